@@ -0,0 +1,68 @@
+"""add message_outbox table and messages.delivery_status
+
+Revision ID: m3n4o5p6q7r8
+Revises: aafd62b6dfa5
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "m3n4o5p6q7r8"
+down_revision: Union[str, Sequence[str], None] = "aafd62b6dfa5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "messages",
+        sa.Column("delivery_status", sa.String(length=20), nullable=True),
+    )
+
+    op.create_table(
+        "message_outbox",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("message_id", sa.Integer(), nullable=False),
+        sa.Column("line_user_id", sa.String(length=50), nullable=False),
+        sa.Column("line_messages", postgresql.JSONB(), nullable=False),
+        sa.Column("retry_key", sa.String(length=36), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False, server_default="PENDING"),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("next_attempt_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("sent_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["message_id"], ["messages.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("retry_key"),
+    )
+    op.create_index(op.f("ix_message_outbox_id"), "message_outbox", ["id"], unique=False)
+    op.create_index(op.f("ix_message_outbox_message_id"), "message_outbox", ["message_id"], unique=False)
+    op.create_index(op.f("ix_message_outbox_line_user_id"), "message_outbox", ["line_user_id"], unique=False)
+    op.create_index(op.f("ix_message_outbox_status"), "message_outbox", ["status"], unique=False)
+    op.create_index(op.f("ix_message_outbox_next_attempt_at"), "message_outbox", ["next_attempt_at"], unique=False)
+    # Workers only ever scan the pending slice.
+    op.create_index(
+        "ix_message_outbox_pending_due",
+        "message_outbox",
+        ["next_attempt_at", "id"],
+        unique=False,
+        postgresql_where=sa.text("status = 'PENDING'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_message_outbox_pending_due", table_name="message_outbox")
+    op.drop_index(op.f("ix_message_outbox_next_attempt_at"), table_name="message_outbox")
+    op.drop_index(op.f("ix_message_outbox_status"), table_name="message_outbox")
+    op.drop_index(op.f("ix_message_outbox_line_user_id"), table_name="message_outbox")
+    op.drop_index(op.f("ix_message_outbox_message_id"), table_name="message_outbox")
+    op.drop_index(op.f("ix_message_outbox_id"), table_name="message_outbox")
+    op.drop_table("message_outbox")
+    op.drop_column("messages", "delivery_status")
@@ -0,0 +1,60 @@
+"""add broadcast_chunks table
+
+Revision ID: n4o5p6q7r8s9
+Revises: m3n4o5p6q7r8
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "n4o5p6q7r8s9"
+down_revision: Union[str, Sequence[str], None] = "m3n4o5p6q7r8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "broadcast_chunks",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("broadcast_id", sa.Integer(), nullable=False),
+        sa.Column("seq", sa.Integer(), nullable=False),
+        sa.Column("recipients", postgresql.JSONB(), nullable=False),
+        sa.Column("recipient_count", sa.Integer(), nullable=False),
+        sa.Column("retry_key", sa.String(length=36), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False, server_default="PENDING"),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("next_attempt_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("sent_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["broadcast_id"], ["broadcasts.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("broadcast_id", "seq", name="uq_broadcast_chunks_broadcast_seq"),
+        sa.UniqueConstraint("retry_key"),
+    )
+    op.create_index(op.f("ix_broadcast_chunks_id"), "broadcast_chunks", ["id"], unique=False)
+    op.create_index(op.f("ix_broadcast_chunks_broadcast_id"), "broadcast_chunks", ["broadcast_id"], unique=False)
+    op.create_index(op.f("ix_broadcast_chunks_status"), "broadcast_chunks", ["status"], unique=False)
+    # The dispatcher only ever scans the pending slice.
+    op.create_index(
+        "ix_broadcast_chunks_pending_due",
+        "broadcast_chunks",
+        ["next_attempt_at", "id"],
+        unique=False,
+        postgresql_where=sa.text("status = 'PENDING'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_broadcast_chunks_pending_due", table_name="broadcast_chunks")
+    op.drop_index(op.f("ix_broadcast_chunks_status"), table_name="broadcast_chunks")
+    op.drop_index(op.f("ix_broadcast_chunks_broadcast_id"), table_name="broadcast_chunks")
+    op.drop_index(op.f("ix_broadcast_chunks_id"), table_name="broadcast_chunks")
+    op.drop_table("broadcast_chunks")
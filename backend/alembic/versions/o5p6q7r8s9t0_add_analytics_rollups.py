@@ -0,0 +1,67 @@
+"""add hourly analytics rollup tables
+
+Revision ID: o5p6q7r8s9t0
+Revises: n4o5p6q7r8s9
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "o5p6q7r8s9t0"
+down_revision: Union[str, Sequence[str], None] = "n4o5p6q7r8s9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FACT_COLUMNS = (
+    ("sessions_started", sa.Integer()),
+    ("sessions_claimed", sa.Integer()),
+    ("sessions_closed", sa.Integer()),
+    ("sessions_abandoned", sa.Integer()),
+    ("messages_incoming", sa.Integer()),
+    ("messages_outgoing", sa.Integer()),
+    ("messages_user", sa.Integer()),
+    ("messages_bot", sa.Integer()),
+    ("messages_admin", sa.Integer()),
+    ("frt_count", sa.Integer()),
+    ("frt_sum_seconds", sa.Float()),
+    ("queue_wait_count", sa.Integer()),
+    ("queue_wait_sum_seconds", sa.Float()),
+    ("resolution_count", sa.Integer()),
+    ("resolution_sum_seconds", sa.Float()),
+    ("csat_count", sa.Integer()),
+    ("csat_sum", sa.Integer()),
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "analytics_hourly",
+        sa.Column("bucket", sa.DateTime(timezone=True), nullable=False),
+        *(sa.Column(name, type_, nullable=False, server_default="0") for name, type_ in FACT_COLUMNS),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.PrimaryKeyConstraint("bucket"),
+    )
+    op.create_table(
+        "analytics_daily_users",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("line_user_id", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("day", "line_user_id"),
+    )
+    op.create_table(
+        "analytics_rollup_state",
+        sa.Column("name", sa.String(length=50), nullable=False),
+        sa.Column("watermark", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.PrimaryKeyConstraint("name"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("analytics_rollup_state")
+    op.drop_table("analytics_daily_users")
+    op.drop_table("analytics_hourly")
@@ -0,0 +1,48 @@
+"""Index service_requests.updated_at
+
+The report cache checks whether any service request changed since a cached
+result was computed (MAX/range scans on updated_at).
+
+Revision ID: p6q7r8s9t0u1
+Revises: o5p6q7r8s9t0
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "p6q7r8s9t0u1"
+down_revision: Union[str, Sequence[str], None] = "o5p6q7r8s9t0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _index_exists(connection, index_name: str) -> bool:
+    """Check if an index exists in PostgreSQL."""
+    result = connection.execute(
+        sa.text(
+            "SELECT EXISTS (SELECT 1 FROM pg_indexes WHERE indexname = :index_name)"
+        ),
+        {"index_name": index_name},
+    )
+    return bool(result.scalar())
+
+
+def upgrade() -> None:
+    connection = op.get_bind()
+
+    if not _index_exists(connection, "ix_service_requests_updated_at"):
+        op.create_index(
+            "ix_service_requests_updated_at", "service_requests", ["updated_at"], unique=False
+        )
+
+
+def downgrade() -> None:
+    connection = op.get_bind()
+
+    if _index_exists(connection, "ix_service_requests_updated_at"):
+        op.drop_index("ix_service_requests_updated_at", table_name="service_requests")
@@ -0,0 +1,73 @@
+"""Add precomputed outcome fields to chat_sessions
+
+FCR and abandonment KPIs read reopened_within_24h / abandoned instead of a
+correlated EXISTS over every closed session; queue_wait_seconds replaces the
+claimed_at - started_at expression in SLA counts. Existing rows are backfilled.
+
+Revision ID: q7r8s9t0u1v2
+Revises: p6q7r8s9t0u1
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "q7r8s9t0u1v2"
+down_revision: Union[str, Sequence[str], None] = "p6q7r8s9t0u1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("chat_sessions", sa.Column("queue_wait_seconds", sa.Integer(), nullable=True))
+    op.add_column(
+        "chat_sessions",
+        sa.Column("reopened_within_24h", sa.Boolean(), server_default=sa.false(), nullable=False),
+    )
+    op.add_column(
+        "chat_sessions",
+        sa.Column("abandoned", sa.Boolean(), server_default=sa.false(), nullable=False),
+    )
+
+    op.execute(
+        """
+        UPDATE chat_sessions
+        SET queue_wait_seconds = CAST(EXTRACT(EPOCH FROM claimed_at - started_at) AS INTEGER)
+        WHERE claimed_at IS NOT NULL AND started_at IS NOT NULL
+        """
+    )
+    op.execute("UPDATE chat_sessions SET abandoned = true WHERE closed_by = 'SYSTEM_TIMEOUT'")
+    op.execute(
+        """
+        UPDATE chat_sessions AS closed
+        SET reopened_within_24h = true
+        WHERE closed.status = 'CLOSED'
+          AND closed.closed_at IS NOT NULL
+          AND EXISTS (
+              SELECT 1 FROM chat_sessions AS next
+              WHERE next.line_user_id = closed.line_user_id
+                AND next.started_at > closed.closed_at
+                AND next.started_at < closed.closed_at + INTERVAL '24 hours'
+          )
+        """
+    )
+
+    # Abandonment counts only ever look at the abandoned slice.
+    op.create_index(
+        "ix_chat_sessions_abandoned_closed_at",
+        "chat_sessions",
+        ["closed_at"],
+        unique=False,
+        postgresql_where=sa.text("abandoned"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_chat_sessions_abandoned_closed_at", table_name="chat_sessions")
+    op.drop_column("chat_sessions", "abandoned")
+    op.drop_column("chat_sessions", "reopened_within_24h")
+    op.drop_column("chat_sessions", "queue_wait_seconds")
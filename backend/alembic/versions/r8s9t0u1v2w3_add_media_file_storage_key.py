@@ -0,0 +1,44 @@
+"""Add content-addressed storage key to media_files
+
+Blobs move from media_files.data to app.services.media_storage; rows keep
+storage_key (sha256 path) and content_sha256. `data` becomes nullable and is
+emptied by scripts/migrate_media_to_storage.py in resumable batches.
+
+Revision ID: r8s9t0u1v2w3
+Revises: q7r8s9t0u1v2
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "r8s9t0u1v2w3"
+down_revision: Union[str, Sequence[str], None] = "q7r8s9t0u1v2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("media_files", sa.Column("storage_key", sa.String(length=128), nullable=True))
+    op.add_column("media_files", sa.Column("content_sha256", sa.String(length=64), nullable=True))
+    op.create_index(op.f("ix_media_files_storage_key"), "media_files", ["storage_key"], unique=False)
+    op.alter_column("media_files", "data", existing_type=sa.LargeBinary(), nullable=True)
+
+
+def downgrade() -> None:
+    # Rows whose blobs were already moved out have no inline data; refuse
+    # rather than drop library files.
+    moved = op.get_bind().execute(sa.text("SELECT count(*) FROM media_files WHERE data IS NULL")).scalar()
+    if moved:
+        raise RuntimeError(
+            f"{moved} media_files rows keep their content only in media storage; "
+            "copy it back into media_files.data before downgrading"
+        )
+    op.alter_column("media_files", "data", existing_type=sa.LargeBinary(), nullable=False)
+    op.drop_index(op.f("ix_media_files_storage_key"), table_name="media_files")
+    op.drop_column("media_files", "content_sha256")
+    op.drop_column("media_files", "storage_key")
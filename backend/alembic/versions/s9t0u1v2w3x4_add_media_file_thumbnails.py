@@ -0,0 +1,30 @@
+"""Add thumbnails to media_files
+
+Maps thumbnail size (longest edge, px) to its storage key and byte size;
+filled in by app.services.thumbnail_service after upload.
+
+Revision ID: s9t0u1v2w3x4
+Revises: r8s9t0u1v2w3
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "s9t0u1v2w3x4"
+down_revision: Union[str, Sequence[str], None] = "r8s9t0u1v2w3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("media_files", sa.Column("thumbnails", postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("media_files", "thumbnails")
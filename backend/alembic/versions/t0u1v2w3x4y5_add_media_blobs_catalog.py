@@ -0,0 +1,52 @@
+"""Add media_blobs catalog
+
+One row per distinct stored content (sha256) with a reference count across
+admin media, inbound LINE media and operator uploads. Backfilled from the
+media_files rows already moved to blob storage.
+
+Revision ID: t0u1v2w3x4y5
+Revises: s9t0u1v2w3x4
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "t0u1v2w3x4y5"
+down_revision: Union[str, Sequence[str], None] = "s9t0u1v2w3x4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "media_blobs",
+        sa.Column("sha256", sa.String(length=64), nullable=False),
+        sa.Column("storage_key", sa.String(length=128), nullable=False),
+        sa.Column("mime_type", sa.String(), nullable=False),
+        sa.Column("size_bytes", sa.BigInteger(), nullable=False),
+        sa.Column("preview_sha256", sa.String(length=64), nullable=True),
+        sa.Column("ref_count", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("last_referenced_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.PrimaryKeyConstraint("sha256"),
+    )
+    op.create_index(op.f("ix_media_files_content_sha256"), "media_files", ["content_sha256"], unique=False)
+    op.execute(
+        """
+        INSERT INTO media_blobs (sha256, storage_key, mime_type, size_bytes, ref_count, created_at)
+        SELECT content_sha256, min(storage_key), min(mime_type), max(size_bytes), count(*), min(created_at)
+        FROM media_files
+        WHERE content_sha256 IS NOT NULL AND storage_key IS NOT NULL
+        GROUP BY content_sha256
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_media_files_content_sha256"), table_name="media_files")
+    op.drop_table("media_blobs")
@@ -0,0 +1,50 @@
+"""Add media lifecycle fields
+
+media_blobs.recompressed_at marks catalog entries whose stored copy was
+re-encoded. Retention and garbage collection (app.services.
+media_lifecycle_service) scan media messages and unreferenced blobs, so
+both get partial indexes covering just those rows.
+
+Revision ID: u1v2w3x4y5z6
+Revises: t0u1v2w3x4y5
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "u1v2w3x4y5z6"
+down_revision: Union[str, Sequence[str], None] = "t0u1v2w3x4y5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("media_blobs", sa.Column("recompressed_at", sa.DateTime(timezone=True), nullable=True))
+
+    # Retention walks old messages that still reference cataloged media.
+    op.create_index(
+        "ix_messages_media_sha256_created_at",
+        "messages",
+        ["created_at"],
+        unique=False,
+        postgresql_where=sa.text("(payload ->> 'sha256') IS NOT NULL"),
+    )
+    # Garbage collection only looks at unreferenced catalog entries.
+    op.create_index(
+        "ix_media_blobs_unreferenced",
+        "media_blobs",
+        ["last_referenced_at"],
+        unique=False,
+        postgresql_where=sa.text("ref_count = 0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_media_blobs_unreferenced", table_name="media_blobs")
+    op.drop_index("ix_messages_media_sha256_created_at", table_name="messages")
+    op.drop_column("media_blobs", "recompressed_at")
@@ -0,0 +1,35 @@
+"""Add message media sha256 index
+
+The public blob route serves catalog content only while a message
+references it, so each request looks messages up by payload ->> 'sha256'.
+
+Revision ID: v2w3x4y5z6a7
+Revises: u1v2w3x4y5z6
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "v2w3x4y5z6a7"
+down_revision: Union[str, Sequence[str], None] = "u1v2w3x4y5z6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_messages_payload_sha256",
+        "messages",
+        [sa.text("(payload ->> 'sha256')")],
+        unique=False,
+        postgresql_where=sa.text("(payload ->> 'sha256') IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_messages_payload_sha256", table_name="messages")
@@ -6,6 +6,7 @@ from typing import Optional
 from app.api.deps import get_db, get_current_admin
 from app.models.user import User
 from app.services.analytics_service import analytics_service
+from app.services.kpi_snapshot_service import kpi_snapshot_service
 
 router = APIRouter()
 
@@ -29,8 +30,10 @@ async def get_live_kpis(
         - sla_breach_events_24h: Total SLA breach events in last 24 hours
         - sessions_today: Sessions created today
         - human_mode_users: Users in HUMAN mode
+
+    Served from the shared KPI snapshot, refreshed every few seconds.
     """
-    return await analytics_service.get_live_kpis(db)
+    return await kpi_snapshot_service.get_snapshot()
 
 
 @router.get("/operator-performance")
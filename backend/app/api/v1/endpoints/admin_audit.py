@@ -6,6 +6,7 @@ from typing import Optional
 from datetime import datetime, timedelta, timezone
 
 from app.api.deps import get_db, get_current_admin
+from app.db.loaders import user_loader
 from app.models.audit_log import AuditLog
 from app.models.user import User
 
@@ -55,15 +56,13 @@ async def get_audit_logs(
     result = await db.execute(query)
     logs = result.scalars().all()
     
-    # Enrich with admin names
+    # Enrich with admin names (one batched lookup for the page)
+    admins = await user_loader(db).load_many(log.admin_id for log in logs)
     enriched_logs = []
     for log in logs:
         admin_name = None
         if log.admin_id:
-            user_result = await db.execute(
-                select(User).where(User.id == log.admin_id)
-            )
-            user = user_result.scalar_one_or_none()
+            user = admins.get(log.admin_id)
             admin_name = user.display_name if user else f"Admin {log.admin_id}"
         
         enriched_logs.append({
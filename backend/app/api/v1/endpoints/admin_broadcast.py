@@ -10,6 +10,8 @@ from app.api.deps import get_current_admin
 from app.models.broadcast import BroadcastStatus, BroadcastType
 from app.models.user import User
 from app.services.broadcast_service import broadcast_service
+from app.services.segment_service import SegmentError, segment_service
+from app.tasks import broadcast_scheduler, notify_broadcast_dispatcher
 
 router = APIRouter()
 
@@ -65,6 +67,15 @@ class ScheduleRequest(BaseModel):
     scheduled_at: datetime
 
 
+class AudienceEstimateRequest(BaseModel):
+    segment: dict
+
+
+class AudienceEstimateResponse(BaseModel):
+    count: int
+    exact: bool
+
+
 class BroadcastStatsResponse(BaseModel):
     total: int
     draft: int
@@ -86,6 +97,18 @@ async def get_broadcast_stats(
     return stats
 
 
+@router.post("/audience/estimate", response_model=AudienceEstimateResponse)
+async def estimate_audience(
+    payload: AudienceEstimateRequest,
+    db: AsyncSession = Depends(get_db),
+    current_admin: User = Depends(get_current_admin),
+):
+    try:
+        return await segment_service.estimate_audience(db, payload.segment)
+    except SegmentError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.get("", response_model=BroadcastListResponse)
 async def list_broadcasts(
     status: Optional[str] = Query(None),
@@ -109,6 +132,10 @@ async def create_broadcast(
     db: AsyncSession = Depends(get_db),
     current_admin: User = Depends(get_current_admin),
 ):
+    try:
+        broadcast_service.validate_audience(payload.target_audience, payload.target_filter)
+    except SegmentError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     broadcast = await broadcast_service.create_broadcast(
         db,
         title=payload.title,
@@ -147,6 +174,13 @@ async def update_broadcast(
         raise HTTPException(status_code=400, detail="Can only update drafts")
 
     update_data = payload.model_dump(exclude_unset=True)
+    try:
+        broadcast_service.validate_audience(
+            update_data.get("target_audience", broadcast.target_audience),
+            update_data.get("target_filter", broadcast.target_filter),
+        )
+    except SegmentError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     broadcast = await broadcast_service.update_broadcast(db, broadcast, **update_data)
     return BroadcastResponse.model_validate(broadcast)
 
@@ -178,6 +212,8 @@ async def send_broadcast(
         broadcast = await broadcast_service.send_broadcast(db, broadcast)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    if broadcast.status == BroadcastStatus.SENDING:
+        notify_broadcast_dispatcher()
     if broadcast.status == BroadcastStatus.FAILED:
         raise HTTPException(
             status_code=502,
@@ -200,6 +236,7 @@ async def schedule_broadcast(
         broadcast = await broadcast_service.schedule_broadcast(db, broadcast, payload.scheduled_at)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    await broadcast_scheduler.publish_change(broadcast.id, broadcast.scheduled_at)
     return BroadcastResponse.model_validate(broadcast)
 
 
@@ -216,4 +253,5 @@ async def cancel_broadcast(
         broadcast = await broadcast_service.cancel_broadcast(db, broadcast)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    await broadcast_scheduler.publish_change(broadcast.id, None)
     return BroadcastResponse.model_validate(broadcast)
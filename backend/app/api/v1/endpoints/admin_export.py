@@ -1,16 +1,20 @@
-from datetime import datetime, timezone
-import csv
-import io
-from typing import List
-
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import Response, StreamingResponse
-from sqlalchemy import select
+from datetime import datetime
+from typing import Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api import deps
+from app.core.config import settings
 from app.models.message import Message
 from app.models.user import User
+from app.schemas.report_job import ReportJobResponse
+from app.services.csv_export_service import csv_export_service
+from app.services.report_job_service import ReportJobStatus, report_job_service
+from app.services.report_renderers import render_conversation_pdf
 
 router = APIRouter()
 
@@ -20,26 +24,57 @@ def _sanitize_filename(value: str) -> str:
     return safe[:80] or "conversation"
 
 
-def _build_export_filename(display_name: str, messages: List[Message], extension: str) -> str:
-    if messages:
-        first_dt = messages[0].created_at
-        last_dt = messages[-1].created_at
-    else:
-        first_dt = None
-        last_dt = None
-
+def _build_export_filename(
+    display_name: str,
+    first_dt: Optional[datetime],
+    last_dt: Optional[datetime],
+    extension: str,
+) -> str:
     start = first_dt.strftime("%Y%m%d") if first_dt else "unknown"
     end = last_dt.strftime("%Y%m%d") if last_dt else start
     return f"{_sanitize_filename(display_name)}_{start}-{end}.{extension}"
 
 
-async def _get_conversation_messages(line_user_id: str, db: AsyncSession) -> List[Message]:
-    result = await db.execute(
-        select(Message)
+async def _get_conversation_span(
+    line_user_id: str, db: AsyncSession
+) -> Optional[Tuple[Optional[datetime], Optional[datetime]]]:
+    """First and last message time of a conversation, or None if it has no messages."""
+    row = (
+        await db.execute(
+            select(func.count(Message.id), func.min(Message.created_at), func.max(Message.created_at))
+            .where(Message.line_user_id == line_user_id)
+        )
+    ).one()
+    if not row[0]:
+        return None
+    return row[1], row[2]
+
+
+def _conversation_csv_rows(line_user_id: str):
+    return csv_export_service.stream_rows(
+        select(
+            Message.created_at,
+            Message.line_user_id,
+            Message.direction,
+            Message.sender_role,
+            Message.message_type,
+            Message.content,
+        )
         .where(Message.line_user_id == line_user_id)
         .order_by(Message.created_at.asc(), Message.id.asc())
     )
-    return list(result.scalars().all())
+
+
+def _format_conversation_row(message) -> list:
+    sender = message.sender_role.value if hasattr(message.sender_role, "value") else (message.sender_role or "")
+    return [
+        message.created_at.isoformat() if message.created_at else "",
+        message.line_user_id or "",
+        message.direction.value if hasattr(message.direction, "value") else message.direction,
+        sender,
+        message.message_type or "",
+        message.content or "",
+    ]
 
 
 async def _get_display_name(line_user_id: str, db: AsyncSession) -> str:
@@ -53,101 +88,97 @@ async def _get_display_name(line_user_id: str, db: AsyncSession) -> str:
 @router.get("/conversations/{line_user_id}/csv")
 async def export_conversation_csv(
     line_user_id: str,
+    gzip: bool = Query(False, description="Compress the CSV as .csv.gz"),
     db: AsyncSession = Depends(deps.get_db),
     _current_user: User = Depends(deps.get_current_admin),
 ):
-    """Export one conversation as CSV."""
-    messages = await _get_conversation_messages(line_user_id, db)
-    if not messages:
+    """Export one conversation as CSV, streamed from a server-side cursor."""
+    span = await _get_conversation_span(line_user_id, db)
+    if span is None:
         raise HTTPException(status_code=404, detail="Conversation not found or has no messages")
 
     display_name = await _get_display_name(line_user_id, db)
-    filename = _build_export_filename(display_name, messages, "csv")
-
-    buffer = io.StringIO()
-    writer = csv.writer(buffer)
-    writer.writerow(["timestamp", "line_user_id", "direction", "sender", "message_type", "content"])
-    for message in messages:
-        sender = (
-            message.sender_role.value if hasattr(message.sender_role, "value") else (message.sender_role or "")
-        )
-        writer.writerow(
-            [
-                message.created_at.isoformat() if message.created_at else "",
-                message.line_user_id or "",
-                message.direction.value if hasattr(message.direction, "value") else message.direction,
-                sender,
-                message.message_type or "",
-                message.content or "",
-            ]
-        )
+    filename = _build_export_filename(display_name, *span, "csv.gz" if gzip else "csv")
 
-    data = buffer.getvalue().encode("utf-8-sig")
     return StreamingResponse(
-        io.BytesIO(data),
-        media_type="text/csv; charset=utf-8",
+        csv_export_service.iter_csv(
+            ["timestamp", "line_user_id", "direction", "sender", "message_type", "content"],
+            _conversation_csv_rows(line_user_id),
+            _format_conversation_row,
+            gzip=gzip,
+            bom=True,
+        ),
+        media_type=csv_export_service.media_type(gzip),
         headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
 
 
+async def _load_conversation_pdf(line_user_id: str, display_name: str) -> dict:
+    """Collect a conversation as plain strings for the PDF renderer (runs inside the report job)."""
+    messages = []
+    async for message in _conversation_csv_rows(line_user_id):
+        messages.append({
+            "timestamp": message.created_at.isoformat() if message.created_at else "-",
+            "direction": message.direction.value if hasattr(message.direction, "value") else str(message.direction),
+            "sender_role": (
+                message.sender_role.value if hasattr(message.sender_role, "value") else (message.sender_role or "")
+            ),
+            "message_type": message.message_type or "",
+            "content": message.content or "",
+        })
+    return {"display_name": display_name, "line_user_id": line_user_id, "messages": messages}
+
+
+async def _submit_conversation_pdf(line_user_id: str, db: AsyncSession, current_user: User) -> dict:
+    span = await _get_conversation_span(line_user_id, db)
+    if span is None:
+        raise HTTPException(status_code=404, detail="Conversation not found or has no messages")
+
+    display_name = await _get_display_name(line_user_id, db)
+    return await report_job_service.submit(
+        "conversation-pdf",
+        # The last message time makes a new message produce a new render.
+        {"line_user_id": line_user_id, "last_message_at": span[1].isoformat() if span[1] else None},
+        loader=lambda: _load_conversation_pdf(line_user_id, display_name),
+        renderer=render_conversation_pdf,
+        filename=_build_export_filename(display_name, *span, "pdf"),
+        requested_by=current_user.id,
+    )
+
+
 @router.get("/conversations/{line_user_id}/pdf")
 async def export_conversation_pdf(
     line_user_id: str,
     db: AsyncSession = Depends(deps.get_db),
     _current_user: User = Depends(deps.get_current_admin),
 ):
-    """Export one conversation as PDF."""
-    try:
-        from reportlab.lib.pagesizes import A4
-        from reportlab.pdfgen import canvas
-    except Exception as exc:
-        raise HTTPException(status_code=500, detail="PDF export dependency not installed") from exc
-
-    messages = await _get_conversation_messages(line_user_id, db)
-    if not messages:
-        raise HTTPException(status_code=404, detail="Conversation not found or has no messages")
-
-    display_name = await _get_display_name(line_user_id, db)
-    filename = _build_export_filename(display_name, messages, "pdf")
-
-    buffer = io.BytesIO()
-    pdf = canvas.Canvas(buffer, pagesize=A4)
-    width, height = A4
-    left = 36
-    top = height - 36
-    line_height = 14
-
-    pdf.setFont("Helvetica-Bold", 12)
-    pdf.drawString(left, top, f"Conversation Export: {display_name}")
-    pdf.setFont("Helvetica", 9)
-    pdf.drawString(left, top - line_height, f"LINE User ID: {line_user_id}")
-    pdf.drawString(left, top - (line_height * 2), f"Generated UTC: {datetime.now(timezone.utc).isoformat()}")
-
-    y = top - (line_height * 4)
-    for message in messages:
-        if y < 48:
-            pdf.showPage()
-            pdf.setFont("Helvetica", 9)
-            y = height - 48
-
-        timestamp = message.created_at.isoformat() if message.created_at else "-"
-        direction = message.direction.value if hasattr(message.direction, "value") else str(message.direction)
-        sender_role = (
-            message.sender_role.value if hasattr(message.sender_role, "value") else (message.sender_role or "")
-        )
-        message_type = message.message_type or ""
-        content = (message.content or "").replace("\n", " ").strip()
-        if len(content) > 180:
-            content = f"{content[:177]}..."
-
-        line = f"[{timestamp}] {direction}/{sender_role} ({message_type}) {content}"
-        pdf.drawString(left, y, line)
-        y -= line_height
-
-    pdf.save()
+    """
+    Export one conversation as PDF.
+
+    Rendered by a report job in a worker process; if it takes longer than
+    REPORT_JOB_WAIT_SECONDS the job is returned with 202 for polling at
+    /admin/reports/jobs/{id}.
+    """
+    job = await _submit_conversation_pdf(line_user_id, db, _current_user)
+    job, content = await report_job_service.wait_for_result(job, settings.REPORT_JOB_WAIT_SECONDS)
+    if job["status"] == ReportJobStatus.FAILED.value:
+        raise HTTPException(status_code=500, detail=f"PDF export failed: {job['error']}")
+    if content is None:
+        return JSONResponse(status_code=202, content=jsonable_encoder(ReportJobResponse(**job)))
     return Response(
-        content=buffer.getvalue(),
+        content=content,
         media_type="application/pdf",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        headers={"Content-Disposition": f'attachment; filename="{job["filename"]}"'},
     )
 
+
+@router.post(
+    "/conversations/{line_user_id}/pdf/jobs", response_model=ReportJobResponse, status_code=202
+)
+async def submit_conversation_pdf_job(
+    line_user_id: str,
+    db: AsyncSession = Depends(deps.get_db),
+    _current_user: User = Depends(deps.get_current_admin),
+):
+    """Queue a conversation PDF; poll /admin/reports/jobs/{id} or wait for report_job_done."""
+    return await _submit_conversation_pdf(line_user_id, db, _current_user)
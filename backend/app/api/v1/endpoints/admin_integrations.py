@@ -9,11 +9,11 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Any, Dict, List, Optional
 from pydantic import BaseModel, Field
-import httpx
 import logging
 
 from app.api import deps
 from app.api.deps import get_current_admin
+from app.core.http_client import POOL_INTEGRATIONS, POOL_TELEGRAM, outbound_http
 from app.db.session import get_db
 from app.models.user import User
 from app.models.credential import Credential, Provider
@@ -23,6 +23,8 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+TEST_TIMEOUT_SECONDS = 10  # Connection tests give up sooner than the pool default
+
 
 # ── Pydantic Schemas ────────────────────────────────────────────────
 
@@ -182,34 +184,35 @@ async def test_telegram(
         bot_token = decrypted.get("bot_token", "")
         chat_id = decrypted.get("chat_id", "")
 
-        async with httpx.AsyncClient(timeout=10) as client:
-            # Verify bot
-            me_resp = await client.get(f"https://api.telegram.org/bot{bot_token}/getMe")
-            if me_resp.status_code != 200:
-                return TestResult(success=False, message=f"Invalid bot token: {me_resp.text}")
-
-            bot_info = me_resp.json().get("result", {})
-
-            # Send test message
-            send_resp = await client.post(
-                f"https://api.telegram.org/bot{bot_token}/sendMessage",
-                json={
-                    "chat_id": chat_id,
-                    "text": "SKN Admin: Test connection successful!",
-                },
-            )
-            if send_resp.status_code != 200:
-                return TestResult(
-                    success=False,
-                    message=f"Bot verified but failed to send message to chat {chat_id}: {send_resp.text}",
-                    data={"bot": bot_info},
-                )
-
+        client = outbound_http.client(POOL_TELEGRAM)
+        # Verify bot
+        me_resp = await client.get(f"https://api.telegram.org/bot{bot_token}/getMe", timeout=TEST_TIMEOUT_SECONDS)
+        if me_resp.status_code != 200:
+            return TestResult(success=False, message=f"Invalid bot token: {me_resp.text}")
+
+        bot_info = me_resp.json().get("result", {})
+
+        # Send test message
+        send_resp = await client.post(
+            f"https://api.telegram.org/bot{bot_token}/sendMessage",
+            json={
+                "chat_id": chat_id,
+                "text": "SKN Admin: Test connection successful!",
+            },
+            timeout=TEST_TIMEOUT_SECONDS,
+        )
+        if send_resp.status_code != 200:
             return TestResult(
-                success=True,
-                message="Connected and test message sent!",
+                success=False,
+                message=f"Bot verified but failed to send message to chat {chat_id}: {send_resp.text}",
                 data={"bot": bot_info},
             )
+
+        return TestResult(
+            success=True,
+            message="Connected and test message sent!",
+            data={"bot": bot_info},
+        )
     except Exception as exc:
         logger.error("Integration test failed for Telegram: %s", exc, exc_info=True)
         return TestResult(success=False, message=str(exc))
@@ -283,22 +286,23 @@ async def test_n8n(
         if api_key:
             headers["Authorization"] = f"Bearer {api_key}"
 
-        async with httpx.AsyncClient(timeout=10) as client:
-            resp = await client.post(
-                webhook_url,
-                json={"source": "skn-admin", "event": "test", "message": "Connection test"},
-                headers=headers,
-            )
-            if resp.status_code < 400:
-                return TestResult(
-                    success=True,
-                    message=f"Webhook responded with status {resp.status_code}",
-                    data={"status_code": resp.status_code},
-                )
+        client = outbound_http.client(POOL_INTEGRATIONS)
+        resp = await client.post(
+            webhook_url,
+            json={"source": "skn-admin", "event": "test", "message": "Connection test"},
+            headers=headers,
+            timeout=TEST_TIMEOUT_SECONDS,
+        )
+        if resp.status_code < 400:
             return TestResult(
-                success=False,
-                message=f"Webhook returned {resp.status_code}: {resp.text[:200]}",
+                success=True,
+                message=f"Webhook responded with status {resp.status_code}",
+                data={"status_code": resp.status_code},
             )
+        return TestResult(
+            success=False,
+            message=f"Webhook returned {resp.status_code}: {resp.text[:200]}",
+        )
     except Exception as exc:
         logger.error("Integration test failed for n8n: %s", exc, exc_info=True)
         return TestResult(success=False, message=str(exc))
@@ -457,26 +461,27 @@ async def test_integration(
         if api_key:
             headers["Authorization"] = f"Bearer {api_key}"
 
-        async with httpx.AsyncClient(timeout=10) as client:
-            if integration_type == "webhook":
-                resp = await client.post(
-                    url,
-                    json={"source": "skn-admin", "event": "test"},
-                    headers=headers,
-                )
-            else:
-                resp = await client.get(url, headers=headers)
-
-            if resp.status_code < 400:
-                return TestResult(
-                    success=True,
-                    message=f"Connection successful (HTTP {resp.status_code})",
-                    data={"status_code": resp.status_code},
-                )
+        client = outbound_http.client(POOL_INTEGRATIONS)
+        if integration_type == "webhook":
+            resp = await client.post(
+                url,
+                json={"source": "skn-admin", "event": "test"},
+                headers=headers,
+                timeout=TEST_TIMEOUT_SECONDS,
+            )
+        else:
+            resp = await client.get(url, headers=headers, timeout=TEST_TIMEOUT_SECONDS)
+
+        if resp.status_code < 400:
             return TestResult(
-                success=False,
-                message=f"HTTP {resp.status_code}: {resp.text[:200]}",
+                success=True,
+                message=f"Connection successful (HTTP {resp.status_code})",
+                data={"status_code": resp.status_code},
             )
+        return TestResult(
+            success=False,
+            message=f"HTTP {resp.status_code}: {resp.text[:200]}",
+        )
     except Exception as exc:
         logger.error("Integration test failed for custom integration %d: %s", integration_id, exc, exc_info=True)
         return TestResult(success=False, message=str(exc))
@@ -20,11 +20,15 @@ from app.schemas.ws_events import TransferSessionPayload
 from app.services.analytics_service import analytics_service
 from app.services.friend_service import friend_service
 from app.services.line_service import line_service
+from app.services.upload_ingest import ingest_upload
+from app.tasks import notify_outbox
 from datetime import datetime, timezone
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+MAX_MEDIA_BYTES = 10 * 1024 * 1024  # LINE's limit for image messages
+
 
 def _utcnow() -> datetime:
     return datetime.now(timezone.utc)
@@ -34,21 +38,6 @@ def _utcnow_isoformat() -> str:
     return _utcnow().isoformat()
 
 
-def _message_payload_from_record(message, line_user_id: str, temp_id: Optional[str] = None) -> dict[str, Any]:
-    return {
-        "id": message.id,
-        "line_user_id": line_user_id,
-        "direction": message.direction.value if hasattr(message.direction, "value") else message.direction,
-        "content": message.content,
-        "message_type": message.message_type,
-        "payload": message.payload,
-        "sender_role": message.sender_role.value if hasattr(message.sender_role, "value") else message.sender_role,
-        "operator_name": message.operator_name,
-        "created_at": message.created_at.isoformat(),
-        "temp_id": temp_id,
-    }
-
-
 async def _broadcast_conversation_update(
     line_user_id: str,
     db: AsyncSession,
@@ -161,13 +150,12 @@ async def send_message(
         line_user_id, request.text, current_user.id, db
     )
     await db.commit()
-    recent_messages = await live_chat_service.get_recent_messages(line_user_id, 1, db)
-    if recent_messages:
-        await _broadcast_conversation_update(
-            line_user_id=line_user_id,
-            db=db,
-            message_payload=_message_payload_from_record(recent_messages[0], line_user_id),
-        )
+    notify_outbox()
+    await _broadcast_conversation_update(
+        line_user_id=line_user_id,
+        db=db,
+        message_payload=result["message"],
+    )
     return result
 
 @router.post("/conversations/{line_user_id}/media")
@@ -178,16 +166,17 @@ async def send_media(
     current_user: User = Depends(deps.get_current_staff),
 ) -> Any:
     """Upload and send media message to user via LINE."""
-    content = await file.read()
-    result = await live_chat_service.send_media_message(
-        line_user_id=line_user_id,
-        operator_id=current_user.id,
-        file_bytes=content,
-        file_name=file.filename or "attachment",
-        content_type=file.content_type,
-        db=db,
-    )
+    async with ingest_upload(file, MAX_MEDIA_BYTES) as upload:
+        result = await live_chat_service.send_media_message(
+            line_user_id=line_user_id,
+            operator_id=current_user.id,
+            content=upload,
+            file_name=file.filename or "attachment",
+            content_type=upload.mime_type,
+            db=db,
+        )
     await db.commit()
+    notify_outbox()
     sent_message = result.get("message", {})
     created_at = sent_message.get("created_at") or _utcnow_isoformat()
 
@@ -477,8 +466,10 @@ async def create_conversation(
         started_at=now,
         claimed_at=now,
         last_activity_at=now,
+        queue_wait_seconds=0,
     )
     db.add(session)
+    await live_chat_service.mark_reopened_sessions(data.line_user_id, now, db)
     await db.flush()
 
     # 5. If initial_message is provided, create Message and send via LINE
@@ -1,22 +1,29 @@
 """Comprehensive reporting endpoints for admin dashboard."""
 
-import csv
-import io
+import asyncio
 from datetime import date, datetime, timedelta, timezone
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import StreamingResponse
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from sqlalchemy import case, cast, func, select, text, Date, Integer
+from sqlalchemy import case, cast, func, select, text, tuple_, Date, Integer
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_current_admin, get_db
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
 from app.models.chat_session import ChatSession, SessionStatus
 from app.models.friend_event import FriendEvent, FriendEventType
 from app.models.message import Message, MessageDirection
 from app.models.service_request import RequestStatus, ServiceRequest
 from app.models.user import User, UserRole
+from app.schemas.report_job import ReportJobResponse
+from app.services.csv_export_service import csv_export_service
+from app.services.report_cache_service import report_cache_service
+from app.services.report_job_service import ReportJobStatus, report_job_service
+from app.services.report_renderers import render_report_pdf
 
 router = APIRouter()
 
@@ -106,6 +113,15 @@ def _parse_dates(
     return start, end
 
 
+async def _execute_concurrently(*queries) -> list[list]:
+    """Run independent selects on separate pooled connections at the same time."""
+    async def _execute(query):
+        async with AsyncSessionLocal() as session:
+            return (await session.execute(query)).all()
+
+    return await asyncio.gather(*(_execute(query) for query in queries))
+
+
 # ---------------------------------------------------------------------------
 # GET /overview
 # ---------------------------------------------------------------------------
@@ -115,114 +131,103 @@ async def report_overview(
     db: AsyncSession = Depends(get_db),
     current_admin: User = Depends(get_current_admin),
 ):
+    # Covers today and has no range: cached briefly as a live report.
+    return await report_cache_service.get_or_compute(db, "overview", OverviewResponse, _overview_report)
+
+
+async def _overview_report() -> OverviewResponse:
     today = date.today()
     yesterday = today - timedelta(days=1)
     week_ago = today - timedelta(days=7)
     two_weeks_ago = today - timedelta(days=14)
 
-    # --- requests by status ---
-    status_q = select(
-        ServiceRequest.status, func.count(ServiceRequest.id)
-    ).group_by(ServiceRequest.status)
-    status_rows = (await db.execute(status_q)).all()
-    by_status: dict[str, int] = {}
-    total_requests = 0
-    for s, c in status_rows:
-        key = s.value if s else "PENDING"
-        by_status[key] = c
-        total_requests += c
-
-    # --- requests trend (this week vs last week) ---
-    cur_req = (await db.execute(
-        select(func.count(ServiceRequest.id)).where(
-            cast(ServiceRequest.created_at, Date) >= week_ago
-        )
-    )).scalar() or 0
-    prev_req = (await db.execute(
-        select(func.count(ServiceRequest.id)).where(
-            cast(ServiceRequest.created_at, Date) >= two_weeks_ago,
-            cast(ServiceRequest.created_at, Date) < week_ago,
+    # --- requests: status breakdown, weekly trend and last-7-days series in one scan ---
+    request_day = cast(ServiceRequest.created_at, Date)
+    requests = select(
+        ServiceRequest.id.label("id"),
+        ServiceRequest.status.label("status"),
+        request_day.label("day"),
+        case((request_day >= week_ago, request_day)).label("recent_day"),
+    ).subquery()
+    requests_q = select(
+        func.grouping(requests.c.status).label("by_day"),
+        requests.c.status,
+        requests.c.recent_day,
+        func.count(requests.c.id).label("total"),
+        func.count(requests.c.id).filter(requests.c.day >= week_ago).label("current"),
+        func.count(requests.c.id).filter(
+            requests.c.day >= two_weeks_ago,
+            requests.c.day < week_ago,
+        ).label("previous"),
+    ).group_by(func.grouping_sets(tuple_(requests.c.status), tuple_(requests.c.recent_day)))
+
+    # --- messages: today / yesterday and last-7-days series ---
+    message_day = cast(Message.created_at, Date)
+    messages_q = (
+        select(
+            message_day.label("day"),
+            func.count(Message.id).label("total"),
+            func.count(Message.id).filter(Message.direction == MessageDirection.INCOMING).label("incoming"),
+            func.count(Message.id).filter(Message.direction == MessageDirection.OUTGOING).label("outgoing"),
         )
-    )).scalar() or 0
-
-    # --- messages today ---
-    msg_today_q = select(
-        func.count(Message.id),
-        func.count(Message.id).filter(Message.direction == MessageDirection.INCOMING),
-        func.count(Message.id).filter(Message.direction == MessageDirection.OUTGOING),
-    ).where(cast(Message.created_at, Date) == today)
-    msg_row = (await db.execute(msg_today_q)).one()
-    total_msg_today, inc_today, out_today = msg_row
-
-    msg_yesterday = (await db.execute(
-        select(func.count(Message.id)).where(cast(Message.created_at, Date) == yesterday)
-    )).scalar() or 0
+        .where(message_day >= week_ago)
+        .group_by(text("day"))
+    )
 
     # --- followers ---
-    total_followers = (await db.execute(
-        select(func.count(User.id)).where(
-            User.line_user_id.isnot(None),
-            User.friend_status == "ACTIVE",
-        )
-    )).scalar() or 0
-
-    new_followers_week = (await db.execute(
-        select(func.count(FriendEvent.id)).where(
-            FriendEvent.event_type == FriendEventType.FOLLOW.value,
-            cast(FriendEvent.created_at, Date) >= week_ago,
-        )
-    )).scalar() or 0
-    new_followers_prev = (await db.execute(
-        select(func.count(FriendEvent.id)).where(
-            FriendEvent.event_type == FriendEventType.FOLLOW.value,
-            cast(FriendEvent.created_at, Date) >= two_weeks_ago,
-            cast(FriendEvent.created_at, Date) < week_ago,
-        )
-    )).scalar() or 0
+    followers_q = _total_followers_query()
+    follow_day = cast(FriendEvent.created_at, Date)
+    follows_q = select(
+        func.count(FriendEvent.id).filter(follow_day >= week_ago),
+        func.count(FriendEvent.id).filter(follow_day < week_ago),
+    ).where(
+        FriendEvent.event_type == FriendEventType.FOLLOW.value,
+        follow_day >= two_weeks_ago,
+    )
 
     # --- active sessions ---
-    active_sessions = (await db.execute(
-        select(func.count(ChatSession.id)).where(ChatSession.status == SessionStatus.ACTIVE.value)
-    )).scalar() or 0
-
-    active_sessions_yesterday = (await db.execute(
-        select(func.count(ChatSession.id)).where(
-            ChatSession.status == SessionStatus.ACTIVE.value,
-            cast(ChatSession.started_at, Date) == yesterday,
-        )
-    )).scalar() or 0
+    sessions_q = select(
+        func.count(ChatSession.id),
+        func.count(ChatSession.id).filter(cast(ChatSession.started_at, Date) == yesterday),
+    ).where(ChatSession.status == SessionStatus.ACTIVE.value)
 
-    # --- daily activity last 7 days ---
-    daily_q = (
-        select(
-            cast(ServiceRequest.created_at, Date).label("day"),
-            func.count(ServiceRequest.id).label("requests"),
-        )
-        .where(cast(ServiceRequest.created_at, Date) >= week_ago)
-        .group_by(text("day"))
-        .order_by(text("day"))
+    request_rows, message_rows, follower_rows, follow_rows, session_rows = await _execute_concurrently(
+        requests_q, messages_q, followers_q, follows_q, sessions_q,
     )
-    daily_rows = (await db.execute(daily_q)).all()
-    # messages per day
-    msg_daily_q = (
-        select(
-            cast(Message.created_at, Date).label("day"),
-            func.count(Message.id).label("messages"),
-        )
-        .where(cast(Message.created_at, Date) >= week_ago)
-        .group_by(text("day"))
-        .order_by(text("day"))
-    )
-    msg_daily_rows = (await db.execute(msg_daily_q)).all()
 
-    msg_by_day = {str(r.day): r.messages for r in msg_daily_rows}
-    daily_activity = []
-    for r in daily_rows:
-        daily_activity.append({
-            "day": str(r.day),
-            "requests": r.requests,
-            "messages": msg_by_day.get(str(r.day), 0),
-        })
+    by_status: dict[str, int] = {}
+    requests_by_day: dict[date, int] = {}
+    total_requests = cur_req = prev_req = 0
+    for r in request_rows:
+        if r.by_day:
+            if r.recent_day is not None:
+                requests_by_day[r.recent_day] = r.total
+            continue
+        key = r.status.value if r.status else "PENDING"
+        by_status[key] = r.total
+        total_requests += r.total
+        cur_req += r.current
+        prev_req += r.previous
+
+    messages_by_day = {r.day: r for r in message_rows}
+    msg_today = messages_by_day.get(today)
+    total_msg_today, inc_today, out_today = (
+        (msg_today.total, msg_today.incoming, msg_today.outgoing) if msg_today else (0, 0, 0)
+    )
+    msg_yesterday = messages_by_day[yesterday].total if yesterday in messages_by_day else 0
+
+    total_followers = follower_rows[0][0] or 0
+    new_followers_week, new_followers_prev = follow_rows[0]
+    active_sessions, active_sessions_yesterday = session_rows[0]
+
+    daily_activity = [
+        {
+            "day": str(day),
+            "requests": count,
+            "messages": messages_by_day[day].total if day in messages_by_day else 0,
+        }
+        for day, count in sorted(requests_by_day.items())
+    ]
 
     def _trend(cur: int, prev: int) -> TrendValue:
         pct = ((cur - prev) / prev * 100) if prev else (100.0 if cur else 0.0)
@@ -258,6 +263,19 @@ async def report_service_requests(
 ):
     start, end = _parse_dates(start_date, end_date)
 
+    return await report_cache_service.get_or_compute(
+        db,
+        "service-requests",
+        ServiceRequestReportResponse,
+        lambda: _service_requests_report(db, start, end, period),
+        tables=("service_requests",),
+        start=start,
+        end=end,
+        params={"period": period},
+    )
+
+
+async def _service_requests_report(db: AsyncSession, start: datetime, end: datetime, period: str) -> ServiceRequestReportResponse:
     base = select(ServiceRequest).where(
         ServiceRequest.created_at >= start,
         ServiceRequest.created_at <= end,
@@ -340,6 +358,19 @@ async def report_messages(
 ):
     start, end = _parse_dates(start_date, end_date)
 
+    return await report_cache_service.get_or_compute(
+        db,
+        "messages",
+        MessagesReportResponse,
+        lambda: _messages_report(db, start, end, period),
+        tables=("messages",),
+        start=start,
+        end=end,
+        params={"period": period},
+    )
+
+
+async def _messages_report(db: AsyncSession, start: datetime, end: datetime, period: str) -> MessagesReportResponse:
     if period == "monthly":
         date_expr = func.to_char(Message.created_at, "YYYY-MM")
     elif period == "weekly":
@@ -400,6 +431,21 @@ async def report_operators(
 ):
     start, end = _parse_dates(start_date, end_date)
 
+    return await report_cache_service.get_or_compute(
+        db,
+        "operators",
+        OperatorsReportResponse,
+        lambda: _operators_report(db, start, end),
+        tables=("chat_sessions", "messages"),
+        start=start,
+        end=end,
+        params=None,
+        # Messages are counted per session started in range, including those sent after `end`.
+        open_ended=("messages",),
+    )
+
+
+async def _operators_report(db: AsyncSession, start: datetime, end: datetime) -> OperatorsReportResponse:
     # sessions per operator
     sessions_q = (
         select(
@@ -487,45 +533,30 @@ async def report_followers(
 ):
     start, end = _parse_dates(start_date, end_date)
 
-    total_followers = (await db.execute(
-        select(func.count(User.id)).where(
-            User.line_user_id.isnot(None),
-            User.friend_status == "ACTIVE",
-        )
-    )).scalar() or 0
-
-    # Events in period
-    base_filter = [
-        FriendEvent.created_at >= start,
-        FriendEvent.created_at <= end,
-    ]
+    report = await report_cache_service.get_or_compute(
+        db,
+        "followers",
+        FollowersReportResponse,
+        lambda: _followers_report(start, end, period),
+        tables=("friend_events",),
+        start=start,
+        end=end,
+        params={"period": period},
+    )
+    # The follower total is today's count, not a figure of the range, so it
+    # is kept out of the cached payload and read on every request.
+    report.total_followers = await db.scalar(_total_followers_query()) or 0
+    return report
 
-    new_count = (await db.execute(
-        select(func.count(FriendEvent.id)).where(
-            FriendEvent.event_type == FriendEventType.FOLLOW.value,
-            *base_filter,
-        )
-    )).scalar() or 0
 
-    lost_count = (await db.execute(
-        select(func.count(FriendEvent.id)).where(
-            FriendEvent.event_type == FriendEventType.UNFOLLOW.value,
-            *base_filter,
-        )
-    )).scalar() or 0
+def _total_followers_query():
+    return select(func.count(User.id)).where(
+        User.line_user_id.isnot(None),
+        User.friend_status == "ACTIVE",
+    )
 
-    refollow_count = (await db.execute(
-        select(func.count(FriendEvent.id)).where(
-            FriendEvent.event_type == FriendEventType.REFOLLOW.value,
-            *base_filter,
-        )
-    )).scalar() or 0
 
-    net = new_count + refollow_count - lost_count
-    total_follows = new_count + refollow_count
-    refollow_rate = (refollow_count / total_follows * 100) if total_follows else 0.0
-
-    # Over time
+async def _followers_report(start: datetime, end: datetime, period: str) -> FollowersReportResponse:
     if period == "monthly":
         date_expr = func.to_char(FriendEvent.created_at, "YYYY-MM")
     elif period == "weekly":
@@ -533,25 +564,35 @@ async def report_followers(
     else:
         date_expr = func.to_char(FriendEvent.created_at, "YYYY-MM-DD")
 
+    # Period totals are the sums of the per-period counts, so one scan serves both.
     time_q = (
         select(
             date_expr.label("period"),
-            func.count(FriendEvent.id).filter(
-                FriendEvent.event_type.in_([FriendEventType.FOLLOW.value, FriendEventType.REFOLLOW.value])
-            ).label("gained"),
-            func.count(FriendEvent.id).filter(
-                FriendEvent.event_type == FriendEventType.UNFOLLOW.value
-            ).label("lost"),
+            func.count(FriendEvent.id).filter(FriendEvent.event_type == FriendEventType.FOLLOW.value).label("new"),
+            func.count(FriendEvent.id).filter(FriendEvent.event_type == FriendEventType.REFOLLOW.value).label("refollow"),
+            func.count(FriendEvent.id).filter(FriendEvent.event_type == FriendEventType.UNFOLLOW.value).label("lost"),
+        )
+        .where(
+            FriendEvent.created_at >= start,
+            FriendEvent.created_at <= end,
         )
-        .where(*base_filter)
         .group_by(text("period"))
         .order_by(text("period"))
     )
-    rows = (await db.execute(time_q)).all()
-    over_time = [{"period": p, "gained": g, "lost": l} for p, g, l in rows]
+    rows = (await _execute_concurrently(time_q))[0]
+
+    new_count = sum(r.new for r in rows)
+    refollow_count = sum(r.refollow for r in rows)
+    lost_count = sum(r.lost for r in rows)
+
+    net = new_count + refollow_count - lost_count
+    total_follows = new_count + refollow_count
+    refollow_rate = (refollow_count / total_follows * 100) if total_follows else 0.0
+
+    over_time = [{"period": r.period, "gained": r.new + r.refollow, "lost": r.lost} for r in rows]
 
     return FollowersReportResponse(
-        total_followers=total_followers,
+        total_followers=0,  # Filled in live by report_followers
         new_this_period=new_count,
         lost_this_period=lost_count,
         refollow_this_period=refollow_count,
@@ -570,22 +611,36 @@ async def export_report(
     type: str = Query(..., pattern="^(service-requests|messages|operators|followers)$"),
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
+    gzip: bool = Query(False, description="Compress the CSV as .csv.gz"),
     db: AsyncSession = Depends(get_db),
     current_admin: User = Depends(get_current_admin),
 ):
+    """Stream a report as CSV; rows are read from a server-side cursor, without a row cap."""
     start, end = _parse_dates(start_date, end_date)
-    buf = io.StringIO()
-    writer = csv.writer(buf)
 
     if type == "service-requests":
-        writer.writerow(["ID", "Status", "Category", "Subcategory", "Requester", "Created", "Completed"])
-        q = select(ServiceRequest).where(
-            ServiceRequest.created_at >= start,
-            ServiceRequest.created_at <= end,
-        ).order_by(ServiceRequest.created_at.desc())
-        rows = (await db.execute(q)).scalars().all()
-        for r in rows:
-            writer.writerow([
+        header = ["ID", "Status", "Category", "Subcategory", "Requester", "Created", "Completed"]
+        rows = csv_export_service.stream_rows(
+            select(
+                ServiceRequest.id,
+                ServiceRequest.status,
+                ServiceRequest.topic_category,
+                ServiceRequest.category,
+                ServiceRequest.topic_subcategory,
+                ServiceRequest.subcategory,
+                ServiceRequest.firstname,
+                ServiceRequest.lastname,
+                ServiceRequest.requester_name,
+                ServiceRequest.created_at,
+                ServiceRequest.completed_at,
+            ).where(
+                ServiceRequest.created_at >= start,
+                ServiceRequest.created_at <= end,
+            ).order_by(ServiceRequest.created_at.desc())
+        )
+
+        def format_row(r):
+            return [
                 r.id,
                 r.status.value if r.status else "PENDING",
                 r.topic_category or r.category or "",
@@ -593,24 +648,33 @@ async def export_report(
                 f"{r.firstname or ''} {r.lastname or ''}".strip() or r.requester_name or "",
                 str(r.created_at) if r.created_at else "",
                 str(r.completed_at) if r.completed_at else "",
-            ])
+            ]
 
     elif type == "messages":
-        writer.writerow(["ID", "LineUserID", "Direction", "Type", "SenderRole", "Created"])
-        q = select(Message).where(
-            Message.created_at >= start,
-            Message.created_at <= end,
-        ).order_by(Message.created_at.desc()).limit(10000)
-        rows = (await db.execute(q)).scalars().all()
-        for r in rows:
-            writer.writerow([
+        header = ["ID", "LineUserID", "Direction", "Type", "SenderRole", "Created"]
+        rows = csv_export_service.stream_rows(
+            select(
+                Message.id,
+                Message.line_user_id,
+                Message.direction,
+                Message.message_type,
+                Message.sender_role,
+                Message.created_at,
+            ).where(
+                Message.created_at >= start,
+                Message.created_at <= end,
+            ).order_by(Message.created_at.desc())
+        )
+
+        def format_row(r):
+            return [
                 r.id,
                 r.line_user_id or "",
                 r.direction.value if r.direction else "",
                 r.message_type or "",
                 r.sender_role.value if r.sender_role else "",
                 str(r.created_at) if r.created_at else "",
-            ])
+            ]
 
     elif type == "operators":
         # report_operators expects str params, convert datetime back to ISO strings
@@ -620,25 +684,35 @@ async def export_report(
             db=db,
             current_admin=current_admin,
         )
-        writer.writerow(["OperatorID", "Name", "SessionsHandled", "AvgResponseSec", "MessagesSent"])
-        for op in report.operators:
-            writer.writerow([op.operator_id, op.operator_name, op.sessions_handled, op.avg_response_seconds, op.messages_sent])
+        header = ["OperatorID", "Name", "SessionsHandled", "AvgResponseSec", "MessagesSent"]
+        rows = report.operators
 
-    elif type == "followers":
-        writer.writerow(["ID", "LineUserID", "EventType", "Created"])
-        q = select(FriendEvent).where(
-            FriendEvent.created_at >= start,
-            FriendEvent.created_at <= end,
-        ).order_by(FriendEvent.created_at.desc())
-        rows = (await db.execute(q)).scalars().all()
-        for r in rows:
-            writer.writerow([r.id, r.line_user_id, r.event_type, str(r.created_at)])
+        def format_row(op):
+            return [op.operator_id, op.operator_name, op.sessions_handled, op.avg_response_seconds, op.messages_sent]
 
-    buf.seek(0)
-    filename = f"report-{type}-{start.strftime('%Y%m%d')}-{end.strftime('%Y%m%d')}.csv"
+    else:
+        header = ["ID", "LineUserID", "EventType", "Created"]
+        rows = csv_export_service.stream_rows(
+            select(
+                FriendEvent.id,
+                FriendEvent.line_user_id,
+                FriendEvent.event_type,
+                FriendEvent.created_at,
+            ).where(
+                FriendEvent.created_at >= start,
+                FriendEvent.created_at <= end,
+            ).order_by(FriendEvent.created_at.desc())
+        )
+
+        def format_row(r):
+            return [r.id, r.line_user_id, r.event_type, str(r.created_at)]
+
+    filename = csv_export_service.filename(
+        f"report-{type}-{start.strftime('%Y%m%d')}-{end.strftime('%Y%m%d')}", gzip=gzip
+    )
     return StreamingResponse(
-        buf,
-        media_type="text/csv",
+        csv_export_service.iter_csv(header, rows, format_row, gzip=gzip),
+        media_type=csv_export_service.media_type(gzip),
         headers={"Content-Disposition": f"attachment; filename={filename}"},
     )
 
@@ -647,78 +721,145 @@ async def export_report(
 # GET /export/pdf
 # ---------------------------------------------------------------------------
 
-@router.get("/export/pdf")
-async def export_report_pdf(
-    report_type: str = Query(
-        ...,
-        pattern="^(overview|service-requests|messages|operators|followers)$",
-        description="Report type: overview, service-requests, messages, operators, followers",
-    ),
-    period: int = Query(30, ge=1, le=90),
-    db: AsyncSession = Depends(get_db),
-    current_admin: User = Depends(get_current_admin),
-):
-    """Export report as PDF with Content-Disposition for direct download."""
-    from app.services.pdf_report_service import PDFReportService
-
+async def _load_pdf_report(report_type: str, period: int) -> dict:
+    """Gather a PDF report's data on a dedicated session (runs inside the report job)."""
     end_dt = datetime.now(timezone.utc)
     start_dt = end_dt - timedelta(days=period)
     start_iso = start_dt.isoformat()
     end_iso = end_dt.isoformat()
 
     # Gather data by calling existing report endpoint functions internally
-    if report_type == "overview":
-        report = await report_overview(db=db, current_admin=current_admin)
-        data = report.model_dump()
-
-    elif report_type == "service-requests":
-        report = await report_service_requests(
-            start_date=start_iso,
-            end_date=end_iso,
-            period="daily",
-            db=db,
-            current_admin=current_admin,
-        )
-        data = report.model_dump()
+    async with AsyncSessionLocal() as db:
+        if report_type == "overview":
+            report = await report_overview(db=db, current_admin=None)
+
+        elif report_type == "service-requests":
+            report = await report_service_requests(
+                start_date=start_iso,
+                end_date=end_iso,
+                period="daily",
+                db=db,
+                current_admin=None,
+            )
 
-    elif report_type == "messages":
-        report = await report_messages(
-            start_date=start_iso,
-            end_date=end_iso,
-            period="daily",
-            db=db,
-            current_admin=current_admin,
-        )
-        data = report.model_dump()
+        elif report_type == "messages":
+            report = await report_messages(
+                start_date=start_iso,
+                end_date=end_iso,
+                period="daily",
+                db=db,
+                current_admin=None,
+            )
 
-    elif report_type == "operators":
-        report = await report_operators(
-            start_date=start_iso,
-            end_date=end_iso,
-            db=db,
-            current_admin=current_admin,
-        )
-        data = report.model_dump()
+        elif report_type == "operators":
+            report = await report_operators(
+                start_date=start_iso,
+                end_date=end_iso,
+                db=db,
+                current_admin=None,
+            )
 
-    elif report_type == "followers":
-        report = await report_followers(
-            start_date=start_iso,
-            end_date=end_iso,
-            period="daily",
-            db=db,
-            current_admin=current_admin,
-        )
-        data = report.model_dump()
+        elif report_type == "followers":
+            report = await report_followers(
+                start_date=start_iso,
+                end_date=end_iso,
+                period="daily",
+                db=db,
+                current_admin=None,
+            )
 
-    else:
-        raise HTTPException(status_code=400, detail=f"Unsupported report type: {report_type}")
+        else:
+            raise ValueError(f"Unsupported report type: {report_type}")
+
+    return {"report_type": report_type, "data": report.model_dump(), "period": period}
 
-    service = PDFReportService()
-    pdf_buffer = service.generate(report_type, data, period)
 
+async def _submit_pdf_report(report_type: str, period: int, current_admin: User) -> dict:
     filename = f"report_{report_type}_{datetime.now(timezone.utc).strftime('%Y%m%d')}.pdf"
-    return StreamingResponse(
-        pdf_buffer,
-        media_type="application/pdf",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    return await report_job_service.submit(
+        "report-pdf",
+        {"report_type": report_type, "period": period},
+        loader=lambda: _load_pdf_report(report_type, period),
+        renderer=render_report_pdf,
+        filename=filename,
+        requested_by=current_admin.id,
+    )
+
+
+_PDF_REPORT_TYPE = Query(
+    ...,
+    pattern="^(overview|service-requests|messages|operators|followers)$",
+    description="Report type: overview, service-requests, messages, operators, followers",
+)
+
+
+@router.get("/export/pdf")
+async def export_report_pdf(
+    report_type: str = _PDF_REPORT_TYPE,
+    period: int = Query(30, ge=1, le=90),
+    current_admin: User = Depends(get_current_admin),
+):
+    """
+    Export report as PDF with Content-Disposition for direct download.
+
+    Rendering runs as a report job in a worker process. If it takes longer than
+    REPORT_JOB_WAIT_SECONDS the job is returned with 202; poll /jobs/{id}.
+    """
+    job = await _submit_pdf_report(report_type, period, current_admin)
+    job, content = await report_job_service.wait_for_result(job, settings.REPORT_JOB_WAIT_SECONDS)
+    if job["status"] == ReportJobStatus.FAILED.value:
+        raise HTTPException(status_code=500, detail=f"Report generation failed: {job['error']}")
+    if content is None:
+        return JSONResponse(status_code=202, content=jsonable_encoder(ReportJobResponse(**job)))
+    return Response(
+        content=content,
+        media_type=job["media_type"],
+        headers={"Content-Disposition": f'attachment; filename="{job["filename"]}"'},
+    )
+
+
+# ---------------------------------------------------------------------------
+# Report jobs
+# ---------------------------------------------------------------------------
+
+@router.post("/export/pdf/jobs", response_model=ReportJobResponse, status_code=202)
+async def submit_report_pdf_job(
+    report_type: str = _PDF_REPORT_TYPE,
+    period: int = Query(30, ge=1, le=90),
+    current_admin: User = Depends(get_current_admin),
+):
+    """Queue a PDF report; a report_job_done WebSocket event is sent when it is ready."""
+    return await _submit_pdf_report(report_type, period, current_admin)
+
+
+@router.get("/jobs/{job_id}", response_model=ReportJobResponse)
+async def get_report_job(
+    job_id: str,
+    current_admin: User = Depends(get_current_admin),
+):
+    """Poll a report job."""
+    job = await report_job_service.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Report job not found or expired")
+    return job
+
+
+@router.get("/jobs/{job_id}/download")
+async def download_report_job(
+    job_id: str,
+    current_admin: User = Depends(get_current_admin),
+):
+    """Download a finished report job's file."""
+    job = await report_job_service.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Report job not found or expired")
+    if job["status"] != ReportJobStatus.COMPLETED.value:
+        raise HTTPException(status_code=409, detail=f"Report job is {job['status']}")
+    content = await report_job_service.get_result(job_id)
+    if content is None:
+        raise HTTPException(status_code=404, detail="Report file expired")
+    return Response(
+        content=content,
+        media_type=job["media_type"],
+        headers={"Content-Disposition": f'attachment; filename="{job["filename"]}"'},
     )
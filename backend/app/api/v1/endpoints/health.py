@@ -6,8 +6,11 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 
 from app.api.deps import get_db
+from app.core.http_client import outbound_http
+from app.core.line_rate_limiter import line_rate_limiter
 from app.core.websocket_health import ws_health_monitor
 from app.core.websocket_manager import ws_manager
+from app.services.line_service import line_service
 from app.core.redis_client import redis_client
 
 router = APIRouter()
@@ -129,4 +132,16 @@ async def detailed_health(db: AsyncSession = Depends(get_db)):
         if checks["status"] == "healthy":
             checks["status"] = "degraded"
     
+    # Outbound HTTP pool usage (waited > 0 means a pool was saturated)
+    checks["services"]["outbound_http"] = outbound_http.stats()
+    # LINE rate-limit waits, timeouts and 429s per endpoint class
+    checks["services"]["line_rate_limit"] = line_rate_limiter.stats()
+    # LINE circuit breakers (state and trips per operation class), bulkheads, retry budget
+    line_resilience = line_service.resilience_stats()
+    checks["services"]["line_resilience"] = line_resilience
+    if checks["status"] == "healthy" and any(
+        circuit["state"] != "closed" for circuit in line_resilience["circuits"].values()
+    ):
+        checks["status"] = "degraded"
+    
     return checks
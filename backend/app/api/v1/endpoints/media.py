@@ -1,8 +1,10 @@
 import uuid
 import math
-from typing import Optional
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Response, Query
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Path, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func as sa_func
@@ -12,6 +14,12 @@ from app.models.media_file import MediaFile, FileCategory, detect_category
 from app.api.deps import get_db, get_current_admin
 from app.core.config import settings
 from app.models.user import User
+from app.schemas.media_job import MediaJobResponse
+from app.services.media_bulk_service import MediaBulkOperation, media_bulk_service
+from app.services.media_catalog import media_catalog
+from app.services.media_delivery import media_delivery
+from app.services.thumbnail_service import THUMBNAIL_MIME_TYPE, THUMBNAIL_SIZES, thumbnail_service
+from app.services.upload_ingest import IngestedUpload, ingest_upload
 
 router = APIRouter()
 
@@ -44,15 +52,39 @@ def _serialise(media: MediaFile) -> dict:
         "public_token": media.public_token,
         "public_url": public_url,
         "thumbnail_url": media.thumbnail_url,
+        "thumbnails": {
+            size: f"{settings.API_V1_STR}/media/{media.id}/thumbnail?size={size}"
+            for size in sorted(media.thumbnails or {}, key=int)
+        },
         "created_at": media.created_at.isoformat() if media.created_at else None,
     }
 
 
+async def _existing_media_file(db: AsyncSession, sha256: str) -> Optional[MediaFile]:
+    """The oldest media row with this content, returned instead of storing a re-upload."""
+    return await db.scalar(
+        select(MediaFile).where(MediaFile.content_sha256 == sha256).order_by(MediaFile.created_at).limit(1)
+    )
+
+
+async def _new_media_file(db: AsyncSession, upload: IngestedUpload) -> MediaFile:
+    """Catalog an ingested upload (storing it if new) and build the (unsaved) MediaFile row for it."""
+    blob, _ = await media_catalog.add_upload(db, upload)
+    return MediaFile(
+        filename=upload.filename or "untitled",
+        mime_type=upload.mime_type,
+        storage_key=blob.storage_key,
+        content_sha256=blob.sha256,
+        size_bytes=blob.size_bytes,
+        category=detect_category(upload.mime_type),
+    )
+
+
 # ===================================================================
 # Public file access (NO auth)
 # ===================================================================
 @router.get("/public/files/{public_token}")
-async def get_public_file(public_token: str):
+async def get_public_file(public_token: str, request: Request):
     """Serve a file publicly via its unique public token (no auth required)."""
     async with AsyncSessionLocal() as db:
         result = await db.execute(
@@ -66,16 +98,34 @@ async def get_public_file(public_token: str):
         if not media:
             raise HTTPException(status_code=404, detail="File not found or not public")
 
-        return Response(
-            content=media.data,
-            media_type=media.mime_type,
-            headers={
-                "Content-Disposition": f'inline; filename="{media.filename}"',
-                "Cache-Control": "public, max-age=86400",
-            },
+        # Public links can be revoked, so these are revalidated daily rather than immutable.
+        return await media_delivery.respond(
+            request, media, db, disposition="inline", cache_control="public, max-age=86400"
         )
 
 
+@router.get("/public/blobs/{sha256}/{filename}")
+async def get_public_blob(
+    request: Request,
+    sha256: str = Path(..., pattern="^[0-9a-f]{64}$"),
+    filename: str = Path(...),
+):
+    """Serve LINE / operator message media by content hash (no auth; the URL is the capability)."""
+    async with AsyncSessionLocal() as db:
+        blob = await media_catalog.get_message_media(db, sha256)
+    if not blob:
+        raise HTTPException(status_code=404, detail="File not found")
+    return media_delivery.respond_blob(
+        request,
+        key=blob.storage_key,
+        sha256=blob.storage_key.rsplit("/", 1)[-1],  # Differs from blob.sha256 once recompressed
+        size=blob.size_bytes,
+        mime_type=blob.mime_type,
+        filename=filename,
+        last_modified=blob.created_at,
+    )
+
+
 # ===================================================================
 # Existing media endpoint (kept for backward compat)
 # ===================================================================
@@ -84,6 +134,7 @@ async def get_public_file(public_token: str):
 @router.get("/media/{media_id}")
 async def get_media(
     media_id: uuid.UUID,
+    request: Request,
     db: AsyncSession = Depends(get_db),
 ):
     result = await db.execute(select(MediaFile).filter(MediaFile.id == media_id))
@@ -92,7 +143,36 @@ async def get_media(
     if not media:
         raise HTTPException(status_code=404, detail="Media not found")
 
-    return Response(content=media.data, media_type=media.mime_type)
+    return await media_delivery.respond(request, media, db)
+
+
+@router.get("/media/{media_id}/thumbnail")
+async def get_media_thumbnail(
+    media_id: uuid.UUID,
+    request: Request,
+    size: int = Query(THUMBNAIL_SIZES[0], ge=1),
+    db: AsyncSession = Depends(get_db),
+):
+    """Smallest stored thumbnail at least `size` pixels on its longest edge (else the largest)."""
+    result = await db.execute(select(MediaFile).filter(MediaFile.id == media_id))
+    media = result.scalar_one_or_none()
+    if not media or not media.thumbnails:
+        raise HTTPException(status_code=404, detail="Thumbnail not found")
+
+    available = sorted(int(s) for s in media.thumbnails)
+    chosen = next((s for s in available if s >= size), available[-1])
+    thumbnail = media.thumbnails[str(chosen)]
+    return media_delivery.respond_blob(
+        request,
+        key=thumbnail["key"],
+        sha256=thumbnail["key"].rsplit("/", 1)[-1],
+        size=thumbnail["size"],
+        mime_type=THUMBNAIL_MIME_TYPE,
+        filename=f"thumb_{chosen}_{media.id}.jpg",
+        last_modified=media.created_at,
+        # Thumbnails can be regenerated under the same URL.
+        cache_control="public, max-age=86400",
+    )
 
 
 # ===================================================================
@@ -179,23 +259,20 @@ async def upload_media(
     db: AsyncSession = Depends(get_db),
     _admin=Depends(get_current_admin),
 ):
-    """Upload a file (admin only). Auto-detects category from MIME type."""
-    content = await file.read()
-    if len(content) > MAX_UPLOAD_BYTES:
-        raise HTTPException(status_code=413, detail="File too large (max 10MB)")
-    mime = file.content_type or "application/octet-stream"
-
-    media = MediaFile(
-        filename=file.filename or "untitled",
-        mime_type=mime,
-        data=content,
-        size_bytes=len(content),
-        category=detect_category(mime),
-    )
+    """
+    Upload a file (admin only). Auto-detects category from the sniffed MIME type.
+    Re-uploading content already in the library returns the existing file.
+    """
+    async with ingest_upload(file, MAX_UPLOAD_BYTES) as upload:
+        existing = await _existing_media_file(db, upload.sha256)
+        if existing:
+            return _serialise(existing)
+        media = await _new_media_file(db, upload)
 
     db.add(media)
     await db.commit()
     await db.refresh(media)
+    thumbnail_service.schedule(media)
 
     return _serialise(media)
 
@@ -217,13 +294,8 @@ async def delete_media(
     _admin=Depends(get_current_admin),
 ):
     """Delete a media file."""
-    result = await db.execute(select(MediaFile).where(MediaFile.id == media_id))
-    media = result.scalar_one_or_none()
-    if not media:
+    if not await media_bulk_service.delete(db, [media_id]):
         raise HTTPException(status_code=404, detail="Media not found")
-
-    await db.delete(media)
-    await db.commit()
     return {"ok": True}
 
 
@@ -267,21 +339,18 @@ async def get_admin_media_detail(
 @router.get("/admin/media/{media_id}/download")
 async def download_media(
     media_id: uuid.UUID,
+    request: Request,
     db: AsyncSession = Depends(get_db),
     _admin=Depends(get_current_admin),
 ):
-    """Download a media file (returns raw bytes)."""
+    """Download a media file (streamed; supports Range and conditional requests)."""
     result = await db.execute(select(MediaFile).where(MediaFile.id == media_id))
     media = result.scalar_one_or_none()
     if not media:
         raise HTTPException(status_code=404, detail="Media not found")
 
-    return Response(
-        content=media.data,
-        media_type=media.mime_type,
-        headers={
-            "Content-Disposition": f'attachment; filename="{media.filename}"',
-        },
+    return await media_delivery.respond(
+        request, media, db, disposition="attachment", cache_control="private, no-cache"
     )
 
 
@@ -336,30 +405,41 @@ async def revoke_public_link(
 # Bulk operations
 # ===================================================================
 
-@router.post("/admin/media/bulk-delete")
-async def bulk_delete_media(
-    body: dict,
-    db: AsyncSession = Depends(get_db),
-    _admin=Depends(get_current_admin),
-):
-    """Delete multiple media files. Body: {"ids": ["uuid", ...]}"""
+def _bulk_ids(body: dict) -> List[uuid.UUID]:
+    """Distinct valid UUIDs from a {"ids": [...]} body (invalid entries are skipped)."""
     ids = body.get("ids", [])
     if not ids:
         raise HTTPException(status_code=400, detail="No IDs provided")
-
-    deleted = 0
+    parsed = []
     for mid in ids:
         try:
-            uid = uuid.UUID(mid)
+            parsed.append(uuid.UUID(str(mid)))
         except ValueError:
             continue
-        result = await db.execute(select(MediaFile).where(MediaFile.id == uid))
-        media = result.scalar_one_or_none()
-        if media:
-            await db.delete(media)
-            deleted += 1
+    return list(dict.fromkeys(parsed))
 
-    await db.commit()
+
+async def _submit_bulk_job(operation: MediaBulkOperation, ids: List[uuid.UUID], admin: User) -> JSONResponse:
+    job = await media_bulk_service.submit(operation, ids, requested_by=admin.id)
+    return JSONResponse(status_code=202, content=jsonable_encoder(MediaJobResponse(**job)))
+
+
+@router.post("/admin/media/bulk-delete")
+async def bulk_delete_media(
+    body: dict,
+    db: AsyncSession = Depends(get_db),
+    _admin: User = Depends(get_current_admin),
+):
+    """
+    Delete multiple media files. Body: {"ids": ["uuid", ...]}
+
+    More than MEDIA_BULK_INLINE_LIMIT ids are deleted by a background job:
+    the response is 202 with the job record; poll /admin/media/jobs/{id}.
+    """
+    ids = _bulk_ids(body)
+    if len(ids) > settings.MEDIA_BULK_INLINE_LIMIT:
+        return await _submit_bulk_job(MediaBulkOperation.DELETE, ids, _admin)
+    deleted = await media_bulk_service.delete(db, ids) if ids else 0
     return {"ok": True, "deleted": deleted}
 
 
@@ -367,29 +447,30 @@ async def bulk_delete_media(
 async def bulk_create_public_links(
     body: dict,
     db: AsyncSession = Depends(get_db),
-    _admin=Depends(get_current_admin),
+    _admin: User = Depends(get_current_admin),
 ):
-    """Create public links for multiple files. Body: {"ids": ["uuid", ...]}"""
-    ids = body.get("ids", [])
-    if not ids:
-        raise HTTPException(status_code=400, detail="No IDs provided")
+    """
+    Create public links for multiple files. Body: {"ids": ["uuid", ...]}
+
+    Large selections run as a background job, as for bulk-delete.
+    """
+    ids = _bulk_ids(body)
+    if len(ids) > settings.MEDIA_BULK_INLINE_LIMIT:
+        return await _submit_bulk_job(MediaBulkOperation.PUBLISH, ids, _admin)
+    updated = await media_bulk_service.publish(db, ids) if ids else 0
+    return {"ok": True, "updated": updated}
 
-    updated = 0
-    for mid in ids:
-        try:
-            uid = uuid.UUID(mid)
-        except ValueError:
-            continue
-        result = await db.execute(select(MediaFile).where(MediaFile.id == uid))
-        media = result.scalar_one_or_none()
-        if media:
-            if not media.public_token:
-                media.public_token = str(uuid.uuid4())
-            media.is_public = True
-            updated += 1
 
-    await db.commit()
-    return {"ok": True, "updated": updated}
+@router.get("/admin/media/jobs/{job_id}", response_model=MediaJobResponse)
+async def get_media_job(
+    job_id: str,
+    _admin=Depends(get_current_admin),
+):
+    """Poll a bulk media job."""
+    job = await media_bulk_service.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Media job not found or expired")
+    return job
 
 
 # Legacy upload — requires auth, 10MB limit
@@ -399,21 +480,15 @@ async def upload_media_legacy(
     db: AsyncSession = Depends(get_db),
     _admin: User = Depends(get_current_admin),
 ):
-    content = await file.read()
-    if len(content) > MAX_UPLOAD_BYTES:
-        raise HTTPException(status_code=413, detail="File too large (max 10MB)")
-    mime = file.content_type or "application/octet-stream"
-
-    media = MediaFile(
-        filename=file.filename or "untitled",
-        mime_type=mime,
-        data=content,
-        size_bytes=len(content),
-        category=detect_category(mime),
-    )
+    async with ingest_upload(file, MAX_UPLOAD_BYTES) as upload:
+        existing = await _existing_media_file(db, upload.sha256)
+        if existing:
+            return {"id": str(existing.id), "filename": existing.filename}
+        media = await _new_media_file(db, upload)
 
     db.add(media)
     await db.commit()
     await db.refresh(media)
+    thumbnail_service.schedule(media)
 
     return {"id": str(media.id), "filename": media.filename}
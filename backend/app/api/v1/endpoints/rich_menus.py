@@ -4,19 +4,20 @@ from typing import List, Optional
 import json
 import logging
 import os
-import shutil
 from app.db.session import get_db
 from app.api.deps import get_current_admin
 from app.models.rich_menu import RichMenu, RichMenuStatus
 from app.models.user import User
 from app.schemas.rich_menu import RichMenuResponse, RichMenuCreate
 from app.services.rich_menu_service import RichMenuService
+from app.services.upload_ingest import ingest_upload
 from sqlalchemy import select
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 UPLOAD_DIR = "uploads/rich_menus"
+MAX_IMAGE_BYTES = 1024 * 1024  # LINE rejects rich menu images over 1 MB
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 @router.get("", response_model=List[RichMenuResponse])
@@ -98,21 +99,21 @@ async def upload_rich_menu_image(
         
     # Save local file
     file_path = os.path.join(UPLOAD_DIR, f"{id}_{file.filename}")
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-    
+    async with ingest_upload(file, MAX_IMAGE_BYTES) as upload:
+        await upload.save_to(file_path)
+        content_type = upload.mime_type
+        # If already has LINE ID, sync image now. Otherwise, wait for explicit sync.
+        img_bytes = await upload.read() if rich_menu.line_rich_menu_id else None
+
     rich_menu.image_path = file_path
-    
-    # If already has LINE ID, sync image now. Otherwise, wait for explicit sync.
+
     if rich_menu.line_rich_menu_id:
-        with open(file_path, "rb") as f:
-            img_bytes = f.read()
         try:
             await RichMenuService.upload_image_to_line(
                 db, 
                 rich_menu.line_rich_menu_id, 
                 img_bytes, 
-                file.content_type
+                content_type
             )
         except Exception as e:
             await db.commit() # Save local path anyway
@@ -3,6 +3,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from app.db.session import get_db
 from app.api.deps import get_current_admin
+from app.core.http_client import POOL_LINE, outbound_http
 from app.models.user import User
 from app.schemas.rich_menu import SystemSettingBase, SystemSettingResponse
 from app.services.settings_service import SettingsService
@@ -18,15 +19,13 @@ class ValidateLineTokenRequest(BaseModel):
 @router.post("/line/validate")
 @router.post("/line/validate/")
 async def validate_line_token(request: ValidateLineTokenRequest, current_admin: User = Depends(get_current_admin)):
-    import httpx
     url = "https://api.line.me/v2/bot/info"
     headers = {"Authorization": f"Bearer {request.channel_access_token}"}
     
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(url, headers=headers)
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Connection failed: {str(e)}")
+    try:
+        response = await outbound_http.client(POOL_LINE).get(url, headers=headers)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Connection failed: {str(e)}")
         
     if response.status_code == 200:
         return {"status": "valid", "data": response.json()}
@@ -412,7 +412,7 @@ async def handle_message_event(event: MessageEvent, db: AsyncSession):
 
 
     else:
-        message_type, content, payload = await _extract_non_text_message(event.message)
+        message_type, content, payload = await _extract_non_text_message(event.message, db)
         if not message_type:
             logger.info("Unsupported non-text message type: %s", getattr(event.message, "type", "unknown"))
             return
@@ -476,12 +476,13 @@ async def handle_message_event(event: MessageEvent, db: AsyncSession):
             })
 
 
-async def _extract_non_text_message(message):
+async def _extract_non_text_message(message, db: AsyncSession):
     message_type = getattr(message, "type", None)
     line_message_id = getattr(message, "id", None)
 
     if message_type == "image":
         media = await line_service.persist_line_media(
+            db,
             message_id=str(line_message_id),
             media_type="image",
         ) if line_message_id else {"url": None, "preview_url": None, "content_type": None, "size": None}
@@ -490,6 +491,7 @@ async def _extract_non_text_message(message):
             "preview_url": media.get("preview_url"),
             "url": media.get("url"),
             "content_type": media.get("content_type"),
+            "sha256": media.get("sha256"),
             "size": media.get("size"),
         }
 
@@ -507,6 +509,7 @@ async def _extract_non_text_message(message):
         file_name = getattr(message, "file_name", None)
         file_size = getattr(message, "file_size", None)
         media = await line_service.persist_line_media(
+            db,
             message_id=str(line_message_id),
             media_type="file",
             file_name=file_name,
@@ -517,10 +520,12 @@ async def _extract_non_text_message(message):
             "size": media.get("size") if media.get("size") is not None else file_size,
             "url": media.get("url"),
             "content_type": media.get("content_type"),
+            "sha256": media.get("sha256"),
         }
 
     if message_type in {"video", "audio"}:
         media = await line_service.persist_line_media(
+            db,
             message_id=str(line_message_id),
             media_type=message_type,
         ) if line_message_id else {"url": None, "preview_url": None, "content_type": None, "size": None}
@@ -528,6 +533,7 @@ async def _extract_non_text_message(message):
             "line_message_id": line_message_id,
             "url": media.get("url"),
             "content_type": media.get("content_type"),
+            "sha256": media.get("sha256"),
             "size": media.get("size"),
         }
 
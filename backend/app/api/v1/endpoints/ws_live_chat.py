@@ -14,6 +14,8 @@ from app.core.rate_limiter import ws_rate_limiter
 from app.core.websocket_health import ws_health_monitor
 from app.services.live_chat_service import live_chat_service
 from app.services.analytics_service import analytics_service
+from app.services.kpi_snapshot_service import kpi_snapshot_service
+from app.tasks import notify_outbox
 from app.schemas.ws_events import (
     WSEventType,
     WSErrorCode,
@@ -145,6 +147,9 @@ async def websocket_endpoint(
       - claim_session: {"type": "claim_session"}
       - close_session: {"type": "close_session"}
       - ping: {"type": "ping"}
+
+    Operator messages are acknowledged with 'message_sent' once stored; a later
+    'message_status' event reports LINE delivery (SENT/FAILED).
     """
     import time
     connection_id = await ws_manager.connect(websocket)
@@ -309,11 +314,7 @@ async def websocket_endpoint(
             # === ANALYTICS SUBSCRIBE ===
             if msg_type == WSEventType.SUBSCRIBE_ANALYTICS.value:
                 await ws_manager.subscribe_analytics(websocket)
-                async with AsyncSessionLocal() as db:
-                    try:
-                        await analytics_service.emit_live_kpis_update(db)
-                    except Exception as e:
-                        logger.warning("KPI broadcast failed (non-fatal): %s", e)
+                await kpi_snapshot_service.send_snapshot(websocket)
                 continue
 
             if msg_type == WSEventType.UNSUBSCRIBE_ANALYTICS.value:
@@ -363,41 +364,29 @@ async def websocket_endpoint(
 
                 async with AsyncSessionLocal() as db:
                     try:
-                        await live_chat_service.send_message(
+                        result = await live_chat_service.send_message(
                             line_user_id, text, admin_id_int, db
                         )
                         await db.commit()
-                        # Get the sent message
-                        messages = await live_chat_service.get_recent_messages(line_user_id, 1, db)
-                        if messages:
-                            msg = messages[0]
-                            msg_data = {
-                                "id": msg.id,
-                                "line_user_id": line_user_id,
-                                "direction": msg.direction.value if hasattr(msg.direction, 'value') else msg.direction,
-                                "content": msg.content,
-                                "message_type": msg.message_type,
-                                "payload": msg.payload,
-                                "sender_role": msg.sender_role.value if hasattr(msg.sender_role, 'value') else msg.sender_role,
-                                "operator_name": msg.operator_name,
-                                "created_at": msg.created_at.isoformat(),
-                                "temp_id": temp_id
-                            }
-                            # Confirm to sender
-                            await ws_manager.send_personal(websocket, {
-                                "type": WSEventType.MESSAGE_SENT.value,
-                                "payload": msg_data,
-                                "timestamp": timestamp
-                            })
-                            # Track message sent with latency
-                            latency_ms = (time.time() - message_start_time) * 1000
-                            ws_health_monitor.record_message_sent(latency_ms)
-                            # Broadcast to room
-                            await ws_manager.broadcast_to_room(current_room, {
-                                "type": WSEventType.NEW_MESSAGE.value,
-                                "payload": msg_data,
-                                "timestamp": timestamp
-                            }, exclude_websocket=websocket)
+                        notify_outbox()
+                        # Delivery to LINE happens in the outbox; the operator gets
+                        # the stored message (delivery_status=PENDING) right away.
+                        msg_data = {**result["message"], "temp_id": temp_id}
+                        # Confirm to sender
+                        await ws_manager.send_personal(websocket, {
+                            "type": WSEventType.MESSAGE_SENT.value,
+                            "payload": msg_data,
+                            "timestamp": timestamp
+                        })
+                        # Track message sent with latency
+                        latency_ms = (time.time() - message_start_time) * 1000
+                        ws_health_monitor.record_message_sent(latency_ms)
+                        # Broadcast to room
+                        await ws_manager.broadcast_to_room(current_room, {
+                            "type": WSEventType.NEW_MESSAGE.value,
+                            "payload": msg_data,
+                            "timestamp": timestamp
+                        }, exclude_websocket=websocket)
                     except HTTPException as e:
                         await ws_manager.send_personal(websocket, {
                             "type": WSEventType.ERROR.value,
@@ -56,6 +56,119 @@ class Settings(BaseSettings):
     SLA_MAX_QUEUE_WAIT_SECONDS: int = 300
     SLA_ALERT_TELEGRAM_ENABLED: bool = False
 
+    # Operator -> LINE delivery outbox
+    OUTBOX_WORKERS: int = 4              # Concurrent deliveries per instance
+    OUTBOX_BATCH_SIZE: int = 50          # Rows claimed per poll
+    OUTBOX_POLL_INTERVAL_SECONDS: int = 2
+    OUTBOX_LEASE_SECONDS: int = 60       # Claimed rows are hidden from other workers this long
+    OUTBOX_MAX_ATTEMPTS: int = 5
+    OUTBOX_RETRY_BASE_SECONDS: int = 2   # Exponential backoff base
+
+    # Outbound HTTP pools (app.core.http_client); each limit is per upstream
+    HTTP_LINE_MAX_CONNECTIONS: int = 50            # LINE Messaging / Data API, SDK and direct calls
+    HTTP_TELEGRAM_MAX_CONNECTIONS: int = 10
+    HTTP_INTEGRATIONS_MAX_CONNECTIONS: int = 20    # n8n and custom webhooks
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20       # Idle connections kept open per pool
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 60.0    # Idle connections are closed after this long
+    HTTP_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    HTTP_READ_TIMEOUT_SECONDS: float = 30.0
+    HTTP_POOL_TIMEOUT_SECONDS: float = 10.0        # Wait for a free connection before failing
+    HTTP_HTTP2_ENABLED: bool = True                # Negotiated when the h2 package is installed
+
+    # LINE API rate limits (cluster-wide token buckets, app.core.line_rate_limiter)
+    LINE_RATE_LIMIT_ENABLED: bool = True
+    LINE_RATE_REPLY_PER_SECOND: float = 1000       # LINE allows 2,000/s per endpoint
+    LINE_RATE_PUSH_PER_SECOND: float = 1000
+    LINE_RATE_MULTICAST_PER_SECOND: float = 100    # LINE allows 200/s
+    LINE_RATE_BROADCAST_PER_SECOND: float = 60 / 3600  # LINE allows 60/hour
+    LINE_RATE_PROFILE_PER_SECOND: float = 1000
+    LINE_RATE_CONTENT_PER_SECOND: float = 1000     # Media downloads (api-data.line.me)
+    LINE_RATE_LOADING_PER_SECOND: float = 50       # Loading animations
+    LINE_RATE_BULK_RESERVE: float = 0.2            # Share of each bucket bulk traffic may not take
+    LINE_RATE_INTERACTIVE_DEADLINE_SECONDS: float = 10  # Replies/pushes queue at most this long
+    LINE_RATE_BULK_DEADLINE_SECONDS: float = 60
+    LINE_RATE_DEFAULT_RETRY_AFTER_SECONDS: float = 1    # Pause after a 429 without Retry-After
+
+    # LINE API resilience (app.core.resilience): breakers per operation class
+    LINE_CIRCUIT_FAILURE_THRESHOLD: int = 5
+    LINE_CIRCUIT_RECOVERY_SECONDS: float = 30       # Open this long, then let one probe through
+    LINE_CIRCUIT_FAILURE_WINDOW_SECONDS: float = 60  # A longer gap between failures restarts the count
+    LINE_CIRCUIT_SHARED: bool = True                # Share breaker state between replicas via Redis
+    LINE_RETRY_MAX_ATTEMPTS: int = 2                # Retries of idempotent calls on 5xx/network errors
+    LINE_RETRY_BASE_DELAY_SECONDS: float = 0.2      # Full-jitter exponential backoff
+    LINE_RETRY_MAX_DELAY_SECONDS: float = 2.0
+    LINE_RETRY_BUDGET_RATIO: float = 0.1            # Retries allowed per first attempt
+    LINE_RETRY_BUDGET_MIN_PER_SECOND: float = 1.0
+    LINE_RETRY_BUDGET_MAX_TOKENS: float = 20
+    LINE_BULKHEAD_MESSAGING: int = 40               # Concurrent reply/push/loading calls
+    LINE_BULKHEAD_CONTENT: int = 10                 # Concurrent media downloads
+    LINE_BULKHEAD_WAIT_SECONDS: float = 5
+
+    # Scheduled broadcast dispatcher
+    BROADCAST_SCHEDULER_RESYNC_SECONDS: int = 60    # Reload SCHEDULED rows from the DB
+    BROADCAST_SCHEDULER_CONCURRENCY: int = 2        # Broadcasts sent in parallel per instance
+    BROADCAST_MISFIRE_GRACE_SECONDS: int = 3600     # How late a send still counts as on time
+    BROADCAST_MISFIRE_POLICY: str = "send"          # "send" late or "skip" (mark FAILED)
+
+    # Targeted broadcast (multicast) dispatcher
+    BROADCAST_CHUNK_CONCURRENCY: int = 8            # Multicast requests in flight per instance
+    BROADCAST_CHUNK_BATCH_SIZE: int = 32            # Chunks claimed per poll
+    BROADCAST_CHUNK_LEASE_SECONDS: int = 120        # Claimed chunks are hidden from other workers this long
+    BROADCAST_CHUNK_MAX_ATTEMPTS: int = 5
+    BROADCAST_CHUNK_RETRY_BASE_SECONDS: int = 5     # Exponential backoff base
+    BROADCAST_DISPATCH_POLL_INTERVAL_SECONDS: int = 5
+
+    # Hourly analytics rollups
+    ANALYTICS_ROLLUP_INTERVAL_SECONDS: int = 300
+    ANALYTICS_ROLLUP_GRACE_SECONDS: int = 120      # An hour is final this long after it ends
+    ANALYTICS_ROLLUP_LOOKBACK_HOURS: int = 1       # Hours before the watermark recomputed each pass
+    ANALYTICS_ROLLUP_INITIAL_DAYS: int = 30        # History rolled up automatically on first run
+
+    # Daily per-operator chat_analytics aggregation
+    CHAT_ANALYTICS_REFRESH_SECONDS: int = 300      # How often today's rows are recomputed
+    CHAT_ANALYTICS_INITIAL_DAYS: int = 30          # Days aggregated automatically on first run
+    CHAT_ANALYTICS_SETTLE_DAYS: int = 1            # Days before today recomputed each run (late first responses)
+
+    # Shared live-KPI snapshot
+    KPI_SNAPSHOT_MIN_INTERVAL_SECONDS: int = 2     # Throttle: at most one recompute per interval
+    KPI_SNAPSHOT_MAX_INTERVAL_SECONDS: int = 30    # Recompute at least this often even if not dirty
+    KPI_SNAPSHOT_TTL_SECONDS: int = 120            # Redis expiry of the cached snapshot
+
+    # Background report jobs (PDF rendering)
+    REPORT_RENDER_CONCURRENCY: int = 2             # Worker processes rendering PDFs
+    REPORT_JOB_RESULT_TTL_SECONDS: int = 900       # Finished jobs (and their files) are kept this long
+    REPORT_JOB_TIMEOUT_SECONDS: int = 600          # Unfinished jobs expire after this long
+    REPORT_JOB_WAIT_SECONDS: int = 30              # Synchronous download endpoints wait this long
+
+    # Admin report result cache
+    REPORT_CACHE_TTL_SECONDS: int = 86400          # Past ranges (revalidated by high-water marks)
+    REPORT_CACHE_LIVE_TTL_SECONDS: int = 60        # Ranges that include today
+
+    # Media blob storage (content-addressed)
+    MEDIA_STORAGE_BACKEND: str = "local"           # "local" directory tree or "s3" (any S3-compatible store)
+    MEDIA_STORAGE_ROOT: str = ""                   # Local root; defaults to backend/uploads/media_store
+    MEDIA_S3_BUCKET: str = ""
+    MEDIA_S3_ENDPOINT_URL: str = ""                # e.g. https://s3.ap-southeast-1.amazonaws.com or a MinIO URL
+    MEDIA_S3_REGION: str = "us-east-1"
+    MEDIA_S3_ACCESS_KEY_ID: str = ""
+    MEDIA_S3_SECRET_ACCESS_KEY: str = ""
+    MEDIA_S3_PREFIX: str = ""                      # Optional key prefix inside the bucket
+    MEDIA_THUMBNAIL_CONCURRENCY: int = 2           # Worker processes rendering thumbnails
+    MEDIA_BULK_INLINE_LIMIT: int = 500             # Bulk media selections larger than this run as a job
+    MEDIA_BULK_BATCH_SIZE: int = 500               # Ids per statement (and transaction) in bulk media jobs
+    MEDIA_BULK_JOB_TTL_SECONDS: int = 3600         # Bulk media job records are kept this long
+
+    # Media lifecycle (retention, legacy upload migration, garbage collection)
+    MEDIA_GC_INTERVAL_SECONDS: int = 3600          # How often the scheduled pass runs
+    MEDIA_GC_DRY_RUN: bool = True                  # Scheduled passes only report; set false to apply
+    MEDIA_GC_BATCH_SIZE: int = 200                 # Items handled per phase per pass
+    MEDIA_GC_GRACE_DAYS: int = 7                   # Unreferenced blobs / orphan files are kept this long
+    MEDIA_RETENTION_LINE_DAYS: int = 0             # Inbound LINE media kept this long (0 = forever)
+    MEDIA_RETENTION_OPERATOR_DAYS: int = 0         # Operator-sent media kept this long (0 = forever)
+    MEDIA_RECOMPRESS_AFTER_DAYS: int = 0           # Re-encode large images older than this (0 = off)
+    MEDIA_RECOMPRESS_MIN_BYTES: int = 512 * 1024   # Only images at least this large
+    MEDIA_RECOMPRESS_MAX_EDGE: int = 2048          # Longest edge of re-encoded images
+
     model_config = SettingsConfigDict(
         env_ignore_empty=True,
         extra="ignore"
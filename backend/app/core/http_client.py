@@ -0,0 +1,217 @@
+"""
+Shared outbound HTTP pools.
+
+Outbound calls go through one long-lived client per upstream, so requests
+reuse kept-alive connections instead of paying a TCP and TLS handshake each
+time:
+
+- ``outbound_http.client(pool)`` is the shared httpx.AsyncClient for
+  POOL_LINE (rich menus, token checks), POOL_TELEGRAM or POOL_INTEGRATIONS
+  (n8n and custom webhooks). HTTP/2 is negotiated when HTTP_HTTP2_ENABLED is
+  on and the optional ``h2`` package is installed.
+- ``outbound_http.line_api_client(configuration)`` is the line-bot-sdk client
+  used by the LINE messaging and blob APIs. The SDK speaks aiohttp; its
+  session gets a connector with the LINE pool's limit and keep-alive, and
+  the same HTTP_* connect/read timeouts as the httpx pools.
+
+Every pool has its own connection limit, which is also the per-host limit
+for the upstream it serves. ``stats()`` reports per-pool counters for the
+health endpoint: requests, in-flight (and peak), requests that had to wait
+for a free connection, and connections opened (handshakes paid).
+"""
+import importlib.util
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional
+
+import aiohttp
+import httpx
+from linebot.v3.messaging import AsyncApiClient, Configuration
+
+from app.core.config import settings
+
+POOL_LINE = "line"
+POOL_TELEGRAM = "telegram"
+POOL_INTEGRATIONS = "integrations"
+
+
+@dataclass
+class PoolStats:
+    max_connections: int
+    requests: int = 0
+    in_flight: int = 0
+    peak_in_flight: int = 0
+    waited: int = 0              # Requests started while every connection was busy
+    connections_opened: int = 0  # New connections, i.e. TCP/TLS handshakes
+
+    def started(self) -> None:
+        self.requests += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def finished(self) -> None:
+        self.in_flight = max(self.in_flight - 1, 0)
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def _max_connections(pool: str) -> int:
+    return {
+        POOL_LINE: settings.HTTP_LINE_MAX_CONNECTIONS,
+        POOL_TELEGRAM: settings.HTTP_TELEGRAM_MAX_CONNECTIONS,
+        POOL_INTEGRATIONS: settings.HTTP_INTEGRATIONS_MAX_CONNECTIONS,
+    }[pool]
+
+
+def http2_available() -> bool:
+    return settings.HTTP_HTTP2_ENABLED and importlib.util.find_spec("h2") is not None
+
+
+class _MeteredTransport(httpx.AsyncHTTPTransport):
+    """httpx transport that feeds a PoolStats."""
+
+    def __init__(self, stats: PoolStats, **kwargs):
+        super().__init__(**kwargs)
+        self._stats = stats
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        stats = self._stats
+        if stats.in_flight >= stats.max_connections:
+            stats.waited += 1
+        upstream = request.extensions.get("trace")
+
+        async def trace(event: str, info: dict) -> None:
+            if event == "connection.connect_tcp.complete":
+                stats.connections_opened += 1
+            if upstream is not None:
+                await upstream(event, info)
+
+        request.extensions["trace"] = trace
+        stats.started()
+        try:
+            return await super().handle_async_request(request)
+        finally:
+            stats.finished()
+
+
+class OutboundHttp:
+    """Owns the outbound connection pools; created lazily, closed on shutdown."""
+
+    def __init__(self):
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._stats: Dict[str, PoolStats] = {}
+        self._line_api: Optional[AsyncApiClient] = None
+        self._unused_sessions: List[aiohttp.ClientSession] = []
+
+    def _pool_stats(self, pool: str) -> PoolStats:
+        if pool not in self._stats:
+            self._stats[pool] = PoolStats(max_connections=_max_connections(pool))
+        return self._stats[pool]
+
+    @staticmethod
+    def timeout() -> httpx.Timeout:
+        return httpx.Timeout(
+            settings.HTTP_READ_TIMEOUT_SECONDS,
+            connect=settings.HTTP_CONNECT_TIMEOUT_SECONDS,
+            pool=settings.HTTP_POOL_TIMEOUT_SECONDS,
+        )
+
+    def client(self, pool: str) -> httpx.AsyncClient:
+        """The shared client for `pool`; do not close it (use per-request `timeout=` to override)."""
+        client = self._clients.get(pool)
+        if client is None or client.is_closed:
+            max_connections = _max_connections(pool)
+            limits = httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=min(settings.HTTP_MAX_KEEPALIVE_CONNECTIONS, max_connections),
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS,
+            )
+            http2 = http2_available()
+            transport = _MeteredTransport(self._pool_stats(pool), limits=limits, http2=http2)
+            client = httpx.AsyncClient(transport=transport, timeout=self.timeout())
+            self._clients[pool] = client
+        return client
+
+    @staticmethod
+    def line_timeout() -> aiohttp.ClientTimeout:
+        """The HTTP_* timeouts for aiohttp; `connect` includes the wait for a free connection."""
+        return aiohttp.ClientTimeout(
+            connect=settings.HTTP_POOL_TIMEOUT_SECONDS + settings.HTTP_CONNECT_TIMEOUT_SECONDS,
+            sock_connect=settings.HTTP_CONNECT_TIMEOUT_SECONDS,
+            sock_read=settings.HTTP_READ_TIMEOUT_SECONDS,
+        )
+
+    def line_api_client(self, configuration: Configuration) -> AsyncApiClient:
+        """The shared line-bot-sdk client, on a tuned and metered aiohttp connector."""
+        if self._line_api is None:
+            api_client = AsyncApiClient(configuration)
+            # The SDK opens its own session with default limits; it is never
+            # used and is closed with the pools.
+            rest_client = api_client.rest_client
+            self._unused_sessions.append(rest_client.pool_manager)
+            timeout = self.line_timeout()
+            # The SDK passes a 300s total timeout on every request unless the
+            # caller sets _request_timeout, which would override the session's.
+            sdk_request = rest_client.request
+
+            async def request(*args, _request_timeout=None, **kwargs):
+                return await sdk_request(*args, _request_timeout=_request_timeout or timeout, **kwargs)
+
+            rest_client.request = request
+            rest_client.pool_manager = aiohttp.ClientSession(
+                timeout=timeout,
+                connector=aiohttp.TCPConnector(
+                    limit=settings.HTTP_LINE_MAX_CONNECTIONS,
+                    limit_per_host=settings.HTTP_LINE_MAX_CONNECTIONS,
+                    keepalive_timeout=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS,
+                    ttl_dns_cache=300,
+                ),
+                trust_env=True,
+                trace_configs=[self._line_trace(self._pool_stats(POOL_LINE))],
+            )
+            self._line_api = api_client
+        return self._line_api
+
+    @staticmethod
+    def _line_trace(stats: PoolStats) -> aiohttp.TraceConfig:
+        trace = aiohttp.TraceConfig()
+
+        async def on_request_start(session, context, params) -> None:
+            stats.started()
+
+        async def on_request_done(session, context, params) -> None:
+            stats.finished()
+
+        async def on_connection_queued(session, context, params) -> None:
+            stats.waited += 1
+
+        async def on_connection_created(session, context, params) -> None:
+            stats.connections_opened += 1
+
+        trace.on_request_start.append(on_request_start)
+        trace.on_request_end.append(on_request_done)
+        trace.on_request_exception.append(on_request_done)
+        trace.on_connection_queued_start.append(on_connection_queued)
+        trace.on_connection_create_end.append(on_connection_created)
+        return trace
+
+    def stats(self) -> dict:
+        return {
+            "http2": http2_available(),
+            "pools": {pool: stats.as_dict() for pool, stats in sorted(self._stats.items())},
+        }
+
+    async def aclose(self) -> None:
+        """Close every pool (application shutdown)."""
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+        if self._line_api is not None:
+            await self._line_api.close()
+            self._line_api = None
+        for session in self._unused_sessions:
+            await session.close()
+        self._unused_sessions.clear()
+
+
+outbound_http = OutboundHttp()
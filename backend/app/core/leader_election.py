@@ -0,0 +1,117 @@
+"""Leader election for singleton background jobs across app replicas."""
+import logging
+import uuid
+import zlib
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+# Extend the lease only if we still own it.
+_RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('expire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# Release the lease only if we still own it.
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class LeaderElector:
+    """
+    Lease-based leadership for one named job.
+
+    Uses a Redis key (SET NX EX + compare-and-extend) when Redis is connected.
+    Without Redis it falls back to a session-level Postgres advisory lock held
+    on a dedicated connection, which Postgres releases if the process dies.
+
+    Call `acquire()` before every run; it both acquires and renews. Periodic
+    jobs size `ttl_seconds` to outlive one interval, so the leader keeps the
+    lease between passes and another replica only takes over once it stops.
+    """
+
+    KEY_PREFIX = "leader"
+
+    def __init__(self, name: str, ttl_seconds: int):
+        self.name = name
+        self.ttl_seconds = max(1, int(ttl_seconds))
+        self.token = uuid.uuid4().hex
+        self._key = f"{self.KEY_PREFIX}:{name}"
+        self._lock_id = zlib.crc32(name.encode("utf-8"))
+        self._pg_conn: Optional[AsyncConnection] = None
+        self.is_leader = False
+
+    async def acquire(self) -> bool:
+        """Acquire or renew leadership; returns whether this instance is leader."""
+        if redis_client.is_connected:
+            leader = await self._acquire_redis()
+        else:
+            leader = await self._acquire_advisory()
+
+        if leader != self.is_leader:
+            logger.info("Leadership for %s %s", self.name, "acquired" if leader else "lost")
+        self.is_leader = leader
+        return leader
+
+    async def release(self):
+        """Give up leadership so another replica can take over immediately."""
+        if redis_client.is_connected:
+            await redis_client.eval(_RELEASE_SCRIPT, [self._key], [self.token])
+        await self._close_advisory()
+        self.is_leader = False
+
+    async def _acquire_redis(self) -> bool:
+        if await redis_client.set(self._key, self.token, seconds=self.ttl_seconds, nx=True):
+            return True
+        renewed = await redis_client.eval(_RENEW_SCRIPT, [self._key], [self.token, self.ttl_seconds])
+        return bool(renewed)
+
+    async def _acquire_advisory(self) -> bool:
+        from app.db.session import engine
+
+        try:
+            if self._pg_conn is not None:
+                # Still holding the lock as long as the connection is alive.
+                await self._pg_conn.execute(text("SELECT 1"))
+                return True
+
+            conn = await engine.connect()
+            locked = (
+                await conn.execute(text("SELECT pg_try_advisory_lock(:lock_id)"), {"lock_id": self._lock_id})
+            ).scalar()
+            await conn.commit()
+            if locked:
+                self._pg_conn = conn
+                return True
+            await conn.close()
+            return False
+        except Exception as e:
+            logger.error(f"Advisory lock error for {self.name}: {e}")
+            await self._close_advisory()
+            return False
+
+    async def _close_advisory(self):
+        conn, self._pg_conn = self._pg_conn, None
+        if conn is None:
+            return
+        try:
+            # Closing returns the connection to the pool, so unlock explicitly first.
+            await conn.execute(text("SELECT pg_advisory_unlock(:lock_id)"), {"lock_id": self._lock_id})
+            await conn.commit()
+        except Exception:
+            pass
+        try:
+            await conn.close()
+        except Exception:
+            pass
@@ -4,6 +4,7 @@ from linebot.v3.messaging import Configuration
 from typing import Optional
 
 from app.core.config import settings
+from app.core.http_client import outbound_http
 
 # Configuration (sync - no event loop needed)
 configuration = Configuration(access_token=settings.LINE_CHANNEL_ACCESS_TOKEN)
@@ -12,16 +13,12 @@ configuration = Configuration(access_token=settings.LINE_CHANNEL_ACCESS_TOKEN)
 parser = WebhookParser(settings.LINE_CHANNEL_SECRET)
 
 # Lazy initialization for async clients
-_async_api_client: Optional[AsyncApiClient] = None
 _line_bot_api: Optional[AsyncMessagingApi] = None
 
 
 def get_async_api_client() -> AsyncApiClient:
-    """Get or create the async API client (lazy initialization)"""
-    global _async_api_client
-    if _async_api_client is None:
-        _async_api_client = AsyncApiClient(configuration)
-    return _async_api_client
+    """Get or create the async API client (lazy initialization, pooled by app.core.http_client)"""
+    return outbound_http.line_api_client(configuration)
 
 
 def get_line_bot_api() -> AsyncMessagingApi:
@@ -0,0 +1,232 @@
+"""
+Cluster-wide rate limiting for LINE Messaging API calls.
+
+LINE limits requests per endpoint and channel (2,000/s for reply, push and
+profile, 200/s for multicast, ...). Every replica draws from one Redis token
+bucket per endpoint class, so together they stay under the limit; without
+Redis each process keeps a local bucket.
+
+Callers queue instead of failing: ``acquire`` waits for a token until its
+deadline and only then raises LineRateLimitTimeout. Bulk traffic
+(multicast, broadcast, stale-profile refreshes, loading animations) may
+not take the last LINE_RATE_BULK_RESERVE share of a bucket, which stays
+free for replies and pushes, and no caller holds a lock while waiting, so
+a long broadcast never queues an interactive reply behind it. A 429 pauses
+its endpoint class cluster-wide for the response's Retry-After.
+"""
+import asyncio
+import time
+from collections import Counter
+from dataclasses import dataclass
+from enum import Enum
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+from app.core.config import settings
+from app.core.redis_client import redis_client
+
+T = TypeVar("T")
+
+KEY_PREFIX = "line_rate"
+
+# Take one token unless paused; otherwise return the seconds to wait (as a
+# string: Lua numbers would be truncated to integers). Bulk callers must
+# leave `reserve` tokens in the bucket.
+_ACQUIRE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local rate, capacity, reserve = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts', 'paused_until')
+local tokens = tonumber(state[1]) or capacity
+local paused_until = tonumber(state[3]) or 0
+tokens = math.min(capacity, tokens + math.max(0, now - (tonumber(state[2]) or now)) * rate)
+local wait = 0
+if paused_until > now then
+    wait = paused_until - now
+elseif tokens >= 1 + reserve then
+    tokens = tokens - 1
+else
+    wait = (1 + reserve - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.max(60, math.ceil(paused_until - now) + 1))
+return tostring(wait)
+"""
+
+# Extend the pause to now + ARGV[1] seconds (never shortens it).
+_PAUSE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local until_ = now + tonumber(ARGV[1])
+local current = tonumber(redis.call('HGET', KEYS[1], 'paused_until')) or 0
+if until_ > current then
+    redis.call('HSET', KEYS[1], 'paused_until', until_)
+    redis.call('EXPIRE', KEYS[1], math.max(60, math.ceil(until_ - now) + 1))
+end
+return 1
+"""
+
+
+class LineEndpoint(str, Enum):
+    REPLY = "reply"
+    PUSH = "push"
+    MULTICAST = "multicast"
+    BROADCAST = "broadcast"
+    PROFILE = "profile"
+    CONTENT = "content"
+    LOADING = "loading"
+
+
+class LinePriority(str, Enum):
+    INTERACTIVE = "interactive"
+    BULK = "bulk"
+
+
+class LineRateLimitTimeout(RuntimeError):
+    """No LINE rate-limit capacity became available before the caller's deadline."""
+
+
+def _rate(endpoint: LineEndpoint) -> float:
+    return {
+        LineEndpoint.REPLY: settings.LINE_RATE_REPLY_PER_SECOND,
+        LineEndpoint.PUSH: settings.LINE_RATE_PUSH_PER_SECOND,
+        LineEndpoint.MULTICAST: settings.LINE_RATE_MULTICAST_PER_SECOND,
+        LineEndpoint.BROADCAST: settings.LINE_RATE_BROADCAST_PER_SECOND,
+        LineEndpoint.PROFILE: settings.LINE_RATE_PROFILE_PER_SECOND,
+        LineEndpoint.CONTENT: settings.LINE_RATE_CONTENT_PER_SECOND,
+        LineEndpoint.LOADING: settings.LINE_RATE_LOADING_PER_SECOND,
+    }[endpoint]
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Seconds to back off for a LINE 429 response, or None when `exc` is not a 429."""
+    if getattr(exc, "status", None) != 429:
+        return None
+    headers = getattr(exc, "headers", None) or {}
+    try:
+        return max(0.0, float(headers.get("Retry-After")))
+    except (TypeError, ValueError):
+        return settings.LINE_RATE_DEFAULT_RETRY_AFTER_SECONDS
+
+
+@dataclass
+class _LocalBucket:
+    tokens: float
+    updated: float
+    paused_until: float = 0.0
+
+
+class LineRateLimiter:
+    """Per-endpoint-class token buckets shared through Redis (see module docstring)."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._local: Dict[LineEndpoint, _LocalBucket] = {}
+        self._counters: Dict[LineEndpoint, Counter] = {}
+
+    def _count(self, endpoint: LineEndpoint, event: str) -> None:
+        self._counters.setdefault(endpoint, Counter())[event] += 1
+
+    @staticmethod
+    def default_deadline(priority: LinePriority) -> float:
+        if priority == LinePriority.BULK:
+            return settings.LINE_RATE_BULK_DEADLINE_SECONDS
+        return settings.LINE_RATE_INTERACTIVE_DEADLINE_SECONDS
+
+    def _take_local(self, endpoint: LineEndpoint, rate: float, capacity: float, reserve: float) -> float:
+        now = self._clock()
+        bucket = self._local.setdefault(endpoint, _LocalBucket(tokens=capacity, updated=now))
+        bucket.tokens = min(capacity, bucket.tokens + (now - bucket.updated) * rate)
+        bucket.updated = now
+        if bucket.paused_until > now:
+            return bucket.paused_until - now
+        if bucket.tokens >= 1 + reserve:
+            bucket.tokens -= 1
+            return 0.0
+        return (1 + reserve - bucket.tokens) / rate
+
+    async def _take(self, endpoint: LineEndpoint, priority: LinePriority) -> float:
+        """Take a token, or return how long to wait before trying again."""
+        rate = _rate(endpoint)
+        if rate <= 0:
+            return 0.0
+        capacity = max(1.0, rate)
+        reserve = 0.0
+        if priority == LinePriority.BULK:
+            # Never reserve the whole bucket (broadcast holds a single token).
+            reserve = min(capacity * settings.LINE_RATE_BULK_RESERVE, capacity - 1)
+        if redis_client.is_connected:
+            wait = await redis_client.eval(
+                _ACQUIRE_SCRIPT, [f"{KEY_PREFIX}:{endpoint.value}"], [rate, capacity, reserve]
+            )
+            if wait is not None:
+                return float(wait)
+        return self._take_local(endpoint, rate, capacity, reserve)
+
+    async def acquire(
+        self,
+        endpoint: LineEndpoint,
+        priority: LinePriority = LinePriority.INTERACTIVE,
+        deadline: Optional[float] = None,
+    ) -> None:
+        """Wait for a token; raises LineRateLimitTimeout if none is due within `deadline` seconds."""
+        if not settings.LINE_RATE_LIMIT_ENABLED:
+            return
+        timeout = self.default_deadline(priority) if deadline is None else deadline
+        give_up_at = self._clock() + timeout
+        waited = False
+        while True:
+            wait = await self._take(endpoint, priority)
+            if wait <= 0:
+                self._count(endpoint, "waited" if waited else "immediate")
+                return
+            if self._clock() + wait > give_up_at:
+                self._count(endpoint, "timeouts")
+                raise LineRateLimitTimeout(
+                    f"LINE {endpoint.value} rate limit: no capacity within {timeout:g}s"
+                )
+            waited = True
+            await asyncio.sleep(wait)
+
+    async def pause(self, endpoint: LineEndpoint, seconds: float) -> None:
+        """Stop every replica from calling `endpoint` for `seconds` (a 429's Retry-After)."""
+        self._count(endpoint, "rate_limited")
+        if redis_client.is_connected:
+            if await redis_client.eval(_PAUSE_SCRIPT, [f"{KEY_PREFIX}:{endpoint.value}"], [seconds]) is not None:
+                return
+        now = self._clock()
+        bucket = self._local.setdefault(endpoint, _LocalBucket(tokens=max(1.0, _rate(endpoint)), updated=now))
+        bucket.paused_until = max(bucket.paused_until, now + seconds)
+
+    async def call(
+        self,
+        endpoint: LineEndpoint,
+        call: Callable[[], Awaitable[T]],
+        priority: LinePriority = LinePriority.INTERACTIVE,
+        deadline: Optional[float] = None,
+    ) -> T:
+        """
+        Run `call` within `endpoint`'s rate limit.
+
+        A 429 pauses the endpoint for its Retry-After and the call is retried
+        (LINE did not process the request) while the deadline allows; after
+        that the 429 ApiException propagates.
+        """
+        timeout = self.default_deadline(priority) if deadline is None else deadline
+        give_up_at = self._clock() + timeout
+        while True:
+            await self.acquire(endpoint, priority, max(0.0, give_up_at - self._clock()))
+            try:
+                return await call()
+            except Exception as exc:
+                retry_after = retry_after_seconds(exc)
+                if retry_after is None:
+                    raise
+                await self.pause(endpoint, retry_after)
+                if not settings.LINE_RATE_LIMIT_ENABLED or self._clock() + retry_after > give_up_at:
+                    raise
+
+    def stats(self) -> dict:
+        return {endpoint.value: dict(counter) for endpoint, counter in sorted(self._counters.items())}
+
+
+line_rate_limiter = LineRateLimiter()
@@ -74,6 +74,16 @@ class RedisClient:
             logger.error(f"Redis get error: {e}")
             return None
     
+    async def eval(self, script: str, keys: list, args: list):
+        """Run a Lua script atomically; returns None when Redis is unavailable."""
+        if not self._redis:
+            return None
+        try:
+            return await self._redis.eval(script, len(keys), *keys, *args)
+        except Exception as e:
+            logger.error(f"Redis eval error: {e}")
+            return None
+
     async def delete(self, key: str):
         """Delete key."""
         if not self._redis:
@@ -0,0 +1,335 @@
+"""
+Resilience primitives for outbound calls: circuit breakers, retry budgets
+and bulkheads.
+
+- ``CircuitBreaker`` guards one operation class. While CLOSED it counts
+  failures (a gap longer than the failure window starts the count over); at
+  the threshold it trips OPEN and rejects calls with CircuitOpenError for
+  the recovery timeout. It is then HALF_OPEN: one probe call goes through,
+  and its outcome closes or re-opens the breaker. With ``shared=True`` and
+  Redis connected, the count, open deadline and probe slot live in one
+  Redis hash, so a trip on one replica stops every replica; without Redis
+  the state is per process.
+- ``RetryBudget`` pays retries from a token bucket: every first attempt adds
+  ``ratio`` tokens and ``min_per_second`` trickle in, so retries add at most
+  that much load while an upstream is failing instead of multiplying it.
+- ``retry_delay`` is exponential backoff with full jitter.
+- ``Bulkhead`` caps the concurrent calls of one kind, so a slow kind (media
+  downloads) cannot occupy every connection another kind (replies) needs.
+"""
+import asyncio
+import logging
+import random
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from enum import Enum
+from typing import AsyncIterator, Callable
+
+import aiohttp
+
+from app.core.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "circuit"
+
+# Admit a call: 'closed', 'probe' (the half-open trial call), or the state
+# that rejected it ('open' / 'half_open' while another probe is running).
+_ACQUIRE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local open_until = tonumber(redis.call('HGET', KEYS[1], 'open_until')) or 0
+if open_until == 0 then
+    return 'closed'
+end
+if now < open_until then
+    return 'open'
+end
+if now < (tonumber(redis.call('HGET', KEYS[1], 'probe_until')) or 0) then
+    return 'half_open'
+end
+redis.call('HSET', KEYS[1], 'probe_until', now + tonumber(ARGV[1]))
+return 'probe'
+"""
+
+# Count a failure; returns 1 when it trips the breaker. ARGV: threshold,
+# recovery seconds, failure window seconds, 1 if the call was the probe.
+_FAILURE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local recovery, window = tonumber(ARGV[2]), tonumber(ARGV[3])
+local open_until = tonumber(redis.call('HGET', KEYS[1], 'open_until')) or 0
+if ARGV[4] == '1' or (open_until == 0 and redis.call('HINCRBY', KEYS[1], 'failures', 1) >= tonumber(ARGV[1])) then
+    redis.call('HSET', KEYS[1], 'open_until', now + recovery, 'failures', 0, 'probe_until', 0)
+    redis.call('EXPIRE', KEYS[1], math.ceil(recovery + window))
+    return 1
+end
+if open_until == 0 then
+    redis.call('EXPIRE', KEYS[1], math.ceil(window))
+end
+return 0
+"""
+
+# Hand the probe slot back after a probe that never reached the upstream.
+_RELEASE_PROBE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('HSET', KEYS[1], 'probe_until', 0)
+end
+return 1
+"""
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """The breaker rejected the call without attempting it."""
+
+
+class BulkheadFullError(RuntimeError):
+    """No bulkhead slot freed up in time; the call was not attempted."""
+
+
+def _status(exc: BaseException):
+    status = getattr(exc, "status", None)
+    return status if isinstance(status, int) else None
+
+
+def is_client_error(exc: BaseException) -> bool:
+    """The upstream answered with a 4xx: the request was at fault, not the upstream."""
+    status = _status(exc)
+    return status is not None and 400 <= status < 500
+
+
+def is_transient(exc: BaseException) -> bool:
+    """5xx responses, timeouts and connection errors: worth retrying."""
+    status = _status(exc)
+    if status is not None:
+        return status >= 500
+    return isinstance(exc, (asyncio.TimeoutError, aiohttp.ClientError, ConnectionError))
+
+
+def retry_delay(attempt: int, base_seconds: float, max_seconds: float) -> float:
+    """Backoff before retry number `attempt` (1-based), drawn uniformly up to the exponential cap."""
+    return random.uniform(0, min(max_seconds, base_seconds * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    """Breaker for one operation class (see module docstring)."""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        recovery_timeout_seconds: float,
+        failure_window_seconds: float,
+        shared: bool = False,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout_seconds = recovery_timeout_seconds
+        self.failure_window_seconds = failure_window_seconds
+        self.shared = shared
+        self._clock = clock
+        self._failures = 0
+        self._last_failure = 0.0
+        self._open_until = 0.0   # 0 while closed
+        self._probe_until = 0.0  # Half-open probe slot taken until then
+        self._dirty = False      # Shared failures recorded here since the last reset
+        self._shared_state = CircuitState.CLOSED
+        self._counters: Counter = Counter()
+
+    @property
+    def _key(self) -> str:
+        return f"{KEY_PREFIX}:{self.name}"
+
+    def _use_redis(self) -> bool:
+        return self.shared and redis_client.is_connected
+
+    @property
+    def state(self) -> CircuitState:
+        if self._use_redis():
+            return self._shared_state
+        if not self._open_until:
+            return CircuitState.CLOSED
+        return CircuitState.OPEN if self._clock() < self._open_until else CircuitState.HALF_OPEN
+
+    def _acquire_local(self) -> str:
+        now = self._clock()
+        if not self._open_until:
+            return "closed"
+        if now < self._open_until:
+            return "open"
+        if now < self._probe_until:
+            return "half_open"
+        self._probe_until = now + self.recovery_timeout_seconds
+        return "probe"
+
+    async def acquire(self) -> bool:
+        """Admit a call; True if it is the half-open probe. Raises CircuitOpenError when rejected."""
+        verdict = None
+        if self._use_redis():
+            verdict = await redis_client.eval(_ACQUIRE_SCRIPT, [self._key], [self.recovery_timeout_seconds])
+        if verdict is None:
+            verdict = self._acquire_local()
+        if verdict in ("open", "half_open"):
+            self._shared_state = CircuitState(verdict)
+            self._counters["rejected"] += 1
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        self._shared_state = CircuitState.HALF_OPEN if verdict == "probe" else CircuitState.CLOSED
+        return verdict == "probe"
+
+    async def record_success(self, probe: bool) -> None:
+        if self._use_redis() and (probe or self._dirty):
+            await redis_client.delete(self._key)
+        if probe:
+            logger.info("%s circuit closed after a successful probe", self.name)
+        self._dirty = False
+        self._failures = 0
+        self._open_until = self._probe_until = 0.0
+        self._shared_state = CircuitState.CLOSED
+
+    async def release(self, probe: bool) -> None:
+        """The call never reached the upstream (throttled locally): free the probe slot, count nothing."""
+        if not probe:
+            return
+        if self._use_redis():
+            await redis_client.eval(_RELEASE_PROBE_SCRIPT, [self._key], [])
+        self._probe_until = 0.0
+
+    def _failure_local(self, probe: bool) -> int:
+        now = self._clock()
+        if not probe and self._open_until:
+            return 0
+        if not probe:
+            if now - self._last_failure > self.failure_window_seconds:
+                self._failures = 0
+            self._failures += 1
+            self._last_failure = now
+        if probe or self._failures >= self.failure_threshold:
+            self._open_until = now + self.recovery_timeout_seconds
+            self._failures = 0
+            self._probe_until = 0.0
+            return 1
+        return 0
+
+    async def record_failure(self, probe: bool) -> bool:
+        """Count a failed call; returns True when it tripped the breaker."""
+        tripped = None
+        if self._use_redis():
+            self._dirty = True
+            tripped = await redis_client.eval(
+                _FAILURE_SCRIPT,
+                [self._key],
+                [self.failure_threshold, self.recovery_timeout_seconds, self.failure_window_seconds, int(probe)],
+            )
+        if tripped is None:
+            tripped = self._failure_local(probe)
+        self._counters["failures"] += 1
+        if not int(tripped):
+            return False
+        self._counters["trips"] += 1
+        self._shared_state = CircuitState.OPEN
+        return True
+
+    def snapshot(self) -> dict:
+        return {
+            "state": self.state.value,
+            "shared": self._use_redis(),
+            "failures": self._counters["failures"],
+            "trips": self._counters["trips"],
+            "rejected": self._counters["rejected"],
+        }
+
+
+class RetryBudget:
+    """Token bucket that retries are paid from (see module docstring)."""
+
+    def __init__(
+        self,
+        ratio: float,
+        min_per_second: float,
+        max_tokens: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self._clock = clock
+        self._tokens = max_tokens
+        self._updated = clock()
+        self._counters: Counter = Counter()
+
+    def _refill(self, extra: float = 0.0) -> None:
+        now = self._clock()
+        self._tokens = min(self.max_tokens, self._tokens + (now - self._updated) * self.min_per_second + extra)
+        self._updated = now
+
+    def deposit(self) -> None:
+        """Record a first attempt."""
+        self._counters["requests"] += 1
+        self._refill(self.ratio)
+
+    def withdraw(self) -> bool:
+        """Pay for one retry; False when the budget is spent."""
+        self._refill()
+        if self._tokens < 1:
+            self._counters["exhausted"] += 1
+            return False
+        self._tokens -= 1
+        self._counters["retries"] += 1
+        return True
+
+    def stats(self) -> dict:
+        self._refill()
+        return {
+            "tokens": round(self._tokens, 2),
+            "requests": self._counters["requests"],
+            "retries": self._counters["retries"],
+            "exhausted": self._counters["exhausted"],
+        }
+
+
+class Bulkhead:
+    """Concurrency limit for one kind of call; waits at most `max_wait_seconds` for a slot."""
+
+    def __init__(self, name: str, max_concurrent: int, max_wait_seconds: float):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_wait_seconds = max_wait_seconds
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._active = 0
+        self._counters: Counter = Counter()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        if self._semaphore.locked():
+            self._counters["waited"] += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.max_wait_seconds)
+        except asyncio.TimeoutError:
+            self._counters["rejected"] += 1
+            raise BulkheadFullError(
+                f"{self.name} bulkhead full: {self.max_concurrent} calls in flight"
+            ) from None
+        self._active += 1
+        self._counters["peak"] = max(self._counters["peak"], self._active)
+        try:
+            yield
+        finally:
+            self._active -= 1
+            self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "active": self._active,
+            "peak": self._counters["peak"],
+            "waited": self._counters["waited"],
+            "rejected": self._counters["rejected"],
+        }
@@ -0,0 +1,75 @@
+"""Scheduling primitives shared by background jobs: an injectable clock and a due-time heap."""
+import asyncio
+import heapq
+from datetime import datetime, timezone
+from typing import Dict, Hashable, List, Optional, Tuple
+
+
+class SystemClock:
+    """Wall clock used in production; tests substitute a fake with the same interface."""
+
+    def now(self) -> datetime:
+        return datetime.now(timezone.utc)
+
+    async def sleep(self, seconds: float):
+        await asyncio.sleep(max(0.0, seconds))
+
+
+class DueQueue:
+    """
+    Min-heap of jobs keyed by id and ordered by due time.
+
+    Rescheduling or cancelling a key is O(log n): the old heap entry is left in
+    place and skipped when it surfaces (lazy deletion), so the heap never has to
+    be searched.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[datetime, int, Hashable]] = []
+        self._live: Dict[Hashable, int] = {}  # key -> sequence of its current heap entry
+        self._seq = 0  # Tie-breaker so keys never need to be comparable
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._live
+
+    def schedule(self, key: Hashable, due_at: datetime):
+        """Add a job or move it to a new due time."""
+        if due_at.tzinfo is None:
+            due_at = due_at.replace(tzinfo=timezone.utc)
+        self._seq += 1
+        self._live[key] = self._seq
+        heapq.heappush(self._heap, (due_at, self._seq, key))
+
+    def cancel(self, key: Hashable):
+        """Forget a job; a no-op when the key is unknown."""
+        self._live.pop(key, None)
+
+    def clear(self):
+        self._heap.clear()
+        self._live.clear()
+
+    def next_due(self) -> Optional[datetime]:
+        """Due time of the earliest live job, if any."""
+        self._discard_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: datetime) -> List[Hashable]:
+        """Remove and return every job due at or before `now`, earliest first."""
+        ready = []
+        while True:
+            self._discard_stale()
+            if not self._heap or self._heap[0][0] > now:
+                return ready
+            _, _, key = heapq.heappop(self._heap)
+            del self._live[key]
+            ready.append(key)
+
+    def _discard_stale(self):
+        while self._heap:
+            _, seq, key = self._heap[0]
+            if self._live.get(key) == seq:
+                return
+            heapq.heappop(self._heap)
@@ -24,6 +24,8 @@ class ConnectionManager:
 
     # Redis Pub/Sub channels
     BROADCAST_CHANNEL = "live_chat:broadcast"
+    ANALYTICS_CHANNEL = "live_chat:analytics"
+    ADMIN_CHANNEL = "live_chat:admin"
     ROOM_CHANNEL_PREFIX = "live_chat:room:"
     READ_KEY_PREFIX = "read"
     REDIS_CONNECTION_PREFIX = "ws:connections"
@@ -65,6 +67,14 @@ class ConnectionManager:
                 self.BROADCAST_CHANNEL,
                 self._handle_remote_broadcast
             )
+            await pubsub_manager.subscribe(
+                self.ANALYTICS_CHANNEL,
+                self._handle_remote_analytics
+            )
+            await pubsub_manager.subscribe(
+                self.ADMIN_CHANNEL,
+                self._handle_remote_admin_message
+            )
             logger.info("WebSocket manager initialized with Pub/Sub")
             self._pubsub_initialized = True
         else:
@@ -75,6 +85,21 @@ class ConnectionManager:
         # Only broadcast locally - don't re-publish to avoid loops
         await self._broadcast_local(data)
 
+    async def _handle_remote_analytics(self, data: dict):
+        """Deliver an analytics update published by any server to local subscribers."""
+        if data.get("_origin") == self.server_id:
+            return  # Already delivered locally by publish_analytics_update
+        message = {k: v for k, v in data.items() if not k.startswith("_")}
+        await self.broadcast_analytics_update(message)
+
+    async def _handle_remote_admin_message(self, data: dict):
+        """Deliver a message for one admin published by another server."""
+        admin_id = data.get("_admin_id")
+        if not admin_id or data.get("_origin") == self.server_id:
+            return
+        message = {k: v for k, v in data.items() if not k.startswith("_")}
+        await self.send_to_admin(admin_id, message)
+
     async def _handle_remote_room_message(self, data: dict):
         """Handle room message from other servers via Pub/Sub."""
         room_id = data.get("_room_id")
@@ -169,6 +194,12 @@ class ConnectionManager:
         for admin_id in list(self.analytics_subscribers.keys()):
             await self.send_to_admin(admin_id, data)
 
+    async def publish_analytics_update(self, data: dict):
+        """Broadcast analytics updates to subscribed admins on every server."""
+        if self._pubsub_initialized:
+            await pubsub_manager.publish(self.ANALYTICS_CHANNEL, {**data, "_origin": self.server_id})
+        await self.broadcast_analytics_update(data)
+
     async def join_room(self, websocket: WebSocket, room_id: str):
         """Add connection to a room"""
         admin_id = self.ws_to_admin.get(websocket)
@@ -256,6 +287,14 @@ class ConnectionManager:
 
         return success
 
+    async def notify_admin(self, admin_id: str, data: dict) -> None:
+        """Send to all connections of an admin on whichever servers they are connected to."""
+        if self._pubsub_initialized:
+            await pubsub_manager.publish(
+                self.ADMIN_CHANNEL, {**data, "_admin_id": admin_id, "_origin": self.server_id}
+            )
+        await self.send_to_admin(admin_id, data)
+
     async def broadcast_to_room(
         self,
         room_id: str,
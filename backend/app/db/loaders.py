@@ -0,0 +1,96 @@
+"""Per-session batched loaders that resolve ids with one IN query instead of one query per row."""
+import asyncio
+from typing import Awaitable, Callable, Dict, Generic, Hashable, Iterable, List, Optional, TypeVar
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.user import User
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+BatchFetch = Callable[[AsyncSession, List[K]], Awaitable[Dict[K, V]]]
+
+_INFO_KEY = "batch_loaders"
+
+
+class BatchLoader(Generic[K, V]):
+    """
+    Dataloader-style batching bound to one AsyncSession.
+
+    ``load`` calls made in the same event-loop tick are collected and
+    resolved with a single ``fetch`` of all their keys; ``load_many``
+    resolves a known set of keys at once. Results (including misses) are
+    memoized for the session's lifetime, i.e. the request. Batches run one
+    at a time because an AsyncSession cannot execute statements concurrently.
+    """
+
+    def __init__(self, db: AsyncSession, fetch: BatchFetch):
+        self._db = db
+        self._fetch = fetch
+        self._cache: Dict[K, Optional[V]] = {}
+        self._pending: Dict[K, asyncio.Future] = {}
+        self._lock = asyncio.Lock()
+
+    async def load(self, key: K) -> Optional[V]:
+        if key in self._cache:
+            return self._cache[key]
+        future = self._pending.get(key)
+        if future is None:
+            if not self._pending:
+                asyncio.get_running_loop().call_soon(lambda: asyncio.ensure_future(self._dispatch()))
+            future = self._pending[key] = asyncio.get_running_loop().create_future()
+        return await future
+
+    async def load_many(self, keys: Iterable[K]) -> Dict[K, Optional[V]]:
+        keys = list(dict.fromkeys(key for key in keys if key is not None))
+        missing = [key for key in keys if key not in self._cache and key not in self._pending]
+        if missing:
+            async with self._lock:
+                await self._resolve(missing)
+        return {key: await self.load(key) for key in keys}
+
+    def prime(self, key: K, value: Optional[V]) -> None:
+        self._cache.setdefault(key, value)
+
+    async def _dispatch(self) -> None:
+        batch, self._pending = self._pending, {}
+        try:
+            async with self._lock:
+                await self._resolve(list(batch))
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for key, future in batch.items():
+            if not future.done():
+                future.set_result(self._cache.get(key))
+
+    async def _resolve(self, keys: List[K]) -> None:
+        keys = [key for key in keys if key not in self._cache]
+        if not keys:
+            return
+        found = await self._fetch(self._db, keys)
+        for key in keys:
+            self._cache[key] = found.get(key)
+
+
+def get_loader(db: AsyncSession, name: str, fetch: BatchFetch) -> BatchLoader:
+    """Return the session's loader called `name`, creating it on first use."""
+    loaders = db.info.setdefault(_INFO_KEY, {})
+    loader = loaders.get(name)
+    if loader is None:
+        loader = loaders[name] = BatchLoader(db, fetch)
+    return loader
+
+
+async def _fetch_users(db: AsyncSession, ids: List[int]) -> Dict[int, User]:
+    result = await db.execute(select(User).where(User.id.in_(ids)))
+    return {user.id: user for user in result.scalars().all()}
+
+
+def user_loader(db: AsyncSession) -> BatchLoader[int, User]:
+    """Batched ``User`` lookups by id for the current request."""
+    return get_loader(db, "users", _fetch_users)
@@ -7,12 +7,33 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from app.api.v1.api import api_router
 from app.core.config import settings
+from app.core.http_client import outbound_http
 from app.core.pubsub_manager import pubsub_manager
 from app.core.redis_client import redis_client
 from app.core.websocket_manager import ws_manager
 from app.services.business_hours_service import business_hours_service
 from app.services.credential_service import credential_service
-from app.tasks import start_cleanup_task, stop_cleanup_task
+from app.services.media_bulk_service import media_bulk_service
+from app.services.report_job_service import report_job_service
+from app.services.thumbnail_service import thumbnail_service
+from app.tasks import (
+    start_analytics_rollup_task,
+    start_broadcast_dispatcher_task,
+    start_broadcast_scheduler_task,
+    start_chat_analytics_task,
+    start_cleanup_task,
+    start_kpi_snapshot_task,
+    start_media_lifecycle_task,
+    start_outbox_task,
+    stop_analytics_rollup_task,
+    stop_broadcast_dispatcher_task,
+    stop_broadcast_scheduler_task,
+    stop_chat_analytics_task,
+    stop_cleanup_task,
+    stop_kpi_snapshot_task,
+    stop_media_lifecycle_task,
+    stop_outbox_task,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -61,12 +82,30 @@ async def lifespan(_: FastAPI):
 
     # Start background tasks
     await start_cleanup_task()
+    await start_outbox_task()
+    await start_broadcast_dispatcher_task()
+    await start_broadcast_scheduler_task()
+    await start_analytics_rollup_task()
+    await start_chat_analytics_task()
+    await start_kpi_snapshot_task()
+    await start_media_lifecycle_task()
     logger.info("Background tasks started.")
 
     try:
         yield
     finally:
+        await stop_media_lifecycle_task()
+        await stop_kpi_snapshot_task()
+        await stop_chat_analytics_task()
+        await stop_analytics_rollup_task()
+        await stop_broadcast_scheduler_task()
+        await stop_broadcast_dispatcher_task()
+        await stop_outbox_task()
         await stop_cleanup_task()
+        await report_job_service.shutdown()
+        await thumbnail_service.shutdown()
+        await media_bulk_service.shutdown()
+        await outbound_http.aclose()
         await pubsub_manager.disconnect()
         await redis_client.disconnect()
 
@@ -3,7 +3,9 @@ from .organization import Organization
 from .service_request import ServiceRequest
 from .booking import Booking
 from .message import Message
+from .message_outbox import MessageOutbox
 from .media_file import MediaFile
+from .media_blob import MediaBlob
 from .auto_reply import AutoReply
 from .reply_object import ReplyObject
 from .geography import Province, District, SubDistrict
@@ -12,7 +14,9 @@ from .chat_session import ChatSession
 from .audit_log import AuditLog
 from .business_hours import BusinessHours
 from .csat_response import CsatResponse
+from .analytics_rollup import AnalyticsHourly, AnalyticsDailyUser, AnalyticsRollupState
 from .canned_response import CannedResponse
 from .tag import Tag, UserTag
 from .request_comment import RequestComment
 from .broadcast import Broadcast
+from .broadcast_chunk import BroadcastChunk
@@ -0,0 +1,57 @@
+from sqlalchemy import Column, Integer, String, Date, DateTime, Float
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class AnalyticsHourly(Base):
+    """
+    Hourly chat activity facts, one row per UTC hour.
+
+    Every counter is additive so any window is a SUM over its buckets; averages
+    are stored as (sum, count) pairs for the same reason.
+    """
+
+    __tablename__ = "analytics_hourly"
+
+    bucket = Column(DateTime(timezone=True), primary_key=True)  # Start of the UTC hour
+
+    sessions_started = Column(Integer, default=0, nullable=False)
+    sessions_claimed = Column(Integer, default=0, nullable=False)
+    sessions_closed = Column(Integer, default=0, nullable=False)
+    sessions_abandoned = Column(Integer, default=0, nullable=False)  # closed_by SYSTEM_TIMEOUT
+
+    messages_incoming = Column(Integer, default=0, nullable=False)
+    messages_outgoing = Column(Integer, default=0, nullable=False)
+    messages_user = Column(Integer, default=0, nullable=False)
+    messages_bot = Column(Integer, default=0, nullable=False)
+    messages_admin = Column(Integer, default=0, nullable=False)
+
+    frt_count = Column(Integer, default=0, nullable=False)  # Bucketed by first_response_at
+    frt_sum_seconds = Column(Float, default=0, nullable=False)
+    queue_wait_count = Column(Integer, default=0, nullable=False)  # Bucketed by claimed_at
+    queue_wait_sum_seconds = Column(Float, default=0, nullable=False)
+    resolution_count = Column(Integer, default=0, nullable=False)  # Bucketed by closed_at
+    resolution_sum_seconds = Column(Float, default=0, nullable=False)
+    csat_count = Column(Integer, default=0, nullable=False)
+    csat_sum = Column(Integer, default=0, nullable=False)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class AnalyticsDailyUser(Base):
+    """LINE users who sent at least one message on a UTC day (distinct counts are not additive)."""
+
+    __tablename__ = "analytics_daily_users"
+
+    day = Column(Date, primary_key=True)
+    line_user_id = Column(String, primary_key=True)
+
+
+class AnalyticsRollupState(Base):
+    """Watermark per rollup: everything before it has been folded into the fact tables."""
+
+    __tablename__ = "analytics_rollup_state"
+
+    name = Column(String(50), primary_key=True)
+    watermark = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,31 @@
+from enum import Enum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class ChunkStatus(str, Enum):
+    PENDING = "PENDING"
+    SENT = "SENT"
+    FAILED = "FAILED"
+
+
+class BroadcastChunk(Base):
+    """One multicast request's worth of recipients for a targeted broadcast."""
+
+    __tablename__ = "broadcast_chunks"
+    __table_args__ = (UniqueConstraint("broadcast_id", "seq", name="uq_broadcast_chunks_broadcast_seq"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    broadcast_id = Column(Integer, ForeignKey("broadcasts.id", ondelete="CASCADE"), nullable=False, index=True)
+    seq = Column(Integer, nullable=False)
+    recipients = Column(JSONB, nullable=False)  # LINE user ids, at most 500
+    recipient_count = Column(Integer, nullable=False)
+    retry_key = Column(String(36), nullable=False, unique=True)  # X-Line-Retry-Key
+    status = Column(String(20), default=ChunkStatus.PENDING, nullable=False, index=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True), nullable=True)
@@ -1,5 +1,5 @@
 from enum import Enum
-from sqlalchemy import Boolean, Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Boolean, Column, Integer, String, DateTime, ForeignKey, false
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base import Base
@@ -32,6 +32,11 @@ class ChatSession(Base):
     transfer_count = Column(Integer, default=0)
     transfer_reason = Column(String(255), nullable=True)
 
+    # Outcome fields, written when the outcome becomes known so KPIs are plain counts
+    queue_wait_seconds = Column(Integer, nullable=True)  # claimed_at - started_at, set on claim
+    reopened_within_24h = Column(Boolean, default=False, server_default=false(), nullable=False)  # set when the user's next session starts
+    abandoned = Column(Boolean, default=False, server_default=false(), nullable=False)  # set when cleanup times out a WAITING session
+
     # Archive fields
     is_archived = Column(Boolean, default=False, nullable=False)
     archived_at = Column(DateTime(timezone=True), nullable=True)
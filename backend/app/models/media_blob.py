@@ -0,0 +1,25 @@
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class MediaBlob(Base):
+    """
+    Catalog entry for one distinct piece of stored content, keyed by sha256.
+
+    Admin media (MediaFile), inbound LINE media and operator uploads all
+    reference blobs through this table; ref_count is the number of those
+    references (see app.services.media_catalog).
+    """
+
+    __tablename__ = "media_blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    storage_key = Column(String(128), nullable=False)
+    mime_type = Column(String, nullable=False)
+    size_bytes = Column(BigInteger, nullable=False)
+    preview_sha256 = Column(String(64), nullable=True)  # Rendered preview image, itself a catalog entry
+    ref_count = Column(Integer, nullable=False, default=0, server_default="0")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_referenced_at = Column(DateTime(timezone=True), server_default=func.now())
+    recompressed_at = Column(DateTime(timezone=True), nullable=True)  # storage_key then holds a re-encoded copy
@@ -1,7 +1,8 @@
 import uuid
 import enum
 from sqlalchemy import Column, String, Integer, DateTime, LargeBinary, Boolean, Enum
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import deferred
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.sql import func
 from app.db.base import Base
 
@@ -45,7 +46,11 @@ class MediaFile(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
     filename = Column(String, nullable=False)
     mime_type = Column(String, nullable=False)
-    data = Column(LargeBinary, nullable=False)  # BLOB storage
+    # Content lives in app.services.media_storage under storage_key; `data` only
+    # holds blobs not yet moved out by scripts/migrate_media_to_storage.py.
+    storage_key = Column(String(128), nullable=True, index=True)
+    content_sha256 = Column(String(64), nullable=True, index=True)
+    data = deferred(Column(LargeBinary, nullable=True))
     size_bytes = Column(Integer, nullable=False)
     category = Column(
         Enum(FileCategory, name="filecategory", create_constraint=False),
@@ -56,4 +61,5 @@ class MediaFile(Base):
     is_public = Column(Boolean, nullable=False, default=False, server_default="false")
     public_token = Column(String, unique=True, nullable=True, index=True)
     thumbnail_url = Column(String, nullable=True)
+    thumbnails = Column(JSONB, nullable=True)  # {"<px>": {"key": storage key, "size": bytes}}, see thumbnail_service
     created_at = Column(DateTime(timezone=True), server_default=func.now())
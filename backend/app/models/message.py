@@ -31,5 +31,6 @@ class Message(Base):
     # New columns for live chat support
     sender_role = Column(Enum(SenderRole), nullable=True)  # USER, BOT, or ADMIN
     operator_name = Column(String, nullable=True)  # Display name of admin operator
+    delivery_status = Column(String(20), nullable=True)  # PENDING/SENT/FAILED for outbox deliveries
     
     created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
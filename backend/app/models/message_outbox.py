@@ -0,0 +1,29 @@
+from enum import Enum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class DeliveryStatus(str, Enum):
+    PENDING = "PENDING"
+    SENT = "SENT"
+    FAILED = "FAILED"
+
+
+class MessageOutbox(Base):
+    """Pending operator-to-LINE deliveries, written in the same transaction as the message."""
+
+    __tablename__ = "message_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    message_id = Column(Integer, ForeignKey("messages.id", ondelete="CASCADE"), nullable=False, index=True)
+    line_user_id = Column(String(50), nullable=False, index=True)
+    line_messages = Column(JSONB, nullable=False)  # Serialized LINE message objects
+    retry_key = Column(String(36), nullable=False, unique=True)  # X-Line-Retry-Key
+    status = Column(String(20), default=DeliveryStatus.PENDING, nullable=False, index=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+
+
+class MediaJobResponse(BaseModel):
+    id: str
+    operation: str
+    status: str
+    total: int
+    processed: int
+    affected: int
+    error: Optional[str] = None
+    requested_by: Optional[int] = None
+    created_at: datetime
+    completed_at: Optional[datetime] = None
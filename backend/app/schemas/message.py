@@ -22,5 +22,6 @@ class MessageResponse(BaseModel):
     created_at: datetime
     sender_role: Optional[SenderRole] = None
     operator_name: Optional[str] = None
+    delivery_status: Optional[str] = None
 
     model_config = ConfigDict(from_attributes=True, use_enum_values=True)
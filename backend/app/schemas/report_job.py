@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+
+class ReportJobResponse(BaseModel):
+    id: str
+    kind: str
+    params: Dict[str, Any]
+    status: str
+    filename: str
+    media_type: str
+    size: Optional[int] = None
+    error: Optional[str] = None
+    requested_by: Optional[int] = None
+    created_at: datetime
+    completed_at: Optional[datetime] = None
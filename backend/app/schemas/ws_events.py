@@ -27,6 +27,7 @@ class WSEventType(str, Enum):
     AUTH_ERROR = "auth_error"
     NEW_MESSAGE = "new_message"
     MESSAGE_SENT = "message_sent"
+    MESSAGE_STATUS = "message_status"
     TYPING_INDICATOR = "typing_indicator"
     SESSION_CLAIMED = "session_claimed"
     SESSION_CLOSED = "session_closed"
@@ -36,6 +37,8 @@ class WSEventType(str, Enum):
     OPERATOR_JOINED = "operator_joined"
     OPERATOR_LEFT = "operator_left"
     ANALYTICS_UPDATE = "analytics_update"
+    BROADCAST_PROGRESS = "broadcast_progress"
+    REPORT_JOB_DONE = "report_job_done"
     SLA_ALERT = "sla_alert"
     ERROR = "error"
     PONG = "pong"
@@ -0,0 +1,320 @@
+"""Incremental hourly rollups of chat activity for the analytics dashboard."""
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, literal_column, select, union
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.analytics_rollup import AnalyticsDailyUser, AnalyticsHourly, AnalyticsRollupState
+from app.models.chat_session import ChatSession, ClosedBy, SessionStatus
+from app.models.csat_response import CsatResponse
+from app.models.message import Message, MessageDirection, SenderRole
+
+logger = logging.getLogger(__name__)
+
+HOURLY_ROLLUP = "hourly"
+
+FACT_COLUMNS = (
+    "sessions_started",
+    "sessions_claimed",
+    "sessions_closed",
+    "sessions_abandoned",
+    "messages_incoming",
+    "messages_outgoing",
+    "messages_user",
+    "messages_bot",
+    "messages_admin",
+    "frt_count",
+    "frt_sum_seconds",
+    "queue_wait_count",
+    "queue_wait_sum_seconds",
+    "resolution_count",
+    "resolution_sum_seconds",
+    "csat_count",
+    "csat_sum",
+)
+
+
+def floor_hour(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def floor_day(value: datetime) -> datetime:
+    return floor_hour(value).replace(hour=0)
+
+
+def _hour(column):
+    """UTC hour bucket of a timestamptz column, independent of the session time zone."""
+    return func.date_trunc(literal_column("'hour'"), func.timezone(literal_column("'UTC'"), column))
+
+
+def _utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def _seconds(later, earlier):
+    return func.extract("epoch", later - earlier)
+
+
+class AnalyticsRollupService:
+    """
+    Maintains ``analytics_hourly`` and ``analytics_daily_users`` from raw rows.
+
+    Every metric is bucketed by the time its event happened (started_at,
+    claimed_at, first_response_at, closed_at, created_at), so an hour is final
+    once it is over. A watermark records how far the tables are complete; the
+    job only scans rows newer than it, and readers combine stored buckets with
+    a live computation of the few hours past the watermark.
+    """
+
+    async def compute_buckets(self, db: AsyncSession, start: datetime, end: datetime) -> Dict[datetime, dict]:
+        """Aggregate raw rows in [start, end) into hourly fact dicts (only non-empty hours)."""
+        buckets: Dict[datetime, dict] = {}
+
+        def _merge(rows):
+            for row in rows:
+                values = row._asdict()
+                bucket = _utc(values.pop("bucket"))
+                target = buckets.setdefault(bucket, dict.fromkeys(FACT_COLUMNS, 0))
+                for key, value in values.items():
+                    target[key] += value or 0
+
+        started = _hour(ChatSession.started_at)
+        _merge((await db.execute(
+            select(started.label("bucket"), func.count(ChatSession.id).label("sessions_started"))
+            .where(ChatSession.started_at >= start, ChatSession.started_at < end)
+            .group_by(started)
+        )).all())
+
+        claimed = _hour(ChatSession.claimed_at)
+        queue_wait = _seconds(ChatSession.claimed_at, ChatSession.started_at)
+        _merge((await db.execute(
+            select(
+                claimed.label("bucket"),
+                func.count(ChatSession.id).label("sessions_claimed"),
+                func.count(queue_wait).label("queue_wait_count"),
+                func.coalesce(func.sum(queue_wait), 0).label("queue_wait_sum_seconds"),
+            )
+            .where(ChatSession.claimed_at >= start, ChatSession.claimed_at < end)
+            .group_by(claimed)
+        )).all())
+
+        responded = _hour(ChatSession.first_response_at)
+        frt = _seconds(ChatSession.first_response_at, ChatSession.claimed_at)
+        _merge((await db.execute(
+            select(
+                responded.label("bucket"),
+                func.count(frt).label("frt_count"),
+                func.coalesce(func.sum(frt), 0).label("frt_sum_seconds"),
+            )
+            .where(ChatSession.first_response_at >= start, ChatSession.first_response_at < end)
+            .group_by(responded)
+        )).all())
+
+        closed = _hour(ChatSession.closed_at)
+        resolution = _seconds(ChatSession.closed_at, ChatSession.started_at)
+        _merge((await db.execute(
+            select(
+                closed.label("bucket"),
+                func.count(ChatSession.id).filter(ChatSession.status == SessionStatus.CLOSED).label("sessions_closed"),
+                func.count(ChatSession.id).filter(
+                    ChatSession.closed_by == ClosedBy.SYSTEM_TIMEOUT.value
+                ).label("sessions_abandoned"),
+                func.count(resolution).label("resolution_count"),
+                func.coalesce(func.sum(resolution), 0).label("resolution_sum_seconds"),
+            )
+            .where(ChatSession.closed_at >= start, ChatSession.closed_at < end)
+            .group_by(closed)
+        )).all())
+
+        created = _hour(Message.created_at)
+        _merge((await db.execute(
+            select(
+                created.label("bucket"),
+                func.count(Message.id).filter(Message.direction == MessageDirection.INCOMING).label("messages_incoming"),
+                func.count(Message.id).filter(Message.direction == MessageDirection.OUTGOING).label("messages_outgoing"),
+                func.count(Message.id).filter(Message.sender_role == SenderRole.USER).label("messages_user"),
+                func.count(Message.id).filter(Message.sender_role == SenderRole.BOT).label("messages_bot"),
+                func.count(Message.id).filter(Message.sender_role == SenderRole.ADMIN).label("messages_admin"),
+            )
+            .where(Message.created_at >= start, Message.created_at < end)
+            .group_by(created)
+        )).all())
+
+        rated = _hour(CsatResponse.created_at)
+        _merge((await db.execute(
+            select(
+                rated.label("bucket"),
+                func.count(CsatResponse.id).label("csat_count"),
+                func.coalesce(func.sum(CsatResponse.score), 0).label("csat_sum"),
+            )
+            .where(CsatResponse.created_at >= start, CsatResponse.created_at < end)
+            .group_by(rated)
+        )).all())
+
+        return buckets
+
+    async def rollup_range(self, db: AsyncSession, start: datetime, end: datetime) -> int:
+        """
+        Recompute and upsert every hour in [start, end), one day per transaction.
+
+        Idempotent: hours are overwritten (empty hours with zeros), so ranges can
+        be re-run or overlap freely. Returns the number of hours written.
+        """
+        start, end = floor_hour(start), floor_hour(end)
+        written = 0
+        chunk_start = start
+        while chunk_start < end:
+            chunk_end = min(chunk_start + timedelta(days=1), end)
+            buckets = await self.compute_buckets(db, chunk_start, chunk_end)
+
+            rows = []
+            hour = chunk_start
+            while hour < chunk_end:
+                rows.append({"bucket": hour, **buckets.get(hour, dict.fromkeys(FACT_COLUMNS, 0))})
+                hour += timedelta(hours=1)
+            stmt = insert(AnalyticsHourly).values(rows)
+            await db.execute(stmt.on_conflict_do_update(
+                index_elements=[AnalyticsHourly.bucket],
+                set_={**{column: stmt.excluded[column] for column in FACT_COLUMNS}, "updated_at": func.now()},
+            ))
+
+            day = func.date(func.timezone(literal_column("'UTC'"), Message.created_at))
+            await db.execute(
+                insert(AnalyticsDailyUser)
+                .from_select(
+                    ["day", "line_user_id"],
+                    select(day, Message.line_user_id)
+                    .where(
+                        Message.created_at >= chunk_start,
+                        Message.created_at < chunk_end,
+                        Message.direction == MessageDirection.INCOMING,
+                        Message.line_user_id.isnot(None),
+                    )
+                    .distinct(),
+                )
+                .on_conflict_do_nothing()
+            )
+            await db.commit()
+
+            written += len(rows)
+            chunk_start = chunk_end
+        return written
+
+    async def get_watermark(self, db: AsyncSession, name: str = HOURLY_ROLLUP) -> Optional[datetime]:
+        watermark = await db.scalar(
+            select(AnalyticsRollupState.watermark).where(AnalyticsRollupState.name == name)
+        )
+        return _utc(watermark) if watermark else None
+
+    async def set_watermark(self, db: AsyncSession, watermark: datetime, name: str = HOURLY_ROLLUP) -> None:
+        """Move a rollup's watermark forward (never back) and commit."""
+        stmt = insert(AnalyticsRollupState).values(name=name, watermark=watermark)
+        await db.execute(stmt.on_conflict_do_update(
+            index_elements=[AnalyticsRollupState.name],
+            set_={
+                "watermark": func.greatest(AnalyticsRollupState.watermark, stmt.excluded.watermark),
+                "updated_at": func.now(),
+            },
+        ))
+        await db.commit()
+
+    async def advance(self, db: AsyncSession, now: Optional[datetime] = None) -> int:
+        """
+        Fold every complete hour since the watermark into the fact tables.
+
+        An hour counts as complete once ANALYTICS_ROLLUP_GRACE_SECONDS have
+        passed after it, which leaves room for in-flight transactions. The last
+        ANALYTICS_ROLLUP_LOOKBACK_HOURS before the watermark are recomputed too.
+        On first run the tables start ANALYTICS_ROLLUP_INITIAL_DAYS back; older
+        history is loaded with scripts/backfill_analytics_rollups.py.
+        """
+        now = now or datetime.now(timezone.utc)
+        target = floor_hour(now - timedelta(seconds=settings.ANALYTICS_ROLLUP_GRACE_SECONDS))
+        watermark = await self.get_watermark(db)
+        if watermark is None:
+            start = target - timedelta(days=settings.ANALYTICS_ROLLUP_INITIAL_DAYS)
+        else:
+            start = watermark - timedelta(hours=settings.ANALYTICS_ROLLUP_LOOKBACK_HOURS)
+        if start >= target:
+            return 0
+
+        written = await self.rollup_range(db, start, target)
+        await self.set_watermark(db, target)
+        logger.debug("Analytics rollup advanced to %s (%s hours)", target.isoformat(), written)
+        return written
+
+    async def hourly_series(self, db: AsyncSession, start: datetime, end: datetime) -> List[dict]:
+        """
+        Hourly facts for [start, end), stored buckets up to the watermark and a
+        live computation for the remainder. Only non-empty hours are returned.
+        """
+        start = floor_hour(start)
+        watermark = await self.get_watermark(db)
+        split = min(max(watermark or start, start), end)
+
+        series: Dict[datetime, dict] = {}
+        if split > start:
+            result = await db.execute(
+                select(AnalyticsHourly)
+                .where(AnalyticsHourly.bucket >= start, AnalyticsHourly.bucket < split)
+                .order_by(AnalyticsHourly.bucket)
+            )
+            for row in result.scalars().all():
+                series[_utc(row.bucket)] = {column: getattr(row, column) or 0 for column in FACT_COLUMNS}
+        if end > split:
+            series.update(await self.compute_buckets(db, split, end))
+
+        return [{"bucket": bucket, **facts} for bucket, facts in sorted(series.items())]
+
+    async def count_active_users(self, db: AsyncSession, start: datetime, end: datetime) -> int:
+        """
+        Distinct LINE users with an incoming message in [start, end).
+
+        Whole UTC days below the watermark come from the daily user rollup; the
+        partial days at either edge and the hours past the watermark are read
+        from messages, so the window is exact rather than widened to midnight.
+        """
+        start, end = _utc(start), _utc(end)
+        watermark = await self.get_watermark(db)
+        split = min(max(watermark or start, start), end)
+        first_day = floor_day(start)
+        if first_day < start:
+            first_day += timedelta(days=1)
+        last_day = floor_day(split)
+
+        parts = []
+        live = [(start, end)]
+        if last_day > first_day:
+            parts.append(
+                select(AnalyticsDailyUser.line_user_id).where(
+                    AnalyticsDailyUser.day >= first_day.date(),
+                    AnalyticsDailyUser.day < last_day.date(),
+                )
+            )
+            live = [(start, first_day), (last_day, end)]
+        for live_start, live_end in live:
+            if live_end > live_start:
+                parts.append(
+                    select(Message.line_user_id).where(
+                        Message.created_at >= live_start,
+                        Message.created_at < live_end,
+                        Message.direction == MessageDirection.INCOMING,
+                        Message.line_user_id.isnot(None),
+                    )
+                )
+        if not parts:
+            return 0
+        audience = (parts[0] if len(parts) == 1 else union(*parts)).subquery()
+        return int(await db.scalar(select(func.count(func.distinct(audience.c.line_user_id)))) or 0)
+
+def sum_facts(series: List[dict], *columns: str) -> float:
+    return sum(row[column] for row in series for column in columns)
+
+
+analytics_rollup_service = AnalyticsRollupService()
@@ -2,95 +2,113 @@
 import asyncio
 import logging
 from datetime import datetime, timedelta, timezone
-from sqlalchemy import and_, exists, func, literal_column, select
+from sqlalchemy import and_, func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 
 from app.models.chat_session import ChatSession, SessionStatus
 from app.models.csat_response import CsatResponse
 from app.models.user import User, ChatMode
-from app.models.message import Message, MessageDirection
 from app.core.redis_client import redis_client
 from app.core.config import settings
+from app.db.loaders import user_loader
 from app.db.session import AsyncSessionLocal
+from app.services.analytics_rollup_service import analytics_rollup_service, sum_facts
 
 logger = logging.getLogger(__name__)
 
+PERCENTILES = (("p50", 0.5), ("p90", 0.9), ("p99", 0.99))
+
 class AnalyticsService:
     """Service for calculating live chat analytics and KPIs."""
 
     async def get_live_kpis(self, db: AsyncSession) -> dict:
         """
         Get real-time KPIs for the dashboard.
-        
+
+        Every figure comes from a single statement: session metrics are FILTERed
+        aggregates over one pass of chat_sessions, CSAT and HUMAN-mode users are
+        scalar subqueries. Dashboards read the cached copy maintained by
+        kpi_snapshot_service rather than calling this directly.
+
         Returns:
             Dict with waiting, active, FRT, resolution time, CSAT, FCR
         """
-        # Waiting/Active counts
-        waiting = await db.scalar(
-            select(func.count()).where(ChatSession.status == SessionStatus.WAITING)
-        )
-        active = await db.scalar(
-            select(func.count()).where(ChatSession.status == SessionStatus.ACTIVE)
-        )
+        now = datetime.now(timezone.utc)
+        hour_ago = now - timedelta(hours=1)
+        day_ago = now - timedelta(days=1)
+        week_ago = now - timedelta(days=7)
+        today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+        frt = func.extract("epoch", ChatSession.first_response_at - ChatSession.claimed_at)
+        resolution = func.extract("epoch", ChatSession.closed_at - ChatSession.started_at)
+        closed_this_week = and_(ChatSession.status == SessionStatus.CLOSED, ChatSession.closed_at > week_ago)
 
-        # Average First Response Time (last hour)
-        hour_ago = datetime.now(timezone.utc) - timedelta(hours=1)
-        avg_frt_result = await db.execute(
-            select(
-                func.avg(
-                    func.extract('epoch', ChatSession.first_response_at - ChatSession.claimed_at)
+        row = (
+            await db.execute(
+                select(
+                    func.count().filter(ChatSession.status == SessionStatus.WAITING).label("waiting"),
+                    func.count().filter(ChatSession.status == SessionStatus.ACTIVE).label("active"),
+                    # Average First Response Time (last hour)
+                    func.avg(frt).filter(
+                        ChatSession.first_response_at.isnot(None), ChatSession.claimed_at > hour_ago
+                    ).label("avg_frt"),
+                    # Average Resolution Time (today)
+                    func.avg(resolution).filter(
+                        ChatSession.status == SessionStatus.CLOSED, ChatSession.closed_at > today_start
+                    ).label("avg_resolution"),
+                    func.count().filter(ChatSession.started_at > today_start).label("sessions_today"),
+                    # FCR (last 7 days): closed sessions not followed by another within 24h
+                    func.count().filter(closed_this_week).label("fcr_total"),
+                    func.count().filter(closed_this_week, ChatSession.reopened_within_24h.is_(False)).label("fcr_resolved"),
+                    # Abandonment (last 7 days)
+                    func.count().filter(ChatSession.closed_at > week_ago, ChatSession.abandoned).label("abandoned"),
+                    func.count().filter(ChatSession.claimed_at > week_ago).label("claimed"),
+                    # SLA breach events (last 24 hours)
+                    func.count().filter(
+                        ChatSession.claimed_at >= day_ago,
+                        ChatSession.queue_wait_seconds > settings.SLA_MAX_QUEUE_WAIT_SECONDS,
+                    ).label("queue_wait_breaches"),
+                    func.count().filter(
+                        ChatSession.first_response_at >= day_ago, frt > settings.SLA_MAX_FRT_SECONDS
+                    ).label("frt_breaches"),
+                    func.count().filter(
+                        ChatSession.closed_at >= day_ago, resolution > settings.SLA_MAX_RESOLUTION_SECONDS
+                    ).label("resolution_breaches"),
+                    # CSAT (last 24 hours)
+                    select(func.avg(CsatResponse.score))
+                    .where(CsatResponse.created_at > day_ago)
+                    .scalar_subquery()
+                    .label("csat_avg"),
+                    select(func.count(User.id))
+                    .where(User.chat_mode == ChatMode.HUMAN)
+                    .scalar_subquery()
+                    .label("human_mode_users"),
                 )
-            ).where(
-                ChatSession.first_response_at.isnot(None),
-                ChatSession.claimed_at > hour_ago
-            )
-        )
-        avg_frt = avg_frt_result.scalar() or 0
-
-        # Average Resolution Time (today)
-        today_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
-        avg_resolution_result = await db.execute(
-            select(
-                func.avg(
-                    func.extract('epoch', ChatSession.closed_at - ChatSession.started_at)
+                # Only open sessions and those touched in the last week can
+                # contribute; each branch is served by an index.
+                .where(
+                    or_(
+                        ChatSession.status.in_([SessionStatus.WAITING, SessionStatus.ACTIVE]),
+                        ChatSession.started_at > week_ago,
+                        ChatSession.claimed_at > week_ago,
+                        ChatSession.closed_at > week_ago,
+                    )
                 )
-            ).where(
-                ChatSession.status == SessionStatus.CLOSED,
-                ChatSession.closed_at > today_start
             )
-        )
-        avg_resolution = avg_resolution_result.scalar() or 0
-
-        # CSAT (last 24 hours)
-        day_ago = datetime.now(timezone.utc) - timedelta(days=1)
-        csat_result = await db.execute(
-            select(func.avg(CsatResponse.score)).where(
-                CsatResponse.created_at > day_ago
-            )
-        )
-        csat_avg = csat_result.scalar() or 0
+        ).one()
 
-        # FCR Rate (last 7 days)
-        fcr_rate = await self.calculate_fcr_rate(db, days=7)
-        abandonment_rate = await self.calculate_abandonment_rate(db, days=7)
-        sla_breach_events_24h = await self.calculate_sla_breach_events(db, hours=24)
-
-        # Sessions today
-        sessions_today = await db.scalar(
-            select(func.count()).where(
-                ChatSession.started_at > today_start
-            )
-        )
-        
-        # Total users in HUMAN mode
-        human_mode_users = await db.scalar(
-            select(func.count()).where(User.chat_mode == ChatMode.HUMAN)
-        )
+        avg_frt = float(row.avg_frt or 0)
+        avg_resolution = float(row.avg_resolution or 0)
+        csat_avg = float(row.csat_avg or 0)
+        fcr_rate = (row.fcr_resolved / row.fcr_total) * 100 if row.fcr_total else 0
+        abandonment_total = row.abandoned + row.claimed
+        abandonment_rate = (row.abandoned / abandonment_total) * 100 if abandonment_total else 0.0
+        sla_breach_events_24h = row.queue_wait_breaches + row.frt_breaches + row.resolution_breaches
 
         return {
-            "waiting": waiting or 0,
-            "active": active or 0,
+            "waiting": row.waiting or 0,
+            "active": row.active or 0,
             "avg_first_response_seconds": round(avg_frt, 1),
             "avg_resolution_seconds": round(avg_resolution, 1),
             "csat_average": round(csat_avg, 2) if csat_avg else 0,
@@ -98,88 +116,43 @@ class AnalyticsService:
             "fcr_rate": round(fcr_rate, 1),
             "abandonment_rate": round(abandonment_rate, 1),
             "sla_breach_events_24h": int(sla_breach_events_24h),
-            "sessions_today": sessions_today or 0,
-            "human_mode_users": human_mode_users or 0,
+            "sessions_today": row.sessions_today or 0,
+            "human_mode_users": row.human_mode_users or 0,
             "timestamp": datetime.now(timezone.utc).isoformat()
         }
 
     async def emit_live_kpis_update(self, db: AsyncSession = None) -> None:
-        """Emit live KPI updates to WebSocket analytics subscribers.
+        """Signal that live KPIs changed.
 
-        Uses its own DB session so callers are never disrupted by a
-        broadcast failure.  The ``db`` parameter is accepted for
-        backward-compatibility but ignored — a fresh session is always
-        created internally.
+        Marks the shared KPI snapshot dirty; the snapshot leader recomputes it
+        (at most every KPI_SNAPSHOT_MIN_INTERVAL_SECONDS) and pushes it to
+        analytics subscribers on every server. Never raises. The ``db``
+        parameter is accepted for backward-compatibility but ignored.
         """
         try:
-            from app.core.websocket_manager import ws_manager
-            from app.schemas.ws_events import WSEventType
-
-            async with AsyncSessionLocal() as session:
-                kpis = await self.get_live_kpis(session)
-                await ws_manager.broadcast_analytics_update(
-                    {
-                        "type": WSEventType.ANALYTICS_UPDATE.value,
-                        "payload": kpis,
-                        "timestamp": datetime.now(timezone.utc).isoformat(),
-                    }
-                )
+            from app.services.kpi_snapshot_service import kpi_snapshot_service
+
+            await kpi_snapshot_service.mark_dirty()
         except Exception as e:
-            logger.warning("KPI broadcast failed (non-fatal): %s", e)
+            logger.warning("KPI dirty mark failed (non-fatal): %s", e)
 
     async def calculate_fcr_rate(self, db: AsyncSession, days: int = 7) -> float:
         """
         Calculate First Contact Resolution rate.
-        
-        A session is "first contact resolved" if:
-        - Not reopened within 24 hours
-        - Has a CSAT score >= 4 (or no CSAT but was closed normally)
-        
+
+        A closed session is "first contact resolved" unless the same user
+        started another session within 24 hours of its close; that outcome is
+        recorded on the session as ``reopened_within_24h``.
+
         Args:
             db: Database session
             days: Lookback period in days
-            
+
         Returns:
             FCR rate as percentage (0-100)
         """
         cutoff = datetime.now(timezone.utc) - timedelta(days=days)
-
-        closed_sessions = (
-            select(
-                ChatSession.id.label("id"),
-                ChatSession.line_user_id.label("line_user_id"),
-                ChatSession.closed_at.label("closed_at"),
-            )
-            .where(
-                ChatSession.status == SessionStatus.CLOSED,
-                ChatSession.closed_at > cutoff
-            )
-            .subquery()
-        )
-
-        total_sessions = await db.scalar(
-            select(func.count()).select_from(closed_sessions)
-        )
-        if not total_sessions:
-            return 0
-
-        reopened_exists = exists(
-            select(ChatSession.id).where(
-                and_(
-                    ChatSession.line_user_id == closed_sessions.c.line_user_id,
-                    ChatSession.started_at > closed_sessions.c.closed_at,
-                    ChatSession.started_at < closed_sessions.c.closed_at + timedelta(hours=24),
-                )
-            )
-        )
-
-        fcr_count = await db.scalar(
-            select(func.count())
-            .select_from(closed_sessions)
-            .where(~reopened_exists)
-        )
-
-        return ((fcr_count or 0) / total_sessions) * 100
+        return await self._fcr_rate(db, ChatSession.closed_at > cutoff)
 
     async def calculate_fcr_rate_window(
         self,
@@ -188,35 +161,21 @@ class AnalyticsService:
         end: datetime,
     ) -> float:
         """Calculate FCR within an explicit closed_at time window."""
-        closed_sessions = (
-            select(
-                ChatSession.id.label("id"),
-                ChatSession.line_user_id.label("line_user_id"),
-                ChatSession.closed_at.label("closed_at"),
-            )
-            .where(
-                ChatSession.status == SessionStatus.CLOSED,
-                ChatSession.closed_at >= start,
-                ChatSession.closed_at < end,
+        return await self._fcr_rate(db, ChatSession.closed_at >= start, ChatSession.closed_at < end)
+
+    @staticmethod
+    async def _fcr_rate(db: AsyncSession, *conditions) -> float:
+        total, resolved = (
+            await db.execute(
+                select(
+                    func.count(ChatSession.id),
+                    func.count(ChatSession.id).filter(ChatSession.reopened_within_24h.is_(False)),
+                ).where(ChatSession.status == SessionStatus.CLOSED, *conditions)
             )
-            .subquery()
-        )
-        total_sessions = await db.scalar(select(func.count()).select_from(closed_sessions))
-        if not total_sessions:
+        ).one()
+        if not total:
             return 0.0
-        reopened_exists = exists(
-            select(ChatSession.id).where(
-                and_(
-                    ChatSession.line_user_id == closed_sessions.c.line_user_id,
-                    ChatSession.started_at > closed_sessions.c.closed_at,
-                    ChatSession.started_at < closed_sessions.c.closed_at + timedelta(hours=24),
-                )
-            )
-        )
-        fcr_count = await db.scalar(
-            select(func.count()).select_from(closed_sessions).where(~reopened_exists)
-        )
-        return ((fcr_count or 0) / total_sessions) * 100
+        return ((resolved or 0) / total) * 100
 
     async def calculate_abandonment_rate(self, db: AsyncSession, days: int = 7) -> float:
         """
@@ -224,31 +183,13 @@ class AnalyticsService:
 
         Formula:
             abandoned / (abandoned + claimed) * 100
-        Where abandoned = closed_by SYSTEM_TIMEOUT, claimed = claimed_at is not null
+        Where abandoned = sessions flagged ``abandoned`` by cleanup, claimed = claimed_at is not null
         """
         cutoff = datetime.now(timezone.utc) - timedelta(days=days)
-
-        abandoned = await db.scalar(
-            select(func.count(ChatSession.id)).where(
-                ChatSession.closed_at > cutoff,
-                ChatSession.closed_by == "SYSTEM_TIMEOUT",
-            )
+        return await self._abandonment_rate(
+            db, ChatSession.closed_at > cutoff, ChatSession.claimed_at > cutoff
         )
 
-        claimed = await db.scalar(
-            select(func.count(ChatSession.id)).where(
-                ChatSession.claimed_at > cutoff,
-                ChatSession.claimed_at.isnot(None),
-            )
-        )
-
-        abandoned_count = abandoned or 0
-        claimed_count = claimed or 0
-        total = abandoned_count + claimed_count
-        if total == 0:
-            return 0.0
-        return (abandoned_count / total) * 100
-
     async def calculate_abandonment_rate_window(
         self,
         db: AsyncSession,
@@ -256,44 +197,39 @@ class AnalyticsService:
         end: datetime,
     ) -> float:
         """Calculate abandonment rate for a specific time window."""
-        abandoned = await db.scalar(
-            select(func.count(ChatSession.id)).where(
-                ChatSession.closed_at >= start,
-                ChatSession.closed_at < end,
-                ChatSession.closed_by == "SYSTEM_TIMEOUT",
-            )
+        return await self._abandonment_rate(
+            db,
+            and_(ChatSession.closed_at >= start, ChatSession.closed_at < end),
+            and_(ChatSession.claimed_at >= start, ChatSession.claimed_at < end),
         )
-        claimed = await db.scalar(
-            select(func.count(ChatSession.id)).where(
-                ChatSession.claimed_at >= start,
-                ChatSession.claimed_at < end,
-                ChatSession.claimed_at.isnot(None),
+
+    @staticmethod
+    async def _abandonment_rate(db: AsyncSession, closed_in_range, claimed_in_range) -> float:
+        abandoned_in_range = and_(closed_in_range, ChatSession.abandoned)
+        abandoned, claimed = (
+            await db.execute(
+                select(
+                    func.count(ChatSession.id).filter(abandoned_in_range),
+                    func.count(ChatSession.id).filter(claimed_in_range),
+                ).where(or_(abandoned_in_range, claimed_in_range))
             )
-        )
-        abandoned_count = abandoned or 0
-        claimed_count = claimed or 0
-        total = abandoned_count + claimed_count
+        ).one()
+        total = (abandoned or 0) + (claimed or 0)
         if total == 0:
             return 0.0
-        return (abandoned_count / total) * 100
+        return ((abandoned or 0) / total) * 100
 
     async def get_session_volume(self, db: AsyncSession, days: int = 7) -> list[dict]:
-        """Get daily session counts for the last N days."""
+        """Get daily session counts for the last N days (from hourly rollups)."""
         safe_days = max(1, min(days, 30))
-        today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        now = datetime.now(timezone.utc)
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
         start = today - timedelta(days=safe_days - 1)
-        day_bucket = func.date_trunc(literal_column("'day'"), ChatSession.started_at)
 
-        result = await db.execute(
-            select(
-                day_bucket.label("day"),
-                func.count(ChatSession.id).label("count"),
-            )
-            .where(ChatSession.started_at >= start)
-            .group_by(day_bucket)
-            .order_by(day_bucket)
-        )
-        raw = {row.day.date().isoformat(): int(row.count) for row in result.all() if row.day}
+        raw: dict[str, int] = {}
+        for row in await analytics_rollup_service.hourly_series(db, start, now):
+            key = row["bucket"].date().isoformat()
+            raw[key] = raw.get(key, 0) + int(row["sessions_started"])
 
         series: list[dict] = []
         cursor = start.date()
@@ -304,94 +240,73 @@ class AnalyticsService:
         return series
 
     async def get_peak_hours_heatmap(self, db: AsyncSession, days: int = 7) -> list[dict]:
-        """Get message volume grouped by day-of-week and hour."""
+        """Get message volume grouped by day-of-week (0 = Sunday) and UTC hour."""
         safe_days = max(1, min(days, 30))
-        cutoff = datetime.now(timezone.utc) - timedelta(days=safe_days)
-        result = await db.execute(
-            select(
-                func.extract("dow", Message.created_at).label("dow"),
-                func.extract("hour", Message.created_at).label("hour"),
-                func.count(Message.id).label("message_count"),
-            )
-            .where(Message.created_at >= cutoff)
-            .group_by(
-                func.extract("dow", Message.created_at),
-                func.extract("hour", Message.created_at),
-            )
-        )
+        now = datetime.now(timezone.utc)
+        counts: dict[tuple[int, int], int] = {}
+        for row in await analytics_rollup_service.hourly_series(db, now - timedelta(days=safe_days), now):
+            bucket = row["bucket"]
+            key = ((bucket.weekday() + 1) % 7, bucket.hour)
+            counts[key] = counts.get(key, 0) + int(row["messages_incoming"] + row["messages_outgoing"])
         return [
-            {
-                "day_of_week": int(row.dow),
-                "hour": int(row.hour),
-                "message_count": int(row.message_count),
-            }
-            for row in result.all()
+            {"day_of_week": dow, "hour": hour, "message_count": count}
+            for (dow, hour), count in sorted(counts.items())
+            if count
         ]
 
     async def get_conversation_funnel(self, db: AsyncSession, days: int = 7) -> dict:
         """Get Bot -> Human -> Resolved funnel metrics."""
         safe_days = max(1, min(days, 30))
-        cutoff = datetime.now(timezone.utc) - timedelta(days=safe_days)
+        now = datetime.now(timezone.utc)
+        cutoff = now - timedelta(days=safe_days)
 
-        bot_entries = await db.scalar(
-            select(func.count(func.distinct(Message.line_user_id))).where(
-                Message.created_at >= cutoff,
-                Message.direction == MessageDirection.INCOMING,
-                Message.line_user_id.isnot(None),
-            )
-        )
-        human_handoff = await db.scalar(
-            select(func.count(ChatSession.id)).where(
-                ChatSession.started_at >= cutoff,
-                ChatSession.claimed_at.isnot(None),
-            )
-        )
-        resolved = await db.scalar(
-            select(func.count(ChatSession.id)).where(
-                ChatSession.closed_at >= cutoff,
-                ChatSession.status == SessionStatus.CLOSED,
-            )
-        )
+        series = await analytics_rollup_service.hourly_series(db, cutoff, now)
+        bot_entries = await analytics_rollup_service.count_active_users(db, cutoff, now)
 
         return {
             "bot_entries": int(bot_entries or 0),
-            "human_handoff": int(human_handoff or 0),
-            "resolved": int(resolved or 0),
+            "human_handoff": int(sum_facts(series, "sessions_claimed")),
+            "resolved": int(sum_facts(series, "sessions_closed")),
         }
 
     async def get_percentiles(self, db: AsyncSession, days: int = 7) -> dict:
-        """Get P50/P90/P99 for FRT and resolution times."""
+        """
+        Get P50/P90/P99 for FRT and resolution times.
+
+        Percentiles are computed in PostgreSQL with percentile_cont, so only six
+        numbers leave the database regardless of how many sessions are in range.
+        """
         safe_days = max(1, min(days, 30))
         cutoff = datetime.now(timezone.utc) - timedelta(days=safe_days)
 
-        frt_rows = await db.execute(
-            select(func.extract("epoch", ChatSession.first_response_at - ChatSession.claimed_at))
-            .where(
-                ChatSession.first_response_at.isnot(None),
-                ChatSession.claimed_at >= cutoff,
-            )
+        frt = await self._duration_percentiles(
+            db,
+            func.extract("epoch", ChatSession.first_response_at - ChatSession.claimed_at),
+            ChatSession.first_response_at.isnot(None),
+            ChatSession.claimed_at >= cutoff,
         )
-        resolution_rows = await db.execute(
-            select(func.extract("epoch", ChatSession.closed_at - ChatSession.started_at))
-            .where(
-                ChatSession.closed_at.isnot(None),
-                ChatSession.closed_at >= cutoff,
-            )
+        resolution = await self._duration_percentiles(
+            db,
+            func.extract("epoch", ChatSession.closed_at - ChatSession.started_at),
+            ChatSession.closed_at.isnot(None),
+            ChatSession.closed_at >= cutoff,
         )
-        frt_values = [float(v[0]) for v in frt_rows.all() if v[0] is not None]
-        resolution_values = [float(v[0]) for v in resolution_rows.all() if v[0] is not None]
+        return {"frt": frt, "resolution": resolution}
 
+    @staticmethod
+    async def _duration_percentiles(db: AsyncSession, duration, *conditions) -> dict:
+        """P50/P90/P99 of a duration expression (seconds) over matching sessions."""
+        row = (
+            await db.execute(
+                select(*(
+                    func.percentile_cont(fraction).within_group(duration).label(label)
+                    for label, fraction in PERCENTILES
+                )).where(*conditions)
+            )
+        ).first()
         return {
-            "frt": {
-                "p50": round(self._percentile(frt_values, 50), 1),
-                "p90": round(self._percentile(frt_values, 90), 1),
-                "p99": round(self._percentile(frt_values, 99), 1),
-            },
-            "resolution": {
-                "p50": round(self._percentile(resolution_values, 50), 1),
-                "p90": round(self._percentile(resolution_values, 90), 1),
-                "p99": round(self._percentile(resolution_values, 99), 1),
-            },
+            label: round(float(getattr(row, label) or 0), 1) if row is not None else 0.0
+            for label, _ in PERCENTILES
         }
 
     async def get_kpi_trends(self, db: AsyncSession) -> dict:
@@ -403,43 +318,24 @@ class AnalyticsService:
 
         current = await self.get_live_kpis(db)
 
-        yesterday_sessions = await db.scalar(
-            select(func.count(ChatSession.id)).where(
-                ChatSession.started_at >= yesterday_start,
-                ChatSession.started_at < yesterday_end,
-            )
-        )
-        yesterday_frt = (
-            await db.execute(
-                select(func.avg(func.extract("epoch", ChatSession.first_response_at - ChatSession.claimed_at)))
-                .where(
-                    ChatSession.first_response_at.isnot(None),
-                    ChatSession.claimed_at >= yesterday_start,
-                    ChatSession.claimed_at < yesterday_end,
-                )
-            )
-        ).scalar() or 0
-        yesterday_resolution = (
-            await db.execute(
-                select(func.avg(func.extract("epoch", ChatSession.closed_at - ChatSession.started_at)))
-                .where(
-                    ChatSession.closed_at.isnot(None),
-                    ChatSession.closed_at >= yesterday_start,
-                    ChatSession.closed_at < yesterday_end,
-                )
-            )
-        ).scalar() or 0
-        yesterday_csat = (
-            await db.execute(
-                select(func.avg(CsatResponse.score)).where(
-                    CsatResponse.created_at >= yesterday_start,
-                    CsatResponse.created_at < yesterday_end,
-                )
-            )
-        ).scalar() or 0
+        yesterday = await analytics_rollup_service.hourly_series(db, yesterday_start, yesterday_end)
+
+        def _avg(sum_column: str, count_column: str) -> float:
+            count = sum_facts(yesterday, count_column)
+            return sum_facts(yesterday, sum_column) / count if count else 0
+
+        yesterday_sessions = sum_facts(yesterday, "sessions_started")
+        yesterday_frt = _avg("frt_sum_seconds", "frt_count")
+        yesterday_resolution = _avg("resolution_sum_seconds", "resolution_count")
+        yesterday_csat = _avg("csat_sum", "csat_count")
         yesterday_csat_pct = (float(yesterday_csat) / 5) * 100 if yesterday_csat else 0
         yesterday_fcr = await self.calculate_fcr_rate_window(db, yesterday_start, yesterday_end)
-        yesterday_abandon = await self.calculate_abandonment_rate_window(db, yesterday_start, yesterday_end)
+        yesterday_abandoned = sum_facts(yesterday, "sessions_abandoned")
+        yesterday_claimed = sum_facts(yesterday, "sessions_claimed")
+        yesterday_abandon = (
+            yesterday_abandoned / (yesterday_abandoned + yesterday_claimed) * 100
+            if yesterday_abandoned + yesterday_claimed else 0.0
+        )
 
         def trend(current_value: float, previous_value: float) -> dict:
             delta = float(current_value) - float(previous_value)
@@ -512,10 +408,8 @@ class AnalyticsService:
 
         queue_wait_count = await db.scalar(
             select(func.count(ChatSession.id)).where(
-                ChatSession.claimed_at.isnot(None),
-                ChatSession.started_at.isnot(None),
                 ChatSession.claimed_at >= cutoff,
-                func.extract("epoch", ChatSession.claimed_at - ChatSession.started_at) > settings.SLA_MAX_QUEUE_WAIT_SECONDS,
+                ChatSession.queue_wait_seconds > settings.SLA_MAX_QUEUE_WAIT_SECONDS,
             )
         )
 
@@ -586,13 +480,11 @@ class AnalyticsService:
             days=days,
         )
 
+        operators = await user_loader(db).load_many(row.operator_id for row in rows)
+
         performance = []
         for row in rows:
-            # Get operator details
-            user_result = await db.execute(
-                select(User).where(User.id == row.operator_id)
-            )
-            user = user_result.scalar_one_or_none()
+            user = operators.get(row.operator_id)
             availability = availability_map.get(
                 str(row.operator_id),
                 {"availability_seconds": 0.0, "availability_percent": 0.0},
@@ -686,47 +578,19 @@ class AnalyticsService:
         Returns:
             List of hourly stats dicts
         """
-        from app.models.message import Message
-        
-        cutoff = datetime.now(timezone.utc) - timedelta(hours=hours)
-        
-        # Get messages per hour
-        result = await db.execute(
-            select(
-                func.date_trunc('hour', Message.created_at).label("hour"),
-                func.count().label("count")
-            ).where(
-                Message.created_at > cutoff
-            ).group_by(
-                func.date_trunc('hour', Message.created_at)
-            ).order_by("hour")
-        )
-        
-        rows = result.all()
-        
+        now = datetime.now(timezone.utc)
+        series = await analytics_rollup_service.hourly_series(db, now - timedelta(hours=hours), now)
+
         stats = []
-        for row in rows:
-            stats.append({
-                "hour": row.hour.isoformat() if row.hour else None,
-                "message_count": row.count
-            })
-        
-        return stats
+        for row in series:
+            message_count = int(row["messages_incoming"] + row["messages_outgoing"])
+            if message_count:
+                stats.append({
+                    "hour": row["bucket"].isoformat(),
+                    "message_count": message_count
+                })
 
-    @staticmethod
-    def _percentile(values: list[float], percentile: int) -> float:
-        """Calculate percentile using nearest-rank with linear interpolation."""
-        if not values:
-            return 0.0
-        p = max(0, min(percentile, 100)) / 100
-        ordered = sorted(values)
-        if len(ordered) == 1:
-            return ordered[0]
-        idx = p * (len(ordered) - 1)
-        lower = int(idx)
-        upper = min(lower + 1, len(ordered) - 1)
-        weight = idx - lower
-        return ordered[lower] * (1 - weight) + ordered[upper] * weight
+        return stats
 
 
 # Global analytics service instance
@@ -0,0 +1,345 @@
+"""Chunked, resumable multicast delivery for targeted broadcasts."""
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterable, Dict, Iterable, List, Optional, Union
+
+from linebot.v3.messaging import MulticastRequest
+from linebot.v3.messaging.exceptions import ApiException
+from sqlalchemy import case, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.line_rate_limiter import (
+    LineEndpoint,
+    LinePriority,
+    LineRateLimitTimeout,
+    line_rate_limiter,
+    retry_after_seconds,
+)
+from app.core.websocket_manager import ws_manager
+from app.db.session import AsyncSessionLocal
+from app.models.broadcast import Broadcast, BroadcastStatus
+from app.models.broadcast_chunk import BroadcastChunk, ChunkStatus
+from app.schemas.ws_events import WSEventType
+
+logger = logging.getLogger(__name__)
+
+MULTICAST_MAX_RECIPIENTS = 500  # LINE multicast limit per request
+CHUNK_INSERT_BATCH = 100  # Chunk rows per INSERT round trip
+
+
+async def _iterate(recipients: Union[Iterable[str], AsyncIterable[str]]):
+    if hasattr(recipients, "__aiter__"):
+        async for recipient in recipients:
+            yield recipient
+    else:
+        for recipient in recipients:
+            yield recipient
+
+
+class BroadcastDispatchService:
+    """
+    Splits a targeted broadcast into persisted 500-recipient chunks and delivers them.
+
+    The send request only writes chunk rows; the dispatcher (app.tasks.broadcast_dispatcher)
+    claims due chunks with SKIP LOCKED, multicasts each with its own X-Line-Retry-Key
+    and records the outcome per chunk. A crashed worker's lease expires and the chunk
+    is picked up again; the retry key makes LINE reject the duplicate (409) instead of
+    sending twice.
+    """
+
+    async def prepare_chunks(
+        self,
+        db: AsyncSession,
+        broadcast: Broadcast,
+        recipients: Union[Iterable[str], AsyncIterable[str]],
+    ) -> int:
+        """
+        Write chunk rows for `broadcast` in the caller's transaction (no commit).
+
+        Duplicate recipients are dropped. When chunks already exist the broadcast is
+        being resumed and nothing is written. Returns the number of chunks.
+        """
+        existing = await db.scalar(
+            select(func.count(BroadcastChunk.id)).where(BroadcastChunk.broadcast_id == broadcast.id)
+        )
+        if existing:
+            return existing
+
+        now = datetime.now(timezone.utc)
+        seen = set()
+        current: List[str] = []
+        rows: List[dict] = []
+        seq = 0
+        total = 0
+
+        def _close_chunk():
+            nonlocal seq, current
+            rows.append({
+                "broadcast_id": broadcast.id,
+                "seq": seq,
+                "recipients": current,
+                "recipient_count": len(current),
+                "retry_key": str(uuid.uuid4()),
+                "status": ChunkStatus.PENDING.value,
+                "attempts": 0,
+                "next_attempt_at": now,
+            })
+            seq += 1
+            current = []
+
+        async for recipient in _iterate(recipients):
+            if not recipient or recipient in seen:
+                continue
+            seen.add(recipient)
+            current.append(recipient)
+            total += 1
+            if len(current) == MULTICAST_MAX_RECIPIENTS:
+                _close_chunk()
+                if len(rows) >= CHUNK_INSERT_BATCH:
+                    await db.execute(insert(BroadcastChunk), rows)
+                    rows = []
+        if current:
+            _close_chunk()
+        if rows:
+            await db.execute(insert(BroadcastChunk), rows)
+
+        broadcast.total_recipients = total
+        broadcast.success_count = 0
+        broadcast.failure_count = 0
+        return seq
+
+    async def claim_due(self, db: AsyncSession, limit: int) -> List[BroadcastChunk]:
+        """Claim up to `limit` due chunks and lease them to this worker."""
+        now = datetime.now(timezone.utc)
+        result = await db.execute(
+            select(BroadcastChunk)
+            .where(
+                BroadcastChunk.status == ChunkStatus.PENDING.value,
+                BroadcastChunk.next_attempt_at <= now,
+            )
+            .order_by(BroadcastChunk.broadcast_id, BroadcastChunk.seq)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        chunks = list(result.scalars().all())
+        lease_until = now + timedelta(seconds=settings.BROADCAST_CHUNK_LEASE_SECONDS)
+        for chunk in chunks:
+            chunk.attempts = (chunk.attempts or 0) + 1
+            chunk.next_attempt_at = lease_until
+        await db.commit()
+        return chunks
+
+    async def deliver_chunk(self, api, chunk: BroadcastChunk, messages: list) -> str:
+        """Multicast one claimed chunk, persist the outcome and return the chunk status."""
+        error: Optional[str] = None
+        retryable = False
+        retry_after: Optional[float] = None
+        try:
+            await line_rate_limiter.call(
+                LineEndpoint.MULTICAST,
+                lambda: api.multicast(
+                    MulticastRequest(to=chunk.recipients, messages=messages),
+                    x_line_retry_key=chunk.retry_key,
+                ),
+                priority=LinePriority.BULK,
+            )
+        except LineRateLimitTimeout as exc:
+            # Throttled before reaching LINE: wait for capacity without
+            # spending one of the chunk's attempts.
+            logger.info("Broadcast %s chunk %s throttled, rescheduling: %s", chunk.broadcast_id, chunk.seq, exc)
+            await self._reschedule(
+                chunk, settings.BROADCAST_CHUNK_RETRY_BASE_SECONDS, str(exc), attempts=BroadcastChunk.attempts - 1
+            )
+            return ChunkStatus.PENDING.value
+        except ApiException as exc:
+            status_code = exc.status or 0
+            if status_code == 409:
+                # LINE already accepted a request with this retry key.
+                logger.info("Broadcast %s chunk %s already delivered (retry key accepted)", chunk.broadcast_id, chunk.seq)
+            else:
+                error = f"LINE API {status_code}: {exc.reason}"
+                retryable = status_code == 429 or status_code >= 500 or status_code == 0
+                retry_after = retry_after_seconds(exc)
+        except Exception as exc:
+            error = str(exc) or exc.__class__.__name__
+            retryable = not isinstance(exc, (ValueError, TypeError))
+
+        now = datetime.now(timezone.utc)
+        if error is not None and retryable and (chunk.attempts or 0) < settings.BROADCAST_CHUNK_MAX_ATTEMPTS:
+            backoff = settings.BROADCAST_CHUNK_RETRY_BASE_SECONDS * (2 ** max((chunk.attempts or 1) - 1, 0))
+            backoff = max(backoff, retry_after or 0)
+            logger.warning(
+                "Broadcast %s chunk %s attempt %s failed, retrying in %ss: %s",
+                chunk.broadcast_id, chunk.seq, chunk.attempts, backoff, error,
+            )
+            await self._reschedule(chunk, backoff, error)
+            return ChunkStatus.PENDING.value
+
+        if error is None:
+            status = ChunkStatus.SENT.value
+            values = {"status": status, "sent_at": now, "last_error": None}
+            counter = {"success_count": Broadcast.success_count + chunk.recipient_count}
+        else:
+            status = ChunkStatus.FAILED.value
+            values = {"status": status, "last_error": error}
+            counter = {"failure_count": Broadcast.failure_count + chunk.recipient_count}
+            logger.error(
+                "Broadcast %s chunk %s failed permanently after %s attempts: %s",
+                chunk.broadcast_id, chunk.seq, chunk.attempts, error,
+            )
+
+        async with AsyncSessionLocal() as db:
+            # Only the worker that moves the chunk out of PENDING counts it, so an
+            # expired lease racing a slow worker cannot double-count recipients.
+            moved = await db.execute(
+                update(BroadcastChunk)
+                .where(BroadcastChunk.id == chunk.id, BroadcastChunk.status == ChunkStatus.PENDING.value)
+                .values(**values)
+                .returning(BroadcastChunk.id)
+            )
+            if moved.first() is None:
+                await db.rollback()
+                return status
+            progress = (
+                await db.execute(
+                    update(Broadcast)
+                    .where(Broadcast.id == chunk.broadcast_id)
+                    .values(**counter)
+                    .returning(
+                        Broadcast.status,
+                        Broadcast.total_recipients,
+                        Broadcast.success_count,
+                        Broadcast.failure_count,
+                    )
+                )
+            ).first()
+            await db.commit()
+
+        if progress is not None:
+            await self._broadcast_progress(chunk.broadcast_id, progress._asdict())
+        return status
+
+    async def _reschedule(self, chunk: BroadcastChunk, delay: float, error: str, **values) -> None:
+        """Make a claimed chunk due again after `delay` seconds."""
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(BroadcastChunk)
+                .where(BroadcastChunk.id == chunk.id)
+                .values(
+                    next_attempt_at=datetime.now(timezone.utc) + timedelta(seconds=delay),
+                    last_error=error,
+                    **values,
+                )
+            )
+            await db.commit()
+
+    async def load_messages(self, db: AsyncSession, broadcast_ids: Iterable[int], build) -> Dict[int, Optional[list]]:
+        """
+        Build LINE messages for each broadcast that is still SENDING.
+
+        Broadcasts that were cancelled (or are otherwise no longer SENDING) map to None.
+        """
+        result = await db.execute(select(Broadcast).where(Broadcast.id.in_(list(broadcast_ids))))
+        messages: Dict[int, Optional[list]] = {}
+        for broadcast in result.scalars().all():
+            if broadcast.status == BroadcastStatus.SENDING:
+                messages[broadcast.id] = build(broadcast) or None
+            else:
+                messages[broadcast.id] = None
+        return messages
+
+    async def abandon_chunks(self, db: AsyncSession, broadcast_id: int, reason: str) -> int:
+        """
+        Fail every PENDING chunk of a broadcast that will not be sent (e.g. cancelled).
+
+        Their recipients count as failures in the same transaction, so finalize
+        cannot close a broadcast that reached nobody as COMPLETED.
+        """
+        abandoned = (
+            await db.execute(
+                update(BroadcastChunk)
+                .where(
+                    BroadcastChunk.broadcast_id == broadcast_id,
+                    BroadcastChunk.status == ChunkStatus.PENDING.value,
+                )
+                .values(status=ChunkStatus.FAILED.value, last_error=reason)
+                .returning(BroadcastChunk.recipient_count)
+            )
+        ).scalars().all()
+        if abandoned:
+            await db.execute(
+                update(Broadcast)
+                .where(Broadcast.id == broadcast_id)
+                .values(failure_count=Broadcast.failure_count + sum(abandoned))
+            )
+        await db.commit()
+        return len(abandoned)
+
+    async def finalize(self, db: AsyncSession, broadcast_id: int) -> bool:
+        """
+        Close a SENDING broadcast once none of its chunks are PENDING.
+
+        The broadcast ends COMPLETED when every recipient was reached and FAILED
+        otherwise. Safe to call from several workers: only one UPDATE matches.
+        """
+        pending = await db.scalar(
+            select(func.count(BroadcastChunk.id)).where(
+                BroadcastChunk.broadcast_id == broadcast_id,
+                BroadcastChunk.status == ChunkStatus.PENDING.value,
+            )
+        )
+        if pending:
+            return False
+
+        progress = (
+            await db.execute(
+                update(Broadcast)
+                .where(Broadcast.id == broadcast_id, Broadcast.status == BroadcastStatus.SENDING)
+                .values(
+                    status=case(
+                        (Broadcast.failure_count == 0, BroadcastStatus.COMPLETED),
+                        else_=BroadcastStatus.FAILED,
+                    ),
+                    sent_at=datetime.now(timezone.utc),
+                )
+                .returning(
+                    Broadcast.status,
+                    Broadcast.total_recipients,
+                    Broadcast.success_count,
+                    Broadcast.failure_count,
+                )
+            )
+        ).first()
+        await db.commit()
+        if progress is None:
+            return False
+
+        logger.info(
+            "Broadcast %s finished: success=%s, failed=%s",
+            broadcast_id, progress.success_count, progress.failure_count,
+        )
+        await self._broadcast_progress(broadcast_id, progress._asdict())
+        return True
+
+    async def _broadcast_progress(self, broadcast_id: int, progress: dict):
+        """Push delivery progress to analytics subscribers on every replica."""
+        status = progress.get("status")
+        try:
+            await ws_manager.publish_analytics_update({
+                "type": WSEventType.BROADCAST_PROGRESS.value,
+                "payload": {
+                    "broadcast_id": broadcast_id,
+                    "status": status.value if isinstance(status, BroadcastStatus) else status,
+                    "total_recipients": progress.get("total_recipients") or 0,
+                    "success_count": progress.get("success_count") or 0,
+                    "failure_count": progress.get("failure_count") or 0,
+                },
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+            })
+        except Exception as e:
+            logger.error(f"Failed to broadcast progress for broadcast {broadcast_id}: {e}")
+
+
+broadcast_dispatch_service = BroadcastDispatchService()
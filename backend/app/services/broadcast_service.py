@@ -4,7 +4,6 @@ from typing import Optional, List
 
 from linebot.v3.messaging import (
     BroadcastRequest,
-    MulticastRequest,
     TextMessage,
     ImageMessage,
     FlexMessage,
@@ -14,8 +13,11 @@ from sqlalchemy import select, func, desc
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.line_client import get_line_bot_api
+from app.core.line_rate_limiter import LineEndpoint, LinePriority, line_rate_limiter
 from app.models.broadcast import Broadcast, BroadcastStatus, BroadcastType
 from app.models.user import User
+from app.services.broadcast_dispatch_service import broadcast_dispatch_service
+from app.services.segment_service import segment_service
 
 logger = logging.getLogger(__name__)
 
@@ -156,54 +158,90 @@ class BroadcastService:
 
         return messages[:5]  # LINE API limit
 
+    # ------------------------------------------------------------------ #
+    #  Audience
+    # ------------------------------------------------------------------ #
+
+    def validate_audience(self, target_audience: str, target_filter: Optional[dict]) -> None:
+        """Reject a segment audience whose definition does not compile."""
+        if target_audience == "segment":
+            segment_service.validate((target_filter or {}).get("segment"))
+
+    def _recipients(self, broadcast: Broadcast):
+        """Recipient source for a targeted broadcast, or None when it has none."""
+        target_filter = broadcast.target_filter or {}
+        if broadcast.target_audience == "segment":
+            return segment_service.stream_line_user_ids(target_filter.get("segment"))
+        return target_filter.get("user_ids") or None
+
     # ------------------------------------------------------------------ #
     #  Send
     # ------------------------------------------------------------------ #
 
     async def send_broadcast(self, db: AsyncSession, broadcast: Broadcast) -> Broadcast:
-        """Send a broadcast to all followers using LINE Broadcast API."""
+        """
+        Send a broadcast now.
+
+        "all" audiences go out in one LINE Broadcast API call. Targeted audiences
+        (explicit user_ids or a server-side segment) are split into multicast
+        chunks and left SENDING for the broadcast dispatcher.
+        """
         if broadcast.status not in (BroadcastStatus.DRAFT, BroadcastStatus.SCHEDULED):
             raise ValueError(f"Cannot send broadcast in status {broadcast.status}")
 
         messages = self._build_messages(broadcast)
         if not messages:
             raise ValueError("Broadcast has no valid messages to send")
+        self.validate_audience(broadcast.target_audience, broadcast.target_filter)
 
         broadcast.status = BroadcastStatus.SENDING
         await db.commit()
 
+        return await self.deliver_broadcast(db, broadcast, messages)
+
+    async def deliver_broadcast(
+        self, db: AsyncSession, broadcast: Broadcast, messages: Optional[list] = None
+    ) -> Broadcast:
+        """Deliver a broadcast that is already marked SENDING and record the outcome."""
+        if messages is None:
+            messages = self._build_messages(broadcast)
+        if not messages:
+            broadcast.status = BroadcastStatus.FAILED
+            logger.error("Broadcast %s has no valid messages to send", broadcast.id)
+            await db.commit()
+            await db.refresh(broadcast)
+            return broadcast
+
         try:
             if broadcast.target_audience == "all":
-                await self.api.broadcast(
-                    BroadcastRequest(messages=messages)
+                await line_rate_limiter.call(
+                    LineEndpoint.BROADCAST,
+                    lambda: self.api.broadcast(BroadcastRequest(messages=messages)),
+                    priority=LinePriority.BULK,
                 )
                 broadcast.status = BroadcastStatus.COMPLETED
                 broadcast.sent_at = datetime.now(timezone.utc)
             else:
-                user_ids = broadcast.target_filter.get("user_ids", [])
-                if not user_ids:
+                recipients = self._recipients(broadcast)
+                if recipients is None:
                     broadcast.status = BroadcastStatus.FAILED
                     broadcast.failure_count = 1
                     logger.error("Broadcast %s has no target user IDs", broadcast.id)
                 else:
-                    sent = 0
-                    failed = 0
-                    for i in range(0, len(user_ids), 500):
-                        chunk = user_ids[i : i + 500]
-                        try:
-                            await self.api.multicast(
-                                MulticastRequest(to=chunk, messages=messages)
-                            )
-                            sent += len(chunk)
-                        except Exception as chunk_exc:
-                            failed += len(chunk)
-                            logger.error("Broadcast %s chunk %d failed: %s", broadcast.id, i // 500, chunk_exc)
-
-                    broadcast.total_recipients = len(user_ids)
-                    broadcast.success_count = sent
-                    broadcast.failure_count = failed
-                    broadcast.sent_at = datetime.now(timezone.utc)
-                    broadcast.status = BroadcastStatus.COMPLETED if failed == 0 else BroadcastStatus.FAILED
+                    # Multicast goes out chunk by chunk from the dispatcher; the
+                    # broadcast stays SENDING until its last chunk settles.
+                    chunks = await broadcast_dispatch_service.prepare_chunks(db, broadcast, recipients)
+                    if not chunks:
+                        broadcast.status = BroadcastStatus.COMPLETED
+                        broadcast.sent_at = datetime.now(timezone.utc)
+                        logger.info("Broadcast %s matched no recipients", broadcast.id)
+                    await db.commit()
+                    await db.refresh(broadcast)
+                    logger.info(
+                        "Broadcast %s queued for %s recipients in %s chunks",
+                        broadcast.id, broadcast.total_recipients, chunks,
+                    )
+                    return broadcast
 
             logger.info("Broadcast %s finished: success=%s, failed=%s", broadcast.id, broadcast.success_count, broadcast.failure_count)
 
@@ -216,11 +254,62 @@ class BroadcastService:
         await db.refresh(broadcast)
         return broadcast
 
+    async def claim_scheduled(
+        self,
+        db: AsyncSession,
+        broadcast_ids: List[int],
+        now: datetime,
+        misfire_grace_seconds: int,
+        misfire_policy: str = "send",
+    ) -> List[int]:
+        """
+        Atomically move due SCHEDULED broadcasts to SENDING and return their ids.
+
+        Rows another replica is already claiming are skipped (SKIP LOCKED), so each
+        broadcast is handed to the send path exactly once. Broadcasts later than
+        `misfire_grace_seconds` are still sent when `misfire_policy` is "send" and
+        marked FAILED when it is "skip".
+        """
+        if not broadcast_ids:
+            return []
+
+        result = await db.execute(
+            select(Broadcast)
+            .where(
+                Broadcast.id.in_(broadcast_ids),
+                Broadcast.status == BroadcastStatus.SCHEDULED,
+                Broadcast.scheduled_at <= now,
+            )
+            .order_by(Broadcast.scheduled_at)
+            .with_for_update(skip_locked=True)
+        )
+        claimed = []
+        for broadcast in result.scalars().all():
+            scheduled_at = broadcast.scheduled_at
+            if scheduled_at.tzinfo is None:
+                scheduled_at = scheduled_at.replace(tzinfo=timezone.utc)
+            late_seconds = (now - scheduled_at).total_seconds()
+            if late_seconds > misfire_grace_seconds and misfire_policy == "skip":
+                broadcast.status = BroadcastStatus.FAILED
+                logger.warning(
+                    "Broadcast %s misfired by %.0fs (grace %ss); not sending",
+                    broadcast.id, late_seconds, misfire_grace_seconds,
+                )
+                continue
+            if late_seconds > misfire_grace_seconds:
+                logger.warning("Broadcast %s misfired by %.0fs; sending late", broadcast.id, late_seconds)
+            broadcast.status = BroadcastStatus.SENDING
+            claimed.append(broadcast.id)
+
+        await db.commit()
+        return claimed
+
     async def schedule_broadcast(
         self, db: AsyncSession, broadcast: Broadcast, scheduled_at: datetime
     ) -> Broadcast:
         if broadcast.status != BroadcastStatus.DRAFT:
             raise ValueError(f"Cannot schedule broadcast in status {broadcast.status}")
+        self.validate_audience(broadcast.target_audience, broadcast.target_filter)
 
         now = datetime.now(timezone.utc)
         if scheduled_at.tzinfo is None:
@@ -0,0 +1,167 @@
+"""Daily per-operator aggregates for the chat_analytics table."""
+import logging
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import and_, delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.chat_analytics import ChatAnalytics
+from app.models.chat_session import ChatSession
+from app.models.message import Message, MessageDirection, SenderRole
+from app.services.analytics_rollup_service import analytics_rollup_service
+
+logger = logging.getLogger(__name__)
+
+CHAT_ANALYTICS_ROLLUP = "chat_analytics"  # Watermark: first UTC day not yet finalized
+
+
+def _day_bounds(day: date):
+    start = datetime.combine(day, time.min, tzinfo=timezone.utc)
+    return start, start + timedelta(days=1)
+
+
+class ChatAnalyticsService:
+    """
+    Computes one chat_analytics row per operator and UTC day.
+
+    - total_sessions / avg_response_time_seconds: sessions claimed that day
+    - avg_resolution_time_seconds: sessions closed that day
+    - total_messages_sent: operator messages sent that day, attributed to the
+      operator holding the session at the time
+    """
+
+    async def compute_day(self, db: AsyncSession, day: date) -> Dict[int, dict]:
+        start, end = _day_bounds(day)
+        stats: Dict[int, dict] = {}
+
+        def _row(operator_id: int) -> dict:
+            return stats.setdefault(operator_id, {
+                "total_sessions": 0,
+                "avg_response_time_seconds": None,
+                "avg_resolution_time_seconds": None,
+                "total_messages_sent": 0,
+            })
+
+        claimed = await db.execute(
+            select(
+                ChatSession.operator_id,
+                func.count(ChatSession.id).label("total_sessions"),
+                func.avg(func.extract("epoch", ChatSession.first_response_at - ChatSession.claimed_at)).label("avg_frt"),
+            )
+            .where(
+                ChatSession.operator_id.isnot(None),
+                ChatSession.claimed_at >= start,
+                ChatSession.claimed_at < end,
+            )
+            .group_by(ChatSession.operator_id)
+        )
+        for row in claimed.all():
+            target = _row(row.operator_id)
+            target["total_sessions"] = int(row.total_sessions)
+            target["avg_response_time_seconds"] = round(row.avg_frt) if row.avg_frt is not None else None
+
+        closed = await db.execute(
+            select(
+                ChatSession.operator_id,
+                func.avg(func.extract("epoch", ChatSession.closed_at - ChatSession.started_at)).label("avg_resolution"),
+            )
+            .where(
+                ChatSession.operator_id.isnot(None),
+                ChatSession.closed_at >= start,
+                ChatSession.closed_at < end,
+            )
+            .group_by(ChatSession.operator_id)
+        )
+        for row in closed.all():
+            if row.avg_resolution is not None:
+                _row(row.operator_id)["avg_resolution_time_seconds"] = round(row.avg_resolution)
+
+        sent = await db.execute(
+            select(ChatSession.operator_id, func.count(Message.id).label("total_messages_sent"))
+            .select_from(Message)
+            .join(
+                ChatSession,
+                and_(
+                    ChatSession.line_user_id == Message.line_user_id,
+                    ChatSession.operator_id.isnot(None),
+                    ChatSession.claimed_at <= Message.created_at,
+                    func.coalesce(ChatSession.closed_at, end) >= Message.created_at,
+                ),
+            )
+            .where(
+                Message.created_at >= start,
+                Message.created_at < end,
+                Message.direction == MessageDirection.OUTGOING,
+                Message.sender_role == SenderRole.ADMIN,
+            )
+            .group_by(ChatSession.operator_id)
+        )
+        for row in sent.all():
+            _row(row.operator_id)["total_messages_sent"] = int(row.total_messages_sent)
+
+        return stats
+
+    async def aggregate_day(self, db: AsyncSession, day: date) -> int:
+        """
+        Recompute and upsert one day's rows, removing operators with no activity.
+
+        Idempotent; commits. Returns the number of operator rows written.
+        """
+        stats = await self.compute_day(db, day)
+        if stats:
+            stmt = insert(ChatAnalytics).values([
+                {"date": day, "operator_id": operator_id, **values}
+                for operator_id, values in stats.items()
+            ])
+            await db.execute(stmt.on_conflict_do_update(
+                constraint="uq_chat_analytics_date_operator",
+                set_={
+                    "total_sessions": stmt.excluded.total_sessions,
+                    "avg_response_time_seconds": stmt.excluded.avg_response_time_seconds,
+                    "avg_resolution_time_seconds": stmt.excluded.avg_resolution_time_seconds,
+                    "total_messages_sent": stmt.excluded.total_messages_sent,
+                },
+            ))
+        stale = delete(ChatAnalytics).where(ChatAnalytics.date == day)
+        if stats:
+            stale = stale.where(ChatAnalytics.operator_id.not_in(list(stats)))
+        await db.execute(stale)
+        await db.commit()
+        return len(stats)
+
+    async def aggregate_range(self, db: AsyncSession, start_day: date, end_day: date) -> int:
+        """Re-run aggregation for every day in [start_day, end_day]."""
+        written = 0
+        day = start_day
+        while day <= end_day:
+            written += await self.aggregate_day(db, day)
+            day += timedelta(days=1)
+        return written
+
+    async def refresh(self, db: AsyncSession, now: Optional[datetime] = None) -> int:
+        """
+        Finalize every day since the watermark, then refresh the open days.
+
+        The last CHAT_ANALYTICS_SETTLE_DAYS days before today stay open and are
+        re-aggregated on every run: a session claimed just before midnight may
+        only get its first response the next day, and its FRT counts toward the
+        claim day. The watermark lets a restarted job catch up on days it missed
+        without redoing the ones it already finalized.
+        """
+        now = now or datetime.now(timezone.utc)
+        today = now.astimezone(timezone.utc).date()
+        settle_from = today - timedelta(days=max(0, settings.CHAT_ANALYTICS_SETTLE_DAYS))
+        watermark = await analytics_rollup_service.get_watermark(db, CHAT_ANALYTICS_ROLLUP)
+        first_open_day = (
+            watermark.date() if watermark else today - timedelta(days=settings.CHAT_ANALYTICS_INITIAL_DAYS)
+        )
+
+        written = await self.aggregate_range(db, min(first_open_day, settle_from), today)
+        if first_open_day < settle_from:
+            await analytics_rollup_service.set_watermark(db, _day_bounds(settle_from)[0], CHAT_ANALYTICS_ROLLUP)
+        return written
+
+chat_analytics_service = ChatAnalyticsService()
@@ -3,11 +3,11 @@ import json
 import logging
 from typing import Any, Dict, List, Optional
 
-import httpx
 from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
+from app.core.http_client import POOL_LINE, POOL_TELEGRAM, outbound_http
 from app.models.credential import Credential, Provider
 from app.schemas.credential import CredentialCreate, CredentialUpdate
 
@@ -205,22 +205,20 @@ class CredentialService:
 
         if db_obj.provider == Provider.LINE:
             token = creds.get("channel_access_token")
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    "https://api.line.me/v2/bot/info",
-                    headers={"Authorization": f"Bearer {token}"}
-                )
-                if response.status_code == 200:
-                    return {"success": True, "message": "LINE connection verified", "data": response.json()}
-                return {"success": False, "message": f"LINE error: {response.text}"}
+            response = await outbound_http.client(POOL_LINE).get(
+                "https://api.line.me/v2/bot/info",
+                headers={"Authorization": f"Bearer {token}"}
+            )
+            if response.status_code == 200:
+                return {"success": True, "message": "LINE connection verified", "data": response.json()}
+            return {"success": False, "message": f"LINE error: {response.text}"}
 
         elif db_obj.provider == Provider.TELEGRAM:
             token = creds.get("bot_token")
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"https://api.telegram.org/bot{token}/getMe")
-                if response.status_code == 200:
-                    return {"success": True, "message": "Telegram connection verified", "data": response.json()}
-                return {"success": False, "message": f"Telegram error: {response.text}"}
+            response = await outbound_http.client(POOL_TELEGRAM).get(f"https://api.telegram.org/bot{token}/getMe")
+            if response.status_code == 200:
+                return {"success": True, "message": "Telegram connection verified", "data": response.json()}
+            return {"success": False, "message": f"Telegram error: {response.text}"}
 
         return {"success": False, "message": f"Verification not implemented for {db_obj.provider}"}
 
@@ -6,8 +6,12 @@ from datetime import datetime, timezone
 from typing import Dict, List, Optional, Tuple
 import logging
 
+from app.core.line_rate_limiter import LineEndpoint, LinePriority, line_rate_limiter
+
 logger = logging.getLogger(__name__)
 
+PROFILE_BACKFILL_DEADLINE_SECONDS = 2.0
+
 
 class FriendService:
     async def get_or_create_user(self, line_user_id: str, db: AsyncSession, commit: bool = True) -> User:
@@ -19,7 +23,9 @@ class FriendService:
             # Try to fetch profile from LINE
             from app.core.line_client import get_line_bot_api
             try:
-                profile = await get_line_bot_api().get_profile(line_user_id)
+                profile = await line_rate_limiter.call(
+                    LineEndpoint.PROFILE, lambda: get_line_bot_api().get_profile(line_user_id)
+                )
                 user = User(
                     line_user_id=line_user_id,
                     display_name=profile.display_name,
@@ -75,7 +81,14 @@ class FriendService:
         from app.core.line_client import get_line_bot_api
 
         try:
-            profile = await get_line_bot_api().get_profile(line_user_id)
+            # Manual refreshes are interactive; stale-profile refreshes from the
+            # webhook yield to replies and are skipped rather than queued.
+            profile = await line_rate_limiter.call(
+                LineEndpoint.PROFILE,
+                lambda: get_line_bot_api().get_profile(line_user_id),
+                priority=LinePriority.INTERACTIVE if force else LinePriority.BULK,
+                deadline=None if force else PROFILE_BACKFILL_DEADLINE_SECONDS,
+            )
             user.display_name = profile.display_name or user.display_name
             user.picture_url = profile.picture_url or user.picture_url
             user.profile_updated_at = now
@@ -222,48 +235,16 @@ class FriendService:
 
     async def get_friend_stats(self, db: AsyncSession) -> Dict:
         """Get friend statistics summary."""
-        # Total followers (ACTIVE status)
-        total_followers_result = await db.execute(
-            select(func.count(User.id)).where(
-                User.line_user_id.isnot(None),
-                User.friend_status == "ACTIVE",
-            )
-        )
-        total_followers = total_followers_result.scalar() or 0
-
-        # Total blocked
-        total_blocked_result = await db.execute(
-            select(func.count(User.id)).where(
-                User.line_user_id.isnot(None),
-                User.friend_status == "BLOCKED",
-            )
-        )
-        total_blocked = total_blocked_result.scalar() or 0
-
-        # Total unfollowed
-        total_unfollowed_result = await db.execute(
-            select(func.count(User.id)).where(
-                User.line_user_id.isnot(None),
-                User.friend_status == "UNFOLLOWED",
-            )
-        )
-        total_unfollowed = total_unfollowed_result.scalar() or 0
-
-        # Total unique users who re-followed
-        total_refollows_result = await db.execute(
-            select(func.count(func.distinct(FriendEvent.line_user_id))).where(
-                FriendEvent.event_type == FriendEventType.REFOLLOW.value,
-            )
-        )
-        total_refollows = total_refollows_result.scalar() or 0
-
-        # All users who ever existed (had LINE ID)
-        total_all_result = await db.execute(
-            select(func.count(User.id)).where(User.line_user_id.isnot(None))
+        # Status totals for all LINE users in one pass
+        counts_result = await db.execute(
+            select(
+                func.count(User.id).filter(User.friend_status == "ACTIVE"),
+                func.count(User.id).filter(User.friend_status == "BLOCKED"),
+                func.count(User.id).filter(User.friend_status == "UNFOLLOWED"),
+                func.count(User.id),
+            ).where(User.line_user_id.isnot(None))
         )
-        total_all = total_all_result.scalar() or 0
-
-        refollow_rate = (total_refollows / total_all * 100) if total_all > 0 else 0.0
+        total_followers, total_blocked, total_unfollowed, total_all = counts_result.one()
 
         # Refollow breakdown: for each user, what's their max refollow_count
         breakdown_query = (
@@ -289,6 +270,11 @@ class FriendService:
             for row in breakdown_rows
         ]
 
+        # Each re-followed user falls in exactly one breakdown bucket
+        total_refollows = sum(row[1] for row in breakdown_rows)
+
+        refollow_rate = (total_refollows / total_all * 100) if total_all > 0 else 0.0
+
         return {
             "total_followers": total_followers,
             "total_blocked": total_blocked,
@@ -0,0 +1,108 @@
+"""Cluster-wide, throttled snapshot of the live dashboard KPIs."""
+import asyncio
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import WebSocket
+
+from app.core.config import settings
+from app.core.redis_client import redis_client
+from app.core.websocket_manager import ws_manager
+from app.db.session import AsyncSessionLocal
+from app.schemas.ws_events import WSEventType
+from app.services.analytics_service import analytics_service
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_KEY = "analytics:kpi_snapshot"
+DIRTY_KEY = "analytics:kpi_dirty"
+
+# Read-and-clear in one step so a mark landing mid-refresh is never lost.
+_CONSUME_DIRTY_SCRIPT = """
+local value = redis.call('GET', KEYS[1])
+if value then
+    redis.call('DEL', KEYS[1])
+end
+return value
+"""
+
+
+class KpiSnapshotService:
+    """
+    Keeps one copy of ``AnalyticsService.get_live_kpis`` for the whole cluster.
+
+    Session events only mark the snapshot dirty. The snapshot leader
+    (app.tasks.kpi_snapshot) recomputes it when dirty, at most every
+    KPI_SNAPSHOT_MIN_INTERVAL_SECONDS and at least every
+    KPI_SNAPSHOT_MAX_INTERVAL_SECONDS, stores it in Redis and publishes it to
+    analytics subscribers on every server. Readers and new subscribers get the
+    cached copy without touching the database.
+
+    Without Redis every instance keeps and refreshes its own local snapshot.
+    """
+
+    def __init__(self):
+        self._snapshot: Optional[dict] = None
+        self._dirty = False
+        self._lock = asyncio.Lock()
+
+    async def mark_dirty(self) -> None:
+        """Request a recompute; cheap enough to call on every session event."""
+        self._dirty = True
+        if redis_client.is_connected:
+            await redis_client.set(DIRTY_KEY, "1", seconds=settings.KPI_SNAPSHOT_TTL_SECONDS)
+
+    async def consume_dirty(self) -> bool:
+        """Return whether a recompute was requested, clearing the request."""
+        dirty, self._dirty = self._dirty, False
+        if redis_client.is_connected:
+            dirty = bool(await redis_client.eval(_CONSUME_DIRTY_SCRIPT, [DIRTY_KEY], [])) or dirty
+        return dirty
+
+    async def refresh(self, publish: bool = True) -> dict:
+        """Recompute the snapshot, cache it and (by default) push it to all subscribers."""
+        async with AsyncSessionLocal() as db:
+            kpis = await analytics_service.get_live_kpis(db)
+        self._snapshot = kpis
+        await redis_client.setex(SNAPSHOT_KEY, settings.KPI_SNAPSHOT_TTL_SECONDS, json.dumps(kpis))
+        if publish:
+            await ws_manager.publish_analytics_update(self._message(kpis))
+        return kpis
+
+    async def get_snapshot(self) -> dict:
+        """Return the cached snapshot, computing it once if none exists yet."""
+        cached = await redis_client.get(SNAPSHOT_KEY)
+        if cached:
+            return json.loads(cached)
+        if self._snapshot is not None and not redis_client.is_connected:
+            return self._snapshot
+
+        # Cold start: concurrent callers on this instance share one computation.
+        async with self._lock:
+            if self._snapshot is not None and not redis_client.is_connected:
+                return self._snapshot
+            cached = await redis_client.get(SNAPSHOT_KEY)
+            if cached:
+                return json.loads(cached)
+            return await self.refresh(publish=False)
+
+    async def send_snapshot(self, websocket: WebSocket) -> None:
+        """Send the current snapshot to one newly subscribed websocket."""
+        try:
+            kpis = await self.get_snapshot()
+            await ws_manager.send_personal(websocket, self._message(kpis))
+        except Exception as e:
+            logger.warning("KPI snapshot send failed (non-fatal): %s", e)
+
+    @staticmethod
+    def _message(kpis: dict) -> dict:
+        return {
+            "type": WSEventType.ANALYTICS_UPDATE.value,
+            "payload": kpis,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        }
+
+
+kpi_snapshot_service = KpiSnapshotService()
@@ -12,84 +12,149 @@ from linebot.v3.messaging import (
 from linebot.v3.messaging.exceptions import ApiException
 import mimetypes
 from pathlib import Path
-from typing import Optional, Tuple
-from uuid import uuid4
-from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple, Union
+import asyncio
 import logging
 from app.core.line_client import get_line_bot_api
+from app.core.line_rate_limiter import LineEndpoint, LinePriority, LineRateLimitTimeout, line_rate_limiter
+from app.core.resilience import (
+    Bulkhead,
+    BulkheadFullError,
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryBudget,
+    is_client_error,
+    is_transient,
+    retry_delay,
+)
 from app.core.config import settings
+from app.services.thumbnail_service import THUMBNAIL_SIZES, thumbnail_service
+from app.services.media_catalog import media_catalog
+from app.services.upload_ingest import IngestedUpload
 from app.core.line_client import get_async_api_client
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.models.message import Message, MessageDirection
 
 logger = logging.getLogger(__name__)
+PREVIEW_SIZE = THUMBNAIL_SIZES[-1]  # Longest edge of previews rendered for inbound LINE media
+LOADING_ANIMATION_DEADLINE_SECONDS = 1.0  # Skip the animation rather than queue behind replies
+
 
 class LineService:
     def __init__(self):
         self._api = None
         self._blob_api = None
-        self._cb_failures = 0
-        self._cb_open_until: Optional[datetime] = None
-        self._cb_failure_threshold = 5
-        self._cb_recovery_timeout_seconds = 30
+        # One breaker per operation class, so failing loading animations or
+        # media downloads never stop replies. Each class has a bulkhead.
+        self._breakers = {
+            endpoint: CircuitBreaker(
+                f"LINE {endpoint.value}",
+                failure_threshold=settings.LINE_CIRCUIT_FAILURE_THRESHOLD,
+                recovery_timeout_seconds=settings.LINE_CIRCUIT_RECOVERY_SECONDS,
+                failure_window_seconds=settings.LINE_CIRCUIT_FAILURE_WINDOW_SECONDS,
+                shared=settings.LINE_CIRCUIT_SHARED,
+            )
+            for endpoint in (LineEndpoint.REPLY, LineEndpoint.PUSH, LineEndpoint.LOADING, LineEndpoint.CONTENT)
+        }
+        messaging = Bulkhead("LINE messaging", settings.LINE_BULKHEAD_MESSAGING, settings.LINE_BULKHEAD_WAIT_SECONDS)
+        content = Bulkhead("LINE content", settings.LINE_BULKHEAD_CONTENT, settings.LINE_BULKHEAD_WAIT_SECONDS)
+        self._bulkheads = {
+            LineEndpoint.REPLY: messaging,
+            LineEndpoint.PUSH: messaging,
+            LineEndpoint.LOADING: messaging,
+            LineEndpoint.CONTENT: content,
+        }
+        self._retry_budget = RetryBudget(
+            ratio=settings.LINE_RETRY_BUDGET_RATIO,
+            min_per_second=settings.LINE_RETRY_BUDGET_MIN_PER_SECOND,
+            max_tokens=settings.LINE_RETRY_BUDGET_MAX_TOKENS,
+        )
 
     @property
     def api(self) -> AsyncMessagingApi:
-        """Lazy initialization of LINE API client"""
+        """Lazy-load API client to avoid event loop issues at import time."""
         if self._api is None:
             self._api = get_line_bot_api()
         return self._api
 
     @property
     def blob_api(self) -> AsyncMessagingApiBlob:
-        """Lazy initialization of LINE Blob API client"""
+        """Lazy-load blob API client for downloading message content."""
         if self._blob_api is None:
             self._blob_api = AsyncMessagingApiBlob(get_async_api_client())
         return self._blob_api
 
-    async def _call_with_circuit(self, operation: str, call):
-        now = datetime.now(timezone.utc)
-        open_until = self._cb_open_until
-        # Legacy tests/data may still set naive UTC datetimes.
-        if open_until and open_until.tzinfo is None:
-            open_until = open_until.replace(tzinfo=timezone.utc)
-        if open_until and now < open_until:
-            logger.warning(
-                "LINE circuit open; fast-fail operation=%s until=%s",
-                operation,
-                open_until.isoformat(),
-            )
-            raise RuntimeError("LINE API circuit is open")
+    async def _send(
+        self, call, endpoint: LineEndpoint, priority: LinePriority, deadline: Optional[float], retries: int
+    ):
+        """Rate limit, bulkhead and retry transient failures while the retry budget allows."""
+        bulkhead = self._bulkheads[endpoint]
+
+        async def attempt():
+            async with bulkhead.slot():
+                return await call()
+
+        self._retry_budget.deposit()
+        retry = 0
+        while True:
+            try:
+                return await line_rate_limiter.call(endpoint, attempt, priority=priority, deadline=deadline)
+            except Exception as exc:
+                if retry >= retries or not is_transient(exc) or not self._retry_budget.withdraw():
+                    raise
+                retry += 1
+                delay = retry_delay(
+                    retry, settings.LINE_RETRY_BASE_DELAY_SECONDS, settings.LINE_RETRY_MAX_DELAY_SECONDS
+                )
+                logger.warning(
+                    "LINE %s call failed, retry %s/%s in %.2fs: %s", endpoint.value, retry, retries, delay, exc
+                )
+            await asyncio.sleep(delay)
+
+    async def _call_with_circuit(
+        self,
+        operation: str,
+        call,
+        endpoint: LineEndpoint,
+        priority: LinePriority = LinePriority.INTERACTIVE,
+        deadline: Optional[float] = None,
+        idempotent: bool = False,
+    ):
+        breaker = self._breakers[endpoint]
+        try:
+            probe = await breaker.acquire()
+        except CircuitOpenError:
+            logger.warning("LINE %s circuit open; fast-fail operation=%s", endpoint.value, operation)
+            raise
 
+        retries = settings.LINE_RETRY_MAX_ATTEMPTS if idempotent else 0
         try:
-            result = await call()
+            result = await self._send(call, endpoint, priority, deadline, retries)
         except Exception as exc:
-            self._cb_failures += 1
-            if self._cb_failures >= self._cb_failure_threshold:
-                self._cb_open_until = datetime.now(timezone.utc) + timedelta(seconds=self._cb_recovery_timeout_seconds)
-                logger.error(
-                    "LINE circuit opened after %s failures; operation=%s error=%s",
-                    self._cb_failures,
-                    operation,
-                    exc,
-                )
+            if isinstance(exc, (LineRateLimitTimeout, BulkheadFullError)):
+                # Never reached LINE.
+                await breaker.release(probe)
+            elif is_client_error(exc):
+                # LINE answered (4xx, including 429): the request was at fault, not LINE.
+                await breaker.record_success(probe)
+            elif await breaker.record_failure(probe):
+                logger.error("LINE %s circuit opened; operation=%s error=%s", endpoint.value, operation, exc)
             else:
-                logger.warning(
-                    "LINE API failure %s/%s; operation=%s error=%s",
-                    self._cb_failures,
-                    self._cb_failure_threshold,
-                    operation,
-                    exc,
-                )
+                logger.warning("LINE API failure; operation=%s error=%s", operation, exc)
             raise
 
-        if self._cb_failures > 0 or self._cb_open_until:
-            logger.info("LINE circuit closed after successful operation=%s", operation)
-        self._cb_failures = 0
-        self._cb_open_until = None
+        await breaker.record_success(probe)
         return result
 
+    def resilience_stats(self) -> dict:
+        """Breaker states and trip counts, bulkhead usage and the retry budget (health endpoint)."""
+        return {
+            "circuits": {endpoint.value: breaker.snapshot() for endpoint, breaker in self._breakers.items()},
+            "bulkheads": {bulkhead.name: bulkhead.stats() for bulkhead in self._bulkheads.values()},
+            "retry_budget": self._retry_budget.stats(),
+        }
+
     async def reply_text(self, reply_token: str, text: str):
         await self._call_with_circuit(
             "reply_text",
@@ -99,6 +164,9 @@ class LineService:
                     messages=[TextMessage(text=text)]
                 )
             ),
+            LineEndpoint.REPLY,
+            # A reply token is single-use, so a retry can never deliver twice.
+            idempotent=True,
         )
 
     async def reply_flex(self, reply_token: str, alt_text: str, contents: dict):
@@ -111,6 +179,8 @@ class LineService:
                     messages=[FlexMessage(alt_text=alt_text, contents=container)]
                 )
             ),
+            LineEndpoint.REPLY,
+            idempotent=True,
         )
 
     async def reply_messages(self, reply_token: str, messages: list):
@@ -133,20 +203,23 @@ class LineService:
                     messages=messages[:5]
                 )
             ),
+            LineEndpoint.REPLY,
+            idempotent=True,
         )
 
-    async def push_messages(self, line_user_id: str, messages: list):
+    async def push_messages(self, line_user_id: str, messages: list, retry_key: Optional[str] = None):
         """
         Push messages to a user proactively (no reply token needed).
         Used for Live Chat operator messages.
-        
+
         Args:
             line_user_id: LINE user ID
             messages: List of LINE message objects (TextMessage, FlexMessage, etc.)
+            retry_key: Optional X-Line-Retry-Key so retried pushes are delivered at most once
         """
         if not messages:
             return
-        
+
         # LINE API limit: max 5 messages per push
         await self._call_with_circuit(
             "push_messages",
@@ -154,8 +227,12 @@ class LineService:
                 PushMessageRequest(
                     to=line_user_id,
                     messages=messages[:5]
-                )
+                ),
+                x_line_retry_key=retry_key,
             ),
+            LineEndpoint.PUSH,
+            # LINE deduplicates pushes by retry key; without one a retry could double-send.
+            idempotent=retry_key is not None,
         )
 
     async def show_loading_animation(self, chat_id: str, loading_seconds: int = 20):
@@ -165,6 +242,9 @@ class LineService:
                 lambda: self.api.show_loading_animation(
                     ShowLoadingAnimationRequest(chatId=chat_id, loadingSeconds=loading_seconds)
                 ),
+                LineEndpoint.LOADING,
+                priority=LinePriority.BULK,
+                deadline=LOADING_ANIMATION_DEADLINE_SECONDS,
             )
         except Exception as e:
             # Helper: Log but don't crash if loading animation fails (e.g. rate limit)
@@ -233,9 +313,15 @@ class LineService:
         """Download message content bytes and content-type from LINE Blob API."""
         try:
             if preview:
-                resp = await self.blob_api.get_message_content_preview_with_http_info(message_id=message_id)
+                fetch = self.blob_api.get_message_content_preview_with_http_info
             else:
-                resp = await self.blob_api.get_message_content_with_http_info(message_id=message_id)
+                fetch = self.blob_api.get_message_content_with_http_info
+            resp = await self._call_with_circuit(
+                "download_message_content",
+                lambda: fetch(message_id=message_id),
+                LineEndpoint.CONTENT,
+                idempotent=True,
+            )
             data = bytes(resp.data) if resp and resp.data is not None else b""
             content_type = resp.headers.get("Content-Type") if resp and resp.headers else None
             return data, content_type
@@ -248,17 +334,17 @@ class LineService:
 
     async def persist_line_media(
         self,
+        db: AsyncSession,
         message_id: str,
         media_type: str,
         file_name: Optional[str] = None,
     ) -> dict:
         """
-        Download and persist LINE message binary content into uploads/line_media.
-        Returns URL metadata for message payload.
+        Download LINE message binary content into the media catalog.
+        Content seen before is referenced, not stored (or previewed) again.
+        The reference is taken in `db`, so it commits or rolls back with the
+        message that holds it. Returns URL metadata for message payload.
         """
-        uploads_root = Path(__file__).resolve().parents[2] / "uploads" / "line_media"
-        uploads_root.mkdir(parents=True, exist_ok=True)
-
         data, content_type = await self.download_message_content(message_id=message_id, preview=False)
         if not data:
             return {"url": None, "preview_url": None, "content_type": content_type, "size": None}
@@ -274,52 +360,44 @@ class LineService:
         elif media_type == "audio":
             ext = ".m4a"
 
-        raw_name = file_name or f"{media_type}_{uuid4().hex}{ext}"
-        safe_name = Path(raw_name).name.replace("..", "").strip()
-        if not safe_name:
-            safe_name = f"{media_type}_{uuid4().hex}{ext}"
+        safe_name = Path(file_name or "").name.replace("..", "").strip() or f"{media_type}{ext}"
         if not Path(safe_name).suffix and ext:
             safe_name = f"{safe_name}{ext}"
 
-        full_path = (uploads_root / safe_name).resolve()
-        if not str(full_path).startswith(str(uploads_root.resolve())):
-            safe_name = f"{media_type}_{uuid4().hex}{ext}"
-            full_path = uploads_root / safe_name
-        full_path.write_bytes(data)
-
-        relative_url = f"/uploads/line_media/{safe_name}"
-        base = (settings.SERVER_BASE_URL or "").rstrip("/")
-        absolute_url = f"{base}{relative_url}" if base else relative_url
+        entry, _ = await media_catalog.add_bytes(db, data, content_type or "application/octet-stream")
+        sha256, preview_sha256 = entry.sha256, entry.preview_sha256
 
-        preview_url = None
-        if media_type == "image":
-            preview_data, preview_ct = await self.download_message_content(message_id=message_id, preview=True)
+        if preview_sha256 is None and media_type in ("image", "video"):
+            # Rendered locally (process pool) instead of a second round trip to the LINE preview API.
+            rendered = await thumbnail_service.render(data, content_type or f"{media_type}/*", sizes=(PREVIEW_SIZE,))
+            preview_data = rendered.get(PREVIEW_SIZE)
+            if not preview_data and media_type == "image":
+                preview_data, _ = await self.download_message_content(message_id=message_id, preview=True)
             if preview_data:
-                preview_name = f"preview_{uuid4().hex}{mimetypes.guess_extension(preview_ct or '') or '.jpg'}"
-                preview_path = uploads_root / preview_name
-                preview_path.write_bytes(preview_data)
-                preview_relative = f"/uploads/line_media/{preview_name}"
-                preview_url = f"{base}{preview_relative}" if base else preview_relative
+                preview_sha256 = await media_catalog.attach_preview(db, sha256, preview_data)
 
         return {
-            "url": absolute_url,
-            "preview_url": preview_url,
+            "url": media_catalog.public_url(sha256, safe_name),
+            "preview_url": media_catalog.public_url(preview_sha256, "preview.jpg") if preview_sha256 else None,
             "content_type": content_type,
             "size": len(data),
             "file_name": safe_name,
+            "sha256": sha256,
         }
 
     async def persist_operator_upload(
         self,
-        data: bytes,
+        db: AsyncSession,
+        data: Union[bytes, IngestedUpload],
         media_type: str,
         file_name: Optional[str] = None,
         content_type: Optional[str] = None,
     ) -> dict:
-        """Persist operator-uploaded media into uploads/operator_media."""
-        uploads_root = Path(__file__).resolve().parents[2] / "uploads" / "operator_media"
-        uploads_root.mkdir(parents=True, exist_ok=True)
-
+        """
+        Catalog operator-uploaded media (bytes or a spooled upload); re-sent
+        files are not stored again. The reference is taken in `db`, in the
+        transaction that saves the message and queues its delivery.
+        """
         ext = ""
         guessed = mimetypes.guess_extension(content_type or "") if content_type else None
         if guessed:
@@ -327,26 +405,26 @@ class LineService:
         elif media_type == "image":
             ext = ".jpg"
 
-        base_name = Path(file_name or f"{media_type}_{uuid4().hex}{ext}").name
+        base_name = Path(file_name or f"{media_type}{ext}").name
         if not Path(base_name).suffix and ext:
             base_name = f"{base_name}{ext}"
         if not base_name:
-            base_name = f"{media_type}_{uuid4().hex}{ext}"
-
-        safe_name = f"{uuid4().hex}_{base_name}"
-        full_path = uploads_root / safe_name
-        full_path.write_bytes(data)
+            base_name = f"{media_type}{ext}"
 
-        relative_url = f"/uploads/operator_media/{safe_name}"
-        base = (settings.SERVER_BASE_URL or "").rstrip("/")
-        absolute_url = f"{base}{relative_url}" if base else relative_url
+        if isinstance(data, IngestedUpload):
+            entry, _ = await media_catalog.add_upload(db, data)
+        else:
+            entry, _ = await media_catalog.add_bytes(db, data, content_type or "application/octet-stream")
+        sha256, size = entry.sha256, entry.size_bytes
 
+        url = media_catalog.public_url(sha256, base_name)
         return {
-            "url": absolute_url,
-            "preview_url": absolute_url if media_type == "image" else None,
+            "url": url,
+            "preview_url": url if media_type == "image" else None,
             "content_type": content_type,
-            "size": len(data),
-            "file_name": safe_name,
+            "size": size,
+            "file_name": base_name,
+            "sha256": sha256,
         }
 
     async def push_image_message(self, line_user_id: str, image_url: str, preview_url: Optional[str] = None):
@@ -364,6 +442,7 @@ class LineService:
                     ],
                 )
             ),
+            LineEndpoint.PUSH,
         )
 
 # Singleton instance
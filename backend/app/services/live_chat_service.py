@@ -2,7 +2,7 @@ import logging
 from datetime import datetime, timedelta, timezone
 from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import and_, select, update, desc, func
+from sqlalchemy import and_, cast, select, update, desc, func, Integer
 from sqlalchemy.orm import aliased
 from app.models.user import User, ChatMode, UserRole
 from app.models.chat_session import ChatSession, SessionStatus, ClosedBy
@@ -10,18 +10,37 @@ from app.models.message import Message, MessageDirection
 from app.models.tag import Tag, UserTag
 from app.models.chat_analytics import ChatAnalytics
 from app.services.line_service import line_service
+from app.services.message_outbox_service import message_outbox_service
 from app.services.telegram_service import telegram_service
 from app.services.sla_service import sla_service
 from app.services.business_hours_service import business_hours_service
+from app.services.upload_ingest import IngestedUpload
 from app.core.config import settings
 from app.core.audit import audit_action
 from app.core.redis_client import redis_client
 from app.core.websocket_manager import ConnectionManager
 from typing import List, Optional, Any, Union
-from linebot.v3.messaging import TextMessage
+from linebot.v3.messaging import ImageMessage, TextMessage
 
 logger = logging.getLogger(__name__)
 
+
+def _serialize_outgoing_message(message: Message) -> dict:
+    """Shape a freshly stored operator message for REST/WS responses."""
+    return {
+        "id": message.id,
+        "line_user_id": message.line_user_id,
+        "direction": message.direction.value if hasattr(message.direction, "value") else message.direction,
+        "content": message.content,
+        "message_type": message.message_type,
+        "payload": message.payload,
+        "sender_role": message.sender_role.value if hasattr(message.sender_role, "value") else message.sender_role,
+        "operator_name": message.operator_name,
+        "delivery_status": message.delivery_status,
+        "created_at": message.created_at.isoformat() if message.created_at else None,
+    }
+
+
 class LiveChatService:
     async def get_unread_count(self, line_user_id: str, admin_id: Union[int, str], db: AsyncSession) -> int:
         """Compute unread incoming messages for one admin and conversation."""
@@ -80,6 +99,7 @@ class LiveChatService:
                 last_activity_at=datetime.now(timezone.utc)
             )
             db.add(session)
+            await self.mark_reopened_sessions(user.line_user_id, session.started_at, db)
             user.chat_mode = ChatMode.HUMAN
             if commit:
                 await db.commit()
@@ -100,6 +120,7 @@ class LiveChatService:
             last_activity_at=datetime.now(timezone.utc)
         )
         db.add(session)
+        await self.mark_reopened_sessions(user.line_user_id, session.started_at, db)
         await db.flush()  # Flush to get session ID
 
         # 4. Send auto-greeting with queue position
@@ -209,6 +230,7 @@ class LiveChatService:
                 operator_id=operator_id,
                 claimed_at=now,
                 last_activity_at=now,
+                queue_wait_seconds=cast(func.extract("epoch", now - ChatSession.started_at), Integer),
             )
         )
         if result.rowcount != 1:
@@ -352,6 +374,20 @@ class LiveChatService:
             "has_more": has_more,
         }
 
+    async def mark_reopened_sessions(self, line_user_id: str, started_at: datetime, db: AsyncSession) -> None:
+        """Flag the user's sessions closed in the 24h before `started_at` as not first-contact resolved."""
+        await db.execute(
+            update(ChatSession)
+            .where(
+                ChatSession.line_user_id == line_user_id,
+                ChatSession.status == SessionStatus.CLOSED,
+                ChatSession.closed_at > started_at - timedelta(hours=24),
+                ChatSession.closed_at < started_at,
+                ChatSession.reopened_within_24h.is_(False),
+            )
+            .values(reopened_within_24h=True)
+        )
+
     async def get_active_session(self, line_user_id: str, db: AsyncSession, lock: bool = False):
         """Get active session for user"""
         stmt = (
@@ -636,9 +672,13 @@ class LiveChatService:
 
     @audit_action("send_message", "message")
     async def send_message(self, line_user_id: str, text: str, operator_id: int, db: AsyncSession):
-        """Send message from operator to user via LINE"""
-        from linebot.v3.messaging import TextMessage
+        """
+        Store an operator message and queue it for LINE delivery.
 
+        The LINE push happens in the outbox worker after the caller commits, so
+        the operator never waits on LINE. Callers should commit and then call
+        app.tasks.notify_outbox() to wake the local worker.
+        """
         session = await self._require_active_session_owner(line_user_id, operator_id, db)
 
         # Get operator name
@@ -646,17 +686,17 @@ class LiveChatService:
         operator = operator_result.scalar_one_or_none()
         operator_name = operator.display_name if operator else "Admin"
 
-        await line_service.push_messages(line_user_id, [TextMessage(text=text)])
-
-        await line_service.save_message(
+        saved_message = await line_service.save_message(
             db=db,
             line_user_id=line_user_id,
             direction=MessageDirection.OUTGOING,
             message_type="text",
             content=text,
             sender_role="ADMIN",
-            operator_name=operator_name
+            operator_name=operator_name,
+            commit=False,
         )
+        await message_outbox_service.enqueue(db, saved_message, [TextMessage(text=text)])
 
         session.message_count += 1
         session.last_activity_at = datetime.now(timezone.utc)
@@ -664,20 +704,21 @@ class LiveChatService:
             session.first_response_at = datetime.now(timezone.utc)
             await sla_service.check_frt_on_first_response(session, db)
 
-        return {"success": True}
+        return {"success": True, "message": _serialize_outgoing_message(saved_message)}
 
     @audit_action("send_media", "message")
     async def send_media_message(
         self,
         line_user_id: str,
         operator_id: int,
-        file_bytes: bytes,
+        content: Union[bytes, IngestedUpload],
         file_name: str,
         content_type: Optional[str],
         db: AsyncSession,
     ):
-        """Send media from operator to user, persist file, and store outgoing message."""
-        if not file_bytes:
+        """Persist operator media, store the outgoing message and queue the LINE push."""
+        size = content.size if isinstance(content, IngestedUpload) else len(content)
+        if not size:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Uploaded file is empty",
@@ -692,7 +733,8 @@ class LiveChatService:
         operator_name = operator.display_name if operator else "Admin"
 
         media = await line_service.persist_operator_upload(
-            data=file_bytes,
+            db,
+            data=content,
             media_type=media_type,
             file_name=file_name,
             content_type=content_type,
@@ -711,15 +753,16 @@ class LiveChatService:
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="SERVER_BASE_URL must be configured for image sending",
                 )
-            await line_service.push_image_message(
-                line_user_id=line_user_id,
-                image_url=media_url,
-                preview_url=media.get("preview_url") or media_url,
-            )
+            line_messages = [
+                ImageMessage(
+                    original_content_url=media_url,
+                    preview_image_url=media.get("preview_url") or media_url,
+                )
+            ]
             content = "[Image]"
         else:
             text = f"Attachment: {file_name}\n{media_url}"
-            await line_service.push_messages(line_user_id, [TextMessage(text=text[:5000])])
+            line_messages = [TextMessage(text=text[:5000])]
             content = file_name or "[File]"
 
         payload = {
@@ -728,6 +771,7 @@ class LiveChatService:
             "file_name": media.get("file_name") or file_name,
             "content_type": media.get("content_type"),
             "size": media.get("size"),
+            "sha256": media.get("sha256"),
         }
         saved_message = await line_service.save_message(
             db=db,
@@ -738,7 +782,9 @@ class LiveChatService:
             payload=payload,
             sender_role="ADMIN",
             operator_name=operator_name,
+            commit=False,
         )
+        await message_outbox_service.enqueue(db, saved_message, line_messages)
 
         session.message_count += 1
         session.last_activity_at = datetime.now(timezone.utc)
@@ -749,17 +795,7 @@ class LiveChatService:
 
         return {
             "success": True,
-            "message": {
-                "id": saved_message.id,
-                "line_user_id": saved_message.line_user_id,
-                "direction": saved_message.direction.value if hasattr(saved_message.direction, "value") else saved_message.direction,
-                "content": saved_message.content,
-                "message_type": saved_message.message_type,
-                "payload": saved_message.payload,
-                "sender_role": saved_message.sender_role.value if hasattr(saved_message.sender_role, "value") else saved_message.sender_role,
-                "operator_name": saved_message.operator_name,
-                "created_at": saved_message.created_at.isoformat() if saved_message.created_at else None,
-            },
+            "message": _serialize_outgoing_message(saved_message),
         }
 
     async def set_chat_mode(self, line_user_id: str, mode: ChatMode, db: AsyncSession):
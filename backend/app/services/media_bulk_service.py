@@ -0,0 +1,207 @@
+"""Set-based bulk operations on the media library, run in the request or as background jobs."""
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import String, any_, bindparam, cast, delete, func, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.redis_client import redis_client
+from app.db.session import AsyncSessionLocal
+from app.models.media_blob import MediaBlob
+from app.models.media_file import MediaFile
+from app.services.media_catalog import media_catalog
+from app.services.media_storage import media_storage
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "media_job"
+
+
+class MediaBulkOperation(str, Enum):
+    DELETE = "delete"
+    PUBLISH = "publish"
+
+
+class MediaJobStatus(str, Enum):
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+
+
+def _any_id(ids: Sequence[uuid.UUID]):
+    """`media_files.id = ANY(:ids)` with the ids bound as a single array parameter."""
+    return MediaFile.id == any_(bindparam("ids", list(ids), type_=ARRAY(UUID(as_uuid=True))))
+
+
+def _thumbnail_keys(thumbnails: Optional[dict]) -> Set[str]:
+    return {entry["key"] for entry in (thumbnails or {}).values()}
+
+
+class MediaBulkService:
+    """
+    Bulk delete and publish for the admin media library.
+
+    Every batch is one statement on media_files (``DELETE ... WHERE id =
+    ANY(...) RETURNING``, ``UPDATE ... SET public_token = coalesce(...,
+    gen_random_uuid())``) plus at most one catalog update, so rows are never
+    loaded into the session and the deferred ``data`` column is never read.
+    Originals are catalog blobs: deleting a file drops its reference and
+    media_lifecycle_service collects the blob later. Thumbnails are removed
+    from storage after the commit, in the background.
+
+    Selections larger than MEDIA_BULK_INLINE_LIMIT run as a job in batches of
+    MEDIA_BULK_BATCH_SIZE ids (one transaction each). Job records carry
+    progress counters and live in Redis (visible to every replica) with a
+    TTL; without Redis they are kept in process memory.
+    """
+
+    def __init__(self):
+        self._tasks: Set[asyncio.Task] = set()
+        self._local: Dict[str, Tuple[float, str]] = {}
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    # -- operations --------------------------------------------------------
+
+    async def delete(self, db: AsyncSession, ids: Sequence[uuid.UUID]) -> int:
+        """Delete the files in `ids` and commit; returns how many existed."""
+        rows = (
+            await db.execute(
+                delete(MediaFile)
+                .where(_any_id(ids))
+                .returning(MediaFile.content_sha256, MediaFile.thumbnails)
+                .execution_options(synchronize_session=False)
+            )
+        ).all()
+        await media_catalog.release_many(db, Counter(row.content_sha256 for row in rows))
+        await db.commit()
+        if any(row.thumbnails for row in rows):
+            self._spawn(self._delete_thumbnails(rows))
+        return len(rows)
+
+    async def publish(self, db: AsyncSession, ids: Sequence[uuid.UUID]) -> int:
+        """Make the files in `ids` public (keeping existing tokens) and commit; returns how many existed."""
+        result = await db.execute(
+            update(MediaFile)
+            .where(_any_id(ids))
+            .values(
+                is_public=True,
+                public_token=func.coalesce(MediaFile.public_token, cast(func.gen_random_uuid(), String)),
+            )
+            .returning(MediaFile.id)
+            .execution_options(synchronize_session=False)
+        )
+        updated = len(result.all())
+        await db.commit()
+        return updated
+
+    async def _delete_thumbnails(self, rows) -> None:
+        keys = set().union(*(_thumbnail_keys(row.thumbnails) for row in rows))
+        digests = list({row.content_sha256 for row in rows if row.content_sha256})
+        try:
+            async with AsyncSessionLocal() as db:
+                # Thumbnails are content-addressed: a surviving copy of the same
+                # file, or a cataloged LINE preview, may share a key.
+                kept = set(await db.scalars(select(MediaBlob.storage_key).where(MediaBlob.storage_key.in_(keys))))
+                if digests:
+                    survivors = await db.scalars(
+                        select(MediaFile.thumbnails).where(
+                            MediaFile.content_sha256.in_(digests), MediaFile.thumbnails.isnot(None)
+                        )
+                    )
+                    for thumbnails in survivors:
+                        kept |= _thumbnail_keys(thumbnails)
+            for key in keys - kept:
+                await media_storage.delete(key)
+        except Exception as e:
+            logger.warning("Thumbnail cleanup after bulk delete failed (non-fatal): %s", e)
+
+    # -- jobs --------------------------------------------------------------
+
+    @staticmethod
+    def _job_key(job_id: str) -> str:
+        return f"{KEY_PREFIX}:{job_id}"
+
+    async def _save(self, job: dict) -> None:
+        raw, seconds = json.dumps(job), settings.MEDIA_BULK_JOB_TTL_SECONDS
+        if redis_client.is_connected:
+            await redis_client.set(self._job_key(job["id"]), raw, seconds=seconds)
+        else:
+            self._local[job["id"]] = (time.monotonic() + seconds, raw)
+
+    async def get_job(self, job_id: str) -> Optional[dict]:
+        if redis_client.is_connected:
+            raw = await redis_client.get(self._job_key(job_id))
+        else:
+            expires_at, raw = self._local.get(job_id, (0.0, None))
+            if expires_at <= time.monotonic():
+                self._local.pop(job_id, None)
+                raw = None
+        return json.loads(raw) if raw else None
+
+    async def submit(
+        self, operation: MediaBulkOperation, ids: List[uuid.UUID], requested_by: Optional[int] = None
+    ) -> dict:
+        """Queue `operation` over `ids` and return the job record."""
+        job = {
+            "id": uuid.uuid4().hex,
+            "operation": operation.value,
+            "status": MediaJobStatus.QUEUED.value,
+            "total": len(ids),
+            "processed": 0,
+            "affected": 0,
+            "error": None,
+            "requested_by": requested_by,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "completed_at": None,
+        }
+        await self._save(job)
+        self._spawn(self._run(job, ids))
+        return job
+
+    async def _run(self, job: dict, ids: List[uuid.UUID]) -> None:
+        handler = self.delete if job["operation"] == MediaBulkOperation.DELETE.value else self.publish
+        batch_size = max(1, settings.MEDIA_BULK_BATCH_SIZE)
+        try:
+            job["status"] = MediaJobStatus.RUNNING.value
+            await self._save(job)
+            for start in range(0, len(ids), batch_size):
+                batch = ids[start:start + batch_size]
+                async with AsyncSessionLocal() as db:
+                    job["affected"] += await handler(db, batch)
+                job["processed"] += len(batch)
+                await self._save(job)
+            job["status"] = MediaJobStatus.COMPLETED.value
+        except asyncio.CancelledError:
+            job.update(status=MediaJobStatus.FAILED.value, error="Cancelled")
+            await self._save(job)
+            raise
+        except Exception as e:
+            logger.error(f"Media job {job['id']} ({job['operation']}) failed: {e}")
+            job.update(status=MediaJobStatus.FAILED.value, error=str(e) or e.__class__.__name__)
+
+        job["completed_at"] = datetime.now(timezone.utc).isoformat()
+        await self._save(job)
+
+    async def shutdown(self) -> None:
+        """Cancel running jobs and pending thumbnail cleanups."""
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+media_bulk_service = MediaBulkService()
@@ -0,0 +1,131 @@
+"""Reference-counted catalog of stored media content, shared by every media source."""
+import hashlib
+from typing import Awaitable, Callable, Mapping, Optional, Tuple
+from urllib.parse import quote
+
+from sqlalchemy import Integer, String, column, exists, func, or_, select, update, values
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.media_blob import MediaBlob
+from app.models.message import Message
+from app.services.media_storage import StoredBlob, media_storage
+from app.services.thumbnail_service import THUMBNAIL_MIME_TYPE
+from app.services.upload_ingest import IngestedUpload
+
+
+class MediaCatalog:
+    """
+    Deduplicates media by sha256 across admin media, inbound LINE media and
+    operator uploads.
+
+    ``add_*`` looks the digest up first: known content is not written to
+    storage again, it only gains a reference and the existing entry (URL,
+    preview) is returned. New content is written once and cataloged with an
+    upsert, so concurrent first uploads of the same file converge on one row.
+    ``release`` drops a reference; entries at zero are deleted, with their
+    blobs, by app.services.media_lifecycle_service after a grace period.
+    Callers own the transaction.
+    """
+
+    async def get(self, db: AsyncSession, sha256: str) -> Optional[MediaBlob]:
+        return await db.scalar(select(MediaBlob).where(MediaBlob.sha256 == sha256))
+
+    async def get_message_media(self, db: AsyncSession, sha256: str) -> Optional[MediaBlob]:
+        """
+        The entry for `sha256` if a message uses it as content or as a preview.
+
+        Only this content is served by hash: admin library files share the
+        catalog (and their digest is their ETag), but stay reachable only
+        through their own routes, where public links can be revoked.
+        """
+        digest = Message.payload["sha256"].astext
+        owners = select(MediaBlob.sha256).where(MediaBlob.preview_sha256 == sha256)
+        referenced = exists().where(or_(digest == sha256, digest.in_(owners)))
+        return await db.scalar(select(MediaBlob).where(MediaBlob.sha256 == sha256, referenced))
+
+    async def _add(
+        self,
+        db: AsyncSession,
+        sha256: str,
+        size: int,
+        mime_type: str,
+        write: Callable[[], Awaitable[StoredBlob]],
+    ) -> Tuple[MediaBlob, bool]:
+        existing = await self.get(db, sha256)
+        storage_key = existing.storage_key if existing else (await write()).key
+
+        stmt = insert(MediaBlob).values(
+            sha256=sha256, storage_key=storage_key, mime_type=mime_type, size_bytes=size, ref_count=1,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[MediaBlob.sha256],
+            set_={"ref_count": MediaBlob.ref_count + 1, "last_referenced_at": func.now()},
+        ).returning(MediaBlob)
+        result = await db.execute(
+            select(MediaBlob).from_statement(stmt).execution_options(populate_existing=True)
+        )
+        entry = result.scalar_one()
+        if existing is not None and entry.ref_count == 1 and not await media_storage.exists(entry.storage_key):
+            # The entry was garbage-collected (blob deleted) between the lookup and the upsert.
+            entry.storage_key = (await write()).key
+        return entry, existing is None
+
+    async def add_bytes(self, db: AsyncSession, data: bytes, mime_type: str) -> Tuple[MediaBlob, bool]:
+        """Reference `data`, storing it if it is new; returns (entry, created)."""
+        sha256 = hashlib.sha256(data).hexdigest()
+        return await self._add(db, sha256, len(data), mime_type, lambda: media_storage.put(data))
+
+    async def add_upload(self, db: AsyncSession, upload: IngestedUpload) -> Tuple[MediaBlob, bool]:
+        """Reference an ingested upload, streaming it to storage if it is new; returns (entry, created)."""
+        return await self._add(
+            db, upload.sha256, upload.size, upload.mime_type,
+            lambda: media_storage.put_file(upload.file, upload.sha256, upload.size),
+        )
+
+    async def attach_preview(self, db: AsyncSession, sha256: str, data: bytes) -> str:
+        """Catalog a rendered preview for `sha256`; returns the preview digest (an existing one wins a race)."""
+        preview, _ = await self.add_bytes(db, data, THUMBNAIL_MIME_TYPE)
+        attached = await db.scalar(
+            update(MediaBlob)
+            .where(MediaBlob.sha256 == sha256, MediaBlob.preview_sha256.is_(None))
+            .values(preview_sha256=preview.sha256)
+            .returning(MediaBlob.preview_sha256)
+        )
+        if attached is None:
+            await self.release(db, preview.sha256)
+            return await db.scalar(select(MediaBlob.preview_sha256).where(MediaBlob.sha256 == sha256))
+        return attached
+
+    async def release(self, db: AsyncSession, sha256: Optional[str], count: int = 1) -> None:
+        """Drop `count` references to `sha256` (no-op for unknown or legacy content)."""
+        if not sha256 or count <= 0:
+            return
+        await db.execute(
+            update(MediaBlob)
+            .where(MediaBlob.sha256 == sha256)
+            .values(ref_count=func.greatest(MediaBlob.ref_count - count, 0))
+        )
+
+    async def release_many(self, db: AsyncSession, counts: Mapping[str, int]) -> None:
+        """Drop references for several digests in one statement; `counts` maps sha256 to references dropped."""
+        rows = [(sha256, count) for sha256, count in counts.items() if sha256 and count > 0]
+        if not rows:
+            return
+        released = values(column("sha256", String), column("count", Integer), name="released").data(rows)
+        await db.execute(
+            update(MediaBlob)
+            .where(MediaBlob.sha256 == released.c.sha256)
+            .values(ref_count=func.greatest(MediaBlob.ref_count - released.c.count, 0))
+            .execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    def public_url(sha256: str, filename: str) -> str:
+        """Absolute (when SERVER_BASE_URL is set) URL serving the content under `filename`."""
+        base = (settings.SERVER_BASE_URL or "").rstrip("/")
+        return f"{base}{settings.API_V1_STR}/public/blobs/{sha256}/{quote(filename)}"
+
+
+media_catalog = MediaCatalog()
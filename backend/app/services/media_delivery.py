@@ -0,0 +1,161 @@
+"""HTTP delivery of stored media: streaming, byte ranges and conditional GET."""
+import hashlib
+import re
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.media_file import MediaFile
+from app.services.media_storage import media_storage
+
+# Content behind a media id never changes, so id URLs may be cached forever.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Resolve a ``Range`` header to an inclusive (start, end) byte span.
+
+    Returns None when the header is absent or not a single ``bytes`` range
+    (the full body is sent, as RFC 9110 allows); raises RangeNotSatisfiable
+    when the range lies outside the file.
+    """
+    if not header:
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if not match or (not match[1] and not match[2]):
+        return None
+    if not match[1]:
+        length = int(match[2])
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable()
+        return max(0, size - length), size - 1
+    start = int(match[1])
+    end = min(int(match[2]), size - 1) if match[2] else size - 1
+    if start >= size or end < start:
+        raise RangeNotSatisfiable()
+    return start, end
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in header.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def _not_modified_since(header: Optional[str], last_modified: Optional[datetime]) -> bool:
+    if not header or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified.replace(microsecond=0) <= since
+
+
+class MediaDelivery:
+    """
+    Builds responses for media downloads.
+
+    Bodies are streamed from media storage in chunks. Every response carries a
+    strong ETag (the content sha256), Last-Modified and ``Accept-Ranges``;
+    ``If-None-Match`` / ``If-Modified-Since`` produce 304s and a single
+    ``Range`` (honouring ``If-Range``) produces a 206 with just that span.
+    """
+
+    async def respond(
+        self,
+        request: Request,
+        media: MediaFile,
+        db: AsyncSession,
+        disposition: Optional[str] = None,
+        cache_control: str = IMMUTABLE_CACHE_CONTROL,
+    ) -> Response:
+        """Serve a MediaFile's content."""
+        inline_data = None
+        sha256 = media.content_sha256
+        if not media.storage_key:
+            # Not moved to blob storage yet: the bytes are in memory anyway.
+            inline_data = await db.scalar(select(MediaFile.data).where(MediaFile.id == media.id)) or b""
+            sha256 = hashlib.sha256(inline_data).hexdigest()
+        return self.respond_blob(
+            request,
+            key=media.storage_key,
+            sha256=sha256,
+            size=len(inline_data) if inline_data is not None else media.size_bytes,
+            mime_type=media.mime_type,
+            filename=media.filename,
+            last_modified=media.created_at,
+            disposition=disposition,
+            cache_control=cache_control,
+            inline_data=inline_data,
+        )
+
+    def respond_blob(
+        self,
+        request: Request,
+        key: Optional[str],
+        sha256: str,
+        size: int,
+        mime_type: str,
+        filename: str,
+        last_modified: Optional[datetime] = None,
+        disposition: Optional[str] = None,
+        cache_control: str = IMMUTABLE_CACHE_CONTROL,
+        inline_data: Optional[bytes] = None,
+    ) -> Response:
+        """Serve a stored blob (or `inline_data`) with validators and range support."""
+        etag = f'"{sha256}"'
+        headers = {"ETag": etag, "Cache-Control": cache_control, "Accept-Ranges": "bytes"}
+        if last_modified:
+            headers["Last-Modified"] = format_datetime(last_modified.astimezone(timezone.utc), usegmt=True)
+        if disposition:
+            headers["Content-Disposition"] = f'{disposition}; filename="{filename}"'
+
+        if_none_match = request.headers.get("if-none-match")
+        if _etag_matches(if_none_match, etag) or (
+            if_none_match is None and _not_modified_since(request.headers.get("if-modified-since"), last_modified)
+        ):
+            headers.pop("Content-Disposition", None)
+            return Response(status_code=304, headers=headers)
+
+        span = None
+        if_range = request.headers.get("if-range")
+        if if_range is None or if_range.strip() == etag:
+            try:
+                span = parse_range(request.headers.get("range"), size)
+            except RangeNotSatisfiable:
+                return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+        start, end = span if span else (0, size - 1)
+        status_code = 206 if span else 200
+        if span:
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(max(0, end - start + 1))
+
+        if inline_data is not None:
+            return Response(
+                content=inline_data[start:end + 1], status_code=status_code,
+                media_type=mime_type, headers=headers,
+            )
+        body = media_storage.iter_range(key, start, end) if size else iter(())
+        return StreamingResponse(body, status_code=status_code, media_type=mime_type, headers=headers)
+
+
+media_delivery = MediaDelivery()
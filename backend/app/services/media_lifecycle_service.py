@@ -0,0 +1,392 @@
+"""
+Media lifecycle: retention, migration of legacy upload folders, garbage
+collection and optional recompression.
+
+Each pass handles at most one batch per phase, so the scheduled task
+(app.tasks.media_lifecycle) and scripts/media_gc.py make steady progress
+without long transactions. Without ``apply`` a pass only counts what it
+would do.
+"""
+import asyncio
+import mimetypes
+import re
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, exists, func, literal_column, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.media_blob import MediaBlob
+from app.models.media_file import MediaFile
+from app.models.message import Message, MessageDirection
+from app.services.media_catalog import media_catalog
+from app.services.media_storage import media_storage
+from app.services.thumbnail_service import THUMBNAIL_MIME_TYPE, thumbnail_service
+
+UPLOADS_ROOT = Path(__file__).resolve().parents[2] / "uploads"
+# Flat folders written before media went through the catalog
+LEGACY_DIRS = ("line_media", "operator_media")
+RECOMPRESS_MIN_SAVING = 0.9  # Keep a re-encoded image only if it is at most 90% of the original
+
+_LEGACY_URL_RE = re.compile(r"/uploads/(line_media|operator_media)/([^/?#]+)$")
+_LEGACY_URL_PATTERNS = [f"%/uploads/{folder}/%" for folder in LEGACY_DIRS]
+
+
+@dataclass
+class LifecycleReport:
+    apply: bool
+    expired: int = 0           # Message media references dropped by retention
+    imported: int = 0          # Legacy files moved into the catalog
+    orphans: int = 0           # Legacy files no message references
+    orphan_bytes: int = 0
+    reconciled: int = 0        # Catalog entries whose ref_count did not match their references
+    collected: int = 0         # Unreferenced catalog entries deleted with their blobs
+    collected_bytes: int = 0
+    recompressed: int = 0
+    saved_bytes: int = 0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def _legacy_file(url: Optional[str]) -> Optional[Path]:
+    match = _LEGACY_URL_RE.search(url or "")
+    return UPLOADS_ROOT / match[1] / match[2] if match else None
+
+
+def _legacy_message_filter():
+    return (
+        Message.payload["sha256"].astext.is_(None),
+        Message.payload["media_missing"].astext.is_(None),
+        or_(*[
+            Message.payload[field].astext.like(pattern)
+            for field in ("url", "preview_url")
+            for pattern in _LEGACY_URL_PATTERNS
+        ]),
+    )
+
+
+def _thumbnail_uses(storage_key: str):
+    """`media_files.thumbnails` lists `storage_key` as one of its sizes."""
+    return func.jsonb_path_exists(
+        MediaFile.thumbnails,
+        literal_column("'$.* ? (@.key == $key)'::jsonpath"),
+        func.jsonb_build_object("key", storage_key),
+    )
+
+
+def _iter_legacy_files() -> Iterator[Path]:
+    for folder in LEGACY_DIRS:
+        root = UPLOADS_ROOT / folder
+        if root.is_dir():
+            for entry in root.iterdir():
+                if entry.is_file():
+                    yield entry
+
+
+class MediaLifecycleService:
+    """
+    Keeps media storage bounded.
+
+    Phases, in order:
+    - retention: messages older than MEDIA_RETENTION_{LINE,OPERATOR}_DAYS
+      drop their media reference (the message stays, marked media_expired);
+    - legacy import: files in the flat uploads/line_media and
+      uploads/operator_media folders that messages still point at are moved
+      into the content-addressed (sharded) store and the payload URLs are
+      rewritten;
+    - orphans: legacy files no message references are deleted once older
+      than MEDIA_GC_GRACE_DAYS;
+    - recompression (MEDIA_RECOMPRESS_AFTER_DAYS > 0): large old chat images
+      are re-encoded in the thumbnail process pool;
+    - reconciliation: ref_count is recounted from messages.payload sha256,
+      media_files and the previews other entries hold, one batch of the
+      catalog per pass, so a leaked or lost reference neither pins a blob
+      forever nor lets a used one be collected;
+    - garbage collection: catalog entries unreferenced for
+      MEDIA_GC_GRACE_DAYS are deleted together with their blobs.
+    """
+
+    def __init__(self):
+        self._reconcile_after = ""  # Last digest reconciled; the next pass continues after it
+
+    @property
+    def reconciling(self) -> bool:
+        """True while a reconciliation sweep is part way through the catalog."""
+        return bool(self._reconcile_after)
+
+    async def run(self, apply: bool, batch_size: Optional[int] = None) -> LifecycleReport:
+        batch_size = batch_size or settings.MEDIA_GC_BATCH_SIZE
+        report = LifecycleReport(apply=apply)
+        retention = (
+            (MessageDirection.INCOMING, settings.MEDIA_RETENTION_LINE_DAYS),
+            (MessageDirection.OUTGOING, settings.MEDIA_RETENTION_OPERATOR_DAYS),
+        )
+        for direction, days in retention:
+            if days > 0:
+                async with AsyncSessionLocal() as db:
+                    await self.expire_references(db, direction, days, batch_size, report)
+        if await asyncio.to_thread(lambda: next(_iter_legacy_files(), None)) is not None:
+            async with AsyncSessionLocal() as db:
+                await self.import_legacy_files(db, batch_size, report)
+            async with AsyncSessionLocal() as db:
+                await self.collect_orphan_files(db, batch_size, report)
+        if settings.MEDIA_RECOMPRESS_AFTER_DAYS > 0:
+            async with AsyncSessionLocal() as db:
+                await self.recompress_images(db, batch_size, report)
+        async with AsyncSessionLocal() as db:
+            await self.reconcile_references(db, batch_size, report)
+        async with AsyncSessionLocal() as db:
+            await self.collect_garbage(db, batch_size, report)
+        return report
+
+    # -- retention ---------------------------------------------------------
+
+    async def expire_references(
+        self, db: AsyncSession, direction: MessageDirection, days: int, limit: int, report: LifecycleReport
+    ) -> None:
+        cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+        rows = (
+            await db.execute(
+                select(Message.id, Message.payload)
+                .where(
+                    Message.payload["sha256"].astext.isnot(None),
+                    Message.created_at < cutoff,
+                    Message.direction == direction,
+                )
+                .order_by(Message.created_at)
+                .limit(limit)
+            )
+        ).all()
+        report.expired += len(rows)
+        if not report.apply or not rows:
+            return
+        for row in rows:
+            await media_catalog.release(db, row.payload["sha256"])
+            payload = {key: value for key, value in row.payload.items() if key != "sha256"}
+            payload.update(url=None, preview_url=None, media_expired=True)
+            await db.execute(update(Message).where(Message.id == row.id).values(payload=payload))
+        await db.commit()
+
+    # -- legacy folders ----------------------------------------------------
+
+    async def import_legacy_files(self, db: AsyncSession, limit: int, report: LifecycleReport) -> None:
+        rows = (
+            await db.execute(
+                select(Message.id, Message.payload)
+                .where(*_legacy_message_filter())
+                .order_by(Message.id)
+                .limit(limit)
+            )
+        ).all()
+        imported: List[Path] = []
+        for row in rows:
+            payload = dict(row.payload)
+            main, preview = _legacy_file(payload.get("url")), _legacy_file(payload.get("preview_url"))
+            if main is None or not await asyncio.to_thread(main.is_file):
+                # Nothing to import; mark it so later passes skip the row.
+                payload["media_missing"] = True
+            elif not report.apply:
+                report.imported += 1
+                continue
+            else:
+                data = await asyncio.to_thread(main.read_bytes)
+                mime_type = payload.get("content_type") or mimetypes.guess_type(main.name)[0]
+                entry, _ = await media_catalog.add_bytes(db, data, mime_type or "application/octet-stream")
+                display_name = payload.get("file_name") or main.name
+                payload.update(sha256=entry.sha256, url=media_catalog.public_url(entry.sha256, display_name))
+                imported.append(main)
+                if preview == main:
+                    payload["preview_url"] = payload["url"]
+                elif preview is not None and await asyncio.to_thread(preview.is_file):
+                    preview_data = await asyncio.to_thread(preview.read_bytes)
+                    preview_sha256 = await media_catalog.attach_preview(db, entry.sha256, preview_data)
+                    payload["preview_url"] = media_catalog.public_url(preview_sha256, "preview.jpg")
+                    imported.append(preview)
+                report.imported += 1
+            if report.apply:
+                await db.execute(update(Message).where(Message.id == row.id).values(payload=payload))
+        if not report.apply:
+            return
+        await db.commit()
+        for path in imported:
+            await asyncio.to_thread(path.unlink, missing_ok=True)
+
+    async def _legacy_references(self, db: AsyncSession) -> Set[Path]:
+        result = await db.execute(
+            select(Message.payload["url"].astext, Message.payload["preview_url"].astext)
+            .where(*_legacy_message_filter())
+        )
+        return {path for row in result for path in map(_legacy_file, row) if path is not None}
+
+    async def collect_orphan_files(self, db: AsyncSession, limit: int, report: LifecycleReport) -> None:
+        referenced = await self._legacy_references(db)
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=settings.MEDIA_GC_GRACE_DAYS)).timestamp()
+
+        def _find_orphans() -> List[Tuple[Path, int]]:
+            orphans = []
+            for path in _iter_legacy_files():
+                stat = path.stat()
+                if path not in referenced and stat.st_mtime < cutoff:
+                    orphans.append((path, stat.st_size))
+                    if len(orphans) >= limit:
+                        break
+            return orphans
+
+        orphans = await asyncio.to_thread(_find_orphans)
+        report.orphans += len(orphans)
+        report.orphan_bytes += sum(size for _, size in orphans)
+        if report.apply:
+            for path, _ in orphans:
+                await asyncio.to_thread(path.unlink, missing_ok=True)
+
+    # -- catalog -----------------------------------------------------------
+
+    @staticmethod
+    def _unused_by_media_files():
+        return ~exists().where(
+            or_(MediaFile.content_sha256 == MediaBlob.sha256, MediaFile.storage_key == MediaBlob.storage_key)
+        )
+
+    @staticmethod
+    async def _key_in_use(db: AsyncSession, storage_key: str, sha256: Optional[str] = None) -> bool:
+        """Whether a blob key is still used by a catalog entry other than `sha256` or by the library."""
+        return bool(await db.scalar(
+            select(or_(
+                exists().where(MediaBlob.storage_key == storage_key, MediaBlob.sha256 != sha256),
+                exists().where(MediaFile.storage_key == storage_key),
+                # A LINE preview and a library thumbnail of the same image render to the same key.
+                exists().where(_thumbnail_uses(storage_key)),
+            ))
+        ))
+
+    async def recompress_images(self, db: AsyncSession, limit: int, report: LifecycleReport) -> None:
+        cutoff = datetime.now(timezone.utc) - timedelta(days=settings.MEDIA_RECOMPRESS_AFTER_DAYS)
+        blobs = (
+            await db.scalars(
+                select(MediaBlob)
+                .where(
+                    MediaBlob.recompressed_at.is_(None),
+                    MediaBlob.mime_type.in_(("image/jpeg", "image/png", "image/webp")),
+                    MediaBlob.size_bytes >= settings.MEDIA_RECOMPRESS_MIN_BYTES,
+                    MediaBlob.created_at < cutoff,
+                    # Library files keep their original bytes.
+                    self._unused_by_media_files(),
+                )
+                .order_by(MediaBlob.created_at)
+                .limit(limit)
+            )
+        ).all()
+        replaced: List[str] = []
+        for blob in blobs:
+            data = await media_storage.read(blob.storage_key)
+            smaller = await thumbnail_service.recompress(data, settings.MEDIA_RECOMPRESS_MAX_EDGE)
+            worth_it = smaller is not None and len(smaller) <= len(data) * RECOMPRESS_MIN_SAVING
+            if worth_it:
+                report.recompressed += 1
+                report.saved_bytes += len(data) - len(smaller)
+            if not report.apply:
+                continue
+            blob.recompressed_at = datetime.now(timezone.utc)  # also marks images not worth re-encoding
+            if worth_it:
+                stored = await media_storage.put(smaller)
+                replaced.append(blob.storage_key)
+                blob.storage_key, blob.size_bytes, blob.mime_type = stored.key, stored.size, THUMBNAIL_MIME_TYPE
+        if not report.apply:
+            return
+        await db.commit()
+        for key in replaced:
+            # Content-addressed: another entry or library file may hold the same bytes.
+            if not await self._key_in_use(db, key):
+                await media_storage.delete(key)
+
+    @staticmethod
+    def _reference_count():
+        """References to the enclosing media_blobs row, counted from the rows that hold them."""
+        preview_owner = aliased(MediaBlob)
+        by_messages = (
+            select(func.count()).select_from(Message)
+            .where(Message.payload["sha256"].astext == MediaBlob.sha256)
+            .correlate(MediaBlob)
+        )
+        by_media_files = (
+            select(func.count()).select_from(MediaFile)
+            .where(MediaFile.content_sha256 == MediaBlob.sha256)
+            .correlate(MediaBlob)
+        )
+        by_previews = (
+            select(func.count()).select_from(preview_owner)
+            .where(preview_owner.preview_sha256 == MediaBlob.sha256)
+            .correlate(MediaBlob)
+        )
+        return by_messages.scalar_subquery() + by_media_files.scalar_subquery() + by_previews.scalar_subquery()
+
+    async def reconcile_references(self, db: AsyncSession, limit: int, report: LifecycleReport) -> None:
+        batch = (
+            select(MediaBlob.sha256)
+            .where(MediaBlob.sha256 > self._reconcile_after)
+            .order_by(MediaBlob.sha256)
+            .limit(limit)
+        )
+        if report.apply:
+            # Locked first and counted in a later statement: writers take the
+            # catalog row before adding or removing a reference, so the count
+            # sees every reference committed before the lock was granted.
+            batch = batch.with_for_update(skip_locked=True)
+        digests = list(await db.scalars(batch))
+        self._reconcile_after = digests[-1] if len(digests) >= limit else ""
+        if not digests:
+            return
+        refs = self._reference_count()
+        mismatched = (MediaBlob.sha256.in_(digests), MediaBlob.ref_count != refs)
+        if not report.apply:
+            report.reconciled += len((await db.scalars(select(MediaBlob.sha256).where(*mismatched))).all())
+            return
+        result = await db.execute(
+            update(MediaBlob)
+            .where(*mismatched)
+            # A corrected entry gets a fresh grace period before collection.
+            .values(ref_count=refs, last_referenced_at=func.now())
+            .returning(MediaBlob.sha256)
+            .execution_options(synchronize_session=False)
+        )
+        report.reconciled += len(result.all())
+        await db.commit()
+
+    async def collect_garbage(self, db: AsyncSession, limit: int, report: LifecycleReport) -> None:
+        cutoff = datetime.now(timezone.utc) - timedelta(days=settings.MEDIA_GC_GRACE_DAYS)
+        query = (
+            select(MediaBlob)
+            .where(
+                MediaBlob.ref_count == 0,
+                MediaBlob.last_referenced_at < cutoff,
+                self._unused_by_media_files(),
+            )
+            .order_by(MediaBlob.last_referenced_at)
+            .limit(limit)
+        )
+        if not report.apply:
+            blobs = (await db.scalars(query)).all()
+            report.collected += len(blobs)
+            report.collected_bytes += sum(blob.size_bytes for blob in blobs)
+            return
+
+        # Rows stay locked until commit, so a concurrent upload of the same
+        # content waits and then re-creates the entry (and its blob).
+        blobs = (await db.scalars(query.with_for_update(skip_locked=True))).all()
+        for blob in blobs:
+            if not await self._key_in_use(db, blob.storage_key, blob.sha256):
+                await media_storage.delete(blob.storage_key)
+            await media_catalog.release(db, blob.preview_sha256)
+            await db.execute(delete(MediaBlob).where(MediaBlob.sha256 == blob.sha256))
+            report.collected += 1
+            report.collected_bytes += blob.size_bytes
+        await db.commit()
+
+
+media_lifecycle_service = MediaLifecycleService()
@@ -0,0 +1,340 @@
+"""
+Content-addressed blob storage for media files.
+
+Blobs are stored once per sha256 under ``sha256/<aa>/<bb>/<digest>`` (two
+fan-out levels keep directories / key prefixes small); ``MediaFile`` rows only
+hold the key. The backend is chosen by MEDIA_STORAGE_BACKEND: a local
+directory tree, or any S3-compatible object store reached over HTTP with
+SigV4 signing.
+"""
+import asyncio
+import hashlib
+import hmac
+import logging
+import os
+import re
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Optional, Union
+from urllib.parse import quote
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 256 * 1024  # Bytes per read when streaming a blob
+DEFAULT_LOCAL_ROOT = Path(__file__).resolve().parents[2] / "uploads" / "media_store"
+
+_KEY_RE = re.compile(r"^sha256/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}$")
+
+
+class MediaStorageError(Exception):
+    """Raised when a storage backend cannot complete an operation."""
+
+
+@dataclass(frozen=True)
+class StoredBlob:
+    key: str
+    sha256: str
+    size: int
+
+
+def content_key(sha256: str) -> str:
+    """Storage key for a blob with the given hex sha256 digest."""
+    return f"sha256/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+def _check_key(key: str) -> str:
+    if not _KEY_RE.match(key or ""):
+        raise MediaStorageError(f"Invalid storage key: {key!r}")
+    return key
+
+
+class MediaStorage(ABC):
+    """Backend interface; keys are always produced by ``content_key``."""
+
+    name = "abstract"
+
+    async def put(self, data: bytes) -> StoredBlob:
+        """Store `data` (once per distinct content) and return its key."""
+        digest = hashlib.sha256(data).hexdigest()
+        key = content_key(digest)
+        if not await self.exists(key):
+            await self._write(key, data, digest)
+        return StoredBlob(key=key, sha256=digest, size=len(data))
+
+    async def put_file(self, file: BinaryIO, sha256: str, size: int) -> StoredBlob:
+        """
+        Store the content of an open file whose digest and size are already
+        known (see app.services.upload_ingest); it is copied in chunks from
+        its current position, never loaded whole.
+        """
+        key = content_key(sha256)
+        if not await self.exists(key):
+            await self._write_stream(key, file, sha256, size)
+        return StoredBlob(key=key, sha256=sha256, size=size)
+
+    async def read(self, key: str) -> bytes:
+        return b"".join([chunk async for chunk in self.iter_range(key)])
+
+    @abstractmethod
+    async def _write(self, key: str, data: bytes, sha256: str) -> None:
+        ...
+
+    @abstractmethod
+    async def _write_stream(self, key: str, file: BinaryIO, sha256: str, size: int) -> None:
+        ...
+
+    @abstractmethod
+    async def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    async def size(self, key: str) -> Optional[int]:
+        """Blob size in bytes, or None if it does not exist."""
+
+    @abstractmethod
+    def iter_range(self, key: str, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        """Yield the bytes ``start..end`` (inclusive; ``end=None`` = to the end) in chunks."""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        ...
+
+
+class LocalMediaStorage(MediaStorage):
+    """Blobs as files under `root`; writes are atomic (temp file + rename)."""
+
+    name = "local"
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def _path(self, key: str) -> Path:
+        return self.root / _check_key(key)
+
+    def _write_file(self, path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    def _copy_file(self, path: Path, file: BinaryIO) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                shutil.copyfileobj(file, f, CHUNK_SIZE)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    async def _write(self, key: str, data: bytes, sha256: str) -> None:
+        await asyncio.to_thread(self._write_file, self._path(key), data)
+
+    async def _write_stream(self, key: str, file: BinaryIO, sha256: str, size: int) -> None:
+        await asyncio.to_thread(self._copy_file, self._path(key), file)
+
+    async def exists(self, key: str) -> bool:
+        return await asyncio.to_thread(self._path(key).is_file)
+
+    async def size(self, key: str) -> Optional[int]:
+        try:
+            return (await asyncio.to_thread(self._path(key).stat)).st_size
+        except FileNotFoundError:
+            return None
+
+    async def iter_range(self, key: str, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        path = self._path(key)
+        try:
+            f = await asyncio.to_thread(open, path, "rb")
+        except FileNotFoundError:
+            raise MediaStorageError(f"Blob not found: {key}")
+        try:
+            await asyncio.to_thread(f.seek, start)
+            remaining = None if end is None else end - start + 1
+            while remaining is None or remaining > 0:
+                chunk = await asyncio.to_thread(f.read, CHUNK_SIZE if remaining is None else min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+        finally:
+            await asyncio.to_thread(f.close)
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(self._path(key).unlink, missing_ok=True)
+
+
+class S3MediaStorage(MediaStorage):
+    """
+    Blobs in an S3-compatible bucket (AWS S3, MinIO, R2, ...), path-style URLs.
+
+    Requests are signed with AWS Signature V4. PUTs carry the content sha256
+    as ``x-amz-content-sha256``, so the store verifies the upload against the
+    same digest that names it.
+    """
+
+    name = "s3"
+
+    def __init__(
+        self,
+        bucket: str,
+        endpoint_url: str,
+        access_key_id: str,
+        secret_access_key: str,
+        region: str = "us-east-1",
+        prefix: str = "",
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        if not bucket or not endpoint_url:
+            raise MediaStorageError("S3 media storage requires MEDIA_S3_BUCKET and MEDIA_S3_ENDPOINT_URL")
+        self.bucket = bucket
+        self.endpoint_url = endpoint_url.rstrip("/")
+        self.access_key_id = access_key_id
+        self.secret_access_key = secret_access_key
+        self.region = region
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(transport=self._transport, timeout=httpx.Timeout(30.0, connect=5.0))
+        return self._client
+
+    def _url(self, key: str) -> str:
+        return f"{self.endpoint_url}/{self.bucket}/{self.prefix}{_check_key(key)}"
+
+    def _signed_headers(self, method: str, url: str, payload_sha256: str, extra: Optional[dict] = None) -> dict:
+        now = datetime.now(timezone.utc)
+        amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+        scope = f"{now:%Y%m%d}/{self.region}/s3/aws4_request"
+        parsed = httpx.URL(url)
+
+        headers = {key.lower(): str(value).strip() for key, value in (extra or {}).items()}
+        headers.update({
+            "host": parsed.netloc.decode("ascii"),
+            "x-amz-date": amz_date,
+            "x-amz-content-sha256": payload_sha256,
+        })
+        signed = sorted(headers)
+        canonical_request = "\n".join([
+            method,
+            quote(parsed.path, safe="/-_.~"),
+            "",
+            "".join(f"{name}:{headers[name]}\n" for name in signed),
+            ";".join(signed),
+            payload_sha256,
+        ])
+        string_to_sign = "\n".join([
+            "AWS4-HMAC-SHA256",
+            amz_date,
+            scope,
+            hashlib.sha256(canonical_request.encode("utf-8")).hexdigest(),
+        ])
+
+        signing_key = f"AWS4{self.secret_access_key}".encode("utf-8")
+        for part in (f"{now:%Y%m%d}", self.region, "s3", "aws4_request"):
+            signing_key = hmac.new(signing_key, part.encode("utf-8"), hashlib.sha256).digest()
+        signature = hmac.new(signing_key, string_to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
+
+        headers["authorization"] = (
+            f"AWS4-HMAC-SHA256 Credential={self.access_key_id}/{scope}, "
+            f"SignedHeaders={';'.join(signed)}, Signature={signature}"
+        )
+        del headers["host"]
+        return headers
+
+    async def _request(self, method: str, key: str, content: Union[bytes, AsyncIterator[bytes]] = b"",
+                       payload_sha256: Optional[str] = None, headers: Optional[dict] = None) -> httpx.Response:
+        url = self._url(key)
+        payload_sha256 = payload_sha256 or hashlib.sha256(content).hexdigest()
+        return await self.client.request(
+            method, url, content=content or None, headers=self._signed_headers(method, url, payload_sha256, headers)
+        )
+
+    async def _head(self, key: str) -> Optional[httpx.Response]:
+        response = await self._request("HEAD", key)
+        if response.status_code == 404:
+            return None
+        if response.status_code >= 300:
+            raise MediaStorageError(f"S3 HEAD {key} failed: HTTP {response.status_code}")
+        return response
+
+    async def _write(self, key: str, data: bytes, sha256: str) -> None:
+        response = await self._request("PUT", key, content=data, payload_sha256=sha256)
+        if response.status_code >= 300:
+            raise MediaStorageError(f"S3 PUT {key} failed: HTTP {response.status_code}")
+
+    async def _write_stream(self, key: str, file: BinaryIO, sha256: str, size: int) -> None:
+        async def _chunks():
+            while chunk := await asyncio.to_thread(file.read, CHUNK_SIZE):
+                yield chunk
+
+        # An explicit length keeps httpx from falling back to chunked encoding, which S3 rejects.
+        response = await self._request(
+            "PUT", key, content=_chunks(), payload_sha256=sha256, headers={"content-length": str(size)}
+        )
+        if response.status_code >= 300:
+            raise MediaStorageError(f"S3 PUT {key} failed: HTTP {response.status_code}")
+
+    async def exists(self, key: str) -> bool:
+        return await self._head(key) is not None
+
+    async def size(self, key: str) -> Optional[int]:
+        response = await self._head(key)
+        return int(response.headers.get("content-length", 0)) if response is not None else None
+
+    async def iter_range(self, key: str, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        url = self._url(key)
+        extra = {"range": f"bytes={start}-{'' if end is None else end}"} if start or end is not None else None
+        headers = self._signed_headers("GET", url, hashlib.sha256(b"").hexdigest(), extra)
+        async with self.client.stream("GET", url, headers=headers) as response:
+            if response.status_code == 404:
+                raise MediaStorageError(f"Blob not found: {key}")
+            if response.status_code >= 300:
+                raise MediaStorageError(f"S3 GET {key} failed: HTTP {response.status_code}")
+            async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                yield chunk
+
+    async def delete(self, key: str) -> None:
+        response = await self._request("DELETE", key)
+        if response.status_code >= 300 and response.status_code != 404:
+            raise MediaStorageError(f"S3 DELETE {key} failed: HTTP {response.status_code}")
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def build_media_storage() -> MediaStorage:
+    """Backend selected by MEDIA_STORAGE_BACKEND ("local" or "s3")."""
+    if settings.MEDIA_STORAGE_BACKEND == "s3":
+        return S3MediaStorage(
+            bucket=settings.MEDIA_S3_BUCKET,
+            endpoint_url=settings.MEDIA_S3_ENDPOINT_URL,
+            access_key_id=settings.MEDIA_S3_ACCESS_KEY_ID,
+            secret_access_key=settings.MEDIA_S3_SECRET_ACCESS_KEY,
+            region=settings.MEDIA_S3_REGION,
+            prefix=settings.MEDIA_S3_PREFIX,
+        )
+    return LocalMediaStorage(Path(settings.MEDIA_STORAGE_ROOT) if settings.MEDIA_STORAGE_ROOT else DEFAULT_LOCAL_ROOT)
+
+
+media_storage = build_media_storage()
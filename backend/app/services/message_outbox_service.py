@@ -0,0 +1,140 @@
+"""Transactional outbox for operator-to-LINE message delivery."""
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from linebot.v3.messaging import Message as LineMessage
+from linebot.v3.messaging.exceptions import ApiException
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.websocket_manager import ws_manager
+from app.db.session import AsyncSessionLocal
+from app.models.message import Message
+from app.models.message_outbox import DeliveryStatus, MessageOutbox
+from app.schemas.ws_events import WSEventType
+from app.services.line_service import line_service
+
+logger = logging.getLogger(__name__)
+
+
+class MessageOutboxService:
+    """
+    Persists outgoing LINE pushes next to their message rows and delivers them later.
+
+    The operator request only writes rows; a worker pool (app.tasks.message_outbox)
+    claims due rows with SKIP LOCKED, pushes them with a stable X-Line-Retry-Key
+    and reports SENT/FAILED back over the WebSocket.
+    """
+
+    async def enqueue(self, db: AsyncSession, message: Message, line_messages: list) -> MessageOutbox:
+        """Queue LINE messages for delivery in the caller's transaction (no commit)."""
+        message.delivery_status = DeliveryStatus.PENDING.value
+        entry = MessageOutbox(
+            message_id=message.id,
+            line_user_id=message.line_user_id,
+            line_messages=[m.to_dict() for m in line_messages],
+            retry_key=str(uuid.uuid4()),
+            status=DeliveryStatus.PENDING.value,
+            attempts=0,
+            next_attempt_at=datetime.now(timezone.utc),
+        )
+        db.add(entry)
+        await db.flush()
+        return entry
+
+    async def claim_due(self, db: AsyncSession, limit: int) -> List[MessageOutbox]:
+        """
+        Claim up to `limit` due entries and lease them to this worker.
+
+        Rows locked by another replica are skipped. Leasing pushes next_attempt_at
+        forward so the rows stay hidden while the LINE call runs outside any
+        transaction; a crashed worker's lease simply expires and the row is retried.
+        """
+        now = datetime.now(timezone.utc)
+        result = await db.execute(
+            select(MessageOutbox)
+            .where(
+                MessageOutbox.status == DeliveryStatus.PENDING.value,
+                MessageOutbox.next_attempt_at <= now,
+            )
+            .order_by(MessageOutbox.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        entries = list(result.scalars().all())
+        lease_until = now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS)
+        for entry in entries:
+            entry.attempts = (entry.attempts or 0) + 1
+            entry.next_attempt_at = lease_until
+        await db.commit()
+        return entries
+
+    async def deliver(self, entry: MessageOutbox) -> str:
+        """Push one claimed entry to LINE, persist the outcome and return the new status."""
+        error: Optional[str] = None
+        retryable = False
+        try:
+            messages = [LineMessage.from_dict(item) for item in entry.line_messages]
+            await line_service.push_messages(entry.line_user_id, messages, retry_key=entry.retry_key)
+        except ApiException as exc:
+            status_code = exc.status or 0
+            if status_code == 409:
+                # LINE already accepted a request with this retry key.
+                logger.info("Outbox entry %s already delivered (retry key accepted)", entry.id)
+            else:
+                error = f"LINE API {status_code}: {exc.reason}"
+                retryable = status_code == 429 or status_code >= 500 or status_code == 0
+        except Exception as exc:
+            error = str(exc) or exc.__class__.__name__
+            retryable = not isinstance(exc, (ValueError, TypeError))
+
+        now = datetime.now(timezone.utc)
+        if error is None:
+            status = DeliveryStatus.SENT.value
+            values = {"status": status, "sent_at": now, "last_error": None}
+        elif retryable and (entry.attempts or 0) < settings.OUTBOX_MAX_ATTEMPTS:
+            status = DeliveryStatus.PENDING.value
+            backoff = settings.OUTBOX_RETRY_BASE_SECONDS * (2 ** max((entry.attempts or 1) - 1, 0))
+            values = {"status": status, "next_attempt_at": now + timedelta(seconds=backoff), "last_error": error}
+            logger.warning(
+                "Outbox entry %s attempt %s failed, retrying in %ss: %s",
+                entry.id, entry.attempts, backoff, error,
+            )
+        else:
+            status = DeliveryStatus.FAILED.value
+            values = {"status": status, "last_error": error}
+            logger.error("Outbox entry %s failed permanently after %s attempts: %s", entry.id, entry.attempts, error)
+
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(MessageOutbox).where(MessageOutbox.id == entry.id).values(**values))
+            if status != DeliveryStatus.PENDING.value:
+                await db.execute(
+                    update(Message).where(Message.id == entry.message_id).values(delivery_status=status)
+                )
+            await db.commit()
+
+        if status != DeliveryStatus.PENDING.value:
+            await self._broadcast_status(entry, status, error)
+        return status
+
+    async def _broadcast_status(self, entry: MessageOutbox, status: str, error: Optional[str]):
+        """Tell operators viewing the conversation how the delivery ended."""
+        try:
+            await ws_manager.broadcast_to_room(ws_manager.get_room_id(entry.line_user_id), {
+                "type": WSEventType.MESSAGE_STATUS.value,
+                "payload": {
+                    "id": entry.message_id,
+                    "line_user_id": entry.line_user_id,
+                    "delivery_status": status,
+                    "error": error,
+                },
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+            })
+        except Exception as e:
+            logger.error(f"Failed to broadcast delivery status for message {entry.message_id}: {e}")
+
+
+message_outbox_service = MessageOutboxService()
@@ -0,0 +1,185 @@
+"""Result cache for the admin report endpoints, invalidated by table high-water marks."""
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Tuple, Type, TypeVar
+
+from pydantic import BaseModel
+from sqlalchemy import exists, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.redis_client import redis_client
+from app.models.chat_session import ChatSession
+from app.models.friend_event import FriendEvent
+from app.models.message import Message
+from app.models.service_request import ServiceRequest
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "report_cache"
+LOCAL_CACHE_SIZE = 256  # Entries kept in process memory when Redis is unavailable
+
+# table -> (id column, column the reports filter ranges on, columns bumped by updates)
+TRACKED_TABLES = {
+    "messages": (Message.id, Message.created_at, ()),
+    "service_requests": (ServiceRequest.id, ServiceRequest.created_at, (ServiceRequest.updated_at,)),
+    "chat_sessions": (ChatSession.id, ChatSession.started_at, (ChatSession.claimed_at, ChatSession.closed_at)),
+    "friend_events": (FriendEvent.id, FriendEvent.created_at, ()),
+}
+
+ReportT = TypeVar("ReportT", bound=BaseModel)
+
+
+def _utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+class ReportCacheService:
+    """
+    Caches report responses keyed by (report, date range, params).
+
+    Ranges that reach today are "live": they are served for
+    REPORT_CACHE_LIVE_TTL_SECONDS and then recomputed. Ranges that ended
+    before today are kept for REPORT_CACHE_TTL_SECONDS together with the
+    high-water marks (max id and max update time) of the tables the report
+    reads; each hit first checks whether any row in the range is newer than
+    those marks (an indexed EXISTS probe) and recomputes only if one is.
+    Tables listed as ``open_ended`` are probed from the range start with no
+    end, for reports that count rows after the range (messages in sessions
+    that started within it).
+    """
+
+    def __init__(self):
+        self._local: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+    # -- storage -----------------------------------------------------------
+
+    async def _get(self, key: str) -> Optional[str]:
+        if redis_client.is_connected:
+            return await redis_client.get(key)
+        entry = self._local.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            self._local.pop(key, None)
+            return None
+        return entry[1]
+
+    async def _set(self, key: str, value: str, seconds: int) -> None:
+        if redis_client.is_connected:
+            await redis_client.setex(key, seconds, value)
+            return
+        self._local[key] = (time.monotonic() + seconds, value)
+        self._local.move_to_end(key)
+        while len(self._local) > LOCAL_CACHE_SIZE:
+            self._local.popitem(last=False)
+
+    # -- marks -------------------------------------------------------------
+
+    async def high_water_marks(self, db: AsyncSession, tables: Iterable[str]) -> Dict[str, dict]:
+        """Current max id and max update time of each table, in one statement."""
+        tables = list(tables)
+        columns = []
+        for table in tables:
+            id_column, _, updated_columns = TRACKED_TABLES[table]
+            columns.append(select(func.max(id_column)).scalar_subquery())
+            columns.extend(select(func.max(column)).scalar_subquery() for column in updated_columns)
+        row = list((await db.execute(select(*columns))).one())
+
+        marks: Dict[str, dict] = {}
+        for table in tables:
+            updated_count = len(TRACKED_TABLES[table][2])
+            max_id, updated = row[0], [value for value in row[1:1 + updated_count] if value is not None]
+            row = row[1 + updated_count:]
+            marks[table] = {
+                "id": max_id or 0,
+                "updated_at": _utc(max(updated)).isoformat() if updated else None,
+            }
+        return marks
+
+    async def changed_since(
+        self,
+        db: AsyncSession,
+        marks: Dict[str, dict],
+        start: Optional[datetime],
+        end: Optional[datetime],
+    ) -> bool:
+        """Whether any row in [start, end] was inserted or updated after `marks`."""
+        probes = []
+        for table, mark in marks.items():
+            id_column, range_column, updated_columns = TRACKED_TABLES[table]
+            newer = [id_column > mark["id"]]
+            if mark["updated_at"]:
+                updated_at = datetime.fromisoformat(mark["updated_at"])
+                newer.extend(column > updated_at for column in updated_columns)
+            else:
+                newer.extend(column.isnot(None) for column in updated_columns)
+            conditions = [or_(*newer)]
+            if start is not None:
+                conditions.append(range_column >= start)
+            if end is not None and not mark.get("open_ended"):
+                conditions.append(range_column <= end)
+            probes.append(exists().where(*conditions))
+        if not probes:
+            return False
+        return bool(await db.scalar(select(or_(*probes))))
+
+    # -- cache -------------------------------------------------------------
+
+    @staticmethod
+    def cache_key(
+        report: str,
+        start: Optional[datetime],
+        end: Optional[datetime],
+        params: Optional[dict],
+        live: bool,
+    ) -> str:
+        def _bound(value: Optional[datetime]) -> str:
+            if value is None:
+                return "-"
+            value = _utc(value)
+            # Live ranges usually end "now"; a minute's resolution lets requests share entries.
+            return (value.replace(second=0, microsecond=0) if live else value).isoformat()
+
+        extra = json.dumps(params or {}, sort_keys=True, default=str)
+        return f"{KEY_PREFIX}:{report}:{_bound(start)}:{_bound(end)}:{extra}"
+
+    async def get_or_compute(
+        self,
+        db: AsyncSession,
+        report: str,
+        model: Type[ReportT],
+        compute: Callable[[], Awaitable[ReportT]],
+        tables: Iterable[str] = (),
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        params: Optional[dict] = None,
+        open_ended: Iterable[str] = (),
+    ) -> ReportT:
+        """Return the cached report for this range or compute and cache it."""
+        today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        live = end is None or _utc(end) >= today
+        key = self.cache_key(report, start, end, params, live)
+
+        cached = await self._get(key)
+        if cached:
+            entry = json.loads(cached)
+            if live or not await self.changed_since(db, entry["marks"], start, end):
+                return model.model_validate(entry["value"])
+
+        # Marks are taken before computing so changes made meanwhile invalidate the entry.
+        marks = {} if live else await self.high_water_marks(db, tables)
+        for table in open_ended:
+            if table in marks:
+                marks[table]["open_ended"] = True
+        result = await compute()
+        ttl = settings.REPORT_CACHE_LIVE_TTL_SECONDS if live else settings.REPORT_CACHE_TTL_SECONDS
+        try:
+            await self._set(key, json.dumps({"value": result.model_dump(mode="json"), "marks": marks}), ttl)
+        except Exception as e:
+            logger.warning("Report cache write failed (non-fatal): %s", e)
+        return result
+
+
+report_cache_service = ReportCacheService()
@@ -0,0 +1,229 @@
+"""Background report jobs: deduplicated, rendered off the event loop, stored with a TTL."""
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import multiprocessing
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.redis_client import redis_client
+from app.core.websocket_manager import ws_manager
+from app.schemas.ws_events import WSEventType
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "report_job"
+WAIT_POLL_SECONDS = 0.5
+
+
+class ReportJobStatus(str, Enum):
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+
+
+FINISHED = {ReportJobStatus.COMPLETED.value, ReportJobStatus.FAILED.value}
+
+
+class ReportJobService:
+    """
+    Runs report exports as background jobs.
+
+    A job is identified by (kind, params): submitting the same export while an
+    earlier one is queued, running or its result is still stored returns the
+    existing job, so identical requests share one render. The loader gathers
+    the report data on the event loop (it is I/O bound); the renderer, a
+    picklable module-level function from app.services.report_renderers, runs
+    in a process pool capped at REPORT_RENDER_CONCURRENCY so reportlab never
+    blocks WebSockets or webhooks.
+
+    Job records and results live in Redis (visible to every replica) with a
+    TTL; without Redis they are kept in process memory. When a job finishes
+    the requesting admin gets a REPORT_JOB_DONE WebSocket event.
+    """
+
+    def __init__(self):
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._local: Dict[str, Tuple[float, str]] = {}
+
+    # -- storage -----------------------------------------------------------
+
+    async def _set(self, key: str, value: str, seconds: int, nx: bool = False) -> bool:
+        if redis_client.is_connected:
+            return await redis_client.set(key, value, seconds=seconds, nx=nx)
+        if nx and await self._get(key) is not None:
+            return False
+        self._local[key] = (time.monotonic() + seconds, value)
+        return True
+
+    async def _get(self, key: str) -> Optional[str]:
+        if redis_client.is_connected:
+            return await redis_client.get(key)
+        entry = self._local.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            self._local.pop(key, None)
+            return None
+        return entry[1]
+
+    async def _delete(self, key: str) -> None:
+        if redis_client.is_connected:
+            await redis_client.delete(key)
+        self._local.pop(key, None)
+
+    @staticmethod
+    def _job_key(job_id: str) -> str:
+        return f"{KEY_PREFIX}:{job_id}"
+
+    @staticmethod
+    def _result_key(job_id: str) -> str:
+        return f"{KEY_PREFIX}:{job_id}:result"
+
+    @staticmethod
+    def dedup_key(kind: str, params: dict) -> str:
+        digest = hashlib.sha256(
+            json.dumps({"kind": kind, "params": params}, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+        return f"{KEY_PREFIX}:dedup:{digest[:32]}"
+
+    async def _save(self, job: dict, seconds: int) -> None:
+        await self._set(self._job_key(job["id"]), json.dumps(job), seconds)
+
+    async def get_job(self, job_id: str) -> Optional[dict]:
+        raw = await self._get(self._job_key(job_id))
+        return json.loads(raw) if raw else None
+
+    async def get_result(self, job_id: str) -> Optional[bytes]:
+        raw = await self._get(self._result_key(job_id))
+        return base64.b64decode(raw) if raw else None
+
+    # -- execution ---------------------------------------------------------
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: never fork the running event loop and its connections.
+            self._executor = ProcessPoolExecutor(
+                max_workers=max(1, settings.REPORT_RENDER_CONCURRENCY),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def submit(
+        self,
+        kind: str,
+        params: dict,
+        loader: Callable[[], Awaitable[dict]],
+        renderer: Callable[[dict], bytes],
+        filename: str,
+        media_type: str = "application/pdf",
+        requested_by: Optional[int] = None,
+    ) -> dict:
+        """Start (or join) the job for (kind, params) and return its record."""
+        dedup_key = self.dedup_key(kind, params)
+        job_id = uuid.uuid4().hex
+        if not await self._set(dedup_key, job_id, settings.REPORT_JOB_TIMEOUT_SECONDS, nx=True):
+            existing_id = await self._get(dedup_key)
+            existing = await self.get_job(existing_id) if existing_id else None
+            if existing and existing["status"] != ReportJobStatus.FAILED.value:
+                return existing
+            await self._set(dedup_key, job_id, settings.REPORT_JOB_TIMEOUT_SECONDS)
+
+        job = {
+            "id": job_id,
+            "kind": kind,
+            "params": params,
+            "status": ReportJobStatus.QUEUED.value,
+            "filename": filename,
+            "media_type": media_type,
+            "size": None,
+            "error": None,
+            "requested_by": requested_by,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "completed_at": None,
+        }
+        await self._save(job, settings.REPORT_JOB_TIMEOUT_SECONDS)
+
+        task = asyncio.create_task(self._run(job, dedup_key, loader, renderer))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def _run(self, job: dict, dedup_key: str, loader, renderer) -> None:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(max(1, settings.REPORT_RENDER_CONCURRENCY))
+        try:
+            async with self._semaphore:
+                job["status"] = ReportJobStatus.RUNNING.value
+                await self._save(job, settings.REPORT_JOB_TIMEOUT_SECONDS)
+
+                payload = await loader()
+                content = await asyncio.get_running_loop().run_in_executor(self._pool(), renderer, payload)
+
+            ttl = settings.REPORT_JOB_RESULT_TTL_SECONDS
+            await self._set(self._result_key(job["id"]), base64.b64encode(content).decode("ascii"), ttl)
+            job.update(status=ReportJobStatus.COMPLETED.value, size=len(content))
+            await self._set(dedup_key, job["id"], ttl)
+        except asyncio.CancelledError:
+            await self._delete(dedup_key)
+            raise
+        except Exception as e:
+            logger.error(f"Report job {job['id']} ({job['kind']}) failed: {e}")
+            job.update(status=ReportJobStatus.FAILED.value, error=str(e) or e.__class__.__name__)
+            await self._delete(dedup_key)
+
+        job["completed_at"] = datetime.now(timezone.utc).isoformat()
+        await self._save(job, settings.REPORT_JOB_RESULT_TTL_SECONDS)
+        await self._notify(job)
+
+    async def _notify(self, job: dict) -> None:
+        if job.get("requested_by") is None:
+            return
+        try:
+            await ws_manager.notify_admin(str(job["requested_by"]), {
+                "type": WSEventType.REPORT_JOB_DONE.value,
+                "payload": {key: job[key] for key in ("id", "kind", "status", "filename", "size", "error")},
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+            })
+        except Exception as e:
+            logger.warning("Report job notification failed (non-fatal): %s", e)
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[dict]:
+        """Poll a job until it finishes or `timeout` seconds pass; returns the last record."""
+        deadline = time.monotonic() + timeout
+        while True:
+            job = await self.get_job(job_id)
+            if job is None or job["status"] in FINISHED or time.monotonic() >= deadline:
+                return job
+            await asyncio.sleep(WAIT_POLL_SECONDS)
+
+    async def wait_for_result(self, job: dict, timeout: float) -> Tuple[dict, Optional[bytes]]:
+        """Wait for a job and return it with its file, or with None if it is unfinished or failed."""
+        job = await self.wait(job["id"], timeout) or job
+        if job["status"] != ReportJobStatus.COMPLETED.value:
+            return job, None
+        return job, await self.get_result(job["id"])
+
+    async def shutdown(self) -> None:
+        """Cancel running jobs and stop the worker processes."""
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._semaphore = None
+
+
+report_job_service = ReportJobService()
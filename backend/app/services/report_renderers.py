@@ -0,0 +1,62 @@
+"""
+CPU-bound PDF renderers executed in report worker processes.
+
+Each renderer is a module-level function taking one picklable payload dict and
+returning the file bytes, so it can be shipped to a ProcessPoolExecutor. Keep
+imports light: worker processes import this module on start.
+"""
+from datetime import datetime, timezone
+from io import BytesIO
+
+
+def render_report_pdf(payload: dict) -> bytes:
+    """Render a dashboard report; payload holds report_type, data and period."""
+    from app.services.pdf_report_service import PDFReportService
+
+    buffer = PDFReportService().generate(payload["report_type"], payload["data"], payload["period"])
+    return buffer.getvalue()
+
+
+def render_conversation_pdf(payload: dict) -> bytes:
+    """
+    Render one conversation transcript.
+
+    payload: display_name, line_user_id and messages, each a dict with
+    timestamp, direction, sender_role, message_type and content strings.
+    """
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    buffer = BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4)
+    width, height = A4
+    left = 36
+    top = height - 36
+    line_height = 14
+
+    pdf.setFont("Helvetica-Bold", 12)
+    pdf.drawString(left, top, f"Conversation Export: {payload['display_name']}")
+    pdf.setFont("Helvetica", 9)
+    pdf.drawString(left, top - line_height, f"LINE User ID: {payload['line_user_id']}")
+    pdf.drawString(left, top - (line_height * 2), f"Generated UTC: {datetime.now(timezone.utc).isoformat()}")
+
+    y = top - (line_height * 4)
+    for message in payload["messages"]:
+        if y < 48:
+            pdf.showPage()
+            pdf.setFont("Helvetica", 9)
+            y = height - 48
+
+        content = (message["content"] or "").replace("\n", " ").strip()
+        if len(content) > 180:
+            content = f"{content[:177]}..."
+
+        line = (
+            f"[{message['timestamp']}] {message['direction']}/{message['sender_role']} "
+            f"({message['message_type']}) {content}"
+        )
+        pdf.drawString(left, y, line)
+        y -= line_height
+
+    pdf.save()
+    return buffer.getvalue()
@@ -3,6 +3,7 @@ from sqlalchemy import select
 from typing import List, Dict, Any, Optional
 import httpx
 from datetime import datetime, timezone
+from app.core.http_client import POOL_LINE, outbound_http
 from app.models.rich_menu import RichMenu, RichMenuStatus
 from app.services.settings_service import SettingsService
 import os
@@ -23,80 +24,80 @@ class RichMenuService:
     async def create_on_line(db: AsyncSession, rich_menu_config: Dict[str, Any]) -> str:
         """Create rich menu on LINE and return the rich menu ID."""
         headers = await RichMenuService.get_client_headers(db)
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{RichMenuService.API_BASE}/richmenu",
-                headers=headers,
-                json=rich_menu_config
-            )
-            response.raise_for_status()
-            return response.json()["richMenuId"]
+        client = outbound_http.client(POOL_LINE)
+        response = await client.post(
+            f"{RichMenuService.API_BASE}/richmenu",
+            headers=headers,
+            json=rich_menu_config
+        )
+        response.raise_for_status()
+        return response.json()["richMenuId"]
 
     @staticmethod
     async def upload_image_to_line(db: AsyncSession, line_rich_menu_id: str, image_bytes: bytes, content_type: str):
         """Upload rich menu image to LINE."""
         headers = await RichMenuService.get_client_headers(db)
         headers["Content-Type"] = content_type
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{RichMenuService.DATA_API_BASE}/richmenu/{line_rich_menu_id}/content",
-                headers=headers,
-                content=image_bytes
-            )
-            response.raise_for_status()
-            return response.json()
+        client = outbound_http.client(POOL_LINE)
+        response = await client.post(
+            f"{RichMenuService.DATA_API_BASE}/richmenu/{line_rich_menu_id}/content",
+            headers=headers,
+            content=image_bytes
+        )
+        response.raise_for_status()
+        return response.json()
 
     @staticmethod
     async def set_default_on_line(db: AsyncSession, line_rich_menu_id: str):
         """Set rich menu as default for all users."""
         headers = await RichMenuService.get_client_headers(db)
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{RichMenuService.API_BASE}/user/all/richmenu/{line_rich_menu_id}",
-                headers=headers
-            )
-            response.raise_for_status()
-            return response.json()
+        client = outbound_http.client(POOL_LINE)
+        response = await client.post(
+            f"{RichMenuService.API_BASE}/user/all/richmenu/{line_rich_menu_id}",
+            headers=headers
+        )
+        response.raise_for_status()
+        return response.json()
 
     @staticmethod
     async def delete_from_line(db: AsyncSession, line_rich_menu_id: str):
         """Delete rich menu from LINE."""
         headers = await RichMenuService.get_client_headers(db)
-        async with httpx.AsyncClient() as client:
-            response = await client.delete(
-                f"{RichMenuService.API_BASE}/richmenu/{line_rich_menu_id}",
-                headers=headers
-            )
-            # 404 is acceptable if already deleted on LINE
-            if response.status_code != 404:
-                response.raise_for_status()
-            return response.status_code
+        client = outbound_http.client(POOL_LINE)
+        response = await client.delete(
+            f"{RichMenuService.API_BASE}/richmenu/{line_rich_menu_id}",
+            headers=headers
+        )
+        # 404 is acceptable if already deleted on LINE
+        if response.status_code != 404:
+            response.raise_for_status()
+        return response.status_code
 
     @staticmethod
     async def list_from_line(db: AsyncSession) -> List[Dict[str, Any]]:
         """List all rich menus from LINE."""
         headers = await RichMenuService.get_client_headers(db)
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{RichMenuService.API_BASE}/richmenu/list",
-                headers=headers
-            )
-            response.raise_for_status()
-            return response.json().get("richmenus", [])
+        client = outbound_http.client(POOL_LINE)
+        response = await client.get(
+            f"{RichMenuService.API_BASE}/richmenu/list",
+            headers=headers
+        )
+        response.raise_for_status()
+        return response.json().get("richmenus", [])
 
     @staticmethod
     async def get_from_line(db: AsyncSession, line_rich_menu_id: str) -> Optional[Dict[str, Any]]:
         """Get a specific rich menu from LINE by ID."""
         headers = await RichMenuService.get_client_headers(db)
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{RichMenuService.API_BASE}/richmenu/{line_rich_menu_id}",
-                headers=headers
-            )
-            if response.status_code == 404:
-                return None
-            response.raise_for_status()
-            return response.json()
+        client = outbound_http.client(POOL_LINE)
+        response = await client.get(
+            f"{RichMenuService.API_BASE}/richmenu/{line_rich_menu_id}",
+            headers=headers
+        )
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.json()
 
     @staticmethod
     async def update_sync_status(
@@ -1,10 +1,10 @@
-import httpx
 import logging
 from typing import List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.credential import Provider
 from app.services.credential_service import credential_service
 from app.core.config import settings
+from app.core.http_client import POOL_TELEGRAM, outbound_http
 
 logger = logging.getLogger(__name__)
 
@@ -67,18 +67,17 @@ class TelegramService:
         # Send to Telegram
         url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(url, json={
-                    "chat_id": self.chat_id,
-                    "text": text,
-                    "parse_mode": "HTML",
-                    "disable_web_page_preview": False
-                })
-                if response.status_code == 200:
-                    return True
-                else:
-                    logger.error(f"Telegram API error: {response.text}")
-                    return False
+            response = await outbound_http.client(POOL_TELEGRAM).post(url, json={
+                "chat_id": self.chat_id,
+                "text": text,
+                "parse_mode": "HTML",
+                "disable_web_page_preview": False
+            })
+            if response.status_code == 200:
+                return True
+            else:
+                logger.error(f"Telegram API error: {response.text}")
+                return False
         except Exception as e:
             logger.error(f"Failed to send Telegram notification: {e}")
             return False
@@ -92,19 +91,18 @@ class TelegramService:
 
         url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    url,
-                    json={
-                        "chat_id": self.chat_id,
-                        "text": text,
-                        "disable_web_page_preview": True,
-                    },
-                )
-                if response.status_code == 200:
-                    return True
-                logger.error(f"Telegram API error: {response.text}")
-                return False
+            response = await outbound_http.client(POOL_TELEGRAM).post(
+                url,
+                json={
+                    "chat_id": self.chat_id,
+                    "text": text,
+                    "disable_web_page_preview": True,
+                },
+            )
+            if response.status_code == 200:
+                return True
+            logger.error(f"Telegram API error: {response.text}")
+            return False
         except Exception as e:
             logger.error(f"Failed to send Telegram alert: {e}")
             return False
@@ -0,0 +1,113 @@
+"""
+CPU-bound thumbnail renderers executed in thumbnail worker processes.
+
+Like report_renderers, each function takes one picklable payload and returns
+plain bytes so it can run in a ProcessPoolExecutor. Pillow is optional: without
+it (or without ffmpeg for video) the renderers return no thumbnails.
+"""
+import shutil
+import subprocess
+import tempfile
+from io import BytesIO
+from typing import Dict, Optional
+
+JPEG_QUALITY = 80
+FFMPEG_TIMEOUT_SECONDS = 20
+
+
+def _video_first_frame(data: bytes) -> Optional[bytes]:
+    ffmpeg = shutil.which("ffmpeg")
+    if not ffmpeg:
+        return None
+    # MP4/MOV often keep the moov atom at the end, which ffmpeg cannot reach by
+    # reading stdin; a seekable file works for every container.
+    with tempfile.NamedTemporaryFile(suffix=".video") as source:
+        source.write(data)
+        source.flush()
+        try:
+            result = subprocess.run(
+                [ffmpeg, "-loglevel", "error", "-i", source.name,
+                 "-frames:v", "1", "-f", "image2pipe", "-vcodec", "png", "pipe:1"],
+                stdin=subprocess.DEVNULL,
+                capture_output=True,
+                timeout=FFMPEG_TIMEOUT_SECONDS,
+                check=False,
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+    return result.stdout or None
+
+
+def _flatten(image):
+    """RGB copy of a Pillow image; transparent areas become white instead of black."""
+    from PIL import Image
+
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image if image.mode == "RGB" else image.convert("RGB")
+
+
+def render_thumbnails(payload: dict) -> Dict[int, bytes]:
+    """
+    Render JPEG thumbnails.
+
+    payload: data (bytes), mime_type and sizes (longest-edge pixel sizes).
+    Returns {size: jpeg bytes}; sizes larger than the source are rendered at
+    the source size. Empty when the input cannot be decoded.
+    """
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        return {}
+
+    data = payload["data"]
+    if (payload.get("mime_type") or "").startswith("video/"):
+        data = _video_first_frame(data)
+        if not data:
+            return {}
+
+    try:
+        with Image.open(BytesIO(data)) as source:
+            source.draft("RGB", (max(payload["sizes"]),) * 2)  # JPEG: decode at reduced scale
+            image = ImageOps.exif_transpose(source)
+            image = _flatten(image)
+
+            thumbnails = {}
+            for size in sorted(payload["sizes"], reverse=True):
+                thumb = image.copy()
+                thumb.thumbnail((size, size), Image.Resampling.LANCZOS)
+                buffer = BytesIO()
+                thumb.save(buffer, format="JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+                thumbnails[size] = buffer.getvalue()
+                image = thumb  # next (smaller) size resizes from this one
+            return thumbnails
+    except Exception:
+        return {}
+
+
+def recompress_image(payload: dict) -> Optional[bytes]:
+    """
+    Re-encode an image as a JPEG no larger than max_edge pixels.
+
+    payload: data (bytes), max_edge and quality. Returns None when Pillow is
+    missing or the input cannot be decoded; the caller decides whether the
+    result is worth keeping.
+    """
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        return None
+
+    try:
+        with Image.open(BytesIO(payload["data"])) as source:
+            image = _flatten(ImageOps.exif_transpose(source))
+            image.thumbnail((payload["max_edge"], payload["max_edge"]), Image.Resampling.LANCZOS)
+            buffer = BytesIO()
+            quality = payload.get("quality", JPEG_QUALITY)
+            image.save(buffer, format="JPEG", quality=quality, optimize=True, progressive=True)
+            return buffer.getvalue()
+    except Exception:
+        return None
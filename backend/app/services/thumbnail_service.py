@@ -0,0 +1,113 @@
+"""Thumbnail generation for media files, rendered off the event loop."""
+import asyncio
+import logging
+import multiprocessing
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional, Set
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.media_file import FileCategory, MediaFile
+from app.services.media_storage import media_storage
+from app.services.thumbnail_renderers import recompress_image, render_thumbnails
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZES = (160, 480)  # Longest edge in pixels: grid tiles and previews
+THUMBNAIL_MIME_TYPE = "image/jpeg"
+THUMBNAIL_CATEGORIES = {FileCategory.IMAGE, FileCategory.VIDEO}
+
+
+class ThumbnailService:
+    """
+    Renders JPEG thumbnails in a process pool capped at
+    MEDIA_THUMBNAIL_CONCURRENCY (Pillow resizing and ffmpeg frame grabs never
+    run on the event loop).
+
+    ``schedule`` starts generation for a stored MediaFile in the background:
+    every size is written to media storage (content-addressed, beside the
+    original) and recorded in ``MediaFile.thumbnails`` as {size: {key, size}}.
+    ``render`` is the awaitable building block used directly by LINE ingest.
+    """
+
+    def __init__(self):
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=max(1, settings.MEDIA_THUMBNAIL_CONCURRENCY),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def _run(self, renderer: Callable[[dict], Any], payload: dict) -> Any:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(max(1, settings.MEDIA_THUMBNAIL_CONCURRENCY))
+        async with self._semaphore:
+            return await asyncio.get_running_loop().run_in_executor(self._pool(), renderer, payload)
+
+    async def render(self, data: bytes, mime_type: str, sizes=THUMBNAIL_SIZES) -> Dict[int, bytes]:
+        """Render thumbnails for `data`; empty if the content cannot be thumbnailed."""
+        try:
+            return await self._run(render_thumbnails, {"data": data, "mime_type": mime_type, "sizes": list(sizes)})
+        except Exception as e:
+            logger.warning("Thumbnail rendering failed (%s): %s", mime_type, e)
+            return {}
+
+    async def recompress(self, data: bytes, max_edge: int) -> Optional[bytes]:
+        """Re-encode an image as a bounded-size JPEG (used by media lifecycle); None if it cannot be."""
+        try:
+            return await self._run(recompress_image, {"data": data, "max_edge": max_edge})
+        except Exception as e:
+            logger.warning("Image recompression failed: %s", e)
+            return None
+
+    def schedule(self, media: MediaFile) -> None:
+        """Generate thumbnails for a committed MediaFile in the background."""
+        if media.category not in THUMBNAIL_CATEGORIES or not media.storage_key:
+            return
+        task = asyncio.create_task(self.generate(media.id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def generate(self, media_id: uuid.UUID) -> bool:
+        """Render, store and record thumbnails for one MediaFile; returns whether any were made."""
+        try:
+            async with AsyncSessionLocal() as db:
+                media = await db.get(MediaFile, media_id)
+                if media is None or not media.storage_key:
+                    return False
+                data = await media_storage.read(media.storage_key)
+                rendered = await self.render(data, media.mime_type)
+                if not rendered:
+                    return False
+
+                thumbnails = {}
+                for size, content in rendered.items():
+                    blob = await media_storage.put(content)
+                    thumbnails[str(size)] = {"key": blob.key, "size": blob.size}
+                media.thumbnails = thumbnails
+                media.thumbnail_url = f"{settings.API_V1_STR}/media/{media.id}/thumbnail"
+                await db.commit()
+                return True
+        except Exception as e:
+            logger.error(f"Thumbnail generation for media {media_id} failed: {e}")
+            return False
+
+    async def shutdown(self) -> None:
+        """Cancel pending generations and stop the worker processes."""
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._semaphore = None
+
+
+thumbnail_service = ThumbnailService()
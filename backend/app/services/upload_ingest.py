@@ -0,0 +1,126 @@
+"""
+Bounded-memory ingest of multipart uploads.
+
+Endpoints call ``ingest_upload`` instead of ``await file.read()``: the upload
+is copied chunk by chunk into an anonymous temporary file while its sha256
+is computed, the size limit is enforced as soon as it is crossed, and the
+MIME type is sniffed from the first bytes. Consumers get the spooled file
+handle, so memory per upload stays at one chunk.
+"""
+import asyncio
+import hashlib
+import shutil
+import tempfile
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Optional
+
+from fastapi import HTTPException, UploadFile
+
+CHUNK_SIZE = 64 * 1024  # Bytes read from the request per step
+SNIFF_BYTES = 32  # Leading bytes kept for MIME sniffing
+GENERIC_MIME_TYPE = "application/octet-stream"
+
+# ISO base media ("ftyp" box) major brands
+_FTYP_BRANDS = {
+    b"isom": "video/mp4", b"iso2": "video/mp4", b"mp41": "video/mp4", b"mp42": "video/mp4",
+    b"avc1": "video/mp4", b"qt  ": "video/quicktime", b"M4V ": "video/mp4", b"M4A ": "audio/mp4",
+    b"heic": "image/heic", b"heix": "image/heic", b"mif1": "image/heif",
+}
+
+# (offset, magic bytes, mime type); checked in order
+_SIGNATURES = (
+    (0, b"\xff\xd8\xff", "image/jpeg"),
+    (0, b"\x89PNG\r\n\x1a\n", "image/png"),
+    (0, b"GIF87a", "image/gif"),
+    (0, b"GIF89a", "image/gif"),
+    (0, b"%PDF-", "application/pdf"),
+    (0, b"\x1aE\xdf\xa3", "video/webm"),
+    (0, b"ID3", "audio/mpeg"),
+    (0, b"OggS", "audio/ogg"),
+)
+
+
+def sniff_mime_type(head: bytes) -> Optional[str]:
+    """MIME type recognised from a file's leading bytes, or None."""
+    if head[:4] == b"RIFF" and head[8:12] in (b"WEBP", b"WAVE", b"AVI "):
+        return {b"WEBP": "image/webp", b"WAVE": "audio/wav", b"AVI ": "video/x-msvideo"}[head[8:12]]
+    if head[4:8] == b"ftyp":
+        return _FTYP_BRANDS.get(head[8:12])
+    for offset, magic, mime_type in _SIGNATURES:
+        if head[offset:offset + len(magic)] == magic:
+            return mime_type
+    return None
+
+
+@dataclass
+class IngestedUpload:
+    """A fully received upload; ``file`` is positioned at the start of the content."""
+
+    file: BinaryIO
+    filename: Optional[str]
+    mime_type: str
+    declared_mime_type: Optional[str]
+    size: int
+    sha256: str
+
+    async def read(self) -> bytes:
+        """The whole content in memory; only for consumers that need bytes (small, bounded uploads)."""
+        self.file.seek(0)
+        return await asyncio.to_thread(self.file.read)
+
+    async def save_to(self, path: Path) -> None:
+        """Copy the content to `path` in chunks."""
+        def _copy() -> None:
+            self.file.seek(0)
+            with open(path, "wb") as out:
+                shutil.copyfileobj(self.file, out, CHUNK_SIZE)
+
+        await asyncio.to_thread(_copy)
+        self.file.seek(0)
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"File too large (max {max_bytes // (1024 * 1024)}MB)")
+
+
+@asynccontextmanager
+async def ingest_upload(upload: UploadFile, max_bytes: int) -> AsyncIterator[IngestedUpload]:
+    """
+    Spool `upload` to a temporary file and yield it as an IngestedUpload.
+
+    Raises HTTPException 413 once more than `max_bytes` have been read (or
+    immediately when the parsed part size already exceeds it). The sniffed
+    MIME type wins over the client's declared Content-Type. The temporary
+    file is removed when the block exits.
+    """
+    if upload.size is not None and upload.size > max_bytes:
+        raise _too_large(max_bytes)
+
+    spool = tempfile.TemporaryFile(prefix="upload-")
+    try:
+        digest = hashlib.sha256()
+        size = 0
+        head = b""
+        while chunk := await upload.read(CHUNK_SIZE):
+            size += len(chunk)
+            if size > max_bytes:
+                raise _too_large(max_bytes)
+            if len(head) < SNIFF_BYTES:
+                head += chunk[:SNIFF_BYTES - len(head)]
+            digest.update(chunk)
+            await asyncio.to_thread(spool.write, chunk)
+        spool.seek(0)
+
+        declared = upload.content_type
+        yield IngestedUpload(
+            file=spool,
+            filename=upload.filename,
+            mime_type=sniff_mime_type(head) or declared or GENERIC_MIME_TYPE,
+            declared_mime_type=declared,
+            size=size,
+            sha256=digest.hexdigest(),
+        )
+    finally:
+        spool.close()
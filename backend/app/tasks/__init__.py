@@ -1,4 +1,39 @@
 """Background tasks for the application."""
+from .analytics_rollup import start_analytics_rollup_task, stop_analytics_rollup_task
+from .broadcast_dispatcher import (
+    notify_broadcast_dispatcher,
+    start_broadcast_dispatcher_task,
+    stop_broadcast_dispatcher_task,
+)
+from .broadcast_scheduler import (
+    broadcast_scheduler,
+    start_broadcast_scheduler_task,
+    stop_broadcast_scheduler_task,
+)
+from .chat_analytics import start_chat_analytics_task, stop_chat_analytics_task
+from .kpi_snapshot import start_kpi_snapshot_task, stop_kpi_snapshot_task
+from .media_lifecycle import start_media_lifecycle_task, stop_media_lifecycle_task
+from .message_outbox import notify_outbox, start_outbox_task, stop_outbox_task
 from .session_cleanup import start_cleanup_task, stop_cleanup_task
 
-__all__ = ["start_cleanup_task", "stop_cleanup_task"]
+__all__ = [
+    "broadcast_scheduler",
+    "notify_broadcast_dispatcher",
+    "notify_outbox",
+    "start_analytics_rollup_task",
+    "start_broadcast_dispatcher_task",
+    "start_broadcast_scheduler_task",
+    "start_chat_analytics_task",
+    "start_cleanup_task",
+    "start_kpi_snapshot_task",
+    "start_media_lifecycle_task",
+    "start_outbox_task",
+    "stop_analytics_rollup_task",
+    "stop_broadcast_dispatcher_task",
+    "stop_broadcast_scheduler_task",
+    "stop_chat_analytics_task",
+    "stop_cleanup_task",
+    "stop_kpi_snapshot_task",
+    "stop_media_lifecycle_task",
+    "stop_outbox_task",
+]
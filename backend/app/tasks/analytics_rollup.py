@@ -0,0 +1,52 @@
+"""Background task that keeps the hourly analytics rollups current."""
+import asyncio
+import logging
+from typing import Optional
+
+from app.core.config import settings
+from app.core.leader_election import LeaderElector
+from app.db.session import AsyncSessionLocal
+from app.services.analytics_rollup_service import analytics_rollup_service
+
+logger = logging.getLogger(__name__)
+
+_rollup_task: Optional[asyncio.Task] = None
+
+_leader = LeaderElector("analytics_rollup", ttl_seconds=settings.ANALYTICS_ROLLUP_INTERVAL_SECONDS * 2)
+
+
+async def run_analytics_rollup():
+    """Advance the rollup watermark every ANALYTICS_ROLLUP_INTERVAL_SECONDS."""
+    logger.info("Analytics rollup task started")
+    while True:
+        try:
+            if await _leader.acquire():
+                async with AsyncSessionLocal() as db:
+                    await analytics_rollup_service.advance(db)
+        except Exception as e:
+            logger.error(f"Analytics rollup error: {e}")
+        await asyncio.sleep(settings.ANALYTICS_ROLLUP_INTERVAL_SECONDS)
+
+
+async def start_analytics_rollup_task():
+    """Start the analytics rollup background task."""
+    global _rollup_task
+    _rollup_task = asyncio.create_task(run_analytics_rollup())
+    logger.info("Analytics rollup background task started")
+
+
+async def stop_analytics_rollup_task():
+    """Stop the analytics rollup background task and give up leadership."""
+    global _rollup_task
+    if _rollup_task and not _rollup_task.done():
+        _rollup_task.cancel()
+        try:
+            await _rollup_task
+        except asyncio.CancelledError:
+            pass
+        logger.info("Analytics rollup background task stopped")
+    _rollup_task = None
+    try:
+        await _leader.release()
+    except Exception as e:
+        logger.error(f"Failed to release analytics rollup leadership: {e}")
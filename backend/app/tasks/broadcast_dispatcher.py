@@ -0,0 +1,116 @@
+"""Background dispatcher that multicasts targeted broadcasts chunk by chunk."""
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.broadcast_chunk import BroadcastChunk
+from app.services.broadcast_dispatch_service import broadcast_dispatch_service
+from app.services.broadcast_service import broadcast_service
+
+logger = logging.getLogger(__name__)
+
+_dispatcher_task: Optional[asyncio.Task] = None
+_wake_event: Optional[asyncio.Event] = None
+
+
+def notify_broadcast_dispatcher():
+    """Wake the local dispatcher after a commit that queued broadcast chunks."""
+    if _wake_event is not None:
+        _wake_event.set()
+
+
+async def run_broadcast_dispatcher():
+    """
+    Claim due chunks and multicast them until cancelled.
+
+    Runs on every replica; SKIP LOCKED claiming splits the chunks between them and
+    chunks leased by a replica that died become due again, so an interrupted
+    broadcast resumes where it stopped without any startup bookkeeping.
+    """
+    logger.info("Broadcast dispatcher started")
+    semaphore = asyncio.Semaphore(max(1, settings.BROADCAST_CHUNK_CONCURRENCY))
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                claimed = await broadcast_dispatch_service.claim_due(db, settings.BROADCAST_CHUNK_BATCH_SIZE)
+            if claimed:
+                await _dispatch_batch(claimed, semaphore)
+                # Keep draining while there is backlog.
+                continue
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Broadcast dispatcher error: {e}")
+
+        try:
+            await asyncio.wait_for(_wake_event.wait(), timeout=settings.BROADCAST_DISPATCH_POLL_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        _wake_event.clear()
+
+
+async def _dispatch_batch(chunks: List[BroadcastChunk], semaphore: asyncio.Semaphore):
+    """Multicast a batch of claimed chunks in parallel, then close finished broadcasts."""
+    by_broadcast: Dict[int, List[BroadcastChunk]] = {}
+    for chunk in chunks:
+        by_broadcast.setdefault(chunk.broadcast_id, []).append(chunk)
+
+    async with AsyncSessionLocal() as db:
+        messages = await broadcast_dispatch_service.load_messages(
+            db, by_broadcast.keys(), broadcast_service._build_messages
+        )
+        for broadcast_id in by_broadcast:
+            if messages.get(broadcast_id) is None:
+                abandoned = await broadcast_dispatch_service.abandon_chunks(
+                    db, broadcast_id, "broadcast is no longer sending"
+                )
+                logger.info("Broadcast %s is no longer sending; dropped %s chunks", broadcast_id, abandoned)
+
+    api = broadcast_service.api
+
+    async def _deliver(chunk: BroadcastChunk):
+        async with semaphore:
+            try:
+                await broadcast_dispatch_service.deliver_chunk(api, chunk, messages[chunk.broadcast_id])
+            except Exception as e:
+                # Lease expiry will make the chunk due again.
+                logger.error(f"Failed to process broadcast {chunk.broadcast_id} chunk {chunk.seq}: {e}")
+
+    await asyncio.gather(*(
+        _deliver(chunk)
+        for broadcast_id, group in by_broadcast.items()
+        if messages.get(broadcast_id) is not None
+        for chunk in group
+    ))
+
+    async with AsyncSessionLocal() as db:
+        for broadcast_id in by_broadcast:
+            try:
+                await broadcast_dispatch_service.finalize(db, broadcast_id)
+            except Exception as e:
+                await db.rollback()
+                logger.error(f"Failed to finalize broadcast {broadcast_id}: {e}")
+
+
+async def start_broadcast_dispatcher_task():
+    """Start the broadcast chunk dispatcher background task."""
+    global _dispatcher_task, _wake_event
+    _wake_event = asyncio.Event()
+    _dispatcher_task = asyncio.create_task(run_broadcast_dispatcher())
+    logger.info("Broadcast dispatcher background task started")
+
+
+async def stop_broadcast_dispatcher_task():
+    """Cancel and await the broadcast chunk dispatcher background task."""
+    global _dispatcher_task, _wake_event
+    if _dispatcher_task and not _dispatcher_task.done():
+        _dispatcher_task.cancel()
+        try:
+            await _dispatcher_task
+        except asyncio.CancelledError:
+            pass
+        logger.info("Broadcast dispatcher background task stopped")
+    _dispatcher_task = None
+    _wake_event = None
@@ -0,0 +1,172 @@
+"""Dispatcher that sends SCHEDULED broadcasts when they fall due."""
+import asyncio
+import logging
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.pubsub_manager import pubsub_manager
+from app.core.scheduler import DueQueue, SystemClock
+from app.db.session import AsyncSessionLocal
+from app.models.broadcast import Broadcast, BroadcastStatus
+from app.services.broadcast_service import broadcast_service
+from app.tasks.broadcast_dispatcher import notify_broadcast_dispatcher
+
+logger = logging.getLogger(__name__)
+
+
+class BroadcastScheduler:
+    """
+    Keeps an in-memory heap of scheduled broadcasts and fires them on time.
+
+    The heap is loaded from the DB at startup, kept current by schedule/cancel
+    notifications (local and via Redis Pub/Sub) and resynced periodically. It is
+    only a wake-up hint: every replica runs one, and the DB claim
+    (FOR UPDATE SKIP LOCKED, status SCHEDULED -> SENDING) decides who sends.
+    """
+
+    SCHEDULE_CHANNEL = "broadcast:schedule"
+
+    def __init__(self, clock=None, session_factory=AsyncSessionLocal):
+        self.clock = clock or SystemClock()
+        self.queue = DueQueue()
+        self._session_factory = session_factory
+        self._wake: Optional[asyncio.Event] = None
+        self._last_resync: Optional[datetime] = None
+
+    async def load(self):
+        """Rebuild the heap from all SCHEDULED broadcasts."""
+        async with self._session_factory() as db:
+            rows = (
+                await db.execute(
+                    select(Broadcast.id, Broadcast.scheduled_at).where(
+                        Broadcast.status == BroadcastStatus.SCHEDULED,
+                        Broadcast.scheduled_at.is_not(None),
+                    )
+                )
+            ).all()
+        self.queue.clear()
+        for broadcast_id, scheduled_at in rows:
+            self.queue.schedule(broadcast_id, scheduled_at)
+        self._last_resync = self.clock.now()
+        logger.debug("Broadcast scheduler loaded %s scheduled broadcasts", len(rows))
+
+    def track(self, broadcast_id: int, scheduled_at: Optional[datetime]):
+        """Add, move or (with scheduled_at=None) drop one broadcast in the local heap."""
+        if scheduled_at is None:
+            self.queue.cancel(broadcast_id)
+        else:
+            self.queue.schedule(broadcast_id, scheduled_at)
+        if self._wake is not None:
+            self._wake.set()
+
+    async def publish_change(self, broadcast_id: int, scheduled_at: Optional[datetime]):
+        """Track a schedule change locally and tell the other replicas."""
+        self.track(broadcast_id, scheduled_at)
+        await pubsub_manager.publish(self.SCHEDULE_CHANNEL, {
+            "type": "broadcast_schedule",
+            "broadcast_id": broadcast_id,
+            "scheduled_at": scheduled_at.isoformat() if scheduled_at else None,
+        })
+
+    async def _handle_remote_change(self, data: dict):
+        raw = data.get("scheduled_at")
+        self.track(int(data["broadcast_id"]), datetime.fromisoformat(raw) if raw else None)
+
+    async def run_pending(self) -> List[int]:
+        """Claim and send every broadcast due at the clock's current time."""
+        now = self.clock.now()
+        due_ids = self.queue.pop_due(now)
+        if not due_ids:
+            return []
+
+        async with self._session_factory() as db:
+            claimed = await broadcast_service.claim_scheduled(
+                db,
+                due_ids,
+                now,
+                misfire_grace_seconds=settings.BROADCAST_MISFIRE_GRACE_SECONDS,
+                misfire_policy=settings.BROADCAST_MISFIRE_POLICY,
+            )
+        if claimed:
+            logger.info("Broadcast scheduler claimed %s due broadcasts: %s", len(claimed), claimed)
+
+        semaphore = asyncio.Semaphore(max(1, settings.BROADCAST_SCHEDULER_CONCURRENCY))
+
+        async def _send(broadcast_id: int):
+            async with semaphore:
+                try:
+                    async with self._session_factory() as db:
+                        broadcast = await broadcast_service.get_broadcast(db, broadcast_id)
+                        if broadcast:
+                            await broadcast_service.deliver_broadcast(db, broadcast)
+                            notify_broadcast_dispatcher()
+                except Exception as e:
+                    logger.error(f"Scheduled broadcast {broadcast_id} failed: {e}")
+
+        await asyncio.gather(*(_send(broadcast_id) for broadcast_id in claimed))
+        return claimed
+
+    def _seconds_until_next_wake(self) -> float:
+        now = self.clock.now()
+        resync_in = settings.BROADCAST_SCHEDULER_RESYNC_SECONDS
+        if self._last_resync is not None:
+            resync_in -= (now - self._last_resync).total_seconds()
+        next_due = self.queue.next_due()
+        if next_due is not None:
+            resync_in = min(resync_in, (next_due - now).total_seconds())
+        return max(0.0, resync_in)
+
+    async def run_forever(self):
+        logger.info("Broadcast scheduler started")
+        while True:
+            try:
+                if (
+                    self._last_resync is None
+                    or (self.clock.now() - self._last_resync).total_seconds()
+                    >= settings.BROADCAST_SCHEDULER_RESYNC_SECONDS
+                ):
+                    await self.load()
+                await self.run_pending()
+            except Exception as e:
+                logger.error(f"Broadcast scheduler error: {e}")
+
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self._seconds_until_next_wake())
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    async def start(self):
+        self._wake = asyncio.Event()
+        self._last_resync = None
+        await pubsub_manager.subscribe(self.SCHEDULE_CHANNEL, self._handle_remote_change)
+
+
+broadcast_scheduler = BroadcastScheduler()
+
+_scheduler_task: Optional[asyncio.Task] = None
+
+
+async def start_broadcast_scheduler_task():
+    """Start the scheduled broadcast dispatcher."""
+    global _scheduler_task
+    await broadcast_scheduler.start()
+    _scheduler_task = asyncio.create_task(broadcast_scheduler.run_forever())
+    logger.info("Broadcast scheduler background task started")
+
+
+async def stop_broadcast_scheduler_task():
+    """Cancel and await the scheduled broadcast dispatcher."""
+    global _scheduler_task
+    if _scheduler_task and not _scheduler_task.done():
+        _scheduler_task.cancel()
+        try:
+            await _scheduler_task
+        except asyncio.CancelledError:
+            pass
+        logger.info("Broadcast scheduler background task stopped")
+    _scheduler_task = None
+    await pubsub_manager.unsubscribe(BroadcastScheduler.SCHEDULE_CHANNEL, broadcast_scheduler._handle_remote_change)
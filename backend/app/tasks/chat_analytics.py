@@ -0,0 +1,52 @@
+"""Background task that maintains the daily per-operator chat_analytics rows."""
+import asyncio
+import logging
+from typing import Optional
+
+from app.core.config import settings
+from app.core.leader_election import LeaderElector
+from app.db.session import AsyncSessionLocal
+from app.services.chat_analytics_service import chat_analytics_service
+
+logger = logging.getLogger(__name__)
+
+_aggregation_task: Optional[asyncio.Task] = None
+
+_leader = LeaderElector("chat_analytics", ttl_seconds=settings.CHAT_ANALYTICS_REFRESH_SECONDS * 2)
+
+
+async def run_chat_analytics_aggregation():
+    """Finalize past days and refresh today every CHAT_ANALYTICS_REFRESH_SECONDS."""
+    logger.info("Chat analytics aggregation task started")
+    while True:
+        try:
+            if await _leader.acquire():
+                async with AsyncSessionLocal() as db:
+                    await chat_analytics_service.refresh(db)
+        except Exception as e:
+            logger.error(f"Chat analytics aggregation error: {e}")
+        await asyncio.sleep(settings.CHAT_ANALYTICS_REFRESH_SECONDS)
+
+
+async def start_chat_analytics_task():
+    """Start the chat analytics aggregation background task."""
+    global _aggregation_task
+    _aggregation_task = asyncio.create_task(run_chat_analytics_aggregation())
+    logger.info("Chat analytics aggregation background task started")
+
+
+async def stop_chat_analytics_task():
+    """Stop the chat analytics aggregation background task and give up leadership."""
+    global _aggregation_task
+    if _aggregation_task and not _aggregation_task.done():
+        _aggregation_task.cancel()
+        try:
+            await _aggregation_task
+        except asyncio.CancelledError:
+            pass
+        logger.info("Chat analytics aggregation background task stopped")
+    _aggregation_task = None
+    try:
+        await _leader.release()
+    except Exception as e:
+        logger.error(f"Failed to release chat analytics leadership: {e}")
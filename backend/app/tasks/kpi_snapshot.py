@@ -0,0 +1,62 @@
+"""Background task that keeps the shared live-KPI snapshot fresh."""
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from app.core.config import settings
+from app.core.leader_election import LeaderElector
+from app.core.redis_client import redis_client
+from app.services.kpi_snapshot_service import kpi_snapshot_service
+
+logger = logging.getLogger(__name__)
+
+_snapshot_task: Optional[asyncio.Task] = None
+
+_leader = LeaderElector("kpi_snapshot", ttl_seconds=max(10, settings.KPI_SNAPSHOT_MIN_INTERVAL_SECONDS * 5))
+
+
+async def run_kpi_snapshot_refresher():
+    """
+    Recompute the KPI snapshot when it is dirty or stale.
+
+    With Redis one replica (the leader) refreshes for the cluster; without it
+    there is no shared cache or cross-server fan-out, so every instance
+    refreshes its own snapshot.
+    """
+    logger.info("KPI snapshot task started")
+    last_refresh = float("-inf")
+    while True:
+        try:
+            if not redis_client.is_connected or await _leader.acquire():
+                stale = time.monotonic() - last_refresh >= settings.KPI_SNAPSHOT_MAX_INTERVAL_SECONDS
+                if await kpi_snapshot_service.consume_dirty() or stale:
+                    await kpi_snapshot_service.refresh()
+                    last_refresh = time.monotonic()
+        except Exception as e:
+            logger.error(f"KPI snapshot refresh error: {e}")
+        await asyncio.sleep(settings.KPI_SNAPSHOT_MIN_INTERVAL_SECONDS)
+
+
+async def start_kpi_snapshot_task():
+    """Start the KPI snapshot background task."""
+    global _snapshot_task
+    _snapshot_task = asyncio.create_task(run_kpi_snapshot_refresher())
+    logger.info("KPI snapshot background task started")
+
+
+async def stop_kpi_snapshot_task():
+    """Stop the KPI snapshot background task and give up leadership."""
+    global _snapshot_task
+    if _snapshot_task and not _snapshot_task.done():
+        _snapshot_task.cancel()
+        try:
+            await _snapshot_task
+        except asyncio.CancelledError:
+            pass
+        logger.info("KPI snapshot background task stopped")
+    _snapshot_task = None
+    try:
+        await _leader.release()
+    except Exception as e:
+        logger.error(f"Failed to release KPI snapshot leadership: {e}")
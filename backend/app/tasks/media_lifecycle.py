@@ -0,0 +1,51 @@
+"""Background task that runs media retention and garbage collection passes."""
+import asyncio
+import logging
+from typing import Optional
+
+from app.core.config import settings
+from app.core.leader_election import LeaderElector
+from app.services.media_lifecycle_service import media_lifecycle_service
+
+logger = logging.getLogger(__name__)
+
+_lifecycle_task: Optional[asyncio.Task] = None
+
+_leader = LeaderElector("media_lifecycle", ttl_seconds=settings.MEDIA_GC_INTERVAL_SECONDS * 2)
+
+
+async def run_media_lifecycle():
+    """Run one batched lifecycle pass every MEDIA_GC_INTERVAL_SECONDS."""
+    logger.info("Media lifecycle task started")
+    while True:
+        try:
+            if await _leader.acquire():
+                report = await media_lifecycle_service.run(apply=not settings.MEDIA_GC_DRY_RUN)
+                logger.info("Media lifecycle pass: %s", report.as_dict())
+        except Exception as e:
+            logger.error(f"Media lifecycle error: {e}")
+        await asyncio.sleep(settings.MEDIA_GC_INTERVAL_SECONDS)
+
+
+async def start_media_lifecycle_task():
+    """Start the media lifecycle background task."""
+    global _lifecycle_task
+    _lifecycle_task = asyncio.create_task(run_media_lifecycle())
+    logger.info("Media lifecycle background task started")
+
+
+async def stop_media_lifecycle_task():
+    """Stop the media lifecycle background task and give up leadership."""
+    global _lifecycle_task
+    if _lifecycle_task and not _lifecycle_task.done():
+        _lifecycle_task.cancel()
+        try:
+            await _lifecycle_task
+        except asyncio.CancelledError:
+            pass
+        logger.info("Media lifecycle background task stopped")
+    _lifecycle_task = None
+    try:
+        await _leader.release()
+    except Exception as e:
+        logger.error(f"Failed to release media lifecycle leadership: {e}")
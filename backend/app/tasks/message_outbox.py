@@ -0,0 +1,84 @@
+"""Background worker pool that drains the operator-to-LINE message outbox."""
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.message_outbox import MessageOutbox
+from app.services.message_outbox_service import message_outbox_service
+
+logger = logging.getLogger(__name__)
+
+_outbox_task: Optional[asyncio.Task] = None
+_wake_event: Optional[asyncio.Event] = None
+
+
+def notify_outbox():
+    """Wake the local dispatcher after a commit that enqueued deliveries."""
+    if _wake_event is not None:
+        _wake_event.set()
+
+
+async def run_outbox_dispatcher():
+    """Claim due outbox rows and deliver them until cancelled."""
+    logger.info("Message outbox dispatcher started")
+    semaphore = asyncio.Semaphore(max(1, settings.OUTBOX_WORKERS))
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                claimed = await message_outbox_service.claim_due(db, settings.OUTBOX_BATCH_SIZE)
+            if claimed:
+                await _deliver_batch(claimed, semaphore)
+                # Keep draining while there is backlog.
+                continue
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Message outbox dispatcher error: {e}")
+
+        try:
+            await asyncio.wait_for(_wake_event.wait(), timeout=settings.OUTBOX_POLL_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        _wake_event.clear()
+
+
+async def _deliver_batch(entries: List[MessageOutbox], semaphore: asyncio.Semaphore):
+    """Deliver different conversations concurrently, each conversation in order."""
+    by_user: Dict[str, List[MessageOutbox]] = {}
+    for entry in entries:
+        by_user.setdefault(entry.line_user_id, []).append(entry)
+
+    async def _deliver_conversation(conversation: List[MessageOutbox]):
+        async with semaphore:
+            for entry in conversation:
+                try:
+                    await message_outbox_service.deliver(entry)
+                except Exception as e:
+                    # Lease expiry will make the row due again.
+                    logger.error(f"Failed to process outbox entry {entry.id}: {e}")
+
+    await asyncio.gather(*(_deliver_conversation(group) for group in by_user.values()))
+
+
+async def start_outbox_task():
+    """Start the outbox dispatcher background task."""
+    global _outbox_task, _wake_event
+    _wake_event = asyncio.Event()
+    _outbox_task = asyncio.create_task(run_outbox_dispatcher())
+    logger.info("Message outbox background task started")
+
+
+async def stop_outbox_task():
+    """Cancel and await the outbox dispatcher background task."""
+    global _outbox_task, _wake_event
+    if _outbox_task and not _outbox_task.done():
+        _outbox_task.cancel()
+        try:
+            await _outbox_task
+        except asyncio.CancelledError:
+            pass
+        logger.info("Message outbox background task stopped")
+    _outbox_task = None
+    _wake_event = None
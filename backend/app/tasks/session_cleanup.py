@@ -2,14 +2,16 @@
 import asyncio
 import logging
 from datetime import datetime, timedelta, timezone
+from typing import List
 
-from sqlalchemy import select, update
+from sqlalchemy import insert, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.audit import create_audit_log
+from app.core.leader_election import LeaderElector
 from app.core.websocket_manager import ws_manager
 from app.db.session import AsyncSessionLocal
-from app.models.chat_session import ChatSession, SessionStatus
+from app.models.audit_log import AuditLog
+from app.models.chat_session import ChatSession, ClosedBy, SessionStatus
 from app.models.user import ChatMode, User
 from app.services.line_service import line_service
 from app.services.analytics_service import analytics_service
@@ -21,6 +23,12 @@ logger = logging.getLogger(__name__)
 INACTIVE_TIMEOUT_MINUTES = 30
 WAITING_ABANDONMENT_MINUTES = 10
 CLEANUP_INTERVAL_SECONDS = 300
+NOTIFY_CONCURRENCY = 10
+
+INACTIVE_CLOSE_TEXT = "Chat session ended due to inactivity. Please message again to reopen."
+ABANDONED_CLOSE_TEXT = "No operator was available in time. Please send a new message to rejoin queue."
+
+_leader = LeaderElector("session_cleanup", ttl_seconds=CLEANUP_INTERVAL_SECONDS * 2)
 
 
 async def cleanup_inactive_sessions():
@@ -28,149 +36,141 @@ async def cleanup_inactive_sessions():
     logger.info("Session cleanup task started")
     while True:
         try:
-            async with AsyncSessionLocal() as db:
-                await _process_inactive_sessions(db)
+            if await _leader.acquire():
+                async with AsyncSessionLocal() as db:
+                    await _process_inactive_sessions(db)
         except Exception as e:
             logger.error(f"Session cleanup error: {e}")
         await asyncio.sleep(CLEANUP_INTERVAL_SECONDS)
 
 
 async def _process_inactive_sessions(db: AsyncSession):
-    """Process both active inactivity timeout and waiting abandonment timeout."""
+    """
+    Close timed-out sessions with set-based updates, then notify after commit.
+
+    The transaction only contains the UPDATE ... RETURNING statements and one
+    bulk audit insert; LINE pushes and WS broadcasts run afterwards with
+    bounded parallelism so a slow push never holds locks.
+    """
     now = datetime.now(timezone.utc)
     active_threshold = now - timedelta(minutes=INACTIVE_TIMEOUT_MINUTES)
     waiting_threshold = now - timedelta(minutes=WAITING_ABANDONMENT_MINUTES)
 
-    inactive_result = await db.execute(
-        select(ChatSession).where(
-            ChatSession.status == SessionStatus.ACTIVE,
-            ChatSession.last_activity_at < active_threshold,
+    inactive_rows = (
+        await db.execute(
+            update(ChatSession)
+            .where(
+                ChatSession.status == SessionStatus.ACTIVE,
+                ChatSession.last_activity_at < active_threshold,
+            )
+            .values(status=SessionStatus.CLOSED, closed_at=now, closed_by=ClosedBy.SYSTEM)
+            .returning(ChatSession.id, ChatSession.line_user_id, ChatSession.last_activity_at)
         )
-    )
-    inactive_sessions = inactive_result.scalars().all()
-
-    abandoned_result = await db.execute(
-        select(ChatSession).where(
-            ChatSession.status == SessionStatus.WAITING,
-            ChatSession.claimed_at.is_(None),
-            ChatSession.started_at < waiting_threshold,
+    ).all()
+
+    abandoned_rows = (
+        await db.execute(
+            update(ChatSession)
+            .where(
+                ChatSession.status == SessionStatus.WAITING,
+                ChatSession.claimed_at.is_(None),
+                ChatSession.started_at < waiting_threshold,
+            )
+            .values(status=SessionStatus.CLOSED, closed_at=now, closed_by=ClosedBy.SYSTEM_TIMEOUT, abandoned=True)
+            .returning(ChatSession.id, ChatSession.line_user_id, ChatSession.started_at)
         )
-    )
-    abandoned_sessions = abandoned_result.scalars().all()
+    ).all()
 
-    if not inactive_sessions and not abandoned_sessions:
+    if not inactive_rows and not abandoned_rows:
+        await db.rollback()
         return
 
     logger.info(
         "Cleanup found inactive=%s abandoned_waiting=%s",
-        len(inactive_sessions),
-        len(abandoned_sessions),
+        len(inactive_rows),
+        len(abandoned_rows),
     )
 
-    for session in inactive_sessions:
-        await _close_inactive_session(session, db)
-
-    for session in abandoned_sessions:
-        await _mark_abandoned_waiting_session(session, db)
-
-    await db.commit()
-    await analytics_service.emit_live_kpis_update(db)
-
-
-async def _close_inactive_session(session: ChatSession, db: AsyncSession):
-    """Close one active session due to inactivity timeout."""
-    session.status = SessionStatus.CLOSED
-    session.closed_at = datetime.now(timezone.utc)
-    session.closed_by = "SYSTEM"
-
+    line_user_ids = {row.line_user_id for row in inactive_rows} | {row.line_user_id for row in abandoned_rows}
     await db.execute(
         update(User)
-        .where(User.line_user_id == session.line_user_id)
+        .where(User.line_user_id.in_(line_user_ids))
         .values(chat_mode=ChatMode.BOT)
     )
 
-    await create_audit_log(
-        db=db,
-        admin_id=None,
-        action="auto_close_session",
-        resource_type="chat_session",
-        resource_id=str(session.id),
-        details={
-            "reason": "inactivity",
-            "threshold_minutes": INACTIVE_TIMEOUT_MINUTES,
-            "last_activity": session.last_activity_at.isoformat() if session.last_activity_at else None,
-        },
-    )
+    audit_rows = [
+        {
+            "admin_id": None,
+            "action": "auto_close_session",
+            "resource_type": "chat_session",
+            "resource_id": str(row.id),
+            "details": {
+                "reason": "inactivity",
+                "threshold_minutes": INACTIVE_TIMEOUT_MINUTES,
+                "last_activity": row.last_activity_at.isoformat() if row.last_activity_at else None,
+            },
+        }
+        for row in inactive_rows
+    ] + [
+        {
+            "admin_id": None,
+            "action": "abandon_waiting_session",
+            "resource_type": "chat_session",
+            "resource_id": str(row.id),
+            "details": {
+                "reason": "waiting_timeout",
+                "threshold_minutes": WAITING_ABANDONMENT_MINUTES,
+                "started_at": row.started_at.isoformat() if row.started_at else None,
+            },
+        }
+        for row in abandoned_rows
+    ]
+    await db.execute(insert(AuditLog), audit_rows)
 
-    try:
-        await line_service.push_messages(
-            session.line_user_id,
-            [TextMessage(text="Chat session ended due to inactivity. Please message again to reopen.")],
-        )
-    except Exception as e:
-        logger.error(f"Failed to notify inactive close user {session.line_user_id}: {e}")
+    await db.commit()
 
-    try:
-        await ws_manager.broadcast_to_all(
-            {
-                "type": "session_closed",
-                "payload": {
-                    "line_user_id": session.line_user_id,
-                    "closed_by": "SYSTEM",
-                    "reason": "inactivity",
-                },
-            }
-        )
-    except Exception as e:
-        logger.error(f"Failed to broadcast inactivity close: {e}")
+    notifications = [
+        (row.line_user_id, ClosedBy.SYSTEM.value, "inactivity", INACTIVE_CLOSE_TEXT)
+        for row in inactive_rows
+    ] + [
+        (row.line_user_id, ClosedBy.SYSTEM_TIMEOUT.value, "waiting_timeout", ABANDONED_CLOSE_TEXT)
+        for row in abandoned_rows
+    ]
+    await _dispatch_close_notifications(notifications)
+    await analytics_service.emit_live_kpis_update(db)
 
 
-async def _mark_abandoned_waiting_session(session: ChatSession, db: AsyncSession):
-    """Close one waiting session as abandoned after timeout."""
-    session.status = SessionStatus.CLOSED
-    session.closed_at = datetime.now(timezone.utc)
-    session.closed_by = "SYSTEM_TIMEOUT"
+async def _dispatch_close_notifications(notifications: List[tuple]):
+    """Notify users and operators about closed sessions with bounded parallelism."""
+    semaphore = asyncio.Semaphore(NOTIFY_CONCURRENCY)
 
-    await db.execute(
-        update(User)
-        .where(User.line_user_id == session.line_user_id)
-        .values(chat_mode=ChatMode.BOT)
-    )
+    async def _notify(line_user_id: str, closed_by: str, reason: str, text: str):
+        async with semaphore:
+            await _notify_session_closed(line_user_id, closed_by, reason, text)
+
+    await asyncio.gather(*(_notify(*item) for item in notifications))
 
-    await create_audit_log(
-        db=db,
-        admin_id=None,
-        action="abandon_waiting_session",
-        resource_type="chat_session",
-        resource_id=str(session.id),
-        details={
-            "reason": "waiting_timeout",
-            "threshold_minutes": WAITING_ABANDONMENT_MINUTES,
-            "started_at": session.started_at.isoformat() if session.started_at else None,
-        },
-    )
 
+async def _notify_session_closed(line_user_id: str, closed_by: str, reason: str, text: str):
+    """Push the close notice to the LINE user and broadcast the close to operators."""
     try:
-        await line_service.push_messages(
-            session.line_user_id,
-            [TextMessage(text="No operator was available in time. Please send a new message to rejoin queue.")],
-        )
+        await line_service.push_messages(line_user_id, [TextMessage(text=text)])
     except Exception as e:
-        logger.error(f"Failed to notify abandoned waiting user {session.line_user_id}: {e}")
+        logger.error(f"Failed to notify {reason} close user {line_user_id}: {e}")
 
     try:
         await ws_manager.broadcast_to_all(
             {
                 "type": "session_closed",
                 "payload": {
-                    "line_user_id": session.line_user_id,
-                    "closed_by": "SYSTEM_TIMEOUT",
-                    "reason": "waiting_timeout",
+                    "line_user_id": line_user_id,
+                    "closed_by": closed_by,
+                    "reason": reason,
                 },
             }
         )
     except Exception as e:
-        logger.error(f"Failed to broadcast waiting timeout close: {e}")
+        logger.error(f"Failed to broadcast {reason} close: {e}")
 
 
 _cleanup_task: asyncio.Task = None
@@ -194,4 +194,7 @@ async def stop_cleanup_task():
             pass
         logger.info("Session cleanup background task stopped")
     _cleanup_task = None
-
+    try:
+        await _leader.release()
+    except Exception as e:
+        logger.error(f"Failed to release session cleanup leadership: {e}")
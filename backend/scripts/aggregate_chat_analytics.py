@@ -0,0 +1,59 @@
+"""Re-run the daily per-operator chat_analytics aggregation for a date range."""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from datetime import date, datetime, timezone
+
+from _cli_utils import ensure_backend_on_path
+
+ensure_backend_on_path()
+
+from app.db.session import AsyncSessionLocal
+from app.services.chat_analytics_service import chat_analytics_service
+from scripts._script_safety import print_dry_run_hint, print_script_header
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Recompute chat_analytics rows for a UTC date range.")
+    parser.add_argument("--start", type=date.fromisoformat, required=True, help="First UTC day (YYYY-MM-DD).")
+    parser.add_argument(
+        "--end",
+        type=date.fromisoformat,
+        default=None,
+        help="Last UTC day, inclusive. Defaults to today.",
+    )
+    parser.add_argument(
+        "--apply",
+        action="store_true",
+        help="Write the aggregates. Without this flag, the script only prints the plan.",
+    )
+    return parser
+
+
+async def aggregate(*, start_day: date, end_day: date | None, apply: bool) -> int:
+    end_day = end_day or datetime.now(timezone.utc).date()
+    print_script_header("Aggregate chat_analytics", apply=apply)
+    print(f"From      : {start_day.isoformat()}")
+    print(f"To        : {end_day.isoformat()} (inclusive)")
+    if start_day > end_day:
+        print("Nothing to do: empty range.")
+        return 0
+    if not apply:
+        print_dry_run_hint()
+        return 0
+
+    async with AsyncSessionLocal() as db:
+        written = await chat_analytics_service.aggregate_range(db, start_day, end_day)
+    print(f"Aggregation complete: {written} operator-day rows written.")
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    return asyncio.run(aggregate(start_day=args.start, end_day=args.end, apply=args.apply))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
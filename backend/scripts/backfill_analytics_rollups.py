@@ -0,0 +1,67 @@
+"""Backfill the hourly analytics rollup tables for a date range."""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from datetime import date, datetime, time, timedelta, timezone
+
+from _cli_utils import ensure_backend_on_path
+
+ensure_backend_on_path()
+
+from app.db.session import AsyncSessionLocal
+from app.services.analytics_rollup_service import analytics_rollup_service, floor_hour
+from scripts._script_safety import print_dry_run_hint, print_script_header
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Recompute analytics_hourly / analytics_daily_users for a UTC date range.")
+    parser.add_argument("--start", type=date.fromisoformat, required=True, help="First UTC day to rebuild (YYYY-MM-DD).")
+    parser.add_argument(
+        "--end",
+        type=date.fromisoformat,
+        default=None,
+        help="Last UTC day to rebuild (inclusive). Defaults to today; the current hour is never written.",
+    )
+    parser.add_argument(
+        "--apply",
+        action="store_true",
+        help="Write the rollups. Without this flag, the script only prints the plan.",
+    )
+    return parser
+
+
+async def backfill(*, start_day: date, end_day: date | None, apply: bool) -> int:
+    now = datetime.now(timezone.utc)
+    start = datetime.combine(start_day, time.min, tzinfo=timezone.utc)
+    end = datetime.combine((end_day or now.date()) + timedelta(days=1), time.min, tzinfo=timezone.utc)
+    end = min(end, floor_hour(now))
+
+    print_script_header("Backfill analytics rollups", apply=apply)
+    print(f"From      : {start.isoformat()}")
+    print(f"Until     : {end.isoformat()} (exclusive)")
+    if start >= end:
+        print("Nothing to do: empty range.")
+        return 0
+    if not apply:
+        print_dry_run_hint()
+        return 0
+
+    async with AsyncSessionLocal() as db:
+        written = await analytics_rollup_service.rollup_range(db, start, end)
+        watermark = await analytics_rollup_service.get_watermark(db)
+        if watermark is None:
+            # Let the background job continue from here instead of its default window.
+            await analytics_rollup_service.set_watermark(db, end)
+    print(f"Rollup complete: {written} hours written.")
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    return asyncio.run(backfill(start_day=args.start, end_day=args.end, apply=args.apply))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,92 @@
+"""Time the admin report queries and count the statements each one issues."""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from _cli_utils import ensure_backend_on_path
+
+ensure_backend_on_path()
+
+from sqlalchemy import event
+
+from app.api.v1.endpoints import admin_reports
+from app.db.session import AsyncSessionLocal, engine
+from app.services.friend_service import friend_service
+from scripts._script_safety import print_script_header
+
+REPORTS = ("overview", "followers", "friend-stats")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the overview, followers and friend-stats queries (read-only, bypasses the report cache)."
+    )
+    parser.add_argument("--iterations", type=int, default=20, help="Timed runs per report.")
+    parser.add_argument("--warmup", type=int, default=2, help="Untimed runs per report before measuring.")
+    parser.add_argument("--days", type=int, default=30, help="Range of the followers report, in days.")
+    parser.add_argument("--report", choices=REPORTS, action="append", help="Report to run; repeatable. Defaults to all.")
+    return parser
+
+
+async def _run_report(name: str, days: int) -> None:
+    if name == "overview":
+        await admin_reports._overview_report()
+    elif name == "followers":
+        end = datetime.now(timezone.utc)
+        await admin_reports._followers_report(end - timedelta(days=days), end, "daily")
+    else:
+        async with AsyncSessionLocal() as db:
+            await friend_service.get_friend_stats(db)
+
+
+async def benchmark(*, reports: list[str], iterations: int, warmup: int, days: int) -> int:
+    print_script_header("Benchmark report queries", apply=False)
+    print(f"Runs      : {iterations} (+{warmup} warmup)")
+
+    statements = 0
+
+    def _count(*_args) -> None:
+        nonlocal statements
+        statements += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _count)
+    try:
+        print(f"\n{'report':<14}{'stmts/run':>10}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+        for name in reports:
+            for _ in range(warmup):
+                await _run_report(name, days)
+            statements = 0
+            timings = []
+            for _ in range(iterations):
+                started = time.perf_counter()
+                await _run_report(name, days)
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            print(
+                f"{name:<14}{statements / iterations:>10.1f}{statistics.fmean(timings):>10.1f}"
+                f"{statistics.median(timings):>10.1f}{p95:>10.1f}"
+            )
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", _count)
+        await engine.dispose()
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    return asyncio.run(benchmark(
+        reports=args.report or list(REPORTS),
+        iterations=max(1, args.iterations),
+        warmup=max(0, args.warmup),
+        days=args.days,
+    ))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
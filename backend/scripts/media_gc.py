@@ -0,0 +1,72 @@
+"""Run media retention, legacy upload migration, reference reconciliation and garbage collection passes."""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+
+from _cli_utils import ensure_backend_on_path
+
+ensure_backend_on_path()
+
+from app.core.config import settings
+from app.services.media_lifecycle_service import media_lifecycle_service
+from scripts._script_safety import print_dry_run_hint, print_script_header
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Expire old media, move legacy uploads/ files into media storage and delete unreferenced blobs."
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=settings.MEDIA_GC_BATCH_SIZE,
+        help="Items handled per phase per pass.",
+    )
+    parser.add_argument(
+        "--max-batches",
+        type=int,
+        default=None,
+        help="Stop after this many passes (re-run to continue). Defaults to until nothing is left.",
+    )
+    parser.add_argument(
+        "--apply",
+        action="store_true",
+        help="Make the changes. Without this flag, one pass reports what would be done.",
+    )
+    return parser
+
+
+async def collect(*, batch_size: int, max_batches: int | None, apply: bool) -> int:
+    print_script_header("Media lifecycle", apply=apply)
+    print(f"Retention : LINE {settings.MEDIA_RETENTION_LINE_DAYS or 'forever'} days, "
+          f"operator {settings.MEDIA_RETENTION_OPERATOR_DAYS or 'forever'} days")
+    print(f"Grace     : {settings.MEDIA_GC_GRACE_DAYS} days")
+
+    passes = 0
+    totals: dict[str, int] = {}
+    while max_batches is None or passes < max_batches:
+        report = (await media_lifecycle_service.run(apply=apply, batch_size=batch_size)).as_dict()
+        report.pop("apply")
+        passes += 1
+        for key, value in report.items():
+            totals[key] = totals.get(key, 0) + value
+        print(f"Pass {passes:<5}: " + ", ".join(f"{key}={value}" for key, value in report.items() if value))
+        # A dry run changes nothing, so another pass would report the same batch.
+        if not apply or not (any(report.values()) or media_lifecycle_service.reconciling):
+            break
+
+    print("Totals    : " + ", ".join(f"{key}={value}" for key, value in totals.items()))
+    if not apply:
+        print_dry_run_hint()
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    return asyncio.run(collect(batch_size=max(1, args.batch_size), max_batches=args.max_batches, apply=args.apply))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
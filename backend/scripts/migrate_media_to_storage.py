@@ -0,0 +1,98 @@
+"""Move inline media_files.data blobs into the configured media storage backend."""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+
+from _cli_utils import ensure_backend_on_path
+
+ensure_backend_on_path()
+
+from sqlalchemy import func, select, update
+
+from app.db.session import AsyncSessionLocal
+from app.models.media_file import MediaFile
+from app.services.media_catalog import media_catalog
+from app.services.media_storage import media_storage
+from scripts._script_safety import print_dry_run_hint, print_script_header
+
+PENDING = (MediaFile.storage_key.is_(None), MediaFile.data.isnot(None))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Copy inline media blobs to media storage and clear the column, in resumable batches."
+    )
+    parser.add_argument("--batch-size", type=int, default=50, help="Rows moved per transaction.")
+    parser.add_argument(
+        "--max-batches",
+        type=int,
+        default=None,
+        help="Stop after this many batches (re-run to continue). Defaults to all.",
+    )
+    parser.add_argument(
+        "--apply",
+        action="store_true",
+        help="Move the blobs. Without this flag, the script only reports what is pending.",
+    )
+    return parser
+
+
+async def migrate(*, batch_size: int, max_batches: int | None, apply: bool) -> int:
+    print_script_header("Move media blobs to storage", apply=apply)
+    print(f"Backend   : {media_storage.name}")
+
+    async with AsyncSessionLocal() as db:
+        pending, pending_bytes = (
+            await db.execute(
+                select(func.count(MediaFile.id), func.coalesce(func.sum(MediaFile.size_bytes), 0)).where(*PENDING)
+            )
+        ).one()
+    print(f"Pending   : {pending} files, {pending_bytes} bytes")
+    if not apply:
+        print_dry_run_hint()
+        return 0
+
+    moved = batches = 0
+    while max_batches is None or batches < max_batches:
+        # Each batch commits on its own, so an interrupted run resumes where it stopped.
+        async with AsyncSessionLocal() as db:
+            rows = (
+                await db.execute(
+                    select(MediaFile.id, MediaFile.mime_type, MediaFile.data)
+                    .where(*PENDING)
+                    .order_by(MediaFile.created_at, MediaFile.id)
+                    .limit(batch_size)
+                )
+            ).all()
+            if not rows:
+                break
+            for row in rows:
+                blob, _ = await media_catalog.add_bytes(db, bytes(row.data), row.mime_type)
+                await db.execute(
+                    update(MediaFile)
+                    .where(MediaFile.id == row.id)
+                    .values(
+                        storage_key=blob.storage_key,
+                        content_sha256=blob.sha256,
+                        size_bytes=blob.size_bytes,
+                        data=None,
+                    )
+                )
+            await db.commit()
+        moved += len(rows)
+        batches += 1
+        print(f"Moved     : {moved}/{pending}")
+
+    print(f"Done: {moved} files moved in {batches} batches.")
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    return asyncio.run(migrate(batch_size=max(1, args.batch_size), max_batches=args.max_batches, apply=args.apply))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,4 +1,5 @@
 """Endpoint tests for analytics dashboard and conversation export APIs."""
+import asyncio
 import pytest
 from datetime import datetime, timezone
 from types import SimpleNamespace
@@ -47,45 +48,57 @@ def test_dashboard_endpoint_returns_aggregated_payload():
     assert response.json()["funnel"]["resolved"] == 30
 
 
-def test_export_csv_endpoint_streams_file():
+def _conversation_rows():
+    return [
+        SimpleNamespace(
+            created_at=datetime(2026, 2, 8, 3, 0, 0, tzinfo=timezone.utc),
+            line_user_id="U123",
+            direction=MessageDirection.INCOMING,
+            sender_role=SenderRole.USER,
+            message_type="text",
+            content="hello",
+        ),
+        SimpleNamespace(
+            created_at=datetime(2026, 2, 8, 3, 1, 0, tzinfo=timezone.utc),
+            line_user_id="U123",
+            direction=MessageDirection.OUTGOING,
+            sender_role=SenderRole.ADMIN,
+            message_type="text",
+            content="hi",
+        ),
+    ]
+
+
+def _get_conversation_csv(path: str):
     app.dependency_overrides[deps.get_db] = _override_get_db
     app.dependency_overrides[deps.get_current_admin] = _override_get_current_admin
 
     original_get_display_name = admin_export._get_display_name
-    original_get_messages = admin_export._get_conversation_messages
+    original_get_span = admin_export._get_conversation_span
+    original_rows = admin_export._conversation_csv_rows
     admin_export._get_display_name = AsyncMock(return_value="Demo User")
-    admin_export._get_conversation_messages = AsyncMock(
-        return_value=[
-            SimpleNamespace(
-                id=1,
-                created_at=datetime(2026, 2, 8, 3, 0, 0, tzinfo=timezone.utc),
-                line_user_id="U123",
-                direction=MessageDirection.INCOMING,
-                sender_role=SenderRole.USER,
-                message_type="text",
-                content="hello",
-            ),
-            SimpleNamespace(
-                id=2,
-                created_at=datetime(2026, 2, 8, 3, 1, 0, tzinfo=timezone.utc),
-                line_user_id="U123",
-                direction=MessageDirection.OUTGOING,
-                sender_role=SenderRole.ADMIN,
-                message_type="text",
-                content="hi",
-            ),
-        ]
+    admin_export._get_conversation_span = AsyncMock(
+        return_value=(
+            datetime(2026, 2, 8, 3, 0, 0, tzinfo=timezone.utc),
+            datetime(2026, 2, 8, 3, 1, 0, tzinfo=timezone.utc),
+        )
     )
+    admin_export._conversation_csv_rows = lambda line_user_id: _conversation_rows()
 
     client = TestClient(app)
     try:
-        response = client.get("/api/v1/admin/export/conversations/U123/csv")
+        return client.get(path)
     finally:
         client.close()
         admin_export._get_display_name = original_get_display_name
-        admin_export._get_conversation_messages = original_get_messages
+        admin_export._get_conversation_span = original_get_span
+        admin_export._conversation_csv_rows = original_rows
         app.dependency_overrides.clear()
 
+
+def test_export_csv_endpoint_streams_file():
+    response = _get_conversation_csv("/api/v1/admin/export/conversations/U123/csv")
+
     assert response.status_code == 200
     assert "text/csv" in response.headers["content-type"]
     assert "attachment;" in response.headers["content-disposition"]
@@ -96,6 +109,16 @@ def test_export_csv_endpoint_streams_file():
     assert "hi" in text
 
 
+def test_export_csv_endpoint_gzip():
+    response = _get_conversation_csv("/api/v1/admin/export/conversations/U123/csv?gzip=true")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/gzip"
+    assert 'filename="Demo_User_20260208-20260208.csv.gz"' in response.headers["content-disposition"]
+    text = __import__("gzip").decompress(response.content).decode("utf-8-sig")
+    assert text.splitlines()[1].endswith("INCOMING,USER,text,hello")
+
+
 @pytest.mark.skipif(
     not __import__("importlib").util.find_spec("reportlab"),
     reason="reportlab not installed",
@@ -104,22 +127,21 @@ def test_export_pdf_endpoint_streams_file():
     app.dependency_overrides[deps.get_db] = _override_get_db
     app.dependency_overrides[deps.get_current_admin] = _override_get_current_admin
 
+    async def _rows(line_user_id):
+        for row in _conversation_rows()[:1]:
+            yield row
+
     original_get_display_name = admin_export._get_display_name
-    original_get_messages = admin_export._get_conversation_messages
+    original_get_span = admin_export._get_conversation_span
+    original_rows = admin_export._conversation_csv_rows
     admin_export._get_display_name = AsyncMock(return_value="Demo User")
-    admin_export._get_conversation_messages = AsyncMock(
-        return_value=[
-            SimpleNamespace(
-                id=1,
-                created_at=datetime(2026, 2, 8, 3, 0, 0, tzinfo=timezone.utc),
-                line_user_id="U123",
-                direction=MessageDirection.INCOMING,
-                sender_role=SenderRole.USER,
-                message_type="text",
-                content="hello",
-            ),
-        ]
+    admin_export._get_conversation_span = AsyncMock(
+        return_value=(
+            datetime(2026, 2, 8, 3, 0, 0, tzinfo=timezone.utc),
+            datetime(2026, 2, 8, 3, 0, 0, tzinfo=timezone.utc),
+        )
     )
+    admin_export._conversation_csv_rows = _rows
 
     client = TestClient(app)
     try:
@@ -127,13 +149,16 @@ def test_export_pdf_endpoint_streams_file():
     finally:
         client.close()
         admin_export._get_display_name = original_get_display_name
-        admin_export._get_conversation_messages = original_get_messages
+        admin_export._get_conversation_span = original_get_span
+        admin_export._conversation_csv_rows = original_rows
         app.dependency_overrides.clear()
+        asyncio.run(admin_export.report_job_service.shutdown())
 
     assert response.status_code == 200
     assert "application/pdf" in response.headers["content-type"]
     assert "attachment;" in response.headers["content-disposition"]
     assert 'filename="Demo_User_20260208-20260208.pdf"' in response.headers["content-disposition"]
+    assert response.content.startswith(b"%PDF")
 
 
 def test_refresh_profile_endpoint_returns_updated_user():
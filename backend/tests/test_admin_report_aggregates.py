@@ -0,0 +1,92 @@
+"""Tests for the single-pass aggregate queries behind the overview and followers reports."""
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.api.v1.endpoints import admin_reports
+from app.models.service_request import RequestStatus
+
+MODULE = "app.api.v1.endpoints.admin_reports"
+
+
+def _sql(query) -> str:
+    return str(query.compile(dialect=postgresql.dialect()))
+
+
+@pytest.mark.asyncio
+async def test_overview_runs_one_concurrent_query_per_table():
+    today = date.today()
+    yesterday = today - timedelta(days=1)
+    request_rows = [
+        SimpleNamespace(by_day=0, status=RequestStatus.PENDING, recent_day=None, total=5, current=2, previous=1),
+        SimpleNamespace(by_day=0, status=RequestStatus.COMPLETED, recent_day=None, total=3, current=1, previous=1),
+        SimpleNamespace(by_day=1, status=None, recent_day=today, total=3, current=3, previous=0),
+        SimpleNamespace(by_day=1, status=None, recent_day=None, total=5, current=0, previous=2),
+    ]
+    message_rows = [
+        SimpleNamespace(day=today, total=10, incoming=6, outgoing=4),
+        SimpleNamespace(day=yesterday, total=5, incoming=3, outgoing=2),
+    ]
+    execute = AsyncMock(return_value=[request_rows, message_rows, [(42,)], [(4, 2)], [(7, 1)]])
+
+    with patch(f"{MODULE}._execute_concurrently", execute):
+        report = await admin_reports._overview_report()
+
+    execute.assert_awaited_once()
+    queries = execute.await_args.args
+    assert len(queries) == 5
+    assert "GROUPING SETS" in _sql(queries[0])
+    assert all(" FILTER (WHERE" in _sql(query) for query in (queries[0], queries[1], queries[3], queries[4]))
+
+    assert report.total_requests == 8
+    assert report.requests_by_status == {"PENDING": 5, "COMPLETED": 3}
+    assert report.requests_trend.current == 3 and report.requests_trend.previous == 2
+    assert (report.total_messages_today, report.messages_incoming_today, report.messages_outgoing_today) == (10, 6, 4)
+    assert report.messages_trend.previous == 5
+    assert report.total_followers == 42
+    assert report.followers_trend.current == 4 and report.followers_trend.previous == 2
+    assert report.active_sessions == 7 and report.sessions_trend.previous == 1
+    assert report.daily_activity == [{"day": str(today), "requests": 3, "messages": 10}]
+
+
+@pytest.mark.asyncio
+async def test_followers_report_derives_totals_from_the_period_series():
+    rows = [
+        SimpleNamespace(period="2026-01-01", new=3, refollow=1, lost=2),
+        SimpleNamespace(period="2026-01-02", new=1, refollow=1, lost=0),
+    ]
+    execute = AsyncMock(return_value=[rows])
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    with patch(f"{MODULE}._execute_concurrently", execute):
+        report = await admin_reports._followers_report(start, start + timedelta(days=2), "daily")
+
+    assert len(execute.await_args.args) == 1
+    assert (report.new_this_period, report.refollow_this_period, report.lost_this_period) == (4, 2, 2)
+    assert report.net_growth == 4
+    assert report.refollow_rate == 33.3
+    assert report.over_time == [
+        {"period": "2026-01-01", "gained": 4, "lost": 2},
+        {"period": "2026-01-02", "gained": 2, "lost": 0},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_followers_total_is_live_on_cached_reports():
+    cached = admin_reports.FollowersReportResponse(
+        total_followers=0, new_this_period=4, lost_this_period=2, refollow_this_period=2,
+        net_growth=4, refollow_rate=33.3, over_time=[],
+    )
+    db = AsyncMock()
+    db.scalar.return_value = 120
+
+    with patch(f"{MODULE}.report_cache_service.get_or_compute", AsyncMock(return_value=cached)):
+        report = await admin_reports.report_followers(
+            "2025-01-01", "2025-01-31", period="daily", db=db, current_admin=None
+        )
+
+    assert (report.total_followers, report.new_this_period) == (120, 4)
+    assert "users.friend_status" in _sql(db.scalar.await_args.args[0])
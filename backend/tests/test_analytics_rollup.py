@@ -0,0 +1,149 @@
+"""Tests for the hourly analytics rollups and the reads built on them."""
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.services.analytics_rollup_service import FACT_COLUMNS, AnalyticsRollupService
+from app.services.analytics_service import AnalyticsService
+
+T0 = datetime(2026, 10, 19, 10, 0, tzinfo=timezone.utc)
+SVC = "app.services.analytics_rollup_service.AnalyticsRollupService"
+
+
+def _facts(**values):
+    facts = dict.fromkeys(FACT_COLUMNS, 0)
+    facts.update(values)
+    return facts
+
+
+def _rows(*rows):
+    result = MagicMock()
+    result.all.return_value = [SimpleNamespace(_asdict=lambda row=row: dict(row)) for row in rows]
+    return result
+
+
+@pytest.mark.asyncio
+async def test_compute_buckets_merges_event_queries_by_utc_hour():
+    db = AsyncMock()
+    db.execute.side_effect = [
+        _rows({"bucket": T0.replace(tzinfo=None), "sessions_started": 3}),
+        _rows({"bucket": T0, "sessions_claimed": 2, "queue_wait_count": 2, "queue_wait_sum_seconds": 90.0}),
+        _rows({"bucket": T0 + timedelta(hours=1), "frt_count": 1, "frt_sum_seconds": 30.0}),
+        _rows({"bucket": T0, "sessions_closed": 1, "sessions_abandoned": 1, "resolution_count": 1, "resolution_sum_seconds": 600.0}),
+        _rows({"bucket": T0, "messages_incoming": 5, "messages_outgoing": 4, "messages_user": 5, "messages_bot": 1, "messages_admin": 3}),
+        _rows(),
+    ]
+
+    buckets = await AnalyticsRollupService().compute_buckets(db, T0, T0 + timedelta(hours=2))
+
+    assert buckets[T0]["sessions_started"] == 3
+    assert buckets[T0]["sessions_claimed"] == 2
+    assert buckets[T0]["messages_admin"] == 3
+    assert buckets[T0 + timedelta(hours=1)] == _facts(frt_count=1, frt_sum_seconds=30.0)
+    first_query = db.execute.await_args_list[0].args[0]
+    sql = str(first_query.compile(dialect=postgresql.dialect()))
+    assert "date_trunc('hour', timezone('UTC', chat_sessions.started_at))" in sql
+
+
+@pytest.mark.asyncio
+async def test_rollup_range_upserts_zero_filled_hours_per_day():
+    db = AsyncMock()
+    svc = AnalyticsRollupService()
+    with patch(f"{SVC}.compute_buckets", new=AsyncMock(return_value={T0: _facts(sessions_started=1)})):
+        written = await svc.rollup_range(db, T0 + timedelta(minutes=20), T0 + timedelta(days=1, hours=3))
+
+    assert written == 27
+    assert db.commit.await_count == 2  # one transaction per day chunk
+    upsert = db.execute.await_args_list[0].args[0]
+    sql = str(upsert.compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (bucket) DO UPDATE" in sql
+
+
+@pytest.mark.asyncio
+async def test_advance_starts_from_initial_window_then_from_watermark():
+    svc = AnalyticsRollupService()
+    now = T0 + timedelta(minutes=1)  # inside the grace period of the 10:00 hour
+    with patch(f"{SVC}.get_watermark", new=AsyncMock(return_value=None)), patch(
+        f"{SVC}.rollup_range", new=AsyncMock(return_value=5)
+    ) as rollup, patch(f"{SVC}.set_watermark", new=AsyncMock()) as set_watermark, patch(
+        "app.services.analytics_rollup_service.settings.ANALYTICS_ROLLUP_INITIAL_DAYS", 2
+    ):
+        await svc.advance(AsyncMock(), now=now)
+    target = T0 - timedelta(hours=1)
+    assert rollup.await_args.args[1:] == (target - timedelta(days=2), target)
+    set_watermark.assert_awaited_once()
+    assert set_watermark.await_args.args[1] == target
+
+    with patch(f"{SVC}.get_watermark", new=AsyncMock(return_value=target)), patch(
+        f"{SVC}.rollup_range", new=AsyncMock(return_value=2)
+    ) as rollup, patch(f"{SVC}.set_watermark", new=AsyncMock()):
+        await svc.advance(AsyncMock(), now=T0 + timedelta(minutes=30))
+    assert rollup.await_args.args[1:] == (target - timedelta(hours=1), T0)
+
+
+@pytest.mark.asyncio
+async def test_hourly_series_reads_stored_hours_and_computes_the_rest():
+    svc = AnalyticsRollupService()
+    stored = SimpleNamespace(bucket=T0 - timedelta(hours=2), **_facts(sessions_started=7))
+    db = AsyncMock()
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = [stored]
+    db.execute.return_value = result
+
+    with patch(f"{SVC}.get_watermark", new=AsyncMock(return_value=T0)), patch(
+        f"{SVC}.compute_buckets", new=AsyncMock(return_value={T0: _facts(sessions_started=1)})
+    ) as compute:
+        series = await svc.hourly_series(db, T0 - timedelta(hours=3), T0 + timedelta(minutes=40))
+
+    compute.assert_awaited_once_with(db, T0, T0 + timedelta(minutes=40))
+    assert [(row["bucket"], row["sessions_started"]) for row in series] == [
+        (T0 - timedelta(hours=2), 7),
+        (T0, 1),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_active_users_read_partial_days_from_messages():
+    db = AsyncMock()
+    db.scalar.return_value = 12
+    start = T0 - timedelta(days=7)  # 10:00, part way through its UTC day
+
+    with patch(f"{SVC}.get_watermark", new=AsyncMock(return_value=T0 - timedelta(hours=1))):
+        assert await AnalyticsRollupService().count_active_users(db, start, T0 + timedelta(minutes=30)) == 12
+
+    sql = str(db.scalar.await_args.args[0].compile(
+        dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+    ))
+    assert "analytics_daily_users.day >= '2026-10-13' AND analytics_daily_users.day < '2026-10-19'" in sql
+    assert "messages.created_at >= '2026-10-12 10:00:00+00:00' AND messages.created_at < '2026-10-13 00:00:00+00:00'" in sql
+    assert "messages.created_at >= '2026-10-19 00:00:00+00:00' AND messages.created_at < '2026-10-19 10:30:00+00:00'" in sql
+
+
+@pytest.mark.asyncio
+async def test_kpi_trends_use_rollup_sums_for_yesterday():
+    service = AnalyticsService()
+    yesterday = [
+        {"bucket": T0, **_facts(sessions_started=4, frt_count=2, frt_sum_seconds=60.0,
+                                resolution_count=1, resolution_sum_seconds=300.0,
+                                csat_count=2, csat_sum=8, sessions_abandoned=1, sessions_claimed=3)},
+    ]
+    current = {
+        "sessions_today": 2, "avg_first_response_seconds": 20.0, "avg_resolution_seconds": 200.0,
+        "csat_percentage": 90.0, "fcr_rate": 50.0, "abandonment_rate": 10.0,
+    }
+    with patch.object(service, "get_live_kpis", new=AsyncMock(return_value=current)), patch.object(
+        service, "calculate_fcr_rate_window", new=AsyncMock(return_value=40.0)
+    ), patch(
+        "app.services.analytics_service.analytics_rollup_service.hourly_series",
+        new=AsyncMock(return_value=yesterday),
+    ):
+        trends = await service.get_kpi_trends(AsyncMock())
+
+    assert trends["sessions_today"]["previous"] == 4
+    assert trends["avg_first_response_seconds"]["previous"] == 30.0
+    assert trends["avg_resolution_seconds"]["previous"] == 300.0
+    assert trends["csat_percentage"]["previous"] == 80.0
+    assert trends["abandonment_rate"]["previous"] == 25.0
@@ -1,6 +1,7 @@
 """Unit tests for analytics service abandonment metrics."""
 import pytest
-from unittest.mock import AsyncMock
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock
 from types import SimpleNamespace
 
 from sqlalchemy.dialects import postgresql
@@ -16,7 +17,7 @@ def service():
 @pytest.mark.asyncio
 async def test_abandonment_rate_zero_when_no_sessions(service):
     mock_db = AsyncMock()
-    mock_db.scalar.side_effect = [0, 0]  # abandoned, claimed
+    mock_db.execute.return_value = MagicMock(one=MagicMock(return_value=(0, 0)))  # abandoned, claimed
 
     rate = await service.calculate_abandonment_rate(mock_db, days=7)
     assert rate == 0.0
@@ -25,22 +26,63 @@ async def test_abandonment_rate_zero_when_no_sessions(service):
 @pytest.mark.asyncio
 async def test_abandonment_rate_calculation(service):
     mock_db = AsyncMock()
-    mock_db.scalar.side_effect = [2, 8]  # abandoned, claimed
+    mock_db.execute.return_value = MagicMock(one=MagicMock(return_value=(2, 8)))  # abandoned, claimed
 
     rate = await service.calculate_abandonment_rate(mock_db, days=7)
     assert rate == 20.0
+    sql = str(mock_db.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "chat_sessions.abandoned" in sql
+    assert "closed_by" not in sql
 
 
 @pytest.mark.asyncio
-async def test_emit_live_kpis_update_broadcasts_to_subscribers(service):
+async def test_fcr_rate_counts_precomputed_reopen_flag(service):
+    mock_db = AsyncMock()
+    mock_db.execute.return_value = MagicMock(one=MagicMock(return_value=(10, 7)))  # closed, not reopened
+
+    rate = await service.calculate_fcr_rate(mock_db, days=7)
+    assert rate == 70.0
+    mock_db.execute.assert_awaited_once()
+    sql = str(mock_db.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "reopened_within_24h IS false" in sql
+    assert "EXISTS" not in sql
+
+
+@pytest.mark.asyncio
+async def test_emit_live_kpis_update_only_marks_snapshot_dirty(service):
     mock_db = AsyncMock()
     with pytest.MonkeyPatch.context() as mp:
-        mp.setattr(service, "get_live_kpis", AsyncMock(return_value={"waiting": 1, "active": 2}))
-        mock_ws_manager = AsyncMock()
-        mp.setattr("app.core.websocket_manager.ws_manager", mock_ws_manager)
+        get_live_kpis = AsyncMock()
+        mp.setattr(service, "get_live_kpis", get_live_kpis)
+        mark_dirty = AsyncMock()
+        mp.setattr("app.services.kpi_snapshot_service.kpi_snapshot_service.mark_dirty", mark_dirty)
         await service.emit_live_kpis_update(mock_db)
 
-    mock_ws_manager.broadcast_analytics_update.assert_awaited_once()
+    mark_dirty.assert_awaited_once()
+    get_live_kpis.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_get_live_kpis_uses_one_statement(service):
+    row = SimpleNamespace(
+        waiting=3, active=2, avg_frt=30.04, avg_resolution=None, sessions_today=9,
+        fcr_total=4, fcr_resolved=3, abandoned=1, claimed=9,
+        queue_wait_breaches=1, frt_breaches=2, resolution_breaches=0,
+        csat_avg=4.5, human_mode_users=7,
+    )
+    mock_db = AsyncMock()
+    mock_db.execute.return_value = SimpleNamespace(one=lambda: row)
+
+    kpis = await service.get_live_kpis(mock_db)
+
+    mock_db.execute.assert_awaited_once()
+    mock_db.scalar.assert_not_awaited()
+    assert kpis["waiting"] == 3 and kpis["avg_first_response_seconds"] == 30.0
+    assert kpis["avg_resolution_seconds"] == 0
+    assert kpis["fcr_rate"] == 75.0 and kpis["abandonment_rate"] == 10.0
+    assert kpis["sla_breach_events_24h"] == 3
+    assert kpis["csat_percentage"] == 90.0 and kpis["human_mode_users"] == 7
+    assert "FILTER (WHERE" in str(mock_db.execute.await_args.args[0])
 
 
 @pytest.mark.asyncio
@@ -67,8 +109,9 @@ async def test_get_operator_performance_includes_availability_and_queue_wait(ser
             )
         ]
     )
+    mock_db.info = {}
     user_result = SimpleNamespace(
-        scalar_one_or_none=lambda: SimpleNamespace(display_name="Agent 7")
+        scalars=lambda: SimpleNamespace(all=lambda: [SimpleNamespace(id=7, display_name="Agent 7")])
     )
     mock_db.execute.side_effect = [query_result, user_result]
 
@@ -88,6 +131,7 @@ async def test_get_operator_performance_includes_availability_and_queue_wait(ser
         data = await service.get_operator_performance(mock_db, days=2)
 
     assert len(data) == 1
+    assert data[0]["operator_name"] == "Agent 7"
     assert data[0]["avg_queue_wait_seconds"] == 30.0
     assert data[0]["availability_seconds"] == 7200.0
     assert data[0]["availability_percent"] == 4.2
@@ -104,28 +148,39 @@ async def test_calculate_sla_breach_events_sums_all_categories(service):
 
 
 @pytest.mark.asyncio
-async def test_get_session_volume_uses_literal_day_bucket(service):
-    captured = {}
+async def test_get_session_volume_sums_hourly_rollups_per_day(service):
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    series = [
+        {"bucket": today + timedelta(hours=1), "sessions_started": 2},
+        {"bucket": today + timedelta(hours=5), "sessions_started": 3},
+        {"bucket": today - timedelta(hours=2), "sessions_started": 4},
+    ]
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(
+            "app.services.analytics_service.analytics_rollup_service.hourly_series",
+            AsyncMock(return_value=series),
+        )
+        volume = await service.get_session_volume(AsyncMock(), days=7)
 
-    class _FakeResult:
-        def all(self):
-            return []
+    assert len(volume) == 7
+    assert volume[-1] == {"day": today.date().isoformat(), "sessions": 5}
+    assert volume[-2]["sessions"] == 4
+    assert volume[0]["sessions"] == 0
 
-    async def _capture(stmt):
-        captured["stmt"] = stmt
-        return _FakeResult()
 
+@pytest.mark.asyncio
+async def test_get_percentiles_computed_in_sql(service):
     mock_db = AsyncMock()
-    mock_db.execute.side_effect = _capture
-
-    series = await service.get_session_volume(mock_db, days=7)
-
-    compiled = str(
-        captured["stmt"].compile(
-            dialect=postgresql.dialect(),
-            compile_kwargs={"literal_binds": True},
-        )
-    )
-
-    assert "date_trunc('day', chat_sessions.started_at)" in compiled
-    assert series[-1]["sessions"] == 0
+    mock_db.execute.side_effect = [
+        SimpleNamespace(first=lambda: SimpleNamespace(p50=12.34, p90=40.0, p99=None)),
+        SimpleNamespace(first=lambda: SimpleNamespace(p50=300.0, p90=900.06, p99=1800.0)),
+    ]
+
+    result = await service.get_percentiles(mock_db, days=90)
+
+    assert result == {
+        "frt": {"p50": 12.3, "p90": 40.0, "p99": 0.0},
+        "resolution": {"p50": 300.0, "p90": 900.1, "p99": 1800.0},
+    }
+    sql = str(mock_db.execute.await_args_list[0].args[0])
+    assert "percentile_cont" in sql and "WITHIN GROUP" in sql
@@ -0,0 +1,74 @@
+"""Tests for per-request batched loaders and the views that use them."""
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.api.v1.endpoints.admin_audit import get_audit_logs
+from app.db.loaders import BatchLoader, get_loader, user_loader
+
+
+def _session():
+    db = AsyncMock()
+    db.info = {}
+    return db
+
+
+def _users_result(users):
+    return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: users))
+
+
+@pytest.mark.asyncio
+async def test_concurrent_loads_resolve_in_one_fetch_and_are_memoized():
+    fetch = AsyncMock(side_effect=lambda db, keys: {key: f"user-{key}" for key in keys if key != 3})
+    loader = BatchLoader(_session(), fetch)
+
+    results = await asyncio.gather(*(loader.load(key) for key in (1, 2, 3, 1)))
+    assert results == ["user-1", "user-2", None, "user-1"]
+    fetch.assert_awaited_once()
+    assert sorted(fetch.await_args.args[1]) == [1, 2, 3]
+
+    assert await loader.load_many([2, 3, None]) == {2: "user-2", 3: None}
+    fetch.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_loader_is_shared_for_the_session():
+    db = _session()
+    assert user_loader(db) is user_loader(db)
+    assert get_loader(db, "other", AsyncMock()) is not user_loader(db)
+    assert user_loader(_session()) is not user_loader(db)
+
+
+@pytest.mark.asyncio
+async def test_audit_log_page_uses_bounded_query_count():
+    now = datetime.now(timezone.utc)
+    logs = [
+        SimpleNamespace(
+            id=i,
+            admin_id=i % 3 + 1,
+            action="claim_session",
+            resource_type="chat_session",
+            resource_id=str(i),
+            details={},
+            ip_address=None,
+            user_agent=None,
+            created_at=now,
+        )
+        for i in range(500)
+    ]
+    db = _session()
+    db.scalar.return_value = 500
+    db.execute.side_effect = [
+        SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: logs)),
+        _users_result([SimpleNamespace(id=1, display_name="Ann"), SimpleNamespace(id=2, display_name="Bo")]),
+    ]
+
+    page = await get_audit_logs(
+        admin_id=None, action=None, resource_type=None, days=7, limit=500, offset=0, db=db, current_user=None
+    )
+
+    assert db.scalar.await_count + db.execute.await_count == 3
+    assert [log["admin_name"] for log in page["logs"][:3]] == ["Ann", "Bo", "Admin 3"]
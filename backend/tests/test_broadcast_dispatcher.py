@@ -0,0 +1,208 @@
+"""Tests for chunked multicast delivery of targeted broadcasts."""
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from linebot.v3.messaging import TextMessage
+from linebot.v3.messaging.exceptions import ApiException
+from sqlalchemy.dialects import postgresql
+
+from app.core.line_rate_limiter import LineRateLimitTimeout
+from app.models.broadcast import BroadcastStatus
+from app.models.broadcast_chunk import ChunkStatus
+from app.services.broadcast_dispatch_service import BroadcastDispatchService
+from app.tasks import broadcast_dispatcher
+
+MESSAGES = [TextMessage(text="Hello")]
+
+
+def _chunk(chunk_id=1, broadcast_id=7, seq=0, count=500, attempts=1):
+    return SimpleNamespace(
+        id=chunk_id,
+        broadcast_id=broadcast_id,
+        seq=seq,
+        recipients=[f"U{seq}-{i}" for i in range(count)],
+        recipient_count=count,
+        retry_key=f"key-{chunk_id}",
+        attempts=attempts,
+    )
+
+
+def _session_returning(*results):
+    db = AsyncMock()
+    db.execute.side_effect = list(results)
+    ctx = MagicMock()
+    ctx.__aenter__ = AsyncMock(return_value=db)
+    ctx.__aexit__ = AsyncMock(return_value=False)
+    return db, MagicMock(return_value=ctx)
+
+
+def _first(row):
+    result = MagicMock()
+    result.first.return_value = row
+    return result
+
+
+@pytest.mark.asyncio
+async def test_prepare_chunks_dedupes_and_streams_from_async_iterables():
+    svc = BroadcastDispatchService()
+    broadcast = SimpleNamespace(id=3, total_recipients=0, success_count=5, failure_count=5)
+    db = AsyncMock()
+    db.scalar.return_value = 0
+
+    async def _recipients():
+        for i in range(1100):
+            yield f"U{i % 1050}"
+
+    assert await svc.prepare_chunks(db, broadcast, _recipients()) == 3
+    rows = db.execute.await_args.args[1]
+    assert [row["seq"] for row in rows] == [0, 1, 2]
+    assert [row["recipient_count"] for row in rows] == [500, 500, 50]
+    assert len({row["retry_key"] for row in rows}) == 3
+    assert (broadcast.total_recipients, broadcast.success_count, broadcast.failure_count) == (1050, 0, 0)
+
+
+@pytest.mark.asyncio
+async def test_prepare_chunks_is_noop_when_resuming():
+    svc = BroadcastDispatchService()
+    broadcast = SimpleNamespace(id=3, total_recipients=1050)
+    db = AsyncMock()
+    db.scalar.return_value = 3
+
+    assert await svc.prepare_chunks(db, broadcast, ["U1"]) == 3
+    db.execute.assert_not_awaited()
+    assert broadcast.total_recipients == 1050
+
+
+@pytest.mark.asyncio
+async def test_deliver_chunk_records_success_with_retry_key_and_reports_progress():
+    svc = BroadcastDispatchService()
+    chunk = _chunk()
+    api = AsyncMock()
+    progress = SimpleNamespace(
+        status=BroadcastStatus.SENDING, total_recipients=1000, success_count=500, failure_count=0,
+        _asdict=lambda: {"status": BroadcastStatus.SENDING, "total_recipients": 1000, "success_count": 500, "failure_count": 0},
+    )
+    db, factory = _session_returning(_first((1,)), _first(progress))
+
+    with patch("app.services.broadcast_dispatch_service.AsyncSessionLocal", factory), patch(
+        "app.services.broadcast_dispatch_service.ws_manager.publish_analytics_update", new=AsyncMock()
+    ) as emit:
+        status = await svc.deliver_chunk(api, chunk, MESSAGES)
+
+    assert status == ChunkStatus.SENT.value
+    assert api.multicast.await_args.kwargs["x_line_retry_key"] == "key-1"
+    db.commit.assert_awaited_once()
+    payload = emit.await_args.args[0]["payload"]
+    assert payload == {
+        "broadcast_id": 7, "status": "sending", "total_recipients": 1000, "success_count": 500, "failure_count": 0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_deliver_chunk_treats_conflict_as_already_sent():
+    svc = BroadcastDispatchService()
+    api = AsyncMock()
+    api.multicast.side_effect = ApiException(status=409, reason="Conflict")
+    db, factory = _session_returning(_first((1,)), _first(None))
+
+    with patch("app.services.broadcast_dispatch_service.AsyncSessionLocal", factory):
+        assert await svc.deliver_chunk(api, _chunk(), MESSAGES) == ChunkStatus.SENT.value
+
+
+@pytest.mark.asyncio
+async def test_deliver_chunk_retries_server_errors_then_fails():
+    svc = BroadcastDispatchService()
+    api = AsyncMock()
+    api.multicast.side_effect = ApiException(status=500, reason="Server Error")
+
+    db, factory = _session_returning(MagicMock())
+    with patch("app.services.broadcast_dispatch_service.AsyncSessionLocal", factory):
+        assert await svc.deliver_chunk(api, _chunk(attempts=1), MESSAGES) == ChunkStatus.PENDING.value
+
+    db, factory = _session_returning(_first((1,)), _first(None))
+    with patch("app.services.broadcast_dispatch_service.AsyncSessionLocal", factory), patch(
+        "app.services.broadcast_dispatch_service.settings.BROADCAST_CHUNK_MAX_ATTEMPTS", 3
+    ):
+        assert await svc.deliver_chunk(api, _chunk(attempts=3), MESSAGES) == ChunkStatus.FAILED.value
+    assert db.execute.await_count == 2  # chunk outcome + failure counter
+
+
+@pytest.mark.asyncio
+async def test_deliver_chunk_reschedules_throttled_chunks_without_spending_an_attempt():
+    svc = BroadcastDispatchService()
+    db, factory = _session_returning(MagicMock())
+
+    with patch("app.services.broadcast_dispatch_service.AsyncSessionLocal", factory), patch(
+        "app.services.broadcast_dispatch_service.line_rate_limiter.call",
+        new=AsyncMock(side_effect=LineRateLimitTimeout("multicast rate limit")),
+    ), patch("app.services.broadcast_dispatch_service.settings.BROADCAST_CHUNK_MAX_ATTEMPTS", 1):
+        assert await svc.deliver_chunk(AsyncMock(), _chunk(attempts=1), MESSAGES) == ChunkStatus.PENDING.value
+
+    sql = str(db.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "attempts=(broadcast_chunks.attempts - %(attempts_1)s::INTEGER)" in sql
+    db.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_deliver_chunk_skips_counting_when_chunk_already_settled():
+    svc = BroadcastDispatchService()
+    db, factory = _session_returning(_first(None))
+
+    with patch("app.services.broadcast_dispatch_service.AsyncSessionLocal", factory):
+        assert await svc.deliver_chunk(AsyncMock(), _chunk(), MESSAGES) == ChunkStatus.SENT.value
+
+    assert db.execute.await_count == 1
+    db.rollback.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_abandoned_chunks_count_as_failed_recipients():
+    svc = BroadcastDispatchService()
+    db = AsyncMock()
+    chunks = MagicMock()
+    chunks.scalars.return_value.all.return_value = [500, 120]
+    db.execute.side_effect = [chunks, MagicMock()]
+
+    assert await svc.abandon_chunks(db, 7, "nothing to send") == 2
+
+    counter = db.execute.await_args_list[1].args[0].compile(dialect=postgresql.dialect())
+    assert "failure_count=(broadcasts.failure_count + %(failure_count_1)s::INTEGER)" in str(counter)
+    assert counter.params["failure_count_1"] == 620
+    db.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_dispatch_batch_bounds_concurrency_and_drops_cancelled_broadcasts():
+    in_flight = 0
+    peak = 0
+    delivered = []
+
+    async def _slow_deliver(api, chunk, messages):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        delivered.append(chunk.id)
+        return ChunkStatus.SENT.value
+
+    chunks = [_chunk(chunk_id=i, broadcast_id=1, seq=i) for i in range(12)]
+    chunks.append(_chunk(chunk_id=99, broadcast_id=2, seq=0))
+    _, factory = _session_returning()
+    svc = "app.tasks.broadcast_dispatcher.broadcast_dispatch_service"
+
+    with patch("app.tasks.broadcast_dispatcher.AsyncSessionLocal", factory), patch(
+        f"{svc}.load_messages", new=AsyncMock(return_value={1: ["msg"], 2: None})
+    ), patch(f"{svc}.abandon_chunks", new=AsyncMock(return_value=1)) as abandon, patch(
+        f"{svc}.deliver_chunk", new=AsyncMock(side_effect=_slow_deliver)
+    ), patch(f"{svc}.finalize", new=AsyncMock(return_value=True)) as finalize, patch(
+        "app.tasks.broadcast_dispatcher.broadcast_service._api", AsyncMock()
+    ):
+        await broadcast_dispatcher._dispatch_batch(chunks, asyncio.Semaphore(4))
+
+    assert sorted(delivered) == list(range(12))
+    assert 1 < peak <= 4
+    assert abandon.await_args.args[1] == 2
+    assert sorted(call.args[1] for call in finalize.await_args_list) == [1, 2]
@@ -0,0 +1,137 @@
+"""Tests for the scheduled broadcast dispatcher and its due-time heap."""
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.core.scheduler import DueQueue
+from app.models.broadcast import BroadcastStatus
+from app.services.broadcast_service import BroadcastService
+from app.tasks.broadcast_scheduler import BroadcastScheduler
+
+T0 = datetime(2026, 10, 19, 8, 0, tzinfo=timezone.utc)
+
+
+class FakeClock:
+    def __init__(self, now: datetime):
+        self.current = now
+
+    def now(self) -> datetime:
+        return self.current
+
+    async def sleep(self, seconds: float):
+        self.current += timedelta(seconds=seconds)
+
+
+def _session_factory(db):
+    ctx = MagicMock()
+    ctx.__aenter__ = AsyncMock(return_value=db)
+    ctx.__aexit__ = AsyncMock(return_value=False)
+    return MagicMock(return_value=ctx)
+
+
+def test_due_queue_orders_reschedules_and_cancels():
+    queue = DueQueue()
+    queue.schedule(1, T0 + timedelta(minutes=5))
+    queue.schedule(2, T0)
+    queue.schedule(3, T0 + timedelta(minutes=1))
+    queue.schedule(1, T0 + timedelta(seconds=30))  # moved earlier
+    queue.cancel(3)
+
+    assert len(queue) == 2
+    assert queue.next_due() == T0
+    assert queue.pop_due(T0 + timedelta(minutes=10)) == [2, 1]
+    assert queue.next_due() is None
+
+
+def test_due_queue_handles_same_time_reschedule():
+    queue = DueQueue()
+    queue.schedule("a", T0)
+    queue.schedule("a", T0)
+    assert queue.pop_due(T0) == ["a"]
+    assert queue.pop_due(T0) == []
+
+
+@pytest.mark.asyncio
+async def test_run_pending_only_fires_due_jobs_with_fake_clock():
+    clock = FakeClock(T0 - timedelta(minutes=1))
+    scheduler = BroadcastScheduler(clock=clock, session_factory=_session_factory(AsyncMock()))
+    scheduler.track(10, T0)
+    scheduler.track(11, T0)
+    scheduler.track(12, T0 + timedelta(hours=1))
+
+    with patch(
+        "app.tasks.broadcast_scheduler.broadcast_service.claim_scheduled",
+        new=AsyncMock(side_effect=lambda db, ids, now, **kw: list(ids)),
+    ) as claim, patch(
+        "app.tasks.broadcast_scheduler.broadcast_service.get_broadcast",
+        new=AsyncMock(side_effect=lambda db, broadcast_id: SimpleNamespace(id=broadcast_id)),
+    ), patch(
+        "app.tasks.broadcast_scheduler.broadcast_service.deliver_broadcast", new=AsyncMock()
+    ) as deliver:
+        assert await scheduler.run_pending() == []
+        claim.assert_not_awaited()
+
+        await clock.sleep(60)
+        assert sorted(await scheduler.run_pending()) == [10, 11]
+        assert deliver.await_count == 2
+        assert 12 in scheduler.queue
+
+
+@pytest.mark.asyncio
+async def test_run_pending_skips_broadcasts_claimed_elsewhere():
+    clock = FakeClock(T0)
+    scheduler = BroadcastScheduler(clock=clock, session_factory=_session_factory(AsyncMock()))
+    scheduler.track(20, T0)
+
+    with patch(
+        "app.tasks.broadcast_scheduler.broadcast_service.claim_scheduled",
+        new=AsyncMock(return_value=[]),
+    ), patch(
+        "app.tasks.broadcast_scheduler.broadcast_service.deliver_broadcast", new=AsyncMock()
+    ) as deliver:
+        assert await scheduler.run_pending() == []
+    deliver.assert_not_awaited()
+
+
+def _scheduled_row(broadcast_id: int, scheduled_at: datetime):
+    return SimpleNamespace(id=broadcast_id, status=BroadcastStatus.SCHEDULED, scheduled_at=scheduled_at)
+
+
+def _db_returning(rows):
+    db = AsyncMock()
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = rows
+    db.execute.return_value = result
+    return db
+
+
+@pytest.mark.asyncio
+async def test_claim_scheduled_marks_sending_and_applies_skip_misfire_policy():
+    svc = BroadcastService()
+    on_time = _scheduled_row(1, T0)
+    misfired = _scheduled_row(2, T0 - timedelta(hours=3))
+    db = _db_returning([misfired, on_time])
+
+    claimed = await svc.claim_scheduled(db, [1, 2], T0 + timedelta(seconds=5), misfire_grace_seconds=3600, misfire_policy="skip")
+
+    assert claimed == [1]
+    assert on_time.status == BroadcastStatus.SENDING
+    assert misfired.status == BroadcastStatus.FAILED
+    stmt = db.execute.await_args.args[0]
+    assert "SKIP LOCKED" in str(stmt.compile(dialect=postgresql.dialect()))
+    db.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_claim_scheduled_sends_late_with_send_policy():
+    svc = BroadcastService()
+    misfired = _scheduled_row(3, T0 - timedelta(hours=3))
+    db = _db_returning([misfired])
+
+    claimed = await svc.claim_scheduled(db, [3], T0, misfire_grace_seconds=60, misfire_policy="send")
+
+    assert claimed == [3]
+    assert misfired.status == BroadcastStatus.SENDING
@@ -71,22 +71,25 @@ async def test_send_broadcast_transitions_to_completed():
 
 
 @pytest.mark.asyncio
-async def test_send_broadcast_multicast_partial_failure():
+async def test_send_broadcast_multicast_queues_chunks_and_stays_sending():
     svc = BroadcastService()
-    user_ids = [f"U{i}" for i in range(10)]
+    user_ids = [f"U{i}" for i in range(1200)]
     bc = _broadcast(
         target_audience="specific",
         target_filter={"user_ids": user_ids},
     )
     db = AsyncMock()
+    db.scalar.return_value = 0  # no chunks yet
     mock_api = AsyncMock()
-    mock_api.multicast.side_effect = Exception("chunk fail")
     svc._api = mock_api
 
     result = await svc.send_broadcast(db, bc)
 
-    assert result.status == BroadcastStatus.FAILED
-    assert result.failure_count == 10
+    assert result.status == BroadcastStatus.SENDING
+    assert result.total_recipients == 1200
+    mock_api.multicast.assert_not_awaited()
+    rows = db.execute.await_args.args[1]
+    assert [row["recipient_count"] for row in rows] == [500, 500, 200]
 
 
 @pytest.mark.asyncio
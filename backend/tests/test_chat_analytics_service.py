@@ -0,0 +1,93 @@
+"""Tests for the daily per-operator chat_analytics aggregation."""
+from datetime import date, datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.services.chat_analytics_service import CHAT_ANALYTICS_ROLLUP, ChatAnalyticsService
+
+DAY = date(2026, 10, 18)
+SVC = "app.services.chat_analytics_service.ChatAnalyticsService"
+
+
+def _rows(*rows):
+    result = MagicMock()
+    result.all.return_value = [SimpleNamespace(**row) for row in rows]
+    return result
+
+
+def _sql(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+@pytest.mark.asyncio
+async def test_compute_day_merges_claims_closes_and_messages_per_operator():
+    db = AsyncMock()
+    db.execute.side_effect = [
+        _rows({"operator_id": 1, "total_sessions": 4, "avg_frt": 31.6}, {"operator_id": 2, "total_sessions": 1, "avg_frt": None}),
+        _rows({"operator_id": 1, "avg_resolution": 600.2}, {"operator_id": 3, "avg_resolution": 90.0}),
+        _rows({"operator_id": 1, "total_messages_sent": 12}),
+    ]
+
+    stats = await ChatAnalyticsService().compute_day(db, DAY)
+
+    assert stats[1] == {
+        "total_sessions": 4,
+        "avg_response_time_seconds": 32,
+        "avg_resolution_time_seconds": 600,
+        "total_messages_sent": 12,
+    }
+    assert stats[2]["avg_response_time_seconds"] is None
+    assert stats[3]["total_sessions"] == 0 and stats[3]["avg_resolution_time_seconds"] == 90
+    messages_sql = _sql(db.execute.await_args_list[2].args[0])
+    assert "JOIN chat_sessions" in messages_sql
+
+
+@pytest.mark.asyncio
+async def test_aggregate_day_upserts_and_removes_stale_operators():
+    db = AsyncMock()
+    stats = {7: {"total_sessions": 2, "avg_response_time_seconds": 10, "avg_resolution_time_seconds": 50, "total_messages_sent": 3}}
+    with patch(f"{SVC}.compute_day", new=AsyncMock(return_value=stats)):
+        assert await ChatAnalyticsService().aggregate_day(db, DAY) == 1
+
+    upsert_sql, delete_sql = (_sql(call.args[0]) for call in db.execute.await_args_list)
+    assert "ON CONFLICT ON CONSTRAINT uq_chat_analytics_date_operator DO UPDATE" in upsert_sql
+    assert "DELETE FROM chat_analytics" in delete_sql and "NOT IN" in delete_sql
+    db.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_aggregate_day_without_activity_clears_the_day():
+    db = AsyncMock()
+    with patch(f"{SVC}.compute_day", new=AsyncMock(return_value={})):
+        assert await ChatAnalyticsService().aggregate_day(db, DAY) == 0
+    db.execute.assert_awaited_once()
+    assert "NOT IN" not in _sql(db.execute.await_args.args[0])
+
+
+@pytest.mark.asyncio
+async def test_refresh_finalizes_missed_days_and_keeps_yesterday_open():
+    now = datetime(2026, 10, 19, 9, 30, tzinfo=timezone.utc)
+    watermark = datetime(2026, 10, 16, tzinfo=timezone.utc)
+    rollups = "app.services.chat_analytics_service.analytics_rollup_service"
+    with patch(f"{rollups}.get_watermark", new=AsyncMock(return_value=watermark)), patch(
+        f"{rollups}.set_watermark", new=AsyncMock()
+    ) as set_watermark, patch(f"{SVC}.aggregate_day", new=AsyncMock(return_value=2)) as aggregate_day:
+        await ChatAnalyticsService().refresh(AsyncMock(), now=now)
+
+    assert [call.args[1] for call in aggregate_day.await_args_list] == [
+        date(2026, 10, 16), date(2026, 10, 17), date(2026, 10, 18), date(2026, 10, 19),
+    ]
+    assert set_watermark.await_args.args[1:] == (datetime(2026, 10, 18, tzinfo=timezone.utc), CHAT_ANALYTICS_ROLLUP)
+
+    # Yesterday is re-aggregated on every run, so a first response after
+    # midnight still reaches the claim day's FRT.
+    with patch(f"{rollups}.get_watermark", new=AsyncMock(return_value=datetime(2026, 10, 18, tzinfo=timezone.utc))), patch(
+        f"{rollups}.set_watermark", new=AsyncMock()
+    ) as set_watermark, patch(f"{SVC}.aggregate_day", new=AsyncMock(return_value=2)) as aggregate_day:
+        await ChatAnalyticsService().refresh(AsyncMock(), now=now)
+
+    assert [call.args[1] for call in aggregate_day.await_args_list] == [date(2026, 10, 18), date(2026, 10, 19)]
+    set_watermark.assert_not_awaited()
@@ -0,0 +1,60 @@
+"""Tests for the streaming CSV export pipeline."""
+import gzip
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy import select
+
+from app.models.message import Message
+from app.services import csv_export_service as module
+from app.services.csv_export_service import CsvExportService
+
+
+async def _collect(chunks):
+    return [chunk async for chunk in chunks]
+
+
+async def _rows(count):
+    for i in range(count):
+        yield (i, f"user-{i}", "x" * 50)
+
+
+@pytest.mark.asyncio
+async def test_iter_csv_flushes_in_bounded_chunks(monkeypatch):
+    monkeypatch.setattr(module, "CSV_CHUNK_BYTES", 1024)
+
+    chunks = await _collect(CsvExportService().iter_csv(["id", "user", "pad"], _rows(500)))
+
+    assert len(chunks) > 10
+    assert all(len(chunk) < 1024 + 200 for chunk in chunks)
+    lines = b"".join(chunks).decode("utf-8").splitlines()
+    assert lines[0] == "id,user,pad" and len(lines) == 501
+    assert lines[-1].startswith("499,user-499,")
+
+
+@pytest.mark.asyncio
+async def test_iter_csv_gzip_and_bom_round_trip():
+    chunks = await _collect(
+        CsvExportService().iter_csv(["a"], [[1], [2]], format_row=lambda r: [r[0] * 10], gzip=True, bom=True)
+    )
+
+    assert gzip.decompress(b"".join(chunks)).decode("utf-8") == "\ufeffa\r\n10\r\n20\r\n"
+
+
+@pytest.mark.asyncio
+async def test_stream_rows_uses_server_side_cursor():
+    async def _result():
+        for row in [(1,), (2,)]:
+            yield row
+
+    db = MagicMock()
+    db.stream = AsyncMock(return_value=_result())
+    session = MagicMock()
+    session.__aenter__ = AsyncMock(return_value=db)
+    session.__aexit__ = AsyncMock(return_value=False)
+
+    rows = [row async for row in CsvExportService().stream_rows(select(Message.id), lambda: session)]
+
+    assert rows == [(1,), (2,)]
+    query = db.stream.await_args.args[0]
+    assert query.get_execution_options()["yield_per"] == module.STREAM_BATCH_SIZE
@@ -0,0 +1,117 @@
+"""Tests for the shared outbound HTTP pools."""
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import httpx
+import pytest
+from linebot.v3.messaging import Configuration
+
+from app.core import http_client as http_module
+from app.core.config import settings
+from app.core.http_client import POOL_LINE, POOL_TELEGRAM, OutboundHttp, PoolStats, _MeteredTransport
+
+
+@pytest.fixture
+def fake_upstream(monkeypatch):
+    """Replace the network layer: each request 'opens' a connection and waits for `release`."""
+    release = asyncio.Event()
+
+    async def handle(self, request):
+        await request.extensions["trace"]("connection.connect_tcp.complete", {})
+        await release.wait()
+        return httpx.Response(200, json={"ok": True})
+
+    monkeypatch.setattr(httpx.AsyncHTTPTransport, "handle_async_request", handle)
+    return release
+
+
+@pytest.mark.asyncio
+async def test_clients_are_shared_per_pool_and_rebuilt_after_close():
+    http = OutboundHttp()
+
+    line = http.client(POOL_LINE)
+    assert http.client(POOL_LINE) is line
+    assert http.client(POOL_TELEGRAM) is not line
+    assert line.timeout.connect == settings.HTTP_CONNECT_TIMEOUT_SECONDS
+    assert line.timeout.pool == settings.HTTP_POOL_TIMEOUT_SECONDS
+
+    await http.aclose()
+
+    assert line.is_closed
+    assert http.client(POOL_LINE) is not line
+    await http.aclose()
+
+
+@pytest.mark.asyncio
+async def test_metered_transport_counts_handshakes_and_saturation(fake_upstream):
+    stats = PoolStats(max_connections=2)
+    seen = []
+
+    async def caller_trace(event, info):
+        seen.append(event)
+
+    async with httpx.AsyncClient(transport=_MeteredTransport(stats)) as client:
+        requests = [
+            asyncio.create_task(client.get("https://example.test/", extensions={"trace": caller_trace}))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0)
+        assert stats.in_flight == 3
+        fake_upstream.set()
+        responses = await asyncio.gather(*requests)
+
+    assert [response.status_code for response in responses] == [200, 200, 200]
+    assert stats.as_dict() == {
+        "max_connections": 2, "requests": 3, "in_flight": 0, "peak_in_flight": 3,
+        "waited": 1, "connections_opened": 3,
+    }
+    assert seen == ["connection.connect_tcp.complete"] * 3
+
+
+@pytest.mark.asyncio
+async def test_line_sdk_client_uses_the_tuned_connector(monkeypatch):
+    monkeypatch.setattr(settings, "HTTP_LINE_MAX_CONNECTIONS", 7)
+    http = OutboundHttp()
+
+    api_client = http.line_api_client(Configuration(access_token="token"))
+
+    assert http.line_api_client(Configuration(access_token="other")) is api_client
+    connector = api_client.rest_client.pool_manager.connector
+    assert (connector.limit, connector.limit_per_host) == (7, 7)
+    assert http.stats()["pools"][POOL_LINE]["max_connections"] == 7
+
+    session = api_client.rest_client.pool_manager
+    await http.aclose()
+    assert session.closed
+    assert http._unused_sessions == []
+
+
+@pytest.mark.asyncio
+async def test_line_sdk_requests_use_the_configured_timeouts(monkeypatch):
+    monkeypatch.setattr(settings, "HTTP_CONNECT_TIMEOUT_SECONDS", 2.0)
+    monkeypatch.setattr(settings, "HTTP_READ_TIMEOUT_SECONDS", 9.0)
+    monkeypatch.setattr(settings, "HTTP_POOL_TIMEOUT_SECONDS", 3.0)
+    http = OutboundHttp()
+    api_client = http.line_api_client(Configuration(access_token="token"))
+    session = api_client.rest_client.pool_manager
+    seen = []
+
+    async def fake_request(**kwargs):
+        seen.append(kwargs["timeout"])
+        return SimpleNamespace(status=200, reason="OK", read=AsyncMock(return_value=b"{}"))
+
+    monkeypatch.setattr(session, "request", fake_request)
+    await api_client.rest_client.get_request("https://api.line.me/v2/bot/info")
+    await api_client.rest_client.get_request("https://api.line.me/v2/bot/info", _request_timeout=1)
+    await http.aclose()
+
+    assert session.timeout == seen[0]
+    assert (seen[0].total, seen[0].connect, seen[0].sock_connect, seen[0].sock_read) == (None, 5.0, 2.0, 9.0)
+    assert seen[1] == 1  # an explicit per-call timeout still wins
+
+
+def test_http2_requires_the_optional_package(monkeypatch):
+    monkeypatch.setattr(settings, "HTTP_HTTP2_ENABLED", True)
+    monkeypatch.setattr(http_module.importlib.util, "find_spec", lambda name: None)
+    assert http_module.http2_available() is False
@@ -0,0 +1,91 @@
+"""Tests for the shared, throttled live-KPI snapshot."""
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.core.websocket_manager import ConnectionManager
+from app.services.kpi_snapshot_service import SNAPSHOT_KEY, KpiSnapshotService
+from app.tasks import kpi_snapshot
+
+MODULE = "app.services.kpi_snapshot_service"
+KPIS = {"waiting": 1, "active": 2}
+
+
+def _session_factory():
+    session = MagicMock()
+    session.__aenter__ = AsyncMock(return_value=AsyncMock())
+    session.__aexit__ = AsyncMock(return_value=False)
+    return MagicMock(return_value=session)
+
+
+@pytest.mark.asyncio
+async def test_get_snapshot_serves_cached_copy_without_database():
+    with patch(f"{MODULE}.redis_client.get", new=AsyncMock(return_value=json.dumps(KPIS))), patch(
+        f"{MODULE}.analytics_service.get_live_kpis", new=AsyncMock()
+    ) as get_live_kpis:
+        assert await KpiSnapshotService().get_snapshot() == KPIS
+    get_live_kpis.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_cold_start_computes_once_for_concurrent_readers():
+    with patch(f"{MODULE}.redis_client._redis", None), patch(
+        f"{MODULE}.AsyncSessionLocal", _session_factory()
+    ), patch(f"{MODULE}.analytics_service.get_live_kpis", new=AsyncMock(return_value=KPIS)) as get_live_kpis, patch(
+        f"{MODULE}.ws_manager.publish_analytics_update", new=AsyncMock()
+    ) as publish:
+        service = KpiSnapshotService()
+        results = await asyncio.gather(*(service.get_snapshot() for _ in range(10)))
+
+    assert results == [KPIS] * 10
+    get_live_kpis.assert_awaited_once()
+    publish.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_refresh_caches_and_publishes_to_all_servers():
+    with patch(f"{MODULE}.AsyncSessionLocal", _session_factory()), patch(
+        f"{MODULE}.analytics_service.get_live_kpis", new=AsyncMock(return_value=KPIS)
+    ), patch(f"{MODULE}.redis_client.setex", new=AsyncMock()) as setex, patch(
+        f"{MODULE}.ws_manager.publish_analytics_update", new=AsyncMock()
+    ) as publish:
+        await KpiSnapshotService().refresh()
+
+    assert setex.await_args.args[0] == SNAPSHOT_KEY
+    assert json.loads(setex.await_args.args[2]) == KPIS
+    assert publish.await_args.args[0]["payload"] == KPIS
+
+
+@pytest.mark.asyncio
+async def test_dirty_flag_is_consumed_once_without_redis():
+    service = KpiSnapshotService()
+    with patch(f"{MODULE}.redis_client._redis", None):
+        await service.mark_dirty()
+        assert await service.consume_dirty() is True
+        assert await service.consume_dirty() is False
+
+
+@pytest.mark.asyncio
+async def test_remote_analytics_update_skips_own_publications():
+    manager = ConnectionManager()
+    manager.broadcast_analytics_update = AsyncMock()
+
+    await manager._handle_remote_analytics({"type": "analytics_update", "_origin": manager.server_id})
+    manager.broadcast_analytics_update.assert_not_awaited()
+
+    await manager._handle_remote_analytics({"type": "analytics_update", "_origin": "other"})
+    manager.broadcast_analytics_update.assert_awaited_once_with({"type": "analytics_update"})
+
+
+@pytest.mark.asyncio
+async def test_refresher_skips_when_not_leader_and_clean():
+    with patch.object(kpi_snapshot, "redis_client", MagicMock(is_connected=True)), patch.object(
+        kpi_snapshot._leader, "acquire", new=AsyncMock(return_value=False)
+    ), patch.object(kpi_snapshot.kpi_snapshot_service, "refresh", new=AsyncMock()) as refresh, patch(
+        "app.tasks.kpi_snapshot.asyncio.sleep", new=AsyncMock(side_effect=asyncio.CancelledError)
+    ):
+        with pytest.raises(asyncio.CancelledError):
+            await kpi_snapshot.run_kpi_snapshot_refresher()
+    refresh.assert_not_awaited()
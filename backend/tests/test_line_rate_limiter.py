@@ -0,0 +1,126 @@
+"""Tests for the cluster-wide LINE rate limiter (local fallback)."""
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.core import line_rate_limiter as limiter_module
+from app.core.config import settings
+from app.core.line_rate_limiter import (
+    LineEndpoint,
+    LinePriority,
+    LineRateLimiter,
+    LineRateLimitTimeout,
+    retry_after_seconds,
+)
+from app.services import line_service as line_service_module
+from app.services.line_service import LineService
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class ApiError(Exception):
+    def __init__(self, status, headers=None):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.headers = headers or {}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(limiter_module.redis_client, "_redis", None)
+    monkeypatch.setattr(limiter_module.asyncio, "sleep", clock.sleep)
+    monkeypatch.setattr(settings, "LINE_RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(settings, "LINE_RATE_MULTICAST_PER_SECOND", 10)
+    monkeypatch.setattr(settings, "LINE_RATE_BULK_RESERVE", 0.2)
+    return clock
+
+
+@pytest.mark.asyncio
+async def test_callers_queue_for_tokens_until_their_deadline(clock):
+    limiter = LineRateLimiter(clock=clock)
+
+    for _ in range(10):
+        await limiter.acquire(LineEndpoint.MULTICAST)
+    assert clock.sleeps == []
+
+    await limiter.acquire(LineEndpoint.MULTICAST, deadline=1)
+    assert clock.sleeps == [pytest.approx(0.1)]
+
+    with pytest.raises(LineRateLimitTimeout):
+        await limiter.acquire(LineEndpoint.MULTICAST, deadline=0.05)
+    assert limiter.stats()["multicast"] == {"immediate": 10, "waited": 1, "timeouts": 1}
+
+
+@pytest.mark.asyncio
+async def test_bulk_traffic_leaves_the_reserve_to_interactive_calls(clock):
+    limiter = LineRateLimiter(clock=clock)
+
+    for _ in range(8):
+        await limiter.acquire(LineEndpoint.MULTICAST, LinePriority.BULK, deadline=0)
+    with pytest.raises(LineRateLimitTimeout):
+        await limiter.acquire(LineEndpoint.MULTICAST, LinePriority.BULK, deadline=0)
+
+    await limiter.acquire(LineEndpoint.MULTICAST, LinePriority.INTERACTIVE, deadline=0)
+    await limiter.acquire(LineEndpoint.MULTICAST, LinePriority.INTERACTIVE, deadline=0)
+    assert clock.sleeps == []
+
+
+@pytest.mark.asyncio
+async def test_429_pauses_the_endpoint_and_retries_after_retry_after(clock):
+    limiter = LineRateLimiter(clock=clock)
+    call = AsyncMock(side_effect=[ApiError(429, {"Retry-After": "3"}), "sent"])
+
+    assert await limiter.call(LineEndpoint.MULTICAST, call, deadline=10) == "sent"
+
+    assert call.await_count == 2
+    assert clock.sleeps == [pytest.approx(3)]
+    assert limiter.stats()["multicast"]["rate_limited"] == 1
+
+
+@pytest.mark.asyncio
+async def test_429_propagates_when_retry_after_exceeds_the_deadline(clock):
+    limiter = LineRateLimiter(clock=clock)
+    call = AsyncMock(side_effect=ApiError(429, {"Retry-After": "30"}))
+
+    with pytest.raises(ApiError):
+        await limiter.call(LineEndpoint.MULTICAST, call, deadline=5)
+    # Other callers wait out the pause instead of hitting LINE again.
+    with pytest.raises(LineRateLimitTimeout):
+        await limiter.acquire(LineEndpoint.MULTICAST, deadline=5)
+    assert call.await_count == 1
+
+
+def test_retry_after_parsing(monkeypatch):
+    monkeypatch.setattr(settings, "LINE_RATE_DEFAULT_RETRY_AFTER_SECONDS", 1)
+    assert retry_after_seconds(ApiError(429, {"Retry-After": "2.5"})) == 2.5
+    assert retry_after_seconds(ApiError(429)) == 1
+    assert retry_after_seconds(ApiError(500, {"Retry-After": "2"})) is None
+    assert retry_after_seconds(RuntimeError("boom")) is None
+
+
+@pytest.mark.asyncio
+async def test_throttling_does_not_trip_the_line_circuit(clock, monkeypatch):
+    monkeypatch.setattr(settings, "LINE_RATE_INTERACTIVE_DEADLINE_SECONDS", 0)
+    monkeypatch.setattr(line_service_module, "line_rate_limiter", LineRateLimiter(clock=clock))
+    service = LineService()
+    service._breakers[LineEndpoint.REPLY].failure_threshold = 1
+    service._api = AsyncMock()
+    service._api.reply_message = AsyncMock(side_effect=ApiError(429, {"Retry-After": "1"}))
+
+    with pytest.raises(ApiError):
+        await service.reply_text("token", "hello")
+
+    assert service.resilience_stats()["circuits"]["reply"]["failures"] == 0
+    assert service.resilience_stats()["circuits"]["reply"]["state"] == "closed"
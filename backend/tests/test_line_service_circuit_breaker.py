@@ -1,18 +1,40 @@
 """Tests for LINE API circuit breaker behavior."""
-from datetime import datetime, timedelta, timezone
+import asyncio
 from unittest.mock import AsyncMock
 
 import pytest
+from linebot.v3.messaging import TextMessage
 
+from app.core import resilience as resilience_module
+from app.core.config import settings
+from app.core.line_rate_limiter import LineEndpoint
+from app.core.resilience import BulkheadFullError, CircuitOpenError
 from app.services.line_service import LineService
 
 
-@pytest.mark.asyncio
-async def test_circuit_opens_after_failure_threshold_and_fast_fails():
+class ApiError(Exception):
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+
+@pytest.fixture(autouse=True)
+def local_state(monkeypatch):
+    monkeypatch.setattr(resilience_module.redis_client, "_redis", None)
+    monkeypatch.setattr(settings, "LINE_RETRY_BASE_DELAY_SECONDS", 0)
+
+
+def _service(threshold: int = 2) -> LineService:
     service = LineService()
-    service._cb_failure_threshold = 2
-    service._cb_recovery_timeout_seconds = 60
+    for breaker in service._breakers.values():
+        breaker.failure_threshold = threshold
     service._api = AsyncMock()
+    return service
+
+
+@pytest.mark.asyncio
+async def test_circuit_opens_after_failure_threshold_and_fast_fails():
+    service = _service()
     service._api.reply_message = AsyncMock(side_effect=RuntimeError("line down"))
 
     with pytest.raises(RuntimeError):
@@ -21,28 +43,123 @@ async def test_circuit_opens_after_failure_threshold_and_fast_fails():
         await service.reply_text("token", "hello")
 
     # Third call should fast-fail without invoking API again.
-    with pytest.raises(RuntimeError, match="circuit is open"):
+    with pytest.raises(CircuitOpenError, match="circuit is open"):
         await service.reply_text("token", "hello")
 
     assert service._api.reply_message.await_count == 2
-    assert service._cb_open_until is not None
+    circuit = service.resilience_stats()["circuits"]["reply"]
+    assert (circuit["state"], circuit["trips"], circuit["rejected"]) == ("open", 1, 1)
 
 
 @pytest.mark.asyncio
-async def test_circuit_recovers_after_timeout_and_success():
-    service = LineService()
-    service._cb_failure_threshold = 1
-    service._cb_recovery_timeout_seconds = 1
-    service._api = AsyncMock()
+async def test_circuit_recovers_through_a_half_open_probe():
+    service = _service(threshold=1)
     service._api.reply_message = AsyncMock(side_effect=RuntimeError("line down"))
 
     with pytest.raises(RuntimeError):
         await service.reply_text("token", "hello")
 
-    service._cb_open_until = datetime.now(timezone.utc) - timedelta(seconds=1)
+    service._breakers[LineEndpoint.REPLY]._open_until -= settings.LINE_CIRCUIT_RECOVERY_SECONDS
     service._api.reply_message = AsyncMock(return_value=None)
     await service.reply_text("token", "hello")
 
-    assert service._cb_open_until is None
-    assert service._cb_failures == 0
+    assert service.resilience_stats()["circuits"]["reply"]["state"] == "closed"
+
+
+@pytest.mark.asyncio
+async def test_failing_operation_class_does_not_open_other_circuits():
+    service = _service()
+    service._api.show_loading_animation = AsyncMock(side_effect=RuntimeError("line down"))
+
+    for _ in range(3):
+        await service.show_loading_animation("U1")
+    await service.reply_text("token", "hello")
+
+    circuits = service.resilience_stats()["circuits"]
+    assert circuits["loading"]["state"] == "open"
+    assert circuits["reply"]["state"] == "closed"
+    assert service._api.show_loading_animation.await_count == 2
+    service._api.reply_message.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_client_errors_do_not_count_toward_the_circuit():
+    service = _service(threshold=1)
+    service._api.reply_message = AsyncMock(side_effect=ApiError(400))
+
+    for _ in range(2):
+        with pytest.raises(ApiError):
+            await service.reply_text("expired-token", "hello")
+
+    assert service._api.reply_message.await_count == 2
+    assert service.resilience_stats()["circuits"]["reply"]["state"] == "closed"
+
+
+@pytest.mark.asyncio
+async def test_transient_failures_are_retried_for_idempotent_calls_only():
+    service = _service(threshold=10)
+    service._api.reply_message = AsyncMock(side_effect=[ApiError(503), None])
+    service._api.push_message = AsyncMock(side_effect=ApiError(503))
+
+    await service.reply_text("token", "hello")
+    with pytest.raises(ApiError):
+        await service.push_messages("U1", [TextMessage(text="hi")])
+
+    assert service._api.reply_message.await_count == 2
+    assert service._api.push_message.await_count == 1
+    assert service.resilience_stats()["retry_budget"]["retries"] == 1
+
+
+@pytest.mark.asyncio
+async def test_retries_stop_when_the_retry_budget_is_spent():
+    service = _service(threshold=10)
+    service._retry_budget._tokens = 0
+    service._retry_budget.min_per_second = 0
+    service._api.reply_message = AsyncMock(side_effect=ApiError(503))
+
+    with pytest.raises(ApiError):
+        await service.reply_text("token", "hello")
+
+    assert service._api.reply_message.await_count == 1
+    assert service.resilience_stats()["retry_budget"]["exhausted"] == 1
+
+
+@pytest.mark.asyncio
+async def test_blob_downloads_cannot_take_reply_slots(monkeypatch):
+    monkeypatch.setattr(settings, "LINE_BULKHEAD_CONTENT", 1)
+    monkeypatch.setattr(settings, "LINE_BULKHEAD_WAIT_SECONDS", 0.01)
+    service = _service()
+    release = asyncio.Event()
+
+    async def slow_download(message_id):
+        await release.wait()
+
+    service._blob_api = AsyncMock()
+    service._blob_api.get_message_content_with_http_info = slow_download
+
+    download = asyncio.create_task(service.download_message_content("m1"))
+    await asyncio.sleep(0)
+    # The content bulkhead is full: a second download is turned away...
+    assert await service.download_message_content("m2") == (b"", None)
+    # ...while replies still get a slot.
+    await service.reply_text("token", "hello")
+    release.set()
+    await download
+
+    bulkheads = service.resilience_stats()["bulkheads"]
+    assert bulkheads["LINE content"]["rejected"] == 1
+    assert bulkheads["LINE messaging"]["rejected"] == 0
+    assert service.resilience_stats()["circuits"]["content"]["failures"] == 0
+
+
+@pytest.mark.asyncio
+async def test_full_bulkhead_raises_without_touching_the_circuit():
+    service = _service(threshold=1)
+    service._bulkheads[LineEndpoint.REPLY].max_wait_seconds = 0.01
+    service._bulkheads[LineEndpoint.REPLY]._semaphore = asyncio.Semaphore(0)
+
+    with pytest.raises(BulkheadFullError):
+        await service.reply_text("token", "hello")
 
+    service._api.reply_message.assert_not_awaited()
+    assert service.resilience_stats()["circuits"]["reply"]["state"] == "closed"
@@ -53,9 +53,9 @@ async def test_send_media_image_success(service):
             "file_name": "img.jpg",
         }),
     ) as mock_persist, patch(
-        "app.services.live_chat_service.line_service.push_image_message",
+        "app.services.live_chat_service.message_outbox_service.enqueue",
         new=AsyncMock(),
-    ) as mock_push_image, patch(
+    ) as mock_enqueue, patch(
         "app.services.live_chat_service.line_service.save_message",
         new=AsyncMock(return_value=saved_message),
     ) as mock_save, patch.object(
@@ -66,7 +66,7 @@ async def test_send_media_image_success(service):
         result = await service.send_media_message(
             line_user_id="U123",
             operator_id=1,
-            file_bytes=b"image-bytes",
+            content=b"image-bytes",
             file_name="photo.jpg",
             content_type="image/jpeg",
             db=mock_db,
@@ -75,8 +75,12 @@ async def test_send_media_image_success(service):
     assert result["success"] is True
     assert result["message"]["message_type"] == "image"
     mock_persist.assert_awaited_once()
-    mock_push_image.assert_awaited_once()
+    assert mock_persist.await_args.args == (mock_db,)
     mock_save.assert_awaited_once()
+    mock_enqueue.assert_awaited_once()
+    queued = mock_enqueue.await_args.args[2]
+    assert queued[0].type == "image"
+    assert queued[0].original_content_url == "https://example.com/uploads/operator_media/img.jpg"
 
 
 @pytest.mark.asyncio
@@ -110,9 +114,9 @@ async def test_send_media_file_sends_text_with_url(service):
             "file_name": "invoice_saved.pdf",
         }),
     ), patch(
-        "app.services.live_chat_service.line_service.push_messages",
+        "app.services.live_chat_service.message_outbox_service.enqueue",
         new=AsyncMock(),
-    ) as mock_push_messages, patch(
+    ) as mock_enqueue, patch(
         "app.services.live_chat_service.line_service.save_message",
         new=AsyncMock(return_value=saved_message),
     ), patch.object(
@@ -123,7 +127,7 @@ async def test_send_media_file_sends_text_with_url(service):
         result = await service.send_media_message(
             line_user_id="U123",
             operator_id=2,
-            file_bytes=b"%PDF...",
+            content=b"%PDF...",
             file_name="invoice.pdf",
             content_type="application/pdf",
             db=mock_db,
@@ -131,7 +135,9 @@ async def test_send_media_file_sends_text_with_url(service):
 
     assert result["success"] is True
     assert result["message"]["message_type"] == "file"
-    mock_push_messages.assert_awaited_once()
+    mock_enqueue.assert_awaited_once()
+    queued = mock_enqueue.await_args.args[2]
+    assert queued[0].text.startswith("Attachment: invoice.pdf")
 
 
 @pytest.mark.asyncio
@@ -159,7 +165,7 @@ async def test_send_media_image_requires_public_url(service):
             await service.send_media_message(
                 line_user_id="U123",
                 operator_id=3,
-                file_bytes=b"abc",
+                content=b"abc",
                 file_name="local.jpg",
                 content_type="image/jpeg",
                 db=mock_db,
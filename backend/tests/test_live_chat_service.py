@@ -6,7 +6,7 @@ Unit tests for live_chat_service.py:
 """
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from fastapi import HTTPException
 
 from app.services.live_chat_service import LiveChatService
@@ -47,6 +47,23 @@ class TestClaimSession:
 
             assert result == mock_session
             mock_db.execute.assert_called_once()
+            claim_sql = str(mock_db.execute.call_args.args[0])
+            assert "queue_wait_seconds" in claim_sql
+
+    @pytest.mark.asyncio
+    async def test_new_session_flags_recently_closed_sessions_reopened(self, live_chat_service):
+        """Starting a session marks the user's sessions closed in the prior 24h as reopened"""
+        mock_db = AsyncMock()
+        started_at = datetime.now(timezone.utc)
+
+        await live_chat_service.mark_reopened_sessions("Utest", started_at, mock_db)
+
+        statement = mock_db.execute.await_args.args[0]
+        compiled = statement.compile()
+        assert str(statement).startswith("UPDATE chat_sessions")
+        assert compiled.params["reopened_within_24h"] is True
+        assert compiled.params["line_user_id_1"] == "Utest"
+        assert compiled.params["closed_at_1"] == started_at - timedelta(hours=24)
 
     @pytest.mark.asyncio
     async def test_claim_nonexistent_session(self, live_chat_service):
@@ -217,7 +234,7 @@ class TestSendMessageOwnership:
         mock_db = AsyncMock()
 
         with patch.object(live_chat_service, 'get_active_session', new_callable=AsyncMock) as mock_get, \
-             patch('app.services.live_chat_service.line_service.push_messages', new_callable=AsyncMock) as mock_push, \
+             patch('app.services.live_chat_service.message_outbox_service.enqueue', new_callable=AsyncMock) as mock_push, \
              patch('app.services.live_chat_service.line_service.save_message', new_callable=AsyncMock) as mock_save:
             mock_get.return_value = mock_session
             with pytest.raises(HTTPException) as exc:
@@ -16,6 +16,18 @@ def test_startup_fails_without_encryption_key_in_production():
         mp.setattr("app.main.ws_manager.initialize", AsyncMock())
         mp.setattr("app.main.start_cleanup_task", AsyncMock())
         mp.setattr("app.main.stop_cleanup_task", AsyncMock())
+        mp.setattr("app.main.start_outbox_task", AsyncMock())
+        mp.setattr("app.main.stop_outbox_task", AsyncMock())
+        mp.setattr("app.main.start_broadcast_dispatcher_task", AsyncMock())
+        mp.setattr("app.main.stop_broadcast_dispatcher_task", AsyncMock())
+        mp.setattr("app.main.start_broadcast_scheduler_task", AsyncMock())
+        mp.setattr("app.main.start_analytics_rollup_task", AsyncMock())
+        mp.setattr("app.main.stop_analytics_rollup_task", AsyncMock())
+        mp.setattr("app.main.start_chat_analytics_task", AsyncMock())
+        mp.setattr("app.main.stop_chat_analytics_task", AsyncMock())
+        mp.setattr("app.main.start_kpi_snapshot_task", AsyncMock())
+        mp.setattr("app.main.stop_kpi_snapshot_task", AsyncMock())
+        mp.setattr("app.main.stop_broadcast_scheduler_task", AsyncMock())
         mp.setattr("app.main.pubsub_manager.disconnect", AsyncMock())
         mp.setattr("app.main.redis_client.disconnect", AsyncMock())
 
@@ -0,0 +1,145 @@
+"""Tests for set-based bulk media operations and bulk media jobs."""
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+
+from app.api.v1.endpoints import media
+from app.core.config import settings
+from app.services import media_bulk_service as bulk_module
+from app.services.media_bulk_service import MediaBulkService, MediaJobStatus
+from app.services.media_catalog import MediaCatalog
+
+SHA_A = "aa" * 32
+SHA_B = "bb" * 32
+
+
+def _sql(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+def _result(rows):
+    result = MagicMock()
+    result.all.return_value = rows
+    return result
+
+
+def _session(db):
+    session = MagicMock()
+    session.return_value.__aenter__ = AsyncMock(return_value=db)
+    session.return_value.__aexit__ = AsyncMock(return_value=False)
+    return session
+
+
+@pytest.fixture(autouse=True)
+def local_jobs(monkeypatch):
+    monkeypatch.setattr(bulk_module.redis_client, "_redis", None)
+
+
+@pytest.mark.asyncio
+async def test_delete_is_one_statement_and_releases_references_in_bulk():
+    rows = [
+        SimpleNamespace(content_sha256=SHA_A, thumbnails=None),
+        SimpleNamespace(content_sha256=SHA_A, thumbnails=None),
+        SimpleNamespace(content_sha256=SHA_B, thumbnails=None),
+        SimpleNamespace(content_sha256=None, thumbnails=None),
+    ]
+    db = AsyncMock()
+    db.execute.side_effect = [_result(rows), None]
+
+    assert await MediaBulkService().delete(db, [uuid4() for _ in rows]) == 4
+
+    delete_sql = _sql(db.execute.await_args_list[0].args[0])
+    assert "WHERE media_files.id = ANY (%(ids)s::UUID[])" in delete_sql
+    assert "RETURNING media_files.content_sha256, media_files.thumbnails" in delete_sql
+    release = db.execute.await_args_list[1].args[0].compile(dialect=postgresql.dialect())
+    assert "FROM (VALUES" in str(release)
+    assert [value for key, value in release.params.items() if key.startswith("param_")] == [SHA_A, 2, SHA_B, 1]
+    db.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_release_many_skips_empty_counts():
+    db = AsyncMock()
+    await MediaCatalog().release_many(db, {None: 2, SHA_A: 0})
+    db.execute.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_publish_keeps_existing_tokens():
+    db = AsyncMock()
+    db.execute.return_value = _result([(uuid4(),), (uuid4(),)])
+
+    assert await MediaBulkService().publish(db, [uuid4(), uuid4(), uuid4()]) == 2
+
+    sql = _sql(db.execute.await_args.args[0])
+    assert "public_token=coalesce(media_files.public_token, CAST(gen_random_uuid() AS VARCHAR))" in sql
+    assert "WHERE media_files.id = ANY (%(ids)s::UUID[])" in sql
+    db.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_thumbnail_cleanup_keeps_keys_still_in_use(monkeypatch):
+    storage = MagicMock(delete=AsyncMock())
+    monkeypatch.setattr(bulk_module, "media_storage", storage)
+    db = AsyncMock()
+    db.scalars.side_effect = [["k-preview"], [{"160": {"key": "k-shared", "size": 1}}]]
+    monkeypatch.setattr(bulk_module, "AsyncSessionLocal", _session(db))
+    rows = [SimpleNamespace(content_sha256=SHA_A, thumbnails={
+        "160": {"key": "k-shared", "size": 1},
+        "480": {"key": "k-preview", "size": 2},
+        "960": {"key": "k-own", "size": 3},
+    })]
+
+    await MediaBulkService()._delete_thumbnails(rows)
+
+    storage.delete.assert_awaited_once_with("k-own")
+
+
+@pytest.mark.asyncio
+async def test_large_bulk_delete_runs_as_job_with_progress(monkeypatch):
+    monkeypatch.setattr(settings, "MEDIA_BULK_INLINE_LIMIT", 2)
+    monkeypatch.setattr(settings, "MEDIA_BULK_BATCH_SIZE", 2)
+    service = MediaBulkService()
+    service.delete = AsyncMock(side_effect=lambda db, batch: len(batch))
+    monkeypatch.setattr(media, "media_bulk_service", service)
+    monkeypatch.setattr(bulk_module, "AsyncSessionLocal", _session(AsyncMock()))
+    ids = [str(uuid4()) for _ in range(5)] + ["not-a-uuid"]
+
+    response = await media.bulk_delete_media({"ids": ids}, db=AsyncMock(), _admin=SimpleNamespace(id=1))
+
+    assert response.status_code == 202
+    job = json.loads(response.body)
+    assert (job["operation"], job["total"]) == ("delete", 5)
+    await asyncio.gather(*service._tasks)
+    finished = await media.get_media_job(job["id"], _admin=None)
+    assert finished["status"] == MediaJobStatus.COMPLETED.value
+    assert (finished["processed"], finished["affected"]) == (5, 5)
+    assert [len(call.args[1]) for call in service.delete.await_args_list] == [2, 2, 1]
+
+
+@pytest.mark.asyncio
+async def test_small_bulk_public_runs_inline(monkeypatch):
+    service = MediaBulkService()
+    service.publish = AsyncMock(return_value=1)
+    monkeypatch.setattr(media, "media_bulk_service", service)
+    media_id = uuid4()
+
+    response = await media.bulk_create_public_links(
+        {"ids": [str(media_id), str(media_id)]}, db=AsyncMock(), _admin=SimpleNamespace(id=1)
+    )
+
+    assert response == {"ok": True, "updated": 1}
+    assert service.publish.await_args.args[1] == [media_id]
+
+
+@pytest.mark.asyncio
+async def test_unknown_media_job_is_404():
+    with pytest.raises(HTTPException) as exc:
+        await media.get_media_job("missing", _admin=None)
+    assert exc.value.status_code == 404
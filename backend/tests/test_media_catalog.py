@@ -0,0 +1,92 @@
+"""Tests for the sha256 media catalog shared by admin, LINE and operator media."""
+import hashlib
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.services import line_service as line_service_module
+from app.services import media_catalog as catalog_module
+from app.services.media_catalog import MediaCatalog
+from app.services.media_storage import content_key
+
+DATA = b"%PDF-1.7 application form"
+DIGEST = hashlib.sha256(DATA).hexdigest()
+
+
+def _db(existing=None):
+    db = AsyncMock()
+    db.scalar.return_value = existing
+    db.execute.return_value.scalar_one = MagicMock(
+        return_value=SimpleNamespace(sha256=DIGEST, storage_key=content_key(DIGEST), ref_count=2)
+    )
+    return db
+
+
+def _sql(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+@pytest.mark.asyncio
+async def test_known_content_is_referenced_without_writing(monkeypatch):
+    storage = MagicMock(put=AsyncMock())
+    monkeypatch.setattr(catalog_module, "media_storage", storage)
+    db = _db(existing=SimpleNamespace(sha256=DIGEST, storage_key=content_key(DIGEST)))
+
+    entry, created = await MediaCatalog().add_bytes(db, DATA, "application/pdf")
+
+    assert created is False
+    assert entry.sha256 == DIGEST
+    storage.put.assert_not_awaited()
+    upsert = _sql(db.execute.await_args.args[0])
+    assert "ON CONFLICT (sha256) DO UPDATE SET ref_count = (media_blobs.ref_count +" in upsert
+
+
+@pytest.mark.asyncio
+async def test_new_content_is_written_once_and_cataloged(monkeypatch):
+    storage = MagicMock(put=AsyncMock(return_value=SimpleNamespace(key=content_key(DIGEST))))
+    monkeypatch.setattr(catalog_module, "media_storage", storage)
+    db = _db()
+
+    _, created = await MediaCatalog().add_bytes(db, DATA, "application/pdf")
+
+    assert created is True
+    storage.put.assert_awaited_once_with(DATA)
+    assert db.execute.await_args.args[0].compile(dialect=postgresql.dialect()).params["storage_key"] == content_key(DIGEST)
+
+
+@pytest.mark.asyncio
+async def test_release_never_goes_below_zero():
+    db = AsyncMock()
+
+    await MediaCatalog().release(db, DIGEST)
+    await MediaCatalog().release(db, None)
+
+    db.execute.assert_awaited_once()
+    assert "greatest(media_blobs.ref_count -" in _sql(db.execute.await_args.args[0])
+
+
+def test_public_url_is_content_addressed(monkeypatch):
+    monkeypatch.setattr(catalog_module.settings, "SERVER_BASE_URL", "https://city.example/")
+
+    url = MediaCatalog.public_url(DIGEST, "แบบฟอร์ม 1.pdf")
+
+    assert url.startswith(f"https://city.example/api/v1/public/blobs/{DIGEST}/")
+    assert " " not in url
+
+
+@pytest.mark.asyncio
+async def test_operator_upload_reference_stays_in_the_callers_transaction(monkeypatch):
+    catalog = MagicMock(add_bytes=AsyncMock(return_value=(SimpleNamespace(sha256=DIGEST, size_bytes=len(DATA)), True)))
+    monkeypatch.setattr(line_service_module, "media_catalog", catalog)
+    db = AsyncMock()
+
+    media = await line_service_module.LineService().persist_operator_upload(
+        db, DATA, "file", file_name="form.pdf", content_type="application/pdf"
+    )
+
+    assert media["sha256"] == DIGEST
+    assert catalog.add_bytes.await_args.args[0] is db
+    # Committed (or rolled back) with the message that references it.
+    db.commit.assert_not_awaited()
@@ -0,0 +1,119 @@
+"""Tests for streamed, range-aware and conditional media responses."""
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import pytest
+from starlette.requests import Request
+
+from app.services import media_delivery as delivery_module
+from app.services.media_delivery import MediaDelivery, RangeNotSatisfiable, parse_range
+from app.services.media_storage import LocalMediaStorage
+
+DATA = b"0123456789" * 100_000  # 1 MB
+
+
+def _request(**headers) -> Request:
+    raw = [(name.replace("_", "-").lower().encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw, "query_string": b""})
+
+
+async def _body(response) -> bytes:
+    if hasattr(response, "body_iterator"):
+        return b"".join([chunk async for chunk in response.body_iterator])
+    return response.body
+
+
+@pytest.fixture
+def stored_media(tmp_path, monkeypatch):
+    storage = LocalMediaStorage(tmp_path)
+    monkeypatch.setattr(delivery_module, "media_storage", storage)
+    blob = asyncio.run(storage.put(DATA))
+    return SimpleNamespace(
+        id=uuid4(),
+        filename="clip.mp4",
+        mime_type="video/mp4",
+        storage_key=blob.key,
+        content_sha256=blob.sha256,
+        size_bytes=blob.size,
+        created_at=datetime(2026, 5, 1, 12, 0, tzinfo=timezone.utc),
+    )
+
+
+def test_parse_range_forms():
+    assert parse_range(None, 100) is None
+    assert parse_range("bytes=0-9", 100) == (0, 9)
+    assert parse_range("bytes=90-", 100) == (90, 99)
+    assert parse_range("bytes=-10", 100) == (90, 99)
+    assert parse_range("bytes=50-500", 100) == (50, 99)
+    assert parse_range("bytes=0-1,5-6", 100) is None
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range("bytes=100-", 100)
+
+
+@pytest.mark.asyncio
+async def test_full_response_streams_with_validators(stored_media):
+    response = await MediaDelivery().respond(_request(), stored_media, AsyncMock())
+
+    assert response.status_code == 200
+    assert response.headers["etag"] == f'"{stored_media.content_sha256}"'
+    assert response.headers["content-length"] == str(len(DATA))
+    assert response.headers["accept-ranges"] == "bytes"
+    assert "immutable" in response.headers["cache-control"]
+    assert response.headers["last-modified"] == "Fri, 01 May 2026 12:00:00 GMT"
+    assert await _body(response) == DATA
+
+
+@pytest.mark.asyncio
+async def test_matching_etag_or_date_returns_304(stored_media):
+    etag = f'"{stored_media.content_sha256}"'
+    delivery = MediaDelivery()
+
+    by_etag = await delivery.respond(_request(if_none_match=f'"other", W/{etag}'), stored_media, AsyncMock())
+    by_date = await delivery.respond(
+        _request(if_modified_since="Sat, 02 May 2026 00:00:00 GMT"), stored_media, AsyncMock()
+    )
+
+    assert by_etag.status_code == by_date.status_code == 304
+    assert by_etag.headers["etag"] == etag
+    assert by_etag.body == b""
+
+
+@pytest.mark.asyncio
+async def test_range_request_returns_partial_content(stored_media):
+    response = await MediaDelivery().respond(_request(range="bytes=300000-300099"), stored_media, AsyncMock())
+
+    assert response.status_code == 206
+    assert response.headers["content-range"] == f"bytes 300000-300099/{len(DATA)}"
+    assert response.headers["content-length"] == "100"
+    assert await _body(response) == DATA[300000:300100]
+
+
+@pytest.mark.asyncio
+async def test_stale_if_range_and_bad_range(stored_media):
+    delivery = MediaDelivery()
+
+    stale = await delivery.respond(_request(range="bytes=0-9", if_range='"old"'), stored_media, AsyncMock())
+    assert stale.status_code == 200
+
+    unsatisfiable = await delivery.respond(_request(range=f"bytes={len(DATA)}-"), stored_media, AsyncMock())
+    assert unsatisfiable.status_code == 416
+    assert unsatisfiable.headers["content-range"] == f"bytes */{len(DATA)}"
+
+
+@pytest.mark.asyncio
+async def test_legacy_inline_rows_are_served_from_the_column():
+    media = SimpleNamespace(
+        id=uuid4(), filename="a.txt", mime_type="text/plain", storage_key=None,
+        content_sha256=None, size_bytes=5, created_at=None,
+    )
+    db = AsyncMock()
+    db.scalar.return_value = b"hello"
+
+    response = await MediaDelivery().respond(_request(range="bytes=1-3"), media, db, disposition="attachment")
+
+    assert response.status_code == 206
+    assert response.body == b"ell"
+    assert response.headers["content-disposition"] == 'attachment; filename="a.txt"'
@@ -1,3 +1,4 @@
+import hashlib
 from datetime import datetime, timezone
 from io import BytesIO
 from types import SimpleNamespace
@@ -6,11 +7,21 @@ from uuid import uuid4
 
 import pytest
 from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
 from starlette.datastructures import Headers, UploadFile
 
 from app.api.v1.endpoints import media
+from app.services import media_catalog as catalog_module
 from app.models.media_file import FileCategory
 from app.models.user import UserRole
+from app.services.media_storage import LocalMediaStorage, content_key
+
+
+@pytest.fixture(autouse=True)
+def media_store(tmp_path, monkeypatch):
+    storage = LocalMediaStorage(tmp_path)
+    monkeypatch.setattr(catalog_module, "media_storage", storage)
+    return storage
 
 
 def _admin_user():
@@ -18,9 +29,14 @@ def _admin_user():
 
 
 @pytest.mark.asyncio
-async def test_upload_media_returns_created_payload():
+async def test_upload_media_returns_created_payload(media_store):
+    digest = hashlib.sha256(b"hello world").hexdigest()
     db = AsyncMock()
     db.add = MagicMock()
+    db.scalar.return_value = None  # neither a library row nor a catalog entry has this content
+    db.execute.return_value.scalar_one = MagicMock(
+        return_value=SimpleNamespace(sha256=digest, storage_key=content_key(digest), size_bytes=11)
+    )
 
     async def _refresh(obj):
         obj.id = uuid4()
@@ -43,9 +59,33 @@ async def test_upload_media_returns_created_payload():
     assert response["filename"] == "manual.pdf"
     assert response["id"] is not None
     db.add.assert_called_once()
+    stored = db.add.call_args.args[0]
+    assert stored.data is None
+    assert await media_store.read(stored.storage_key) == b"hello world"
     db.commit.assert_awaited_once()
 
 
+@pytest.mark.asyncio
+async def test_reupload_returns_existing_media_without_storing(media_store):
+    existing = SimpleNamespace(
+        id=uuid4(), filename="form.pdf", mime_type="application/pdf", size_bytes=4,
+        category=FileCategory.DOCUMENT, is_public=False, public_token=None,
+        thumbnail_url=None, thumbnails=None, created_at=None,
+    )
+    db = AsyncMock()
+    db.add = MagicMock()
+    db.scalar.return_value = existing
+
+    file = UploadFile(BytesIO(b"form"), filename="copy.pdf", headers=Headers({"content-type": "application/pdf"}))
+    response = await media.upload_media(file=file, db=db, _admin=_admin_user())
+
+    assert response["id"] == str(existing.id)
+    assert response["filename"] == "form.pdf"
+    db.add.assert_not_called()
+    db.commit.assert_not_awaited()
+    assert not any(media_store.root.rglob("*"))
+
+
 @pytest.mark.asyncio
 async def test_list_media_returns_paginated_dict():
     media_file = SimpleNamespace(
@@ -57,6 +97,7 @@ async def test_list_media_returns_paginated_dict():
         is_public=False,
         public_token=None,
         thumbnail_url=None,
+        thumbnails=None,
         created_at=datetime(2026, 3, 15, 10, 0, tzinfo=timezone.utc),
     )
 
@@ -85,19 +126,20 @@ async def test_list_media_returns_paginated_dict():
 
 @pytest.mark.asyncio
 async def test_delete_media_removes_existing_row():
-    media_file = SimpleNamespace(id=uuid4(), filename="manual.pdf")
+    sha256 = "ab" * 32
 
     db = AsyncMock()
     result = MagicMock()
-    result.scalar_one_or_none.return_value = media_file
+    result.all.return_value = [SimpleNamespace(content_sha256=sha256, thumbnails=None)]
     db.execute.return_value = result
 
     response = await media.delete_media(
-        media_id=media_file.id, db=db, _admin=_admin_user(),
+        media_id=uuid4(), db=db, _admin=_admin_user(),
     )
 
     assert response == {"ok": True}
-    db.delete.assert_awaited_once_with(media_file)
+    assert str(db.execute.await_args_list[0].args[0]).startswith("DELETE FROM media_files")
+    assert "UPDATE media_blobs SET ref_count" in str(db.execute.await_args_list[-1].args[0])
     db.commit.assert_awaited_once()
 
 
@@ -105,7 +147,7 @@ async def test_delete_media_removes_existing_row():
 async def test_delete_media_raises_404_when_missing():
     db = AsyncMock()
     result = MagicMock()
-    result.scalar_one_or_none.return_value = None
+    result.all.return_value = []
     db.execute.return_value = result
 
     with pytest.raises(HTTPException) as exc:
@@ -127,6 +169,7 @@ async def test_create_public_link_generates_token():
         size_bytes=100, category=FileCategory.DOCUMENT,
         is_public=False, public_token=None,
         thumbnail_url=None,
+        thumbnails=None,
         created_at=datetime.now(timezone.utc),
     )
     db = AsyncMock()
@@ -155,6 +198,7 @@ async def test_create_public_link_preserves_existing_token():
         size_bytes=100, category=FileCategory.DOCUMENT,
         is_public=False, public_token=existing_token,
         thumbnail_url=None,
+        thumbnails=None,
         created_at=datetime.now(timezone.utc),
     )
     db = AsyncMock()
@@ -179,6 +223,7 @@ async def test_revoke_public_link_clears_token():
         size_bytes=100, category=FileCategory.DOCUMENT,
         is_public=True, public_token="some-token",
         thumbnail_url=None,
+        thumbnails=None,
         created_at=datetime.now(timezone.utc),
     )
     db = AsyncMock()
@@ -194,3 +239,23 @@ async def test_revoke_public_link_clears_token():
     assert media_file.is_public is False
     assert media_file.public_token is None
     db.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_revoked_library_file_is_not_served_by_content_hash(monkeypatch):
+    """A library file's digest (its ETag) must not outlive revoking its public link."""
+    digest = "ab" * 32
+    db = AsyncMock()
+    db.scalar.return_value = None  # Cataloged, but no message references it
+    session = MagicMock()
+    session.return_value.__aenter__ = AsyncMock(return_value=db)
+    session.return_value.__aexit__ = AsyncMock(return_value=False)
+    monkeypatch.setattr(media, "AsyncSessionLocal", session)
+
+    with pytest.raises(HTTPException) as exc:
+        await media.get_public_blob(request=MagicMock(), sha256=digest, filename="doc.pdf")
+
+    assert exc.value.status_code == 404
+    sql = str(db.scalar.await_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "EXISTS (SELECT * \nFROM messages" in sql
+    assert "(messages.payload ->> %(payload_1)s::TEXT) = %(param_1)s::VARCHAR" in sql
@@ -0,0 +1,238 @@
+"""Tests for media retention, legacy upload migration and garbage collection."""
+import os
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.models.message import MessageDirection
+from app.services import media_lifecycle_service as lifecycle_module
+from app.services.media_lifecycle_service import LifecycleReport, MediaLifecycleService, _legacy_file
+
+SHA = "ab" * 32
+
+
+@pytest.fixture
+def uploads(tmp_path, monkeypatch):
+    monkeypatch.setattr(lifecycle_module, "UPLOADS_ROOT", tmp_path)
+    for folder in lifecycle_module.LEGACY_DIRS:
+        (tmp_path / folder).mkdir()
+    return tmp_path
+
+
+def _old(path, days=30):
+    stamp = time.time() - days * 86400
+    os.utime(path, (stamp, stamp))
+    return path
+
+
+def _rows(*rows):
+    result = MagicMock()
+    result.all.return_value = list(rows)
+    result.__iter__.return_value = iter(rows)
+    return result
+
+
+def test_legacy_file_recognises_only_flat_upload_urls(uploads):
+    assert _legacy_file("https://x.example/uploads/line_media/image_1.jpg") == uploads / "line_media" / "image_1.jpg"
+    assert _legacy_file("/uploads/operator_media/a_form.pdf") == uploads / "operator_media" / "a_form.pdf"
+    assert _legacy_file(f"https://x.example/api/v1/public/blobs/{SHA}/form.pdf") is None
+    assert _legacy_file(None) is None
+
+
+@pytest.mark.asyncio
+async def test_expire_references_releases_and_marks_messages(monkeypatch):
+    release = AsyncMock()
+    monkeypatch.setattr(lifecycle_module.media_catalog, "release", release)
+    db = AsyncMock()
+    db.execute.side_effect = [_rows(SimpleNamespace(id=7, payload={"sha256": SHA, "url": "u", "size": 3})), None]
+    report = LifecycleReport(apply=True)
+
+    await MediaLifecycleService().expire_references(db, MessageDirection.INCOMING, 90, 100, report)
+
+    assert report.expired == 1
+    release.assert_awaited_once_with(db, SHA)
+    update = db.execute.await_args_list[1].args[0]
+    assert update.compile().params["payload"] == {"url": None, "preview_url": None, "size": 3, "media_expired": True}
+    db.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_import_moves_referenced_legacy_files_into_the_catalog(uploads, monkeypatch):
+    (uploads / "operator_media" / "x_form.pdf").write_bytes(b"%PDF form")
+    add_bytes = AsyncMock(return_value=(SimpleNamespace(sha256=SHA), True))
+    monkeypatch.setattr(lifecycle_module.media_catalog, "add_bytes", add_bytes)
+    payload = {"url": "https://x.example/uploads/operator_media/x_form.pdf", "file_name": "form.pdf",
+               "content_type": "application/pdf"}
+    db = AsyncMock()
+    db.execute.side_effect = [_rows(SimpleNamespace(id=3, payload=payload)), None]
+    report = LifecycleReport(apply=True)
+
+    await MediaLifecycleService().import_legacy_files(db, 100, report)
+
+    assert report.imported == 1
+    add_bytes.assert_awaited_once_with(db, b"%PDF form", "application/pdf")
+    written = db.execute.await_args_list[1].args[0].compile().params["payload"]
+    assert written["sha256"] == SHA
+    assert written["url"].endswith(f"/public/blobs/{SHA}/form.pdf")
+    db.commit.assert_awaited_once()
+    assert not (uploads / "operator_media" / "x_form.pdf").exists()
+
+
+@pytest.mark.asyncio
+async def test_import_dry_run_changes_nothing(uploads, monkeypatch):
+    (uploads / "line_media" / "image_1.jpg").write_bytes(b"jpeg")
+    add_bytes = AsyncMock()
+    monkeypatch.setattr(lifecycle_module.media_catalog, "add_bytes", add_bytes)
+    db = AsyncMock()
+    db.execute.return_value = _rows(SimpleNamespace(id=1, payload={"url": "/uploads/line_media/image_1.jpg"}))
+    report = LifecycleReport(apply=False)
+
+    await MediaLifecycleService().import_legacy_files(db, 100, report)
+
+    assert report.imported == 1
+    add_bytes.assert_not_awaited()
+    db.commit.assert_not_awaited()
+    assert (uploads / "line_media" / "image_1.jpg").exists()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("apply", [False, True])
+async def test_orphans_are_unreferenced_files_past_the_grace_period(uploads, apply):
+    referenced = uploads / "line_media" / "kept.jpg"
+    orphan = uploads / "line_media" / "orphan.jpg"
+    recent = uploads / "operator_media" / "recent.pdf"
+    for path, content in ((referenced, b"1"), (orphan, b"22"), (recent, b"333")):
+        path.write_bytes(content)
+    _old(referenced)
+    _old(orphan)
+    db = AsyncMock()
+    db.execute.return_value = _rows(("/uploads/line_media/kept.jpg", None))
+    report = LifecycleReport(apply=apply)
+
+    await MediaLifecycleService().collect_orphan_files(db, 100, report)
+
+    assert (report.orphans, report.orphan_bytes) == (1, 2)
+    assert orphan.exists() is not apply
+    assert referenced.exists() and recent.exists()
+
+
+@pytest.mark.asyncio
+async def test_garbage_collection_deletes_unshared_blobs(monkeypatch):
+    blob = SimpleNamespace(sha256=SHA, storage_key=f"sha256/ab/ab/{SHA}", size_bytes=10, preview_sha256="cd" * 32)
+    storage = MagicMock(delete=AsyncMock())
+    release = AsyncMock()
+    monkeypatch.setattr(lifecycle_module, "media_storage", storage)
+    monkeypatch.setattr(lifecycle_module.media_catalog, "release", release)
+    db = AsyncMock()
+    db.scalars.return_value.all = MagicMock(return_value=[blob])
+    db.scalar.return_value = False  # no other row shares the storage key
+    report = LifecycleReport(apply=True)
+
+    await MediaLifecycleService().collect_garbage(db, 100, report)
+
+    assert (report.collected, report.collected_bytes) == (1, 10)
+    storage.delete.assert_awaited_once_with(blob.storage_key)
+    release.assert_awaited_once_with(db, blob.preview_sha256)
+    shared = str(db.scalar.await_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "jsonb_path_exists(media_files.thumbnails, '$.* ? (@.key == $key)'::jsonpath" in shared
+    query = db.scalars.await_args.args[0]
+    assert "FOR UPDATE SKIP LOCKED" in str(query.compile(dialect=postgresql.dialect()))
+    db.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_reconciliation_recounts_references_and_walks_the_catalog():
+    db = AsyncMock()
+    db.scalars.return_value = iter(["a" * 64, "b" * 64])
+    db.execute.return_value = _rows(("b" * 64,))
+    service = MediaLifecycleService()
+    report = LifecycleReport(apply=True)
+
+    await service.reconcile_references(db, 2, report)
+
+    assert report.reconciled == 1
+    assert service._reconcile_after == "b" * 64  # a full batch: the next pass continues after it
+    batch = str(db.scalars.await_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "FOR UPDATE SKIP LOCKED" in batch
+    recount = str(db.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "(messages.payload ->> %(payload_1)s::TEXT) = media_blobs.sha256" in recount
+    assert "media_files.content_sha256 = media_blobs.sha256" in recount
+    assert "media_blobs_1.preview_sha256 = media_blobs.sha256" in recount
+    db.commit.assert_awaited_once()
+
+    db.scalars.return_value = iter(["c" * 64])
+    db.execute.return_value = _rows()
+    await service.reconcile_references(db, 2, report)
+    assert service._reconcile_after == ""  # end of the catalog: start over next pass
+
+
+@pytest.mark.asyncio
+async def test_reconciliation_dry_run_only_counts_mismatches():
+    db = AsyncMock()
+    mismatched = MagicMock()
+    mismatched.all.return_value = ["a" * 64]
+    db.scalars.side_effect = [iter(["a" * 64]), mismatched]
+    report = LifecycleReport(apply=False)
+
+    await MediaLifecycleService().reconcile_references(db, 100, report)
+
+    assert report.reconciled == 1
+    assert "FOR UPDATE" not in str(db.scalars.await_args_list[0].args[0].compile(dialect=postgresql.dialect()))
+    db.execute.assert_not_awaited()
+    db.commit.assert_not_awaited()
+
+
+def test_recompress_image_bounds_the_longest_edge():
+    Image = pytest.importorskip("PIL.Image")
+    from io import BytesIO
+
+    from app.services.thumbnail_renderers import recompress_image
+
+    buffer = BytesIO()
+    Image.effect_noise((1200, 600), 64).convert("RGB").save(buffer, format="PNG")
+
+    result = recompress_image({"data": buffer.getvalue(), "max_edge": 300})
+
+    with Image.open(BytesIO(result)) as image:
+        assert image.format == "JPEG"
+        assert image.size == (300, 150)
+    assert recompress_image({"data": b"junk", "max_edge": 300}) is None
+
+
+def test_recompress_image_flattens_transparency_onto_white():
+    Image = pytest.importorskip("PIL.Image")
+    from io import BytesIO
+
+    from app.services.thumbnail_renderers import recompress_image
+
+    buffer = BytesIO()
+    Image.new("RGBA", (400, 200), (0, 0, 0, 0)).save(buffer, format="PNG")
+
+    with Image.open(BytesIO(recompress_image({"data": buffer.getvalue(), "max_edge": 100}))) as image:
+        assert min(image.getpixel((50, 25))) > 245
+
+
+@pytest.mark.asyncio
+async def test_recompression_keeps_replaced_blobs_that_are_still_shared(monkeypatch):
+    blob = SimpleNamespace(sha256=SHA, storage_key=f"sha256/ab/ab/{SHA}", size_bytes=1000, recompressed_at=None)
+    storage = MagicMock(
+        read=AsyncMock(return_value=b"x" * 1000),
+        put=AsyncMock(return_value=SimpleNamespace(key="sha256/cd/cd/new", size=100)),
+        delete=AsyncMock(),
+    )
+    monkeypatch.setattr(lifecycle_module, "media_storage", storage)
+    monkeypatch.setattr(lifecycle_module.thumbnail_service, "recompress", AsyncMock(return_value=b"y" * 100))
+    db = AsyncMock()
+    db.scalars.return_value.all = MagicMock(return_value=[blob])
+    db.scalar.return_value = True  # a library thumbnail has the same bytes
+    report = LifecycleReport(apply=True)
+
+    await MediaLifecycleService().recompress_images(db, 10, report)
+
+    assert (report.recompressed, blob.storage_key) == (1, "sha256/cd/cd/new")
+    shared = str(db.scalar.await_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "jsonb_path_exists(media_files.thumbnails" in shared
+    storage.delete.assert_not_awaited()
@@ -0,0 +1,126 @@
+"""Tests for the content-addressed media storage backends."""
+import hashlib
+import re
+
+import httpx
+import pytest
+
+from app.services.media_storage import (
+    LocalMediaStorage,
+    MediaStorageError,
+    S3MediaStorage,
+    content_key,
+)
+
+DATA = bytes(range(256)) * 2048  # 512 KiB, spans several read chunks
+
+
+class FakeS3:
+    """In-memory stand-in for an S3-compatible endpoint."""
+
+    def __init__(self):
+        self.objects = {}
+        self.requests = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        assert request.headers["authorization"].startswith("AWS4-HMAC-SHA256 Credential=AKID/")
+        key = request.url.path
+        if request.method == "PUT":
+            body = request.content
+            if hashlib.sha256(body).hexdigest() != request.headers["x-amz-content-sha256"]:
+                return httpx.Response(400)
+            self.objects[key] = body
+            return httpx.Response(200)
+        if key not in self.objects:
+            return httpx.Response(404)
+        body = self.objects[key]
+        if request.method == "HEAD":
+            return httpx.Response(200, headers={"content-length": str(len(body))})
+        if request.method == "DELETE":
+            del self.objects[key]
+            return httpx.Response(204)
+        match = re.match(r"bytes=(\d+)-(\d*)", request.headers.get("range", ""))
+        if match:
+            start, end = int(match[1]), int(match[2]) if match[2] else len(body) - 1
+            return httpx.Response(206, content=body[start:end + 1])
+        return httpx.Response(200, content=body)
+
+
+def _s3(fake: FakeS3) -> S3MediaStorage:
+    return S3MediaStorage(
+        bucket="media",
+        endpoint_url="http://s3.local",
+        access_key_id="AKID",
+        secret_access_key="secret",
+        prefix="prod",
+        transport=httpx.MockTransport(fake),
+    )
+
+
+@pytest.mark.asyncio
+async def test_local_storage_is_content_addressed_with_fanout(tmp_path):
+    storage = LocalMediaStorage(tmp_path)
+
+    first = await storage.put(DATA)
+    second = await storage.put(DATA)
+
+    digest = hashlib.sha256(DATA).hexdigest()
+    assert first == second
+    assert first.key == content_key(digest) == f"sha256/{digest[:2]}/{digest[2:4]}/{digest}"
+    assert (tmp_path / first.key).read_bytes() == DATA
+    assert await storage.size(first.key) == len(DATA)
+    assert await storage.read(first.key) == DATA
+    assert b"".join([c async for c in storage.iter_range(first.key, 1000, 300_000)]) == DATA[1000:300_001]
+
+    await storage.delete(first.key)
+    assert not await storage.exists(first.key)
+    assert await storage.size(first.key) is None
+
+
+@pytest.mark.asyncio
+async def test_local_storage_rejects_keys_outside_the_store(tmp_path):
+    storage = LocalMediaStorage(tmp_path)
+    with pytest.raises(MediaStorageError):
+        await storage.exists("../../etc/passwd")
+
+
+@pytest.mark.asyncio
+async def test_s3_storage_round_trip_against_stand_in():
+    fake = FakeS3()
+    storage = _s3(fake)
+
+    blob = await storage.put(DATA)
+    await storage.put(DATA)
+
+    assert f"/media/prod/{blob.key}" in fake.objects
+    assert [r.method for r in fake.requests].count("PUT") == 1
+    assert await storage.size(blob.key) == len(DATA)
+    assert await storage.read(blob.key) == DATA
+    assert b"".join([c async for c in storage.iter_range(blob.key, 10, 19)]) == DATA[10:20]
+
+    await storage.delete(blob.key)
+    assert not await storage.exists(blob.key)
+    with pytest.raises(MediaStorageError):
+        await storage.read(blob.key)
+    await storage.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", ["local", "s3"])
+async def test_put_file_streams_from_an_open_file(tmp_path, backend):
+    fake = FakeS3()
+    storage = LocalMediaStorage(tmp_path / "store") if backend == "local" else _s3(fake)
+    source = tmp_path / "upload.bin"
+    source.write_bytes(DATA)
+    digest = hashlib.sha256(DATA).hexdigest()
+
+    with open(source, "rb") as f:
+        blob = await storage.put_file(f, digest, len(DATA))
+
+    assert blob.key == content_key(digest)
+    assert await storage.read(blob.key) == DATA
+    if backend == "s3":
+        put = next(r for r in fake.requests if r.method == "PUT")
+        assert put.headers["content-length"] == str(len(DATA))
+        assert "transfer-encoding" not in put.headers
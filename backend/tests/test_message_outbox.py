@@ -0,0 +1,176 @@
+"""Unit tests for the operator-to-LINE message outbox."""
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from linebot.v3.messaging import TextMessage
+from linebot.v3.messaging.exceptions import ApiException
+
+from app.models.message_outbox import DeliveryStatus, MessageOutbox
+from app.services.message_outbox_service import MessageOutboxService
+from app.tasks import message_outbox as outbox_task
+
+
+def _entry(entry_id: int = 1, attempts: int = 1, line_user_id: str = "U123") -> SimpleNamespace:
+    return SimpleNamespace(
+        id=entry_id,
+        message_id=100 + entry_id,
+        line_user_id=line_user_id,
+        line_messages=[{"type": "text", "text": "hello"}],
+        retry_key="0f7c2d4e-1111-2222-3333-444455556666",
+        attempts=attempts,
+    )
+
+
+def _session_factory(db):
+    ctx = MagicMock()
+    ctx.__aenter__ = AsyncMock(return_value=db)
+    ctx.__aexit__ = AsyncMock(return_value=False)
+    return MagicMock(return_value=ctx)
+
+
+def _executed_values(db) -> dict:
+    stmt = db.execute.await_args_list[0].args[0]
+    return {col.key: bind.value for col, bind in stmt._values.items()}
+
+
+@pytest.mark.asyncio
+async def test_enqueue_marks_message_pending_and_serialises_payload():
+    service = MessageOutboxService()
+    db = MagicMock()
+    db.flush = AsyncMock()
+    message = SimpleNamespace(id=5, line_user_id="U123", delivery_status=None)
+
+    entry = await service.enqueue(db, message, [TextMessage(text="hi")])
+
+    assert isinstance(entry, MessageOutbox)
+    assert message.delivery_status == DeliveryStatus.PENDING.value
+    assert entry.line_messages == [{"type": "text", "text": "hi"}]
+    assert entry.retry_key
+    db.add.assert_called_once_with(entry)
+    db.flush.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_deliver_success_marks_sent_and_broadcasts():
+    service = MessageOutboxService()
+    db = AsyncMock()
+    entry = _entry()
+
+    with patch(
+        "app.services.message_outbox_service.line_service.push_messages", new=AsyncMock()
+    ) as mock_push, patch(
+        "app.services.message_outbox_service.AsyncSessionLocal", new=_session_factory(db)
+    ), patch(
+        "app.services.message_outbox_service.ws_manager.broadcast_to_room", new=AsyncMock()
+    ) as mock_broadcast:
+        status = await service.deliver(entry)
+
+    assert status == DeliveryStatus.SENT.value
+    assert mock_push.await_args.kwargs["retry_key"] == entry.retry_key
+    assert db.execute.await_count == 2  # outbox row + message row
+    db.commit.assert_awaited_once()
+    event = mock_broadcast.await_args.args[1]
+    assert event["type"] == "message_status"
+    assert event["payload"]["delivery_status"] == "SENT"
+    assert event["payload"]["id"] == entry.message_id
+
+
+@pytest.mark.asyncio
+async def test_deliver_treats_retry_key_conflict_as_sent():
+    service = MessageOutboxService()
+    db = AsyncMock()
+
+    with patch(
+        "app.services.message_outbox_service.line_service.push_messages",
+        new=AsyncMock(side_effect=ApiException(status=409, reason="Conflict")),
+    ), patch(
+        "app.services.message_outbox_service.AsyncSessionLocal", new=_session_factory(db)
+    ), patch(
+        "app.services.message_outbox_service.ws_manager.broadcast_to_room", new=AsyncMock()
+    ):
+        status = await service.deliver(_entry())
+
+    assert status == DeliveryStatus.SENT.value
+
+
+@pytest.mark.asyncio
+async def test_deliver_retries_transient_failure_with_backoff():
+    service = MessageOutboxService()
+    db = AsyncMock()
+
+    with patch(
+        "app.services.message_outbox_service.line_service.push_messages",
+        new=AsyncMock(side_effect=ApiException(status=503, reason="Unavailable")),
+    ), patch(
+        "app.services.message_outbox_service.AsyncSessionLocal", new=_session_factory(db)
+    ), patch(
+        "app.services.message_outbox_service.ws_manager.broadcast_to_room", new=AsyncMock()
+    ) as mock_broadcast:
+        status = await service.deliver(_entry(attempts=2))
+
+    assert status == DeliveryStatus.PENDING.value
+    values = _executed_values(db)
+    assert values["status"] == DeliveryStatus.PENDING.value
+    assert "503" in values["last_error"]
+    # Message row untouched and nobody notified until a terminal state.
+    assert db.execute.await_count == 1
+    mock_broadcast.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_deliver_fails_permanently_on_client_error():
+    service = MessageOutboxService()
+    db = AsyncMock()
+
+    with patch(
+        "app.services.message_outbox_service.line_service.push_messages",
+        new=AsyncMock(side_effect=ApiException(status=400, reason="Bad Request")),
+    ), patch(
+        "app.services.message_outbox_service.AsyncSessionLocal", new=_session_factory(db)
+    ), patch(
+        "app.services.message_outbox_service.ws_manager.broadcast_to_room", new=AsyncMock()
+    ) as mock_broadcast:
+        status = await service.deliver(_entry())
+
+    assert status == DeliveryStatus.FAILED.value
+    assert mock_broadcast.await_args.args[1]["payload"]["delivery_status"] == "FAILED"
+
+
+@pytest.mark.asyncio
+async def test_deliver_gives_up_after_max_attempts():
+    service = MessageOutboxService()
+    db = AsyncMock()
+
+    with patch(
+        "app.services.message_outbox_service.settings.OUTBOX_MAX_ATTEMPTS", 3
+    ), patch(
+        "app.services.message_outbox_service.line_service.push_messages",
+        new=AsyncMock(side_effect=RuntimeError("LINE API circuit is open")),
+    ), patch(
+        "app.services.message_outbox_service.AsyncSessionLocal", new=_session_factory(db)
+    ), patch(
+        "app.services.message_outbox_service.ws_manager.broadcast_to_room", new=AsyncMock()
+    ):
+        status = await service.deliver(_entry(attempts=3))
+
+    assert status == DeliveryStatus.FAILED.value
+
+
+@pytest.mark.asyncio
+async def test_deliver_batch_keeps_per_conversation_order():
+    delivered = []
+
+    async def _fake_deliver(entry):
+        await asyncio.sleep(0)
+        delivered.append((entry.line_user_id, entry.id))
+        return DeliveryStatus.SENT.value
+
+    entries = [_entry(1, line_user_id="UA"), _entry(2, line_user_id="UB"), _entry(3, line_user_id="UA")]
+    with patch.object(outbox_task.message_outbox_service, "deliver", new=AsyncMock(side_effect=_fake_deliver)):
+        await outbox_task._deliver_batch(entries, asyncio.Semaphore(4))
+
+    ua_order = [entry_id for user, entry_id in delivered if user == "UA"]
+    assert ua_order == [1, 3]
+    assert len(delivered) == 3
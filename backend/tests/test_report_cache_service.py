@@ -0,0 +1,101 @@
+"""Tests for the admin report result cache."""
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from pydantic import BaseModel
+from sqlalchemy.dialects import postgresql
+
+from app.services.report_cache_service import ReportCacheService
+
+MODULE = "app.services.report_cache_service"
+
+
+class _Report(BaseModel):
+    total: int
+    generated_at: datetime
+
+
+def _report(total: int = 1) -> _Report:
+    return _Report(total=total, generated_at=datetime(2026, 1, 1, tzinfo=timezone.utc))
+
+
+@pytest.mark.asyncio
+async def test_live_range_is_served_from_cache_without_database():
+    db = AsyncMock()
+    compute = AsyncMock(return_value=_report())
+    end = datetime.now(timezone.utc)
+    with patch(f"{MODULE}.redis_client._redis", None):
+        service = ReportCacheService()
+        first = await service.get_or_compute(db, "messages", _Report, compute, ("messages",), end - timedelta(days=7), end)
+        second = await service.get_or_compute(db, "messages", _Report, compute, ("messages",), end - timedelta(days=7), end)
+
+    assert first == second == _report()
+    compute.assert_awaited_once()
+    db.execute.assert_not_awaited()
+    db.scalar.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_past_range_is_revalidated_against_high_water_marks():
+    db = AsyncMock()
+    db.execute.return_value = MagicMock(one=MagicMock(return_value=(10, datetime(2026, 1, 1, tzinfo=timezone.utc))))
+    compute = AsyncMock(side_effect=[_report(1), _report(2)])
+    start, end = datetime(2025, 1, 1, tzinfo=timezone.utc), datetime(2025, 1, 31, tzinfo=timezone.utc)
+    args = (db, "service-requests", _Report, compute, ("service_requests",), start, end)
+
+    with patch(f"{MODULE}.redis_client._redis", None):
+        service = ReportCacheService()
+        db.scalar.return_value = False
+        assert (await service.get_or_compute(*args)).total == 1
+        assert (await service.get_or_compute(*args)).total == 1
+        db.scalar.return_value = True
+        assert (await service.get_or_compute(*args)).total == 2
+
+    assert compute.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_changed_since_probes_new_and_updated_rows_in_range():
+    db = AsyncMock()
+    db.scalar.return_value = False
+    marks = {"service_requests": {"id": 10, "updated_at": "2026-01-01T00:00:00+00:00"}}
+
+    await ReportCacheService().changed_since(db, marks, datetime(2025, 1, 1), datetime(2025, 2, 1))
+
+    sql = str(db.scalar.await_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "EXISTS" in sql
+    assert "service_requests.id >" in sql
+    assert "service_requests.updated_at >" in sql
+    assert "service_requests.created_at >=" in sql
+
+
+@pytest.mark.asyncio
+async def test_open_ended_marks_probe_past_the_range_end():
+    db = AsyncMock()
+    db.execute.return_value = MagicMock(one=MagicMock(return_value=(10,)))
+    db.scalar.return_value = False
+    start, end = datetime(2025, 1, 1, tzinfo=timezone.utc), datetime(2025, 1, 31, tzinfo=timezone.utc)
+    compute = AsyncMock(return_value=_report())
+
+    with patch(f"{MODULE}.redis_client._redis", None):
+        service = ReportCacheService()
+        for _ in range(2):
+            await service.get_or_compute(
+                db, "operators", _Report, compute, ("messages",), start, end, open_ended=("messages",)
+            )
+
+    sql = str(db.scalar.await_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "messages.created_at >=" in sql
+    assert "messages.created_at <=" not in sql
+    compute.assert_awaited_once()
+
+
+def test_live_keys_share_an_entry_within_the_minute():
+    start = datetime(2026, 3, 1, 10, 0, 5, tzinfo=timezone.utc)
+    key = ReportCacheService.cache_key("followers", start, start + timedelta(seconds=20), {"period": "daily"}, True)
+    other = ReportCacheService.cache_key("followers", start, start + timedelta(seconds=40), {"period": "daily"}, True)
+    exact = ReportCacheService.cache_key("followers", start, start + timedelta(seconds=20), {"period": "daily"}, False)
+
+    assert key == other
+    assert exact != key
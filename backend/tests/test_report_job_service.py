@@ -0,0 +1,92 @@
+"""Tests for background report jobs."""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.services.report_job_service import ReportJobService, ReportJobStatus, ws_manager
+
+MODULE = "app.services.report_job_service"
+
+
+def _render(payload: dict) -> bytes:
+    return f"PDF:{payload['value']}".encode()
+
+
+def _fail(payload: dict) -> bytes:
+    raise RuntimeError("renderer crashed")
+
+
+@pytest.fixture
+def service():
+    service = ReportJobService()
+    service._executor = ThreadPoolExecutor(max_workers=1)
+    with patch(f"{MODULE}.redis_client._redis", None), patch(
+        f"{MODULE}.ws_manager.notify_admin", new=AsyncMock()
+    ):
+        yield service
+    service._executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_identical_requests_share_one_render(service):
+    loader = AsyncMock(return_value={"value": 42})
+
+    first = await service.submit("report-pdf", {"period": 7}, loader, _render, "a.pdf", requested_by=1)
+    second = await service.submit("report-pdf", {"period": 7}, loader, _render, "a.pdf", requested_by=2)
+    assert second["id"] == first["id"]
+
+    job, content = await service.wait_for_result(first, timeout=5)
+    assert job["status"] == ReportJobStatus.COMPLETED.value
+    assert content == b"PDF:42" and job["size"] == 6
+    loader.assert_awaited_once()
+
+    third = await service.submit("report-pdf", {"period": 7}, loader, _render, "a.pdf")
+    assert third["id"] == first["id"]  # Result still stored: no new render
+    other = await service.submit("report-pdf", {"period": 30}, loader, _render, "a.pdf")
+    assert other["id"] != first["id"]
+
+
+@pytest.mark.asyncio
+async def test_finished_job_notifies_requester(service):
+    job = await service.submit("report-pdf", {}, AsyncMock(return_value={"value": 1}), _render, "a.pdf", requested_by=9)
+    await service.wait(job["id"], timeout=5)
+    await asyncio.sleep(0)
+
+    admin_id, message = ws_manager.notify_admin.await_args.args
+    assert admin_id == "9"
+    assert message["payload"]["id"] == job["id"] and message["payload"]["status"] == "COMPLETED"
+
+
+@pytest.mark.asyncio
+async def test_failed_job_is_recorded_and_can_be_retried(service):
+    job = await service.submit("report-pdf", {}, AsyncMock(return_value={"value": 1}), _fail, "a.pdf")
+    job, content = await service.wait_for_result(job, timeout=5)
+
+    assert job["status"] == ReportJobStatus.FAILED.value
+    assert "renderer crashed" in job["error"] and content is None
+
+    retry = await service.submit("report-pdf", {}, AsyncMock(return_value={"value": 2}), _render, "a.pdf")
+    assert retry["id"] != job["id"]
+
+
+@pytest.mark.asyncio
+async def test_render_concurrency_is_capped(service):
+    running = 0
+    peak = 0
+
+    async def loader():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return {"value": 0}
+
+    with patch(f"{MODULE}.settings.REPORT_RENDER_CONCURRENCY", 2):
+        jobs = [await service.submit("report-pdf", {"n": n}, loader, _render, "a.pdf") for n in range(5)]
+        for job in jobs:
+            await service.wait(job["id"], timeout=5)
+
+    assert peak == 2
@@ -0,0 +1,183 @@
+"""Tests for circuit breakers, retry budgets and bulkheads."""
+import asyncio
+from unittest.mock import AsyncMock
+
+import aiohttp
+import pytest
+
+from app.core import resilience as resilience_module
+from app.core.resilience import (
+    Bulkhead,
+    BulkheadFullError,
+    CircuitBreaker,
+    CircuitOpenError,
+    CircuitState,
+    RetryBudget,
+    is_client_error,
+    is_transient,
+    retry_delay,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class ApiError(Exception):
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+
+@pytest.fixture(autouse=True)
+def no_redis(monkeypatch):
+    monkeypatch.setattr(resilience_module.redis_client, "_redis", None)
+
+
+def _breaker(clock, **kwargs):
+    options = dict(failure_threshold=2, recovery_timeout_seconds=30, failure_window_seconds=60, clock=clock)
+    options.update(kwargs)
+    return CircuitBreaker("test", **options)
+
+
+@pytest.mark.asyncio
+async def test_breaker_trips_at_threshold_and_rejects_until_recovery():
+    clock = FakeClock()
+    breaker = _breaker(clock)
+
+    assert await breaker.acquire() is False
+    assert await breaker.record_failure(False) is False
+    assert await breaker.record_failure(False) is True
+    assert breaker.state == CircuitState.OPEN
+    with pytest.raises(CircuitOpenError, match="test circuit is open"):
+        await breaker.acquire()
+
+    clock.now += 30
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert breaker.snapshot() == {"state": "half_open", "shared": False, "failures": 2, "trips": 1, "rejected": 1}
+
+
+@pytest.mark.asyncio
+async def test_half_open_admits_a_single_probe():
+    clock = FakeClock()
+    breaker = _breaker(clock, failure_threshold=1)
+    await breaker.record_failure(False)
+    clock.now += 30
+
+    assert await breaker.acquire() is True
+    with pytest.raises(CircuitOpenError):
+        await breaker.acquire()
+
+    # A failed probe re-opens for another recovery period.
+    assert await breaker.record_failure(True) is True
+    assert breaker.state == CircuitState.OPEN
+    clock.now += 30
+
+    assert await breaker.acquire() is True
+    await breaker.record_success(True)
+    assert breaker.state == CircuitState.CLOSED
+    assert await breaker.acquire() is False
+    assert breaker.snapshot()["trips"] == 2
+
+
+@pytest.mark.asyncio
+async def test_released_probe_lets_the_next_call_probe():
+    clock = FakeClock()
+    breaker = _breaker(clock, failure_threshold=1)
+    await breaker.record_failure(False)
+    clock.now += 30
+
+    assert await breaker.acquire() is True
+    await breaker.release(True)
+    assert await breaker.acquire() is True
+
+
+@pytest.mark.asyncio
+async def test_failures_further_apart_than_the_window_do_not_add_up():
+    clock = FakeClock()
+    breaker = _breaker(clock)
+
+    await breaker.record_failure(False)
+    clock.now += 61
+    assert await breaker.record_failure(False) is False
+    assert breaker.state == CircuitState.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_shared_breaker_uses_redis_state(monkeypatch):
+    monkeypatch.setattr(resilience_module.redis_client, "_redis", object())
+    eval_ = AsyncMock(side_effect=["open", 1])
+    monkeypatch.setattr(resilience_module.redis_client, "eval", eval_)
+    breaker = _breaker(FakeClock(), shared=True)
+
+    # Another replica tripped it: rejected without any local failures.
+    with pytest.raises(CircuitOpenError):
+        await breaker.acquire()
+    assert await breaker.record_failure(False) is True
+
+    assert eval_.await_args_list[0].args[1] == ["circuit:test"]
+    assert eval_.await_args_list[1].args[2] == [2, 30, 60, 0]
+    assert breaker.snapshot()["state"] == "open"
+    assert breaker.snapshot()["shared"] is True
+
+
+@pytest.mark.asyncio
+async def test_shared_breaker_falls_back_to_local_state_when_redis_fails(monkeypatch):
+    monkeypatch.setattr(resilience_module.redis_client, "_redis", object())
+    monkeypatch.setattr(resilience_module.redis_client, "eval", AsyncMock(return_value=None))
+    breaker = _breaker(FakeClock(), failure_threshold=1, shared=True)
+
+    assert await breaker.record_failure(False) is True
+    with pytest.raises(CircuitOpenError):
+        await breaker.acquire()
+
+
+def test_retry_budget_limits_retries_to_a_share_of_requests():
+    clock = FakeClock()
+    budget = RetryBudget(ratio=0.5, min_per_second=0.1, max_tokens=2, clock=clock)
+
+    assert budget.withdraw() and budget.withdraw()
+    assert budget.withdraw() is False
+    budget.deposit()
+    budget.deposit()
+    assert budget.withdraw() is True
+    clock.now += 10
+    assert budget.withdraw() is True
+    assert budget.stats() == {"tokens": 0.0, "requests": 2, "retries": 4, "exhausted": 1}
+
+
+def test_retry_delay_is_jittered_below_the_exponential_cap(monkeypatch):
+    monkeypatch.setattr(resilience_module.random, "uniform", lambda low, high: high)
+    assert [retry_delay(attempt, 0.2, 1.0) for attempt in (1, 2, 3, 4)] == [0.2, 0.4, 0.8, 1.0]
+
+
+def test_error_classification():
+    assert is_transient(ApiError(503)) and not is_client_error(ApiError(503))
+    assert is_client_error(ApiError(400)) and not is_transient(ApiError(400))
+    assert is_transient(asyncio.TimeoutError())
+    assert is_transient(aiohttp.ClientConnectionError())
+    assert not is_transient(RuntimeError("bug"))
+
+
+@pytest.mark.asyncio
+async def test_bulkhead_rejects_when_no_slot_frees_up_in_time():
+    bulkhead = Bulkhead("downloads", max_concurrent=1, max_wait_seconds=0.01)
+    release = asyncio.Event()
+
+    async def hold():
+        async with bulkhead.slot():
+            await release.wait()
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    with pytest.raises(BulkheadFullError):
+        async with bulkhead.slot():
+            pass
+    release.set()
+    await holder
+
+    assert bulkhead.stats() == {"max_concurrent": 1, "active": 0, "peak": 1, "waited": 1, "rejected": 1}
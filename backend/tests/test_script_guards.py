@@ -18,6 +18,7 @@ import import_csv_intents  # noqa: E402
 import migrate_line_to_credentials  # noqa: E402
 import seed_admin  # noqa: E402
 import fix_user_data  # noqa: E402
+import media_gc  # noqa: E402
 
 
 def configure_env_module(monkeypatch: pytest.MonkeyPatch, backend_dir: Path) -> None:
@@ -49,6 +50,7 @@ def test_guarded_scripts_default_to_dry_run() -> None:
     assert seed_admin.build_parser().parse_args([]).apply is False
     assert migrate_line_to_credentials.build_parser().parse_args([]).apply is False
     assert fix_user_data.build_parser().parse_args([]).apply is False
+    assert media_gc.build_parser().parse_args([]).apply is False
 
 
 def test_import_csv_intents_parses_and_summarizes_csv(tmp_path: Path) -> None:
@@ -0,0 +1,128 @@
+"""Tests for broadcast audience segments."""
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.models.broadcast import BroadcastStatus
+from app.services.broadcast_service import BroadcastService
+from app.services.segment_service import SegmentError, SegmentService
+
+NOW = datetime(2026, 10, 19, 8, 0, tzinfo=timezone.utc)
+
+
+def _sql(query) -> str:
+    return str(query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def test_build_query_compiles_nested_segment():
+    segment = {
+        "all": [
+            {"tags": {"any": ["vip"], "none": ["opted_out"]}},
+            {"any": [
+                {"last_message_at": {"within_days": 30}},
+                {"chat_history": {"min_messages": 5, "had_live_chat": True}},
+            ]},
+            {"service_request": {"category": ["water"], "province": "Bangkok"}},
+        ]
+    }
+    sql = _sql(SegmentService().build_query(segment, now=NOW))
+
+    assert "user_tags" in sql and "'vip'" in sql and "'opted_out'" in sql
+    assert "'2026-09-19 08:00:00+00:00'" in sql
+    assert "count(messages.id)" in sql and ">= 5" in sql
+    assert "chat_sessions" in sql
+    assert "service_requests.province IN ('Bangkok')" in sql
+    # No explicit friend_status condition -> only active friends.
+    assert "coalesce(users.friend_status, 'ACTIVE') = 'ACTIVE'" in sql
+
+
+def test_explicit_friend_status_replaces_default():
+    sql = _sql(SegmentService().build_query({"friend_status": ["blocked"]}, now=NOW))
+    assert "IN ('BLOCKED')" in sql
+    assert "= 'ACTIVE'" not in sql
+
+
+@pytest.mark.parametrize("segment, message", [
+    ({"colour": "red"}, "Unknown segment condition"),
+    ({"tags": {}}, "tags needs"),
+    ({"friend_status": ["FRIENDLY"]}, "Unknown friend_status"),
+    ({"service_request": {"status": ["closed"]}}, "Unknown service_request.status"),
+    ({"last_message_at": {"after": "yesterday"}}, "ISO 8601"),
+    ({"all": []}, "non-empty list"),
+    ({"any": [{"not": {"any": [{"friend_status": "ACTIVE"}] * 101}}]}, "more than"),
+])
+def test_invalid_segments_raise(segment, message):
+    with pytest.raises(SegmentError, match=message):
+        SegmentService().validate(segment)
+
+
+@pytest.mark.asyncio
+async def test_estimate_uses_planner_rows_for_large_audiences():
+    plan = MagicMock()
+    plan.scalar.return_value = '[{"Plan": {"Plan Rows": 180000}}]'
+    db = AsyncMock()
+    db.execute.return_value = plan
+
+    result = await SegmentService().estimate_audience(db, {"tags": {"any": ["vip'; DROP TABLE users; --"]}})
+
+    assert result == {"count": 180000, "exact": False}
+    explain, params = db.execute.await_args.args
+    sql = str(explain)
+    assert sql.startswith("EXPLAIN (FORMAT JSON) SELECT users.line_user_id")
+    assert "tags.name IN (:name_1_1)" in sql and "DROP TABLE" not in sql
+    assert params["name_1_1"] == "vip'; DROP TABLE users; --"
+    db.scalar.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_estimate_counts_exactly_for_small_audiences():
+    plan = MagicMock()
+    plan.scalar.return_value = [{"Plan": {"Plan Rows": 40}}]
+    db = AsyncMock()
+    db.execute.return_value = plan
+    db.scalar.return_value = 37
+
+    assert await SegmentService().estimate_audience(db, {"tags": {"any": ["vip"]}}) == {"count": 37, "exact": True}
+
+
+@pytest.mark.asyncio
+async def test_segment_broadcast_streams_recipients_into_chunks(monkeypatch):
+    async def _stream(segment):
+        for i in range(700):
+            yield f"U{i}"
+
+    monkeypatch.setattr("app.services.broadcast_service.segment_service.stream_line_user_ids", _stream)
+    svc = BroadcastService()
+    svc._api = AsyncMock()
+    broadcast = SimpleNamespace(
+        id=5, title="t", message_type="text", content={"text": "hi"},
+        target_audience="segment", target_filter={"segment": {"tags": {"any": ["vip"]}}},
+        status=BroadcastStatus.SENDING, total_recipients=0, success_count=0, failure_count=0, sent_at=None,
+    )
+    db = AsyncMock()
+    db.scalar.return_value = 0
+
+    result = await svc.deliver_broadcast(db, broadcast, messages=["msg"])
+
+    assert result.status == BroadcastStatus.SENDING
+    assert result.total_recipients == 700
+    rows = db.execute.await_args.args[1]
+    assert [row["recipient_count"] for row in rows] == [500, 200]
+
+
+@pytest.mark.asyncio
+async def test_send_broadcast_rejects_invalid_segment_before_sending():
+    svc = BroadcastService()
+    broadcast = SimpleNamespace(
+        id=6, title="t", message_type="text", content={"text": "hi"},
+        target_audience="segment", target_filter={"segment": {"nope": 1}},
+        status=BroadcastStatus.DRAFT,
+    )
+    db = AsyncMock()
+    with pytest.raises(SegmentError):
+        await svc.send_broadcast(db, broadcast)
+    assert broadcast.status == BroadcastStatus.DRAFT
+    db.commit.assert_not_awaited()
@@ -211,17 +211,18 @@ def test_send_message_rest_broadcasts_message_and_conversation_update():
     client = TestClient(app)
     mock_db = AsyncMock()
     fake_user = SimpleNamespace(id=7)
-    message = SimpleNamespace(
-        id=11,
-        line_user_id="Uabcdef0123456789abcdef0123456789",
-        direction="OUTGOING",
-        content="hello",
-        message_type="text",
-        payload=None,
-        sender_role="ADMIN",
-        operator_name="Admin",
-        created_at=datetime(2026, 3, 18, 0, 0, 0, tzinfo=timezone.utc),
-    )
+    message = {
+        "id": 11,
+        "line_user_id": "Uabcdef0123456789abcdef0123456789",
+        "direction": "OUTGOING",
+        "content": "hello",
+        "message_type": "text",
+        "payload": None,
+        "sender_role": "ADMIN",
+        "operator_name": "Admin",
+        "delivery_status": "PENDING",
+        "created_at": datetime(2026, 3, 18, 0, 0, 0, tzinfo=timezone.utc).isoformat(),
+    }
 
     async def _override_get_db():
         yield mock_db
@@ -235,11 +236,10 @@ def test_send_message_rest_broadcasts_message_and_conversation_update():
     try:
         with patch(
             "app.api.v1.endpoints.admin_live_chat.live_chat_service.send_message",
-            new=AsyncMock(return_value={"success": True}),
+            new=AsyncMock(return_value={"success": True, "message": message}),
         ) as mock_send, patch(
-            "app.api.v1.endpoints.admin_live_chat.live_chat_service.get_recent_messages",
-            new=AsyncMock(return_value=[message]),
-        ) as mock_recent, patch(
+            "app.api.v1.endpoints.admin_live_chat.notify_outbox",
+        ) as mock_notify, patch(
             "app.api.v1.endpoints.admin_live_chat.live_chat_service.get_conversation_detail",
             new=AsyncMock(return_value={
                 "display_name": "Alice",
@@ -271,9 +271,9 @@ def test_send_message_rest_broadcasts_message_and_conversation_update():
             )
 
         assert response.status_code == 200
-        assert response.json() == {"success": True}
+        assert response.json() == {"success": True, "message": message}
         mock_send.assert_awaited_once()
-        mock_recent.assert_awaited_once()
+        mock_notify.assert_called_once()
         mock_detail.assert_awaited_once()
         mock_unread.assert_awaited_once()
         mock_in_room.assert_awaited()
@@ -1,46 +1,113 @@
 """Unit tests for session cleanup abandonment handling."""
+import asyncio
 from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
-from app.tasks.session_cleanup import _process_inactive_sessions
-from app.models.chat_session import SessionStatus
+from app.core.leader_election import LeaderElector
+from app.tasks import session_cleanup
+from app.tasks.session_cleanup import _dispatch_close_notifications, _process_inactive_sessions
 
 
-def _mock_result_with_sessions(sessions):
+def _returning(rows):
     result = MagicMock()
-    scalars = MagicMock()
-    scalars.all.return_value = sessions
-    result.scalars.return_value = scalars
+    result.all.return_value = rows
     return result
 
 
 @pytest.mark.asyncio
 async def test_process_inactive_sessions_handles_abandoned_waiting():
     now = datetime.now(timezone.utc)
-    waiting_session = MagicMock()
-    waiting_session.id = 99
-    waiting_session.status = SessionStatus.WAITING
-    waiting_session.claimed_at = None
-    waiting_session.started_at = now - timedelta(minutes=20)
-    waiting_session.line_user_id = "Utest"
+    waiting_row = SimpleNamespace(id=99, line_user_id="Utest", started_at=now - timedelta(minutes=20))
 
     mock_db = AsyncMock()
     mock_db.execute.side_effect = [
-        _mock_result_with_sessions([]),  # inactive active sessions
-        _mock_result_with_sessions([waiting_session]),  # abandoned waiting sessions
+        _returning([]),  # UPDATE ... RETURNING inactive active sessions
+        _returning([waiting_row]),  # UPDATE ... RETURNING abandoned waiting sessions
+        MagicMock(),  # users -> BOT
+        MagicMock(),  # bulk audit insert
     ]
 
-    with patch("app.tasks.session_cleanup._mark_abandoned_waiting_session", new=AsyncMock()) as mark_abandoned, patch(
-        "app.tasks.session_cleanup._close_inactive_session", new=AsyncMock()
-    ) as close_inactive, patch(
+    with patch(
+        "app.tasks.session_cleanup._dispatch_close_notifications", new=AsyncMock()
+    ) as dispatch, patch(
         "app.tasks.session_cleanup.analytics_service.emit_live_kpis_update", new=AsyncMock()
     ) as emit_kpis:
         await _process_inactive_sessions(mock_db)
 
-    mark_abandoned.assert_awaited_once_with(waiting_session, mock_db)
-    close_inactive.assert_not_awaited()
-    emit_kpis.assert_awaited_once_with(mock_db)
+    assert mock_db.execute.await_count == 4
+    abandon_update = mock_db.execute.await_args_list[1].args[0]
+    assert abandon_update.compile().params["abandoned"] is True
+    audit_rows = mock_db.execute.await_args_list[3].args[1]
+    assert [row["action"] for row in audit_rows] == ["abandon_waiting_session"]
+    assert audit_rows[0]["resource_id"] == "99"
     mock_db.commit.assert_awaited_once()
+    dispatch.assert_awaited_once()
+    notifications = dispatch.await_args.args[0]
+    assert notifications == [
+        ("Utest", "SYSTEM_TIMEOUT", "waiting_timeout", session_cleanup.ABANDONED_CLOSE_TEXT)
+    ]
+    emit_kpis.assert_awaited_once_with(mock_db)
+
+
+@pytest.mark.asyncio
+async def test_process_inactive_sessions_noop_skips_commit_and_notifications():
+    mock_db = AsyncMock()
+    mock_db.execute.side_effect = [_returning([]), _returning([])]
+
+    with patch(
+        "app.tasks.session_cleanup._dispatch_close_notifications", new=AsyncMock()
+    ) as dispatch, patch(
+        "app.tasks.session_cleanup.analytics_service.emit_live_kpis_update", new=AsyncMock()
+    ) as emit_kpis:
+        await _process_inactive_sessions(mock_db)
+
+    mock_db.commit.assert_not_awaited()
+    dispatch.assert_not_awaited()
+    emit_kpis.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_dispatch_close_notifications_bounds_parallelism():
+    in_flight = 0
+    peak = 0
+
+    async def _slow_push(*_args, **_kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+
+    notifications = [(f"U{i}", "SYSTEM", "inactivity", "bye") for i in range(25)]
+    with patch.object(session_cleanup, "NOTIFY_CONCURRENCY", 5), patch(
+        "app.tasks.session_cleanup.line_service.push_messages", new=AsyncMock(side_effect=_slow_push)
+    ) as push, patch(
+        "app.tasks.session_cleanup.ws_manager.broadcast_to_all", new=AsyncMock()
+    ) as broadcast:
+        await _dispatch_close_notifications(notifications)
+
+    assert push.await_count == 25
+    assert broadcast.await_count == 25
+    assert 1 < peak <= 5
+
+
+@pytest.mark.asyncio
+async def test_leader_elector_uses_redis_lease():
+    elector = LeaderElector("test_job", ttl_seconds=30)
+    with patch("app.core.leader_election.redis_client") as mock_redis:
+        mock_redis.is_connected = True
+        mock_redis.set = AsyncMock(return_value=False)
+        mock_redis.eval = AsyncMock(return_value=0)
+        assert await elector.acquire() is False
+
+        mock_redis.set = AsyncMock(return_value=True)
+        assert await elector.acquire() is True
+        mock_redis.set.assert_awaited_once_with("leader:test_job", elector.token, seconds=30, nx=True)
 
+        # Renewal path: key exists and is ours.
+        mock_redis.set = AsyncMock(return_value=False)
+        mock_redis.eval = AsyncMock(return_value=1)
+        assert await elector.acquire() is True
@@ -0,0 +1,138 @@
+"""Tests for thumbnail rendering, generation and the thumbnail endpoint."""
+import asyncio
+from datetime import datetime, timezone
+from io import BytesIO
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+import pytest
+from starlette.requests import Request
+
+from app.api.v1.endpoints import media as media_endpoints
+from app.models.media_file import FileCategory
+from app.services import thumbnail_renderers as renderers_module
+from app.services import thumbnail_service as thumbnail_module
+from app.services.media_storage import LocalMediaStorage
+from app.services.thumbnail_renderers import render_thumbnails
+from app.services.thumbnail_service import ThumbnailService
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def _png(width: int, height: int) -> bytes:
+    buffer = BytesIO()
+    Image.new("RGBA", (width, height), (200, 30, 30, 128)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _request() -> Request:
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": [], "query_string": b""})
+
+
+def test_render_thumbnails_fits_each_size():
+    thumbnails = render_thumbnails({"data": _png(800, 400), "mime_type": "image/png", "sizes": [160, 480]})
+
+    assert set(thumbnails) == {160, 480}
+    for size, content in thumbnails.items():
+        with Image.open(BytesIO(content)) as thumb:
+            assert thumb.format == "JPEG"
+            assert thumb.size == (size, size // 2)
+
+
+def test_render_thumbnails_ignores_undecodable_content():
+    assert render_thumbnails({"data": b"not an image", "mime_type": "image/png", "sizes": [160]}) == {}
+
+
+def test_video_frames_are_read_from_a_seekable_file(monkeypatch):
+    seen = {}
+
+    def fake_run(args, **kwargs):
+        source = args[args.index("-i") + 1]
+        with open(source, "rb") as handle:
+            seen["data"] = handle.read()
+        return SimpleNamespace(stdout=_png(320, 180))
+
+    monkeypatch.setattr(renderers_module.shutil, "which", lambda name: "/usr/bin/ffmpeg")
+    monkeypatch.setattr(renderers_module.subprocess, "run", fake_run)
+
+    thumbnails = render_thumbnails({"data": b"mp4 with trailing moov", "mime_type": "video/mp4", "sizes": [160]})
+
+    assert seen["data"] == b"mp4 with trailing moov"
+    assert set(thumbnails) == {160}
+
+
+def test_schedule_skips_documents_and_unstored_files():
+    service = ThumbnailService()
+    service.schedule(SimpleNamespace(id=uuid4(), category=FileCategory.DOCUMENT, storage_key="k"))
+    service.schedule(SimpleNamespace(id=uuid4(), category=FileCategory.IMAGE, storage_key=None))
+
+    assert service._tasks == set()
+
+
+@pytest.fixture
+def stored_image(tmp_path, monkeypatch):
+    storage = LocalMediaStorage(tmp_path)
+    monkeypatch.setattr(thumbnail_module, "media_storage", storage)
+    blob = asyncio.run(storage.put(_png(64, 64)))
+    row = SimpleNamespace(id=uuid4(), mime_type="image/png", storage_key=blob.key, thumbnails=None, thumbnail_url=None)
+    return storage, row
+
+
+@pytest.mark.asyncio
+async def test_generate_stores_thumbnails_and_records_them(stored_image, monkeypatch):
+    storage, row = stored_image
+    db = AsyncMock()
+    db.get.return_value = row
+    session = MagicMock()
+    session.return_value.__aenter__ = AsyncMock(return_value=db)
+    session.return_value.__aexit__ = AsyncMock(return_value=False)
+    monkeypatch.setattr(thumbnail_module, "AsyncSessionLocal", session)
+
+    service = ThumbnailService()
+    service.render = AsyncMock(return_value={160: b"small", 480: b"large"})
+
+    assert await service.generate(row.id) is True
+
+    service.render.assert_awaited_once()
+    assert set(row.thumbnails) == {"160", "480"}
+    assert await storage.read(row.thumbnails["480"]["key"]) == b"large"
+    assert row.thumbnails["160"]["size"] == 5
+    assert row.thumbnail_url.endswith(f"/media/{row.id}/thumbnail")
+    db.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_thumbnail_endpoint_picks_smallest_sufficient_size():
+    row = SimpleNamespace(
+        id=uuid4(),
+        created_at=datetime(2026, 5, 1, tzinfo=timezone.utc),
+        thumbnails={
+            "160": {"key": "sha256/aa/bb/" + "a" * 64, "size": 1000},
+            "480": {"key": "sha256/cc/dd/" + "c" * 64, "size": 9000},
+        },
+    )
+    result = MagicMock()
+    result.scalar_one_or_none.return_value = row
+    db = AsyncMock()
+    db.execute.return_value = result
+
+    medium = await media_endpoints.get_media_thumbnail(row.id, _request(), size=200, db=db)
+    oversized = await media_endpoints.get_media_thumbnail(row.id, _request(), size=2000, db=db)
+
+    assert medium.headers["etag"] == f'"{"c" * 64}"'
+    assert medium.headers["content-length"] == "9000"
+    assert medium.media_type == "image/jpeg"
+    assert oversized.headers["content-length"] == "9000"
+
+
+@pytest.mark.asyncio
+async def test_thumbnail_endpoint_404_without_thumbnails():
+    result = MagicMock()
+    result.scalar_one_or_none.return_value = SimpleNamespace(thumbnails=None)
+    db = AsyncMock()
+    db.execute.return_value = result
+
+    with pytest.raises(media_endpoints.HTTPException) as exc:
+        await media_endpoints.get_media_thumbnail(uuid4(), _request(), size=160, db=db)
+    assert exc.value.status_code == 404
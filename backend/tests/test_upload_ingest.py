@@ -0,0 +1,82 @@
+"""Tests for chunked, size-limited upload ingest."""
+import hashlib
+from io import BytesIO
+
+import pytest
+from fastapi import HTTPException
+from starlette.datastructures import Headers, UploadFile
+
+from app.services.upload_ingest import CHUNK_SIZE, ingest_upload, sniff_mime_type
+
+PNG_HEAD = b"\x89PNG\r\n\x1a\n" + b"\x00" * 24
+
+
+class CountingIO(BytesIO):
+    """BytesIO that records how many bytes were read from it."""
+
+    bytes_read = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+def _upload(data: bytes, content_type: str = "application/octet-stream", size=None) -> UploadFile:
+    return UploadFile(
+        CountingIO(data), size=size, filename="file.bin", headers=Headers({"content-type": content_type})
+    )
+
+
+@pytest.mark.asyncio
+async def test_ingest_hashes_spools_and_sniffs():
+    data = PNG_HEAD + b"x" * (3 * CHUNK_SIZE)
+
+    async with ingest_upload(_upload(data), max_bytes=len(data)) as upload:
+        assert upload.size == len(data)
+        assert upload.sha256 == hashlib.sha256(data).hexdigest()
+        assert upload.mime_type == "image/png"
+        assert upload.declared_mime_type == "application/octet-stream"
+        assert await upload.read() == data
+        spool = upload.file
+
+    assert spool.closed
+
+
+@pytest.mark.asyncio
+async def test_ingest_keeps_declared_type_when_content_is_unrecognised():
+    async with ingest_upload(_upload(b"PK\x03\x04docx", "application/msword"), max_bytes=100) as upload:
+        assert upload.mime_type == "application/msword"
+
+
+@pytest.mark.asyncio
+async def test_ingest_aborts_as_soon_as_the_limit_is_crossed():
+    file = _upload(b"x" * (10 * CHUNK_SIZE))
+
+    with pytest.raises(HTTPException) as exc:
+        async with ingest_upload(file, max_bytes=2 * CHUNK_SIZE):
+            pass
+
+    assert exc.value.status_code == 413
+    assert file.file.bytes_read <= 3 * CHUNK_SIZE
+
+
+@pytest.mark.asyncio
+async def test_ingest_rejects_known_oversized_parts_without_reading():
+    file = _upload(b"x" * 100, size=100)
+
+    with pytest.raises(HTTPException):
+        async with ingest_upload(file, max_bytes=10):
+            pass
+
+    assert file.file.bytes_read == 0
+
+
+def test_sniff_mime_type_signatures():
+    assert sniff_mime_type(b"\xff\xd8\xff\xe0") == "image/jpeg"
+    assert sniff_mime_type(b"RIFF\x00\x00\x00\x00WEBPVP8 ") == "image/webp"
+    assert sniff_mime_type(b"\x00\x00\x00\x18ftypmp42") == "video/mp4"
+    assert sniff_mime_type(b"\x00\x00\x00\x18ftypheic") == "image/heic"
+    assert sniff_mime_type(b"\x00\x00\x00\x18ftypzzzz") is None
+    assert sniff_mime_type(b"%PDF-1.7") == "application/pdf"
+    assert sniff_mime_type(b"PK\x03\x04") is None
@@ -6,6 +6,8 @@ import pytest
 
 from app.api.v1.endpoints.webhook import _extract_non_text_message
 
+DB = object()  # The webhook's session; media references are taken in it
+
 
 class TestExtractNonTextMessage:
     @pytest.mark.asyncio
@@ -22,14 +24,14 @@ class TestExtractNonTextMessage:
             "app.api.v1.endpoints.webhook.line_service.persist_line_media",
             new=AsyncMock(return_value=media_payload),
         ) as mock_persist:
-            message_type, content, payload = await _extract_non_text_message(message)
+            message_type, content, payload = await _extract_non_text_message(message, DB)
 
         assert message_type == "image"
         assert content == "[Image]"
         assert payload["line_message_id"] == "123"
         assert payload["url"] == media_payload["url"]
         assert payload["preview_url"] == media_payload["preview_url"]
-        mock_persist.assert_awaited_once_with(message_id="123", media_type="image")
+        mock_persist.assert_awaited_once_with(DB, message_id="123", media_type="image")
 
     @pytest.mark.asyncio
     async def test_image_message_without_id_returns_null_media_urls(self):
@@ -39,7 +41,7 @@ class TestExtractNonTextMessage:
             "app.api.v1.endpoints.webhook.line_service.persist_line_media",
             new=AsyncMock(),
         ) as mock_persist:
-            message_type, content, payload = await _extract_non_text_message(message)
+            message_type, content, payload = await _extract_non_text_message(message, DB)
 
         assert message_type == "image"
         assert content == "[Image]"
@@ -58,7 +60,7 @@ class TestExtractNonTextMessage:
             sticker_resource_type="ANIMATION",
         )
 
-        message_type, content, payload = await _extract_non_text_message(message)
+        message_type, content, payload = await _extract_non_text_message(message, DB)
 
         assert message_type == "sticker"
         assert content == "[Sticker 11537/52002734]"
@@ -82,7 +84,7 @@ class TestExtractNonTextMessage:
             "app.api.v1.endpoints.webhook.line_service.persist_line_media",
             new=AsyncMock(return_value=media_payload),
         ) as mock_persist:
-            message_type, content, payload = await _extract_non_text_message(message)
+            message_type, content, payload = await _extract_non_text_message(message, DB)
 
         assert message_type == "file"
         assert content == "invoice.pdf"
@@ -92,6 +94,7 @@ class TestExtractNonTextMessage:
         assert payload["url"] == media_payload["url"]
         assert payload["content_type"] == media_payload["content_type"]
         mock_persist.assert_awaited_once_with(
+            DB,
             message_id="file-123",
             media_type="file",
             file_name="invoice.pdf",
@@ -101,7 +104,7 @@ class TestExtractNonTextMessage:
     async def test_unsupported_message_returns_none(self):
         message = SimpleNamespace(type="location", id="loc-1")
 
-        message_type, content, payload = await _extract_non_text_message(message)
+        message_type, content, payload = await _extract_non_text_message(message, DB)
 
         assert message_type is None
         assert content == ""